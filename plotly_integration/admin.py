@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
      AktaColumnsCharacteristics, AktaMethodInformation,
-     AktaScoutingList, PDSamples, DnAssignment
+     AktaScoutingList, PDSamples, DnAssignment, HistorianTag
 )
 
 # admin.site.register(AktaResult)
@@ -9,4 +9,11 @@ admin.site.register(AktaColumnsCharacteristics)
 admin.site.register(AktaMethodInformation)
 admin.site.register(AktaScoutingList)
 admin.site.register(PDSamples)
-admin.site.register(DnAssignment)
\ No newline at end of file
+admin.site.register(DnAssignment)
+
+
+@admin.register(HistorianTag)
+class HistorianTagAdmin(admin.ModelAdmin):
+    list_display = ("name", "node_id", "enabled", "watermark", "last_status", "rows_ingested")
+    list_filter = ("enabled", "last_status")
+    readonly_fields = ("watermark", "last_run_at", "last_status", "last_error", "rows_ingested")
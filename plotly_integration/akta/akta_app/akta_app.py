@@ -1,18 +1,30 @@
 import plotly.graph_objects as go
 from django_plotly_dash import DjangoDash
 from dash import dcc, html, Input, Output, dash_table
+import dash
+import numpy as np
 import pandas as pd
 from django.db.models import F
 import logging
 
 # Replace with your actual models
-from plotly_integration.models import AktaResult, AktaChromatogram, AktaRunLog, AktaFraction
+from plotly_integration.models import (
+    AktaResult, AktaChromatogram, AktaRunLog, AktaRunEvent, AktaFraction, AktaSensorCatalog
+)
+from plotly_integration.akta.akta_app.akta_processing import (
+    decimate_min_max, fraction_mass_mg, fraction_ml_offset,
+)
+from plotly_integration.akta.akta_app.akta_fractions import get_fraction_integrals, get_peaks
+from plotly_integration.akta.akta_app.akta_run_events import get_load_volume, get_phase_bands
 
 logging.basicConfig(filename='akta_logs.log', level=logging.DEBUG,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
 app = DjangoDash("AktaChromatogramApp")
 
+PLOT_MAX_POINTS = 2000  # Points per trace sent to the browser; roughly the graph's pixel width
+UV_PATH_LENGTH_CM = 0.2  # UV flow cell path length used for mass estimates
+
 def fetch_result_ids():
     """Get all available result IDs from the AktaResult table."""
     return [r["result_id"] for r in AktaResult.objects.values("result_id")]
@@ -76,6 +88,12 @@ app.layout = html.Div([
 
             # Fraction Table (NEW)
             html.H4("Fraction Info", style={'color': '#0056b3', 'margin-top': '20px'}),
+            html.Div([
+                html.Label("Extinction coefficient (mL·mg⁻¹·cm⁻¹):",
+                           style={"font-weight": "bold", "margin-right": "10px"}),
+                dcc.Input(id="extinction-coefficient-input", type="number", value=1.0, min=0.01, step=0.01,
+                          debounce=True, style={"width": "100px"}),
+            ], style={"margin-bottom": "10px"}),
             dash_table.DataTable(
                 id="fraction-table",
                 columns=[],  # Populated by callback
@@ -93,6 +111,26 @@ app.layout = html.Div([
                     "textAlign": "center"
                 }
             ),
+
+            # Peak Table
+            html.H4("UV Peaks", style={'color': '#0056b3', 'margin-top': '20px'}),
+            dash_table.DataTable(
+                id="peak-table",
+                columns=[],  # Populated by callback
+                data=[],
+                style_table={"overflowX": "auto"},
+                style_cell={
+                    "textAlign": "left",
+                    "padding": "5px",
+                    "border": "1px solid #ddd",
+                },
+                style_header={
+                    "backgroundColor": "#0056b3",
+                    "fontWeight": "bold",
+                    "color": "white",
+                    "textAlign": "center"
+                }
+            ),
         ], style={
             "width": "70%",
             "border": "2px solid #0056b3",
@@ -149,13 +187,13 @@ def manage_sensor_choices(result_id, left_vals, right_vals):
     if not result_id:
         return [], [], [], []
 
-    qs = AktaChromatogram.objects.filter(result_id=result_id).values()
-    df = pd.DataFrame(qs)
-    if df.empty:
+    # Sensors with data come from the catalog written at import
+    catalog = AktaSensorCatalog.objects.filter(result_id=result_id).values_list("sensors", flat=True).first()
+    if not catalog:
         return [], [], [], []
 
     # Available sensors
-    all_sensors = [c for c in df.columns if c not in ["id", "result_id", "ml"]]
+    all_sensors = list(catalog)
 
     # Convert current picks to sets
     left_vals = set(left_vals or [])
@@ -218,53 +256,16 @@ import pandas as pd
 )
 def update_load_volume_table(result_id):
     """
-    1) Query AktaRunLog for the chosen result_id, ordered by ml.
-    2) Find first 'Block Direct sample injection' => injection_ml
-    3) Find first 'End_Block' after that => end_block_ml
-    4) load_volume = end_block_ml - injection_ml
-    5) Display in DataTable
+    Sample application window from the run-event index:
+    'Start frac (Sample Appl)' block start to the first End_Block after it.
     """
     if not result_id:
         return [], []
 
-    # Fetch relevant data
-    run_logs = (
-        AktaRunLog.objects
-        .filter(result_id=result_id)
-        .order_by("ml")  # ascending order
-        .values("ml", "log_text")
-    )
-
-    if not run_logs.exists():
-        return [], []
-
-    # Convert QuerySet to DataFrame
-    df = pd.DataFrame(list(run_logs))
-
-    if df.empty:
+    injection_ml, end_block_ml, load_volume = get_load_volume(result_id)
+    if injection_ml is None and not AktaRunEvent.objects.filter(result_id=result_id).exists():
         return [], []
 
-    injection_ml = None
-    end_block_ml = None
-    load_volume = 0.0
-    found_injection = False
-
-    # Iterate through DataFrame rows
-    for _, row in df.iterrows():
-        txt = (row["log_text"] or "").lower()
-        ml_val = row["ml"] or 0.0
-
-        # If we see "Block Start frac (Sample Appl) (Issued) (Processing) (Completed)"
-        if "block start frac (sample appl) (issued) (processing) (completed)" in txt:
-            found_injection = True
-            injection_ml = ml_val
-
-        # Once injection is found, find the first "end_block"
-        elif found_injection and "end_block" in txt:
-            end_block_ml = ml_val
-            load_volume = end_block_ml - (injection_ml or 0)
-            break
-
     # Store results in a DataFrame
     result_df = pd.DataFrame([{
         "Sample Application Start": injection_ml if injection_ml is not None else "",
@@ -280,60 +281,63 @@ def update_load_volume_table(result_id):
 
 
 
-# STEP 2c: Fraction Table
+# STEP 2c: Fraction & Peak Tables
 @app.callback(
     [Output("fraction-table", "columns"),
-     Output("fraction-table", "data")],
-    [Input("result-id-dropdown", "value")],
+     Output("fraction-table", "data"),
+     Output("peak-table", "columns"),
+     Output("peak-table", "data")],
+    [Input("result-id-dropdown", "value"),
+     Input("extinction-coefficient-input", "value")],
     prevent_initial_call=True
 )
-def update_fraction_table(result_id):
+def update_fraction_table(result_id, extinction_coefficient):
     """
-    1) Query AktaFraction for the chosen result_id, sorted by ml ascending (including waste).
-    2) Convert to DataFrame.
-    3) Reshape DataFrame to include fraction start and end.
-    4) Drop waste rows after setting up fractionation start and end.
-    5) Return table with fraction info.
+    Fraction windows, UV 280 areas and peak assignments are stored per run at import;
+    only the mass estimate depends on the extinction coefficient entered here.
     """
     if not result_id:
-        return [], []
-
-    # 1) Fetch ALL fraction rows for that result_id, sorted by ml ascending
-    fraction_qs = (AktaFraction.objects
-                   .filter(result_id=result_id)
-                   .order_by("ml"))
-
-    if not fraction_qs.exists():
-        return [], []
-
-    # 2) Convert to DataFrame
-    df = pd.DataFrame(list(fraction_qs.values("ml", "fraction")))
-    print(df)
-    df = df.drop_duplicates(subset=['ml']).reset_index(drop=True)
+        return [], [], [], []
 
-    # 3) Rename 'ml' to 'fraction_start' and add 'fraction_end'
-    df.rename(columns={"ml": "fraction_start"}, inplace=True)
-    df["fraction_end"] = df["fraction_start"].shift(-1)
+    fractions = get_fraction_integrals(result_id)
+    peaks = get_peaks(result_id)
 
-    # 4) Compute fraction volume
-    df["fraction_volume"] = df["fraction_end"] - df["fraction_start"]
+    if extinction_coefficient:
+        fractions["mass_mg"] = fraction_mass_mg(fractions["uv_area"], extinction_coefficient, UV_PATH_LENGTH_CM)
+        peaks["mass_mg"] = fraction_mass_mg(peaks["area"], extinction_coefficient, UV_PATH_LENGTH_CM)
+    fractions["peak_share"] = pd.to_numeric(fractions["peak_share"]) * 100
 
-    # 5) Drop waste rows
-    df = df[~df["fraction"].str.lower().str.contains("waste", na=False)].copy()
+    fraction_names = {
+        "fraction": "Fraction", "start_ml": "Fraction Start", "end_ml": "Fraction End",
+        "volume": "Fraction Volume", "uv_area": "UV Area (mAU·mL)", "peak_number": "Peak",
+        "peak_share": "% of Peak", "mass_mg": "Mass (mg)",
+    }
+    peak_names = {
+        "peak_number": "Peak", "start_ml": "Start (ml)", "apex_ml": "Apex (ml)", "end_ml": "End (ml)",
+        "height": "Height (mAU)", "area": "Area (mAU·mL)", "mass_mg": "Mass (mg)",
+    }
 
-    if df.empty:
-        return [], []
+    def table(df, names):
+        df = df.round(3)
+        columns = [{"name": names[col], "id": col} for col in df.columns]
+        return columns, df.astype(object).where(df.notna(), None).to_dict("records")
 
-    # Reorder columns for clarity
-    df = df[["fraction", "fraction_start", "fraction_end", "fraction_volume"]]
-
-    # Build columns/data for dash table
-    columns = [{"name": col.replace("_", " ").title(), "id": col} for col in df.columns]
-    data = df.to_dict("records")
-
-    return columns, data
+    return (*table(fractions, fraction_names), *table(peaks, peak_names))
 
 
+def visible_ml_window(relayout_data):
+    """
+    Reads the zoomed ml range from the graph's relayoutData.
+    :return: (ml_start, ml_end), or None when the graph shows the full run.
+    """
+    if not relayout_data or relayout_data.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        return float(relayout_data["xaxis.range[0]"]), float(relayout_data["xaxis.range[1]"])
+    if "xaxis.range" in relayout_data:
+        start, end = relayout_data["xaxis.range"]
+        return float(start), float(end)
+    return None
 
 
 # STEP 3: Plot - same domain, different y-axes, but offset so axes don't overlap
@@ -342,23 +346,41 @@ def update_fraction_table(result_id):
     [
         Input("result-id-dropdown", "value"),
         Input("left-sensor-dropdown", "value"),
-        Input("right-sensor-dropdown", "value")
+        Input("right-sensor-dropdown", "value"),
+        Input("chromatogram-graph", "relayoutData")
     ],
     prevent_initial_call=True
 )
-def update_chromatogram_plot(result_id, left_sensors, right_sensors):
+def update_chromatogram_plot(result_id, left_sensors, right_sensors, relayout_data):
     fig = go.Figure()
     if not result_id:
         return fig
 
-    qs = AktaChromatogram.objects.filter(result_id=result_id).values()
-    df = pd.DataFrame(qs)
-    # Sort by ml to avoid wrap-around lines
-    df = df.sort_values(by='ml', ascending=True)
+    catalog = AktaSensorCatalog.objects.filter(result_id=result_id).first()
+    if not catalog:
+        return fig
+
+    left_sensors = [s for s in left_sensors or [] if s in catalog.sensors]
+    right_sensors = [s for s in right_sensors or [] if s not in left_sensors and s in catalog.sensors]
+    sensors = left_sensors + right_sensors
 
-    if df.empty:
+    # A new run resets the zoom; otherwise only the visible ml window is fetched
+    triggered = [t["prop_id"] for t in dash.callback_context.triggered]
+    window = None if "result-id-dropdown.value" in triggered else visible_ml_window(relayout_data)
+
+    qs = AktaChromatogram.objects.filter(result_id=result_id)
+    if window:
+        qs = qs.filter(ml__gte=window[0], ml__lte=window[1])
+    rows = list(qs.order_by("ml").values_list("ml", *sensors))  # Sort by ml to avoid wrap-around lines
+
+    if not rows:
         return fig
 
+    values = np.array(rows, dtype=np.float64)
+    ml, sensor_values = decimate_min_max(values[:, 0], values[:, 1:], PLOT_MAX_POINTS)
+    df = pd.DataFrame(sensor_values, columns=sensors)
+    df.insert(0, "ml", ml)
+
     left_sensors = left_sensors or []
     right_sensors = right_sensors or []
 
@@ -380,7 +402,7 @@ def update_chromatogram_plot(result_id, left_sensors, right_sensors):
         yaxis_id   = f"y{axis_id}"
 
         y_data = df[sensor]
-        y_min, y_max = y_data.min(), y_data.max()
+        y_min, y_max = catalog.sensors[sensor]["min"], catalog.sensors[sensor]["max"]  # Whole-run range
         if y_min == y_max:
             y_min -= 1
             y_max += 1
@@ -433,7 +455,7 @@ def update_chromatogram_plot(result_id, left_sensors, right_sensors):
         yaxis_id   = f"y{axis_id}"
 
         y_data = df[sensor]
-        y_min, y_max = y_data.min(), y_data.max()
+        y_min, y_max = catalog.sensors[sensor]["min"], catalog.sensors[sensor]["max"]  # Whole-run range
         if y_min == y_max:
             y_min -= 1
             y_max += 1
@@ -476,9 +498,21 @@ def update_chromatogram_plot(result_id, left_sensors, right_sensors):
 
         axis_counter += 1
 
+    # Phase bands from the run-event index, moved from run-log ml onto the injection-zeroed chromatogram axis
+    offset = fraction_ml_offset([catalog.ml_min]) if catalog.ml_min is not None else 0.0
+    for k, band in enumerate(get_phase_bands(result_id)):
+        if band["end_ml"] is None or band["end_ml"] <= band["start_ml"]:
+            continue
+        fig.add_vrect(
+            x0=band["start_ml"] - offset, x1=band["end_ml"] - offset,
+            fillcolor="#0056b3" if k % 2 else "#7f7f7f", opacity=0.06, layer="below", line_width=0,
+            annotation_text=band["phase"], annotation_position="top left", annotation_font_size=10
+        )
+
     fig.update_layout(
         title=f"Akta Chromatogram: {result_id}",
-        xaxis=dict(title="ml"),
-        template="plotly_white"
+        xaxis=dict(title="ml", range=list(window) if window else None),
+        template="plotly_white",
+        uirevision=result_id  # Keep the user's zoom while sensors change
     )
     return fig
@@ -1,29 +1,38 @@
+import logging
 import os
-import re
-import sqlite3
-from django.db import transaction
-import numpy as np
-import pandas as pd
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.db import connection, transaction
 import shutil
-import pytz
 from tqdm import tqdm
 from django.conf import settings
 from dash import dcc, html, Input, Output
 from django_plotly_dash import DjangoDash
 from plotly_integration.models import (
-    AktaChromatogram, AktaFraction, AktaRunLog, AktaResult
+    AktaChromatogram, AktaFraction, AktaRunLog, AktaRunEvent, AktaResult, AktaSensorCatalog,
+    AktaFractionIntegral, AktaPeak
 )
-from datetime import datetime, timezone, timedelta
-import re
+from plotly_integration.akta.akta_app.akta_processing import (
+    read_akta_asc, resample_curves, extract_text_curve, parse_akta_file, sensor_ranges,
+    RUN_EVENT_COLUMNS
+)
+from plotly_integration.akta.akta_app.akta_fractions import FRACTION_INTEGRAL_COLUMNS, PEAK_COLUMNS
+from plotly_integration.utils import bulk_insert_frame
 
-# Get database path from Django settings
-DB_PATH = settings.DATABASES['default']['NAME']
+logger = logging.getLogger(__name__)
 
 # Define file paths
 BASE_DIR = os.path.join(settings.BASE_DIR, "plotly_integration", "data")
 INPUT_DIR = r"S:\Shared\Chris Dallarosa\AKTA Database Imports\Chromatogram"  # Where .asc files are stored
 PROCESSED_DIR = r"S:\Shared\Chris Dallarosa\AKTA Database Imported\Chromatogram"  # Where processed files go
 
+# Downsampling settings
+DOWNSAMPLE_INTERVAL_ML = 0.1  # Grid spacing in mL
+PRESERVE_PEAKS = False  # Keep per-interval min/max so sharp UV peaks are not flattened
+
+# Import settings
+IMPORT_WORKERS = min(4, os.cpu_count() or 1)  # Parser processes
+
 # Ensure processed folder exists
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 
@@ -43,383 +52,205 @@ app.layout = html.Div(
 
 def read_and_process_csv(file_path):
     """
-    Reads and renames the chromatography CSV file for standardization.
-    Ensures numeric columns are correctly converted.
+    Reads the chromatography .asc file into typed, standardized columns.
     :param file_path: Path to the .asc file.
-    :return: Processed DataFrame with renamed columns.
+    :return: DataFrame with ml_* / sensor columns as float32, ready for interpolation.
     """
-    print(f"\n🔍 Reading file: {file_path}")
-
-    # Read the .asc file (Auto-detect delimiter)
-    df = pd.read_csv(file_path, sep=None, engine="python", skiprows=2, dtype=str, encoding="utf-8", on_bad_lines="skip")
-
-    print("\n✅ Successfully loaded file!")
-
-    # Define column renaming dictionary
-    rename_dict = {
-        "ml": "ml_1", "mAU": "UV 1_280", "ml.1": "ml_2", "mAU.1": "UV 2_0",
-        "ml.2": "ml_3", "mAU.2": "UV 3_0", "ml.3": "ml_4", "mS/cm": "Cond",
-        "ml.4": "ml_5", "%": "Conc B", "ml.5": "ml_6", "Unnamed: 11": "pH",
-        "ml.6": "ml_7", "ml/min": "System flow", "ml.7": "ml_8", "cm/h": "System linear flow",
-        "ml.8": "ml_9", "MPa": "System pressure", "ml.9": "ml_10", "Fraction": "Fraction",
-        "ml.10": "ml_11", "Injection": "Injection", "ml.11": "ml_12", "°C": "Cond temp",
-        "ml.12": "ml_13", "ml/min.1": "Sample flow", "ml.13": "ml_14", "cm/h.1": "Sample linear flow",
-        "ml.14": "ml_15", "Logbook": "Run Log", "ml.15": "ml_16", "MPa.1": "Sample pressure",
-        "ml.16": "ml_17", "MPa.2": "PreC pressure", "ml.17": "ml_18", "MPa.3": "DeltaC pressure",
-        "ml.18": "ml_19", "MPa.4": "PostC pressure", "ml.19": "ml_20", "°C.1": "Frac temp",
-        "Unnamed: 40": "Unused"
-    }
-
-    # Rename columns
-    df.rename(columns=rename_dict, inplace=True)
-
-    # Convert ml_* columns to numeric (floats)
-    ml_cols = [col for col in df.columns if col.startswith("ml_")]
-    for col in ml_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")  # Convert to float, set errors to NaN
-
-    print("\n✅ Converted ml columns to numeric.")
-
-    print("\n✅ Renamed DataFrame Columns:\n", df.columns)
+    df = read_akta_asc(file_path)
+    logger.debug("Read %s: %d rows, columns %s", file_path, len(df), list(df.columns))
     return df
 
 
-def downsample_data(df, interval=0.1):
+def downsample_data(df, interval=0.1, preserve_peaks=False):
     """
-    Individually downsample each sensor column to a uniform ml interval.
-    Keeps Fraction and Run Log separate.
-    :param df: Input DataFrame containing ml and sensor columns.
+    Resample every sensor onto one uniform ml grid, each against its own ml axis.
+    Keeps Fraction and Run Log separate on their original ml axes.
+    :param df: DataFrame from read_and_process_csv.
     :param interval: Desired downsampling interval in mL.
+    :param preserve_peaks: Keep per-interval min/max extremes so UV peaks are not flattened.
     :return: Downsampled DataFrame, original Fraction & Run Log DataFrames.
     """
-    # Identify ml & sensor columns
-    ml_cols = [col for col in df.columns if col.startswith("ml_")]
-    sensor_cols = [col for col in df.columns if col not in ml_cols]
-
-    # Exclude `Fraction` (ml_10) and `Run Log` (ml_15) from interpolation
-    interpolate_sensors = [col for col in sensor_cols if col not in ["Fraction", "Run Log"]]
-
-    print("\n🔹 Interpolating Sensors:", interpolate_sensors)
-
-    # -------------------------------
-    # 1) Ensure all ml_* and sensor columns are numeric
-    # -------------------------------
-    for col in ml_cols + interpolate_sensors:
-        df[col] = pd.to_numeric(df[col], errors="coerce")  # Convert to float, set errors to NaN
-
-    # Initialize downsampled DataFrame
-    df_downsampled = pd.DataFrame({"ml": np.arange(df["ml_1"].min(), df["ml_1"].max(), interval)})
-
-    # -------------------------------
-    # 2) Downsample Each Sensor Individually
-    # -------------------------------
-    for i in range(1, 21):  # Loop over ml_1 to ml_20
-        ml_col = f"ml_{i}"
-        sensor_col = sensor_cols[i - 1] if i - 1 < len(sensor_cols) else None
-
-        if sensor_col and sensor_col in interpolate_sensors:
-            print(f"🔹 Downsampling: {sensor_col} using {ml_col}")
-
-            # Drop NaNs and sort for interpolation
-            sensor_data = df[[ml_col, sensor_col]].dropna().sort_values(by=ml_col)
-
-            if sensor_data.empty:
-                print(f"⚠️ Skipping {sensor_col}, no valid data for interpolation.")
-                continue  # Skip if there is no data for interpolation
-
-            # Ensure both columns are numeric again before interpolation
-            sensor_data[ml_col] = pd.to_numeric(sensor_data[ml_col], errors="coerce")
-            sensor_data[sensor_col] = pd.to_numeric(sensor_data[sensor_col], errors="coerce")
-
-            # Interpolate sensor values to match downsampled ml axis
-            df_downsampled[sensor_col] = np.interp(
-                df_downsampled["ml"], sensor_data[ml_col], sensor_data[sensor_col]
-            )
-
-    # -------------------------------
-    # 3) Store Fraction Data with Original X-Axis (ml_10)
-    # -------------------------------
-    if {"ml_10", "Fraction"}.issubset(df.columns):
-        df_fraction = df[["ml_10", "Fraction"]].drop_duplicates().dropna().reset_index(drop=True)
-        df_fraction.rename(columns={"ml_10": "ml"}, inplace=True)
-    else:
-        print(f"⚠️ Warning: 'Fraction' or 'ml_10' column is missing. Skipping fraction processing.")
-        df_fraction = pd.DataFrame(columns=["ml", "Fraction"])  # ✅ Empty DataFrame with expected columns
-
-    # -------------------------------
-    # 4) Store Run Log Data with Original X-Axis (ml_15)
-    # -------------------------------
-    df_run_log = df[["ml_15", "Run Log"]].drop_duplicates().dropna().reset_index(drop=True)
-    df_run_log.rename(columns={"ml_15": "ml"}, inplace=True)
-
-    # -------------------------------
-    # 5) Save Data
-    # -------------------------------
-    print("\n✅ Downsampled Sensor Data:\n", df_downsampled.head())
-    print("\n✅ Fraction Data:\n", df_fraction.head())
-    print("\n✅ Run Log Data:\n", df_run_log.head())
-
-    # df_downsampled.to_csv("downsampled_chromatogram.csv", index=False)
-    # df_fraction.to_csv("fraction_chromatogram.csv", index=False)
-    # df_run_log.to_csv("run_log_chromatogram.csv", index=False)
-
-    print("\n✅ Exported 'downsampled_chromatogram.csv', 'fraction_chromatogram.csv', and 'run_log_chromatogram.csv'")
-
-    return df_downsampled, df_fraction, df_run_log
-
-def convert_runlog_timestamp(timestamp_str):
-    """
-    Converts a timestamp from 'M/D/YYYY h:mm:ss AM/PM ±HH:MM' to MySQL-compatible format 'YYYY-MM-DD HH:MM:SS'
-    """
-
-    # Regex pattern to extract date, time, AM/PM, and timezone
-    pattern = re.compile(r"(\d{1,2}/\d{1,2}/\d{4}) (\d{1,2}:\d{2}:\d{2} [APM]{2}) ([+-]\d{2}:\d{2})")
-    match = pattern.match(timestamp_str)
-
-    if not match:
-        print(f"⚠️ Invalid timestamp format: {timestamp_str}")
-        return None  # Return None if parsing fails
-
-    date_part, time_part, tz_offset = match.groups()
-
-    # Convert date + time to a datetime object
-    dt = datetime.strptime(f"{date_part} {time_part}", "%m/%d/%Y %I:%M:%S %p")
-
-    # Convert timezone offset to timedelta
-    offset_hours, offset_minutes = map(int, tz_offset.split(":"))
-    tz_delta = timedelta(hours=offset_hours, minutes=offset_minutes)
-
-    # Apply timezone offset
-    dt = dt.replace(tzinfo=timezone(tz_delta))
-
-    # Convert to MySQL format (removes timezone)
-    formatted_timestamp = dt.strftime('%Y-%m-%d %H:%M:%S')
-    return formatted_timestamp
-
-def extract_run_log_details(df_run_log):
-    """
-    Extracts Batch ID, Method Run timestamp, result path, user, and column ID from the Run Log column.
-    :param df_run_log: DataFrame containing ml (X-axis) and Run Log data.
-    :return: Extracted values as individual variables.
-    """
+    df_downsampled = resample_curves(df, interval=interval, preserve_peaks=preserve_peaks)
+    logger.debug("Interpolated sensors: %s", list(df_downsampled.columns[1:]))
 
-    # Initialize variables
-    timestamp, batch_id, method, result_path, user, column_id = None, None, None, None, None, None
+    df_fraction = extract_text_curve(df, "Fraction")
+    if df_fraction.empty:
+        logger.warning("'Fraction' curve is missing or empty, skipping fraction processing")
 
-    # Define regex patterns
-    timestamp_pattern = re.compile(r"(\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}:\d{2} [APM]{2} [-+\d:]+)")
-    batch_id_pattern = re.compile(r"Batch ID:\s*([\w-]+)")
-    method_pattern = re.compile(r"Method:\s*([\w\d_]+)")
-    result_pattern = re.compile(r"Result:\s*(.*?)(?=\sUser|\Z)")
-    user_pattern = re.compile(r"User\s([\w]+)")
-    column_id_pattern = re.compile(r'Base CV, (.+)')
-
-    for log in df_run_log["Run Log"].dropna():
-        # Extract values
-        if timestamp is None:
-            timestamp_match = timestamp_pattern.search(log)
-            timestamp = timestamp_match.group(1) if timestamp_match else None
-
-        if batch_id is None:
-            batch_id_match = batch_id_pattern.search(log)
-            batch_id = batch_id_match.group(1) if batch_id_match else None
-
-        if method is None:
-            method_match = method_pattern.search(log)
-            method = method_match.group(1) if method_match else None
-
-        if result_path is None:
-            result_match = result_pattern.search(log)
-            result_path = result_match.group(1) if result_match else None
-
-        if user is None:
-            user_match = user_pattern.search(log)
-            user = user_match.group(1) if user_match else None
-
-        if column_id is None:
-            column_id_match = column_id_pattern.search(log)
-            column_id = column_id_match.group(1) if column_id_match else None
-
-    converted_timestamp = convert_runlog_timestamp(timestamp)
-
-    return converted_timestamp, batch_id, method, result_path, user, column_id
-
-
-# Define function to insert Batch ID
-def insert_batch_id(df_downsampled, df_fraction, df_run_log, batch_id):
-    """
-    Inserts the given Batch ID into the downsampled sensor data, fraction data, and run log DataFrames.
-
-    :param df_downsampled: DataFrame containing downsampled sensor data.
-    :param df_fraction: DataFrame containing fraction data.
-    :param df_run_log: DataFrame containing run log data.
-    :param batch_id: The Batch ID to be inserted.
-    :return: Updated DataFrames with Batch ID.
-    """
-    # Add the Batch ID column to each DataFrame
-
-    df_downsampled.insert(0, "result_id", batch_id)
-    df_fraction.insert(0, "result_id", batch_id)
-    df_run_log.insert(0, "result_id", batch_id)
+    df_run_log = extract_text_curve(df, "Run Log")
 
     return df_downsampled, df_fraction, df_run_log
 
-
-def process_akta_file_orm(file_path):
+# Chromatogram curve → AktaChromatogram field
+CHROMATOGRAM_FIELDS = {
+    "ml": "ml",
+    "UV 1_280": "uv_1_280",
+    "UV 2_0": "uv_2_0",
+    "UV 3_0": "uv_3_0",
+    "Cond": "cond",
+    "Conc B": "conc_b",
+    "pH": "pH",
+    "System flow": "system_flow",
+    "System linear flow": "system_linear_flow",
+    "System pressure": "system_pressure",
+    "Cond temp": "cond_temp",
+    "Sample flow": "sample_flow",
+    "Sample linear flow": "sample_linear_flow",
+    "Sample pressure": "sample_pressure",
+    "PreC pressure": "preC_pressure",
+    "DeltaC pressure": "deltaC_pressure",
+    "PostC pressure": "postC_pressure",
+    "Frac temp": "frac_temp",
+}
+
+
+def delete_akta_results(result_ids):
+    """ Removes every row belonging to the given result IDs so they can be re-imported. """
+    for model in (AktaChromatogram, AktaFraction, AktaFractionIntegral, AktaPeak, AktaRunLog, AktaRunEvent,
+                  AktaSensorCatalog, AktaResult):
+        model.objects.filter(result_id__in=result_ids).delete()
+
+
+def insert_akta_run(parsed):
     """
-    Loads Akta .asc file into DataFrames and inserts data into MySQL using Django ORM.
+    Inserts one parsed run (see akta_processing.parse_akta_file) in a single transaction.
+    :return: Row counts per table.
     """
-    try:
-        # Load and process file
-        df = read_and_process_csv(file_path)
-        df_downsampled, df_fraction, df_run_log = downsample_data(df, interval=0.1)
-        timestamp, batch_id, method, result_path, user, column_id = extract_run_log_details(df_run_log)
-
-        # Insert Batch ID into the DataFrames
-        df_downsampled, df_fraction, df_run_log = insert_batch_id(df_downsampled, df_fraction, df_run_log, batch_id)
-
-        # ✅ Use Django ORM to insert data in bulk
-        with transaction.atomic():  # Ensures data integrity
-            # 1️⃣ Insert into AktaChromatogram
-            chromatogram_objects = [
-                AktaChromatogram(
-                    result_id=batch_id,
-                    ml=row["ml"],
-                    uv_1_280=row["UV 1_280"],
-                    uv_2_0=row["UV 2_0"],
-                    uv_3_0=row["UV 3_0"],
-                    cond=row["Cond"],
-                    conc_b=row["Conc B"],
-                    pH=row["pH"],
-                    system_flow=row["System flow"],
-                    system_linear_flow=row["System linear flow"],
-                    system_pressure=row["System pressure"],
-                    cond_temp=row["Cond temp"],
-                    sample_flow=row["Sample flow"],
-                    sample_linear_flow=row["Sample linear flow"],
-                    sample_pressure=row["Sample pressure"],
-                    preC_pressure=row["PreC pressure"],
-                    deltaC_pressure=row["DeltaC pressure"],
-                    postC_pressure=row["PostC pressure"],
-                    frac_temp=row["Frac temp"],
-                )
-                for _, row in df_downsampled.iterrows()
-            ]
-            AktaChromatogram.objects.bulk_create(chromatogram_objects)
-
-            # 2️⃣ Insert into AktaFraction
-            fraction_objects = [
-                AktaFraction(
-                    result_id=row["result_id"],
-                    ml=row["ml"],
-                    fraction=row["Fraction"]
-                )
-                for _, row in df_fraction.iterrows()
-            ]
-            AktaFraction.objects.bulk_create(fraction_objects)
-
-            # 3️⃣ Insert into AktaRunLog
-            run_log_objects = [
-                AktaRunLog(
-                    result_id=row["result_id"],
-                    ml=row["ml"],
-                    log_text=row["Run Log"]
-                )
-                for _, row in df_run_log.iterrows()
-            ]
-            AktaRunLog.objects.bulk_create(run_log_objects)
-
-            # 4️⃣ Insert into AktaResult
-            AktaResult.objects.create(
-                result_id=batch_id,
-                column_name=column_id.split(", ")[1] if column_id else None,
-                column_volume=column_id.split(", ")[0].split("=")[1].split(" ")[0] if column_id else None,
-                method=method,
-                result_path=result_path,
-                date=timestamp,
-                user=user,
-                system="system_name_here",  # Adjust based on your logic
-            )
-
-        return f"✅ Inserted {len(chromatogram_objects)} chromatogram rows, {len(fraction_objects)} fraction rows, and {len(run_log_objects)} run log rows from {file_path}"
-
-    except Exception as e:
-        return f"❌ Error processing {file_path}: {str(e)}"
-
-
-def process_akta_file_raw_sql(file_path):
+    result_id = parsed["result_id"]
+    column_id = parsed["column_id"]
+
+    df_chromatogram = parsed["chromatogram"]
+    curves = [curve for curve in CHROMATOGRAM_FIELDS if curve in df_chromatogram.columns]
+    df_chromatogram = df_chromatogram[curves].rename(columns=CHROMATOGRAM_FIELDS)
+    fields = list(df_chromatogram.columns)
+    df_chromatogram.insert(0, "result_id", result_id)
+
+    df_fraction = parsed["fractions"][["ml", "Fraction"]].copy()
+    df_fraction.insert(0, "result_id", result_id)
+
+    df_run_log = parsed["run_log"][["ml", "Run Log"]].copy()
+    df_run_log.insert(0, "result_id", result_id)
+
+    df_events = parsed["events"][RUN_EVENT_COLUMNS].copy()
+    df_events.insert(0, "result_id", result_id)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        counts = {
+            "chromatogram": bulk_insert_frame(cursor, AktaChromatogram, df_chromatogram, ["result_id"] + fields),
+            "fraction": bulk_insert_frame(cursor, AktaFraction, df_fraction, ["result_id", "ml", "fraction"]),
+            "run_log": bulk_insert_frame(cursor, AktaRunLog, df_run_log, ["result_id", "ml", "log_text"]),
+            "run_event": bulk_insert_frame(cursor, AktaRunEvent, df_events, ["result_id"] + RUN_EVENT_COLUMNS),
+        }
+
+        # ✅ Fraction integrals & peaks (absent when the run has no UV 1_280 curve)
+        if parsed["peaks"] is not None:
+            for model, df, columns in (
+                    (AktaPeak, parsed["peaks"], PEAK_COLUMNS),
+                    (AktaFractionIntegral, parsed["fraction_integrals"], FRACTION_INTEGRAL_COLUMNS),
+            ):
+                df = df[columns].copy()
+                df.insert(0, "result_id", result_id)
+                bulk_insert_frame(cursor, model, df, ["result_id"] + columns)
+
+        AktaResult.objects.create(
+            result_id=result_id,
+            column_name=column_id.split(", ")[1] if column_id else None,
+            column_volume=column_id.split(", ")[0].split("=")[1].split(" ")[0] if column_id else None,
+            method=parsed["method"],
+            result_path=parsed["result_path"],
+            date=parsed["timestamp"],
+            user=parsed["user"],
+            system="system_name_here",  # Adjust based on your logic
+        )
+
+        # ✅ Sensor catalog: lets the chromatogram app list sensors without scanning the run
+        AktaSensorCatalog.objects.create(
+            result_id=result_id,
+            ml_min=float(df_chromatogram["ml"].min()) if counts["chromatogram"] else None,
+            ml_max=float(df_chromatogram["ml"].max()) if counts["chromatogram"] else None,
+            row_count=counts["chromatogram"],
+            sensors=sensor_ranges(df_chromatogram, [field for field in fields if field != "ml"]),
+        )
+
+    return counts
+
+
+def import_parsed_run(parsed, existing_result_ids, on_existing="skip"):
     """
-    Loads Akta .asc file into DataFrames and inserts data into MySQL using raw SQL.
+    Applies the skip/replace policy for an already-imported result ID, then inserts the run.
+    :param existing_result_ids: Set of result IDs already in the database; updated in place.
+    :param on_existing: "skip" to leave existing runs untouched, "replace" to re-import them.
+    :return: (status message, True if the file is done and can be moved)
     """
-    try:
-        # Load and process file
-        df = read_and_process_csv(file_path)
-        df_downsampled, df_fraction, df_run_log = downsample_data(df, interval=0.1)
-        timestamp, batch_id, method, result_path, user, column_id = extract_run_log_details(df_run_log)
-        df_downsampled, df_fraction, df_run_log = insert_batch_id(df_downsampled, df_fraction, df_run_log, batch_id)
-
-        # ✅ Connect to MySQL database
-        from django.db import connection
-        with connection.cursor() as cursor:
-            # 1️⃣ Insert into akta_chromatogram
-            chromatogram_sql = """
-            INSERT INTO akta_chromatogram (
-                result_id, ml, uv_1_280, uv_2_0, uv_3_0, cond, conc_b, pH, system_flow,
-                system_linear_flow, system_pressure, cond_temp, sample_flow, sample_linear_flow,
-                sample_pressure, preC_pressure, deltaC_pressure, postC_pressure, frac_temp
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.executemany(chromatogram_sql, df_downsampled.values.tolist())
-
-            # 2️⃣ Insert into akta_fraction
-            fraction_sql = "INSERT INTO akta_fraction (result_id, ml, fraction) VALUES (%s, %s, %s)"
-            cursor.executemany(fraction_sql, df_fraction.values.tolist())
-
-            # 3️⃣ Insert into akta_run_log
-            run_log_sql = "INSERT INTO akta_run_log (result_id, ml, log_text) VALUES (%s, %s, %s)"
-            cursor.executemany(run_log_sql, df_run_log.values.tolist())
-
-            # 4️⃣ Insert into akta_result
-            result_sql = """
-            INSERT INTO akta_result (result_id, column_name, column_volume, method, result_path, date, user, system)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(result_sql,
-                           (batch_id, column_id, None, method, result_path, timestamp, user, "system_name_here"))
-
-        return f"✅ Inserted data using raw SQL from {file_path}"
-
-    except Exception as e:
-        return f"❌ Error processing {file_path}: {str(e)}"
-
-
-def process_all_files(use_orm=False):
+    file_name = os.path.basename(parsed["file_path"])
+    result_id = parsed["result_id"]
+
+    if not result_id:
+        return f"❌ {file_name}: no Batch ID found in the run log.", False
+
+    replace = result_id in existing_result_ids
+    if replace and on_existing != "replace":
+        return f"⏭️ Skipped {file_name}: result {result_id} is already imported.", True
+
+    start = time.perf_counter()
+    # The old run is only removed together with a successful insert of the new one
+    with transaction.atomic():
+        if replace:
+            delete_akta_results([result_id])
+        counts = insert_akta_run(parsed)
+    insert_seconds = time.perf_counter() - start
+    existing_result_ids.add(result_id)
+
+    total_rows = sum(counts.values())
+    total_seconds = parsed["parse_seconds"] + insert_seconds
+    return (
+        f"✅ {file_name}: {counts['chromatogram']} chromatogram, {counts['fraction']} fraction and "
+        f"{counts['run_log']} run log rows ({counts['run_event']} events) in {total_seconds:.2f}s "
+        f"(parse {parsed['parse_seconds']:.2f}s, insert {insert_seconds:.2f}s, "
+        f"{total_rows / total_seconds:,.0f} rows/s)"
+    ), True
+
+
+def process_all_files(on_existing="skip", max_workers=IMPORT_WORKERS):
     """
-    Processes all Akta .asc files and moves them to the processed folder.
+    Parses all Akta .asc files in a process pool, inserts them as they finish and
+    moves imported (or skipped) files to the processed folder.
+    :param on_existing: "skip" or "replace" for result IDs that are already imported.
+    :param max_workers: Parser processes; 1 parses serially in this process.
     """
     os.makedirs(PROCESSED_DIR, exist_ok=True)
 
-    files = [f for f in os.listdir(INPUT_DIR) if f.endswith(".asc")]
-    if not files:
+    file_paths = [os.path.join(INPUT_DIR, f) for f in os.listdir(INPUT_DIR) if f.endswith(".asc")]
+    if not file_paths:
         return "No Akta files found."
 
-    results = []
-    for file_name in tqdm(files, desc="Processing Files", unit="file"):
-        file_path = os.path.join(INPUT_DIR, file_name)
-        if not os.path.exists(file_path):
-            results.append(f"Skipping {file_name}: File not found.")
-            continue
+    # ✅ Look up already-imported runs once, before any transaction starts
+    existing_result_ids = set(AktaResult.objects.values_list("result_id", flat=True))
 
-        if use_orm:
-            result = process_akta_file_orm(file_path)
-        else:
-            result = process_akta_file_raw_sql(file_path)
+    def parsed_runs():
+        if max_workers <= 1 or len(file_paths) == 1:
+            for file_path in file_paths:
+                yield file_path, lambda fp=file_path: parse_akta_file(fp, DOWNSAMPLE_INTERVAL_ML, PRESERVE_PEAKS)
+            return
 
-        results.append(result)
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(file_paths))) as executor:
+            futures = {
+                executor.submit(parse_akta_file, file_path, DOWNSAMPLE_INTERVAL_ML, PRESERVE_PEAKS): file_path
+                for file_path in file_paths
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result
+
+    results = []
+    for file_path, get_parsed in tqdm(parsed_runs(), total=len(file_paths), desc="Processing Files", unit="file"):
+        try:
+            message, done = import_parsed_run(get_parsed(), existing_result_ids, on_existing)
+        except Exception as e:
+            message, done = f"❌ Error processing {file_path}: {str(e)}", False
 
-        processed_path = os.path.join(PROCESSED_DIR, file_name)
-        if os.path.exists(file_path):
-            shutil.move(file_path, processed_path)
+        results.append(message)
+        if done and os.path.exists(file_path):
+            shutil.move(file_path, os.path.join(PROCESSED_DIR, os.path.basename(file_path)))
 
     return "\n".join(results)
 
@@ -432,4 +263,4 @@ def process_all_files(use_orm=False):
 )
 def trigger_import(n_clicks):
     """ Callback to trigger import when button is pressed """
-    return process_all_files(use_orm=True)  # ✅ Change to False for raw SQL
+    return process_all_files(on_existing="skip")  # ✅ Change to "replace" to re-import existing runs
@@ -0,0 +1,25 @@
+"""
+Fraction integrals and UV peaks per run.
+Both are computed at import; runs imported before these tables existed are backfilled by migration 0043.
+"""
+import pandas as pd
+
+from plotly_integration.models import AktaFractionIntegral, AktaPeak
+
+FRACTION_INTEGRAL_COLUMNS = ["fraction", "start_ml", "end_ml", "volume", "uv_area", "peak_number", "peak_share"]
+PEAK_COLUMNS = ["peak_number", "start_ml", "apex_ml", "end_ml", "height", "area"]
+
+
+def get_fraction_integrals(result_id):
+    """ Fraction integrals for a run, in collection order. """
+    return pd.DataFrame(
+        AktaFractionIntegral.objects.filter(result_id=result_id).values_list(*FRACTION_INTEGRAL_COLUMNS),
+        columns=FRACTION_INTEGRAL_COLUMNS,
+    )
+
+
+def get_peaks(result_id):
+    """ UV peaks for a run, in elution order. """
+    return pd.DataFrame(
+        AktaPeak.objects.filter(result_id=result_id).values_list(*PEAK_COLUMNS), columns=PEAK_COLUMNS
+    )
@@ -0,0 +1,261 @@
+from functools import lru_cache
+
+import numpy as np
+import plotly.graph_objects as go
+from dash import dcc, html, Input, Output, State
+from django_plotly_dash import DjangoDash
+
+from plotly_integration.models import (
+    AktaResult, AktaChromatogram, AktaRunEvent, AktaSensorCatalog, AktaScoutingList
+)
+from plotly_integration.akta.akta_app.akta_processing import decimate_min_max, fraction_ml_offset
+
+app = DjangoDash("AktaOverlayApp")
+
+OVERLAY_POINTS_PER_RUN = 1500  # Decimated points kept per run and sensor
+INJECTION = "__injection__"  # ml 0 of the chromatogram axis, the injection mark
+
+default_colors = [
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728",
+    "#9467bd", "#8c564b", "#e377c2", "#7f7f7f",
+    "#bcbd22", "#17becf"
+]
+
+panel_style = {
+    "border": "2px solid #0056b3",
+    "border-radius": "5px",
+    "padding": "10px",
+    "background-color": "#f7f9fc"
+}
+
+app.layout = html.Div([
+    html.Div([
+        # Left side: overlay plot
+        html.Div([
+            html.H4("Akta Run Overlay", style={'text-align': 'center', 'color': '#0056b3'}),
+            dcc.Loading(dcc.Graph(id="overlay-graph", style={"height": "700px"})),
+            html.Div(id="overlay-status", style={"color": "#7f7f7f", "margin-top": "5px"}),
+        ], style={**panel_style, "width": "70%"}),
+
+        # Right side: run selection & alignment
+        html.Div([
+            html.H4("Runs", style={'color': '#0056b3'}),
+            html.Button("Refresh", id="overlay-refresh-btn", n_clicks=0),
+
+            html.Label("Scouting:", style={"font-weight": "bold", "margin-top": "10px", "display": "block"}),
+            dcc.Dropdown(id="overlay-scouting-dropdown", options=[], placeholder="Select a scouting group"),
+
+            html.Label("Result IDs:", style={"font-weight": "bold", "margin-top": "10px", "display": "block"}),
+            dcc.Dropdown(id="overlay-result-dropdown", options=[], value=[], multi=True,
+                         placeholder="Select runs to overlay"),
+
+            html.H4("Plot Settings", style={'color': '#0056b3', 'margin-top': '20px'}),
+            html.Label("Sensor:", style={"font-weight": "bold"}),
+            dcc.Dropdown(id="overlay-sensor-dropdown", options=[], value="uv_1_280", clearable=False),
+
+            html.Label("Align on:", style={"font-weight": "bold", "margin-top": "10px", "display": "block"}),
+            dcc.Dropdown(id="overlay-anchor-dropdown",
+                         options=[{"label": "Injection (ml 0)", "value": INJECTION}], value=INJECTION, clearable=False),
+
+            html.Label("X units:", style={"font-weight": "bold", "margin-top": "10px", "display": "block"}),
+            dcc.RadioItems(id="overlay-units-radio",
+                           options=[{"label": "mL", "value": "ml"}, {"label": "CV", "value": "cv"}],
+                           value="ml", inline=True),
+        ], style={**panel_style, "width": "30%"}),
+    ], style={"display": "flex", "flex-direction": "row", "gap": "20px", "margin": "10px"})
+])
+
+
+def run_label(result_id, scouting_run_num):
+    return f"Run {scouting_run_num}: {result_id}" if scouting_run_num is not None else result_id
+
+
+def parse_column_volume(value):
+    """ AktaResult.column_volume is stored as text (e.g. '5.027'); returns a float or None. """
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=512)
+def load_decimated_trace(result_id, sensor, catalog_id):
+    """
+    Fetches ml plus one sensor for a run and decimates it for plotting.
+    catalog_id is part of the cache key: a re-import writes a new catalog row, so stale arrays are never reused.
+    :return: (ml, values) float64 arrays.
+    """
+    rows = list(
+        AktaChromatogram.objects.filter(result_id=result_id)
+        .order_by("ml")
+        .values_list("ml", sensor)
+    )
+    if not rows:
+        return np.empty(0), np.empty(0)
+
+    values = np.array(rows, dtype=np.float64)
+    ml, sensor_values = decimate_min_max(values[:, 0], values[:, 1:], OVERLAY_POINTS_PER_RUN)
+    return ml, sensor_values[:, 0]
+
+
+# STEP 1: Scouting groups
+@app.callback(
+    Output("overlay-scouting-dropdown", "options"),
+    Input("overlay-refresh-btn", "n_clicks")
+)
+def load_scouting_groups(n_clicks):
+    scouting_ids = (
+        AktaResult.objects.exclude(scouting_id__isnull=True)
+        .values_list("scouting_id", flat=True).distinct().order_by("-scouting_id")
+    )
+    scouting_ids = list(scouting_ids)
+    descriptions = {
+        row["scouting_id"]: row
+        for row in AktaScoutingList.objects.filter(scouting_id__in=scouting_ids)
+        .values("scouting_id", "variable", "name", "total_num_of_scoutings")
+    }
+
+    options = []
+    for scouting_id in scouting_ids:
+        label = f"Scouting {scouting_id}"
+        if scouting_id in descriptions:
+            row = descriptions[scouting_id]
+            label += f" – {row['name'] or row['variable']} ({row['total_num_of_scoutings']} runs)"
+        options.append({"label": label, "value": scouting_id})
+    return options
+
+
+# STEP 2: Runs (all runs are selectable; a scouting group pre-selects its members)
+@app.callback(
+    Output("overlay-result-dropdown", "options"),
+    Output("overlay-result-dropdown", "value"),
+    Input("overlay-scouting-dropdown", "value"),
+    Input("overlay-refresh-btn", "n_clicks"),
+    State("overlay-result-dropdown", "value")
+)
+def load_runs(scouting_id, n_clicks, selected):
+    runs = list(
+        AktaResult.objects.order_by("-date").values_list("result_id", "scouting_id", "scouting_run_num")
+    )
+    options = [{"label": run_label(result_id, run_num), "value": result_id} for result_id, _, run_num in runs]
+
+    if scouting_id is not None:
+        members = sorted(
+            ((run_num or 0, result_id) for result_id, run_scouting_id, run_num in runs
+             if run_scouting_id == scouting_id)
+        )
+        return options, [result_id for _, result_id in members]
+    return options, selected or []
+
+
+# STEP 3: Sensors and phase anchors shared by the selected runs
+@app.callback(
+    Output("overlay-sensor-dropdown", "options"),
+    Output("overlay-anchor-dropdown", "options"),
+    Input("overlay-result-dropdown", "value")
+)
+def load_overlay_choices(result_ids):
+    anchor_options = [{"label": "Injection (ml 0)", "value": INJECTION}]
+    if not result_ids:
+        return [], anchor_options
+
+    sensors = {}
+    for catalog in AktaSensorCatalog.objects.filter(result_id__in=result_ids).values_list("sensors", flat=True):
+        for sensor in catalog or {}:
+            sensors[sensor] = sensors.get(sensor, 0) + 1
+
+    phases = (
+        AktaRunEvent.objects.filter(result_id__in=result_ids, event_type="phase_start")
+        .order_by("sequence").values_list("block_name", flat=True)
+    )
+    anchor_options += [{"label": f"Phase: {phase}", "value": phase} for phase in dict.fromkeys(phases)]
+
+    sensor_options = [
+        {"label": f"{sensor} ({count}/{len(result_ids)})", "value": sensor}
+        for sensor, count in sensors.items()
+    ]
+    return sensor_options, anchor_options
+
+
+# STEP 4: Overlay plot
+@app.callback(
+    Output("overlay-graph", "figure"),
+    Output("overlay-status", "children"),
+    Input("overlay-result-dropdown", "value"),
+    Input("overlay-sensor-dropdown", "value"),
+    Input("overlay-anchor-dropdown", "value"),
+    Input("overlay-units-radio", "value")
+)
+def update_overlay_plot(result_ids, sensor, anchor, units):
+    fig = go.Figure()
+    if not result_ids or not sensor:
+        return fig, ""
+
+    catalogs = {
+        result_id: (catalog_id, fraction_ml_offset([ml_min]) if ml_min is not None else 0.0)
+        for result_id, catalog_id, ml_min in
+        AktaSensorCatalog.objects.filter(result_id__in=result_ids, sensors__has_key=sensor)
+        .values_list("result_id", "id", "ml_min")
+    }
+    results = {
+        result_id: (run_num, parse_column_volume(column_volume))
+        for result_id, run_num, column_volume in AktaResult.objects.filter(result_id__in=result_ids)
+        .values_list("result_id", "scouting_run_num", "column_volume")
+    }
+
+    # Anchor volume per run on the chromatogram axis: 0 for the injection, else the first start of the chosen
+    # phase, moved from run-log ml by that run's injection offset
+    anchors = {result_id: 0.0 for result_id in result_ids}
+    if anchor and anchor != INJECTION:
+        anchors = {}
+        for result_id, ml in (
+                AktaRunEvent.objects.filter(result_id__in=result_ids, event_type="phase_start", block_name=anchor)
+                .order_by("-sequence").values_list("result_id", "ml")
+        ):
+            # Ordered descending, so the first occurrence wins
+            anchors[result_id] = ml - catalogs.get(result_id, (None, 0.0))[1]
+
+    skipped = []
+    for i, result_id in enumerate(result_ids):
+        run_num, column_volume = results.get(result_id, (None, None))
+        if result_id not in catalogs:
+            skipped.append(f"{result_id} (no {sensor})")
+            continue
+        if result_id not in anchors:
+            skipped.append(f"{result_id} (no phase '{anchor}')")
+            continue
+        if units == "cv" and not column_volume:
+            skipped.append(f"{result_id} (no column volume)")
+            continue
+
+        ml, values = load_decimated_trace(result_id, sensor, catalogs[result_id][0])
+        x = ml - anchors[result_id]
+        if units == "cv":
+            x = x / column_volume
+
+        fig.add_trace(go.Scattergl(
+            x=x,
+            y=values,
+            name=run_label(result_id, run_num),
+            mode="lines",
+            line=dict(color=default_colors[i % len(default_colors)]),
+            connectgaps=False
+        ))
+
+    x_title = "CV" if units == "cv" else "ml"
+    if anchor and anchor != INJECTION:
+        x_title += f" from start of {anchor}"
+
+    fig.update_layout(
+        title=f"Akta Overlay: {sensor}",
+        xaxis=dict(title=x_title),
+        yaxis=dict(title=sensor),
+        template="plotly_white",
+        legend=dict(orientation="h", y=-0.15),
+        uirevision=f"{sensor}|{anchor}|{units}"
+    )
+
+    status = f"{len(fig.data)} of {len(result_ids)} runs plotted."
+    if skipped:
+        status += " Skipped: " + ", ".join(skipped)
+    return fig, status
@@ -0,0 +1,542 @@
+"""
+Django-free parsing and resampling of UNICORN .asc exports.
+Kept separate from akta_data_import so it can be benchmarked and reused without a database.
+"""
+import re
+import time
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Curves exported as text; every other curve and all ml axes are parsed as float32
+AKTA_TEXT_CURVES = ("Fraction", "Run Log")
+AKTA_DELIMITERS = ("\t", ";", ",")
+
+
+def detect_delimiter(header_lines, candidates=AKTA_DELIMITERS):
+    """
+    Detects the .asc delimiter once from the header lines.
+    :param header_lines: The three header lines of the export (chrom, curve names, units).
+    :return: The candidate that splits every header line into the most fields.
+    """
+    counts = {delimiter: min(line.count(delimiter) for line in header_lines) for delimiter in candidates}
+    delimiter = max(counts, key=counts.get)
+    if counts[delimiter] == 0:
+        raise ValueError("Could not detect the delimiter from the .asc header")
+    return delimiter
+
+
+def read_akta_asc(file_path):
+    """
+    Reads a UNICORN .asc export with the C parser and an explicit dtype map.
+    Column names come from the curve-name header line, so each curve sits next to its own
+    x-axis: ml_1, <curve 1>, ml_2, <curve 2>, ...
+    :param file_path: Path to the .asc file.
+    :return: DataFrame with float32 ml/sensor columns and string Fraction/Run Log columns.
+    """
+    with open(file_path, encoding="utf-8") as f:
+        header_lines = [f.readline().rstrip("\r\n") for _ in range(3)]
+
+    sep = detect_delimiter(header_lines)
+
+    # Curve names sit on every other field of the second header line (the gaps are the ml columns)
+    curve_names = [name.strip() for name in header_lines[1].split(sep)[::2]]
+    while curve_names and not curve_names[-1]:
+        curve_names.pop()  # Trailing delimiter
+
+    columns, dtypes = [], {}
+    for i, curve in enumerate(curve_names, start=1):
+        if not curve or curve in dtypes:
+            curve = f"{curve or 'Curve'}_{i}"  # Keep names unique for the parser
+        columns += [f"ml_{i}", curve]
+        dtypes[f"ml_{i}"] = np.float32
+        dtypes[curve] = str if curve in AKTA_TEXT_CURVES else np.float32
+
+    df = pd.read_csv(
+        file_path,
+        sep=sep,
+        engine="c",
+        skiprows=len(header_lines),
+        header=None,
+        names=columns,
+        usecols=range(len(columns)),
+        dtype=dtypes,
+        encoding="utf-8",
+        on_bad_lines="skip",
+    )
+    return df
+
+
+def curve_axes(df):
+    """
+    Maps each curve to the ml column that precedes it in the export.
+    :return: {curve name: ml column}
+    """
+    columns = list(df.columns)
+    return {
+        columns[i + 1]: columns[i]
+        for i in range(len(columns) - 1)
+        if columns[i].startswith("ml_") and not columns[i + 1].startswith("ml_")
+    }
+
+
+def build_ml_grid(df, interval=0.1, axis="ml_1"):
+    """ Uniform ml grid spanning the reference axis (UV 1_280's ml by default). """
+    ml = df[axis].to_numpy(dtype=np.float64)
+    return np.arange(np.nanmin(ml), np.nanmax(ml), interval)
+
+
+def _sorted_curve(x, y):
+    """ Drops NaN pairs and sorts by x only when the export is not already monotonic. """
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    if x.size > 1 and np.any(x[1:] < x[:-1]):
+        order = np.argsort(x, kind="stable")
+        x, y = x[order], y[order]
+    return x, y
+
+
+def _peak_preserving(grid, interval, x, y, interpolated):
+    """
+    Replaces each grid value with the raw extreme (min or max) inside its
+    [ml, ml + interval) bin that deviates most from the interpolated value.
+    Empty bins keep the interpolated value.
+    """
+    starts = np.searchsorted(x, grid, side="left")
+    ends = np.append(starts[1:], np.searchsorted(x, grid[-1] + interval, side="left"))
+    filled = ends > starts
+    if not filled.any():
+        return interpolated
+
+    # reduceat over consecutive non-empty bin starts; the empty bins in between have zero width
+    bin_starts = starts[filled]
+    y_window = y[:ends[filled][-1]]
+    bin_max = np.maximum.reduceat(y_window, bin_starts)
+    bin_min = np.minimum.reduceat(y_window, bin_starts)
+
+    base = interpolated[filled]
+    result = interpolated.copy()
+    result[filled] = np.where(np.abs(bin_max - base) >= np.abs(bin_min - base), bin_max, bin_min)
+    return result
+
+
+def resample_curves(df, interval=0.1, preserve_peaks=False, curves=None):
+    """
+    Resamples every numeric curve onto one shared ml grid.
+    Each curve is interpolated against its own ml axis into a preallocated float32 matrix.
+    :param df: DataFrame from read_akta_asc.
+    :param interval: Grid spacing in mL.
+    :param preserve_peaks: Keep per-bin min/max extremes instead of plain interpolation,
+                           so narrow UV peaks survive coarse grids.
+    :param curves: Optional subset of curve names; defaults to all non-text curves.
+    :return: DataFrame with an "ml" column followed by one column per curve.
+    """
+    axes = curve_axes(df)
+    if curves is None:
+        curves = [curve for curve in axes if curve not in AKTA_TEXT_CURVES]
+
+    grid = build_ml_grid(df, interval)
+    values = np.full((grid.size, len(curves)), np.nan, dtype=np.float32)
+
+    kept = []
+    for j, curve in enumerate(curves):
+        x, y = _sorted_curve(
+            df[axes[curve]].to_numpy(dtype=np.float64),
+            df[curve].to_numpy(dtype=np.float64),
+        )
+        if x.size == 0:
+            continue  # No valid data for interpolation
+
+        interpolated = np.interp(grid, x, y)
+        if preserve_peaks:
+            interpolated = _peak_preserving(grid, interval, x, y, interpolated)
+        values[:, j] = interpolated
+        kept.append(j)
+
+    df_resampled = pd.DataFrame(values[:, kept], columns=[curves[j] for j in kept])
+    df_resampled.insert(0, "ml", grid)
+    return df_resampled
+
+
+def extract_text_curve(df, curve):
+    """
+    Returns a text curve (Fraction / Run Log) on its original ml axis.
+    :return: DataFrame with "ml" and the curve column; empty if the curve is missing.
+    """
+    axes = curve_axes(df)
+    if curve not in axes:
+        return pd.DataFrame(columns=["ml", curve])
+
+    df_curve = df[[axes[curve], curve]].drop_duplicates().dropna().reset_index(drop=True)
+    return df_curve.rename(columns={axes[curve]: "ml"})
+
+
+def convert_runlog_timestamp(timestamp_str):
+    """
+    Converts a timestamp from 'M/D/YYYY h:mm:ss AM/PM ±HH:MM' to MySQL-compatible format 'YYYY-MM-DD HH:MM:SS'
+    """
+
+    if not timestamp_str:
+        return None
+
+    # Regex pattern to extract date, time, AM/PM, and timezone
+    pattern = re.compile(r"(\d{1,2}/\d{1,2}/\d{4}) (\d{1,2}:\d{2}:\d{2} [APM]{2}) ([+-]\d{2}:\d{2})")
+    match = pattern.match(timestamp_str)
+
+    if not match:
+        print(f"⚠️ Invalid timestamp format: {timestamp_str}")
+        return None  # Return None if parsing fails
+
+    date_part, time_part, tz_offset = match.groups()
+
+    # Convert date + time to a datetime object
+    dt = datetime.strptime(f"{date_part} {time_part}", "%m/%d/%Y %I:%M:%S %p")
+
+    # Convert timezone offset to timedelta
+    offset_hours, offset_minutes = map(int, tz_offset.split(":"))
+    tz_delta = timedelta(hours=offset_hours, minutes=offset_minutes)
+
+    # Apply timezone offset
+    dt = dt.replace(tzinfo=timezone(tz_delta))
+
+    # Convert to MySQL format (removes timezone)
+    formatted_timestamp = dt.strftime('%Y-%m-%d %H:%M:%S')
+    return formatted_timestamp
+
+# One anchored pattern classifies every run-log line in a single vectorized pass
+RUN_EVENT_PATTERN = (
+    r"^(?:"
+    r"Method Run .*?Method:\s*(?P<method>\w+)(?:.*?Result:\s*(?P<result_path>.*?)(?=\sUser|$))?"
+    r"(?:\sUser\s(?P<user>\w+))?"
+    r"|Batch ID:\s*(?P<batch_id>[\w-]+)"
+    r"|Base CV, (?P<column>.+)"
+    r"|Phase (?P<phase_start>.+?) \(Issued\)"
+    r"|(?P<phase_end>End Phase) \(Issued\)"
+    r"|Block (?P<block_start>.+?) \(Issued\)"
+    r"|(?P<block_end>End_Block) \(Issued\)"
+    r"|Set mark (?P<mark>.+?)\"? \(Issued\)"
+    r"|(?P<run_end>End) \d{1,2}/\d{1,2}/\d{4} .*\(Completed\)"
+    r")"
+)
+RUN_LOG_TIMESTAMP_PATTERN = r"(\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}:\d{2} [APM]{2} [-+]\d{2}:\d{2})"
+METHOD_EVENT_TYPES = ("method", "result_path", "user", "batch_id", "column")
+RUN_EVENT_COLUMNS = ["sequence", "ml", "end_ml", "event_type", "block_name", "phase_name", "value", "timestamp"]
+
+
+def parse_run_events(df_run_log):
+    """
+    Parses the run log once into structural events.
+    Phase/block starts carry their own end_ml, block/phase names are resolved for end events,
+    and every event gets the latest run-log timestamp at or before it.
+    :param df_run_log: DataFrame with "ml" and "Run Log" columns.
+    :return: DataFrame with RUN_EVENT_COLUMNS, ordered by sequence (run-log order).
+    """
+    if df_run_log.empty:
+        return pd.DataFrame(columns=RUN_EVENT_COLUMNS)
+
+    text = df_run_log["Run Log"].astype(str).reset_index(drop=True)
+    ml = df_run_log["ml"].to_numpy(dtype=np.float64)
+
+    matches = text.str.extract(RUN_EVENT_PATTERN)
+    raw_timestamps = text.str.extract(RUN_LOG_TIMESTAMP_PATTERN)[0].ffill()
+    timestamps = raw_timestamps.map({ts: convert_runlog_timestamp(ts) for ts in raw_timestamps.dropna().unique()})
+
+    # Only lines that matched a group take part in the (short) pairing loop below
+    matched = matches.notna()
+    has_event = matched.any(axis=1).to_numpy()
+    event_types = matched.idxmax(axis=1).to_numpy()
+
+    events, open_blocks, phase = [], [], None
+    for row in np.flatnonzero(has_event):
+        event_type = event_types[row]
+        value = matches.at[row, event_type]
+        event = {
+            "sequence": len(events), "ml": float(ml[row]), "end_ml": None, "event_type": event_type,
+            "block_name": None, "phase_name": phase["block_name"] if phase else None,
+            "value": None, "timestamp": timestamps.iat[row],
+        }
+
+        if event_type == "phase_start":
+            event["block_name"] = event["phase_name"] = value
+            phase = event
+        elif event_type == "phase_end":
+            if phase:
+                event["block_name"] = phase["block_name"]
+                phase["end_ml"] = event["ml"]
+            phase = None
+        elif event_type == "block_start":
+            event["block_name"] = value
+            open_blocks.append(event)
+        elif event_type == "block_end":
+            if open_blocks:
+                block = open_blocks.pop()
+                event["block_name"] = block["block_name"]
+                block["end_ml"] = event["ml"]
+        elif event_type in METHOD_EVENT_TYPES or event_type == "mark":
+            event["value"] = value.strip()
+
+        events.append(event)
+
+        # The Method Run line also carries the result path and user
+        if event_type == "method":
+            for extra in ("result_path", "user"):
+                if pd.notna(matches.at[row, extra]):
+                    events.append({**event, "sequence": len(events), "event_type": extra,
+                                   "value": matches.at[row, extra].strip()})
+
+    return pd.DataFrame(events, columns=RUN_EVENT_COLUMNS)
+
+
+def run_details(df_events):
+    """
+    Reads the run metadata from parsed run events.
+    :return: (timestamp, batch_id, method, result_path, user, column_id); missing values are None.
+    """
+    first = (
+        df_events[df_events["event_type"].isin(METHOD_EVENT_TYPES)]
+        .drop_duplicates(subset="event_type")
+        .set_index("event_type")
+    )
+
+    def value(event_type):
+        return first.at[event_type, "value"] if event_type in first.index else None
+
+    timestamp = first.at["method", "timestamp"] if "method" in first.index else None
+    if timestamp is None and df_events["timestamp"].notna().any():
+        timestamp = df_events["timestamp"].dropna().iloc[0]  # No Method Run line; first logged time
+
+    return timestamp, value("batch_id"), value("method"), value("result_path"), value("user"), value("column")
+
+
+def extract_run_log_details(df_run_log):
+    """
+    Extracts Batch ID, Method Run timestamp, result path, user, and column ID from the Run Log column.
+    :param df_run_log: DataFrame containing ml (X-axis) and Run Log data.
+    :return: Extracted values as individual variables.
+    """
+    return run_details(parse_run_events(df_run_log))
+
+
+def parse_akta_file(file_path, interval=0.1, preserve_peaks=False):
+    """
+    Parses one .asc export end to end without touching the database, so it can run in a worker process.
+    :return: dict with the run metadata, the downsampled/fraction/run log/run event DataFrames,
+             the fraction integrals and UV peaks, and the parse time.
+    """
+    start = time.perf_counter()
+
+    df = read_akta_asc(file_path)
+    df_downsampled = resample_curves(df, interval=interval, preserve_peaks=preserve_peaks)
+    df_fraction = extract_text_curve(df, "Fraction")
+    df_run_log = extract_text_curve(df, "Run Log")
+    df_events = parse_run_events(df_run_log)
+    timestamp, batch_id, method, result_path, user, column_id = run_details(df_events)
+
+    if "UV 1_280" in df_downsampled.columns:
+        df_fraction_integrals, df_peaks = integrate_fractions(
+            df_downsampled["ml"].to_numpy(), df_downsampled["UV 1_280"].to_numpy(), df_fraction
+        )
+    else:
+        df_fraction_integrals, df_peaks = None, None
+
+    return {
+        "file_path": file_path,
+        "result_id": batch_id,
+        "timestamp": timestamp,
+        "method": method,
+        "result_path": result_path,
+        "user": user,
+        "column_id": column_id,
+        "chromatogram": df_downsampled,
+        "fractions": df_fraction,
+        "run_log": df_run_log,
+        "events": df_events,
+        "fraction_integrals": df_fraction_integrals,
+        "peaks": df_peaks,
+        "parse_seconds": time.perf_counter() - start,
+    }
+
+
+def sensor_ranges(df, columns):
+    """
+    Summarises which sensors actually carry data.
+    :param columns: Sensor columns to inspect.
+    :return: {column: {"min": float, "max": float}} for every column with at least one non-null value.
+    """
+    ranges = {}
+    for column in columns:
+        values = df[column].to_numpy(dtype=np.float64)
+        if values.size == 0 or np.isnan(values).all():
+            continue
+        ranges[column] = {"min": float(np.nanmin(values)), "max": float(np.nanmax(values))}
+    return ranges
+
+
+def decimate_min_max(x, ys, max_points=2000):
+    """
+    Reduces sorted traces to at most ~max_points per trace for plotting.
+    Each bucket keeps its first point plus the min and max of every trace, so peaks stay visible.
+    :param x: Sorted 1-D x values.
+    :param ys: 2-D array (points x traces) sharing x.
+    :return: (x, ys) decimated; the input is returned unchanged when it already fits.
+    """
+    n = x.size
+    if n <= max_points:
+        return x, ys
+
+    # Equal-width buckets laid out as a (bucket, offset) grid; padding is NaN
+    bucket = -(-n // max(max_points // 3, 1))  # Up to three kept points per bucket
+    n_buckets = -(-n // bucket)
+    starts = np.arange(n_buckets) * bucket
+
+    keep = [starts]
+    for j in range(ys.shape[1]):
+        y = np.full(n_buckets * bucket, np.nan)
+        y[:n] = ys[:, j]
+        y = y.reshape(n_buckets, bucket)
+        valid = ~np.isnan(y).all(axis=1)  # NaN-only buckets keep just their first point
+        keep.append((starts + np.argmin(np.where(np.isnan(y), np.inf, y), axis=1))[valid])
+        keep.append((starts + np.argmax(np.where(np.isnan(y), -np.inf, y), axis=1))[valid])
+
+    rows = np.unique(np.concatenate(keep))
+    return x[rows], ys[rows]
+
+
+def fraction_ml_offset(ml):
+    """
+    Shift from the chromatogram ml axis to the fraction/run log axis.
+    UNICORN zeroes the sensor curves at the injection mark (they start at -injection ml)
+    while Fraction and Run Log keep absolute volumes.
+    """
+    ml_min = float(np.nanmin(ml)) if len(ml) else 0.0
+    return -ml_min if ml_min < 0 else 0.0
+
+
+def cumulative_area(ml, uv):
+    """ Running trapezoid integral of uv over ml (mAU·mL); NaNs count as zero. """
+    uv = np.nan_to_num(np.asarray(uv, dtype=np.float64))
+    return np.concatenate(([0.0], np.cumsum((uv[1:] + uv[:-1]) * 0.5 * np.diff(ml))))
+
+
+def window_areas(ml, cumulative, starts, ends):
+    """ UV area between each (start, end) pair, read off the cumulative integral. """
+    return np.interp(ends, ml, cumulative) - np.interp(starts, ml, cumulative)
+
+
+def detect_peaks(ml, uv, min_height_fraction=0.05, valley_ratio=0.5, edge_fraction=0.01):
+    """
+    Finds UV peaks on a sorted grid without scipy.
+    Local maxima above min_height_fraction of the run maximum are candidates; neighbours whose valley stays
+    above valley_ratio of the smaller apex are merged. Outer edges are where the signal drops below
+    edge_fraction of the apex height.
+    :return: DataFrame with peak_number, start_ml, apex_ml, end_ml, height (mAU), area (mAU·mL).
+    """
+    columns = ["peak_number", "start_ml", "apex_ml", "end_ml", "height", "area"]
+    uv = np.nan_to_num(np.asarray(uv, dtype=np.float64), nan=-np.inf)
+    if uv.size < 3 or not np.isfinite(uv).any():
+        return pd.DataFrame(columns=columns)
+
+    top = uv[np.isfinite(uv)].max()
+    is_apex = (uv[1:-1] > uv[:-2]) & (uv[1:-1] >= uv[2:]) & (uv[1:-1] >= top * min_height_fraction)
+    candidates = np.flatnonzero(is_apex) + 1
+    if candidates.size == 0 or top <= 0:
+        return pd.DataFrame(columns=columns)
+
+    # Merge shoulders into the higher apex; only the (few) candidates are looped over
+    apexes, valleys = [candidates[0]], []
+    for apex in candidates[1:]:
+        previous = apexes[-1]
+        valley = previous + int(np.argmin(uv[previous:apex + 1]))
+        if uv[valley] > valley_ratio * min(uv[previous], uv[apex]):
+            if uv[apex] > uv[previous]:
+                apexes[-1] = apex
+        else:
+            apexes.append(apex)
+            valleys.append(valley)
+
+    apexes = np.array(apexes)
+    starts, ends = np.empty(apexes.size, dtype=np.int64), np.empty(apexes.size, dtype=np.int64)
+    for k, apex in enumerate(apexes):
+        low = uv < uv[apex] * edge_fraction
+        left_limit = valleys[k - 1] if k > 0 else 0
+        right_limit = valleys[k] if k < len(valleys) else uv.size - 1
+        left = np.flatnonzero(low[left_limit:apex])
+        right = np.flatnonzero(low[apex:right_limit + 1])
+        starts[k] = left_limit + left[-1] if left.size else left_limit
+        ends[k] = apex + right[0] if right.size else right_limit
+
+    cumulative = cumulative_area(ml, np.where(np.isfinite(uv), uv, 0.0))
+    return pd.DataFrame({
+        "peak_number": np.arange(1, apexes.size + 1),
+        "start_ml": ml[starts],
+        "apex_ml": ml[apexes],
+        "end_ml": ml[ends],
+        "height": uv[apexes],
+        "area": cumulative[ends] - cumulative[starts],
+    }, columns=columns)
+
+
+def integrate_fractions(ml, uv, df_fraction, peaks=None):
+    """
+    Integrates UV over every fraction window and assigns each fraction to the peak it overlaps most.
+    Windows run from one fraction mark to the next (waste marks included); the last one ends with the run.
+    :param ml: Sorted chromatogram ml grid.
+    :param uv: UV 1_280 on that grid (mAU).
+    :param df_fraction: DataFrame with "ml" (fraction axis) and "Fraction" labels.
+    :param peaks: Output of detect_peaks; computed when omitted.
+    :return: (fractions, peaks). fractions has fraction, start_ml, end_ml, volume, uv_area,
+             peak_number and peak_share (share of that peak's area collected in the fraction). Waste is dropped.
+    """
+    ml = np.asarray(ml, dtype=np.float64)
+    if peaks is None:
+        peaks = detect_peaks(ml, uv)
+
+    columns = ["fraction", "start_ml", "end_ml", "volume", "uv_area", "peak_number", "peak_share"]
+    df = df_fraction[["ml", "Fraction"]].dropna().drop_duplicates(subset="ml").sort_values("ml")
+    if df.empty or ml.size < 2:
+        return pd.DataFrame(columns=columns), peaks
+
+    offset = fraction_ml_offset(ml)
+    starts = df["ml"].to_numpy(dtype=np.float64)
+    ends = np.append(starts[1:], ml[-1] + offset)
+
+    cumulative = cumulative_area(ml, uv)
+    fractions = pd.DataFrame({
+        "fraction": df["Fraction"].to_numpy(),
+        "start_ml": starts,
+        "end_ml": ends,
+        "volume": ends - starts,
+        "uv_area": window_areas(ml, cumulative, starts - offset, ends - offset),
+        "peak_number": None,
+        "peak_share": None,
+    }, columns=columns)
+
+    if not peaks.empty:
+        # Fraction × peak overlap areas in one broadcast
+        peak_starts = peaks["start_ml"].to_numpy(dtype=np.float64)
+        peak_ends = peaks["end_ml"].to_numpy(dtype=np.float64)
+        lo = np.maximum((starts - offset)[:, None], peak_starts[None, :])
+        hi = np.minimum((ends - offset)[:, None], peak_ends[None, :])
+        overlap = np.where(hi > lo, window_areas(ml, cumulative, lo, np.maximum(hi, lo)), 0.0)
+
+        best = overlap.argmax(axis=1)
+        best_area = overlap[np.arange(len(fractions)), best]
+        peak_areas = peaks["area"].to_numpy(dtype=np.float64)
+        assigned = best_area > 0
+        fractions["peak_number"] = np.where(assigned, peaks["peak_number"].to_numpy()[best], None)
+        fractions["peak_share"] = np.where(
+            assigned & (peak_areas[best] > 0), best_area / np.where(peak_areas[best] > 0, peak_areas[best], 1), None
+        )
+
+    fractions = fractions[~fractions["fraction"].str.lower().str.contains("waste", na=False)]
+    return fractions.reset_index(drop=True), peaks
+
+
+def fraction_mass_mg(uv_area, extinction_coefficient, path_length_cm=0.2):
+    """
+    Protein mass from a UV area: mAU·mL / 1000 / (ε · l).
+    :param extinction_coefficient: Absorbance of a 1 mg/mL solution over 1 cm (mL·mg⁻¹·cm⁻¹).
+    :param path_length_cm: UV flow cell path length (AKTA UV monitors: 0.2 cm).
+    """
+    return np.asarray(uv_area, dtype=np.float64) / 1000.0 / (extinction_coefficient * path_length_cm)
@@ -0,0 +1,51 @@
+"""
+Indexed lookups on akta_run_event: load volume, phase bands and method metadata.
+Events are written at import; runs imported before the event table existed are backfilled by migration 0042.
+"""
+from plotly_integration.models import AktaRunEvent
+from plotly_integration.akta.akta_app.akta_processing import METHOD_EVENT_TYPES
+
+SAMPLE_APPLICATION_BLOCK = "Start frac (Sample Appl)"
+
+
+def get_load_volume(result_id):
+    """
+    Sample application window: the 'Start frac (Sample Appl)' block to the first End_Block after it.
+    :return: (start_ml, end_ml, load_volume); missing values are None (load_volume 0.0).
+    """
+    events = AktaRunEvent.objects.filter(result_id=result_id)
+
+    start = events.filter(event_type="block_start", block_name=SAMPLE_APPLICATION_BLOCK) \
+        .order_by("sequence").values("sequence", "ml").first()
+    if not start:
+        return None, None, 0.0
+
+    end_ml = events.filter(event_type="block_end", sequence__gt=start["sequence"]) \
+        .order_by("sequence").values_list("ml", flat=True).first()
+    if end_ml is None:
+        return start["ml"], None, 0.0
+    return start["ml"], end_ml, end_ml - (start["ml"] or 0)
+
+
+def get_phase_bands(result_id):
+    """
+    Phase boundaries for shading chromatograms.
+    :return: List of {"phase": name, "start_ml": float, "end_ml": float or None} in run order.
+    """
+    return [
+        {"phase": name, "start_ml": ml, "end_ml": end_ml}
+        for name, ml, end_ml in AktaRunEvent.objects
+        .filter(result_id=result_id, event_type="phase_start")
+        .order_by("sequence")
+        .values_list("block_name", "ml", "end_ml")
+    ]
+
+
+def get_method_details(result_id):
+    """ First value per method event type, e.g. {"method": ..., "batch_id": ..., "column": ...}. """
+    details = {}
+    for event_type, value in AktaRunEvent.objects.filter(
+            result_id=result_id, event_type__in=METHOD_EVENT_TYPES
+    ).order_by("sequence").values_list("event_type", "value"):
+        details.setdefault(event_type, value)
+    return details
@@ -0,0 +1,184 @@
+"""
+Incremental ingestion of OPC UA historian tags into historian_sample.
+
+Each enabled HistorianTag is read from its watermark (or backfill_days back on the first run) up to
+now - INGEST_SETTLE_SECONDS, page by page. Every page is bulk-inserted together with the advanced
+watermark in one transaction, so an interrupted run resumes exactly where it stopped. Runs of non-good
+status codes and silences longer than the tag's max_gap_seconds are written to historian_gap; a status run
+that is still open is stored with end NULL in the same transaction and picked up again by the next pass.
+
+    python manage.py ingest_historian             # one pass over all enabled tags
+    python manage.py ingest_historian --loop 300  # every 5 minutes
+"""
+import concurrent.futures
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+
+from plotly_integration.models import HistorianTag, HistorianSample, HistorianGap
+from plotly_integration.utils import bulk_insert_frame
+from plotly_integration.akta.opcua_server.opcua_history import iter_history_pages, status_names
+from plotly_integration.akta.opcua_server.opcua_session import opc_sessions
+
+logger = logging.getLogger(__name__)
+
+INGEST_SETTLE_SECONDS = 60  # Leave the most recent minute for late historian writes
+
+
+def is_good(status):
+    """ Severity bits 00 = Good (StatusCode values are uint32 with severity in the top two bits). """
+    return (status >> 30) == 0
+
+
+def to_utc(timestamp):
+    """ numpy datetime64 → aware UTC datetime (OPC UA timestamps are naive UTC). """
+    return pd.Timestamp(timestamp).to_pydatetime().replace(tzinfo=timezone.utc)
+
+
+class GapTracker:
+    """ Finds gaps across consecutive pages of one tag, carrying open status runs between pages. """
+
+    def __init__(self, tag, last_timestamp=None, open_run=None):
+        self.max_gap = np.timedelta64(tag.max_gap_seconds, "s") if tag.max_gap_seconds else None
+        self.last_timestamp = last_timestamp  # datetime64 of the previous sample
+        self.open_run = open_run  # (start datetime64, status) of a run of non-good samples
+        self.gaps = []  # [(start, end, reason, status)]
+
+    def add_page(self, timestamps, status):
+        # Silences: consecutive samples further apart than max_gap
+        if self.max_gap is not None:
+            previous = timestamps[:-1] if self.last_timestamp is None \
+                else np.concatenate([[self.last_timestamp], timestamps[:-1]])
+            following = timestamps if self.last_timestamp is not None else timestamps[1:]
+            for i in np.flatnonzero(following - previous > self.max_gap):
+                self.gaps.append((previous[i], following[i], "silence", None))
+
+        # Status runs: boundaries wherever the code changes; only the runs (not the samples) are looped
+        boundaries = np.concatenate([[0], np.flatnonzero(np.diff(status)) + 1, [len(status)]])
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            code = int(status[start])
+            if self.open_run and self.open_run[1] != code:
+                self.gaps.append((self.open_run[0], timestamps[start], "status", self.open_run[1]))
+                self.open_run = None
+            if not is_good(code) and self.open_run is None:
+                self.open_run = (timestamps[start], code)
+        self.last_timestamp = timestamps[-1]
+
+    def take(self, tag):
+        """ Gaps found since the last call, plus the open status run (end None) if there is one. """
+        gaps, self.gaps = self.gaps, []
+        if self.open_run:
+            gaps.append((self.open_run[0], None, "status", self.open_run[1]))
+        names = status_names(np.array([g[3] or 0 for g in gaps], dtype=np.uint32)) if gaps else []
+        return [
+            HistorianGap(tag=tag, start=to_utc(start), end=to_utc(end) if end is not None else None, reason=reason,
+                         status=status, status_name=name if status is not None else None)
+            for (start, end, reason, status), name in zip(gaps, names)
+        ]
+
+
+def new_samples(timestamps, last_timestamp=None):
+    """
+    Positions of the samples of a page to store: the first of each repeated source timestamp (historians
+    can return several values for one timestamp) and only timestamps after the last stored one.
+    """
+    _, first = np.unique(timestamps, return_index=True)
+    keep = np.sort(first)
+    if last_timestamp is not None:
+        keep = keep[timestamps[keep] > last_timestamp]
+    return keep
+
+
+def ingest_tag(tag, now=None, sessions=opc_sessions):
+    """
+    Pulls new history for one tag.
+    :return: Number of samples inserted.
+    """
+    now = now or datetime.now(timezone.utc)
+    end = (now - timedelta(seconds=INGEST_SETTLE_SECONDS)).astimezone(timezone.utc).replace(tzinfo=None)
+    if tag.watermark:
+        watermark = tag.watermark.astimezone(timezone.utc).replace(tzinfo=None)
+        start = watermark + timedelta(microseconds=1)  # Watermark sample is already stored
+        last_timestamp = np.datetime64(watermark, "ns")
+    else:
+        start = end - timedelta(days=tag.backfill_days)
+        last_timestamp = None
+
+    # A status run left open by the previous pass continues into this one
+    open_gaps = HistorianGap.objects.filter(tag=tag, end__isnull=True)
+    open_run = open_gaps.order_by("-start").values_list("start", "status").first()
+    if open_run:
+        open_run = (np.datetime64(open_run[0].astimezone(timezone.utc).replace(tzinfo=None), "ns"), open_run[1])
+
+    inserted = 0
+    tracker = GapTracker(tag, last_timestamp, open_run)
+    try:
+        for page in iter_history_pages(tag.node_id, start, end, sessions=sessions):
+            keep = new_samples(page.timestamps, last_timestamp)
+            if not keep.size:
+                continue
+            timestamps, status = page.timestamps[keep], page.status[keep]
+            tracker.add_page(timestamps, status)
+            df = pd.DataFrame({
+                "tag_id": tag.id,
+                # Naive UTC datetimes for the driver; an object Series keeps pandas from turning them into Timestamps
+                "timestamp": pd.Series(timestamps.astype("datetime64[us]").astype(object), dtype=object),
+                "value": page.values[keep],
+                "status": status.astype(np.int64),
+            })
+            last_timestamp = timestamps[-1]
+            watermark = to_utc(last_timestamp)
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                bulk_insert_frame(cursor, HistorianSample, df, ["tag", "timestamp", "value", "status"])
+                open_gaps.delete()
+                HistorianGap.objects.bulk_create(tracker.take(tag))
+                HistorianTag.objects.filter(pk=tag.pk).update(
+                    watermark=watermark, rows_ingested=F("rows_ingested") + len(df)
+                )
+            tag.watermark = watermark
+            inserted += len(df)
+
+        HistorianTag.objects.filter(pk=tag.pk).update(
+            last_run_at=now, last_status="ok" if inserted else "no_data", last_error=None
+        )
+    except Exception as e:
+        logger.exception("Historian ingestion of %s failed", tag.node_id)
+        HistorianTag.objects.filter(pk=tag.pk).update(last_run_at=now, last_status="error", last_error=str(e))
+    return inserted
+
+
+def _ingest_tag_in_thread(tag_id, now):
+    try:
+        return ingest_tag(HistorianTag.objects.get(pk=tag_id), now)
+    finally:
+        close_old_connections()
+
+
+def ingest_all(tag_ids=None):
+    """
+    One pass over the enabled tags, as many at a time as the OPC UA session pool allows.
+    :return: {node id: samples inserted}
+    """
+    tags = HistorianTag.objects.filter(enabled=True)
+    if tag_ids is not None:
+        tags = tags.filter(pk__in=tag_ids)
+    tags = dict(tags.values_list("pk", "node_id"))
+
+    now = datetime.now(timezone.utc)
+    started = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=opc_sessions.max_sessions) as executor:
+        futures = {executor.submit(_ingest_tag_in_thread, pk, now): node_id for pk, node_id in tags.items()}
+        results = {futures[future]: future.result() for future in concurrent.futures.as_completed(futures)}
+
+    total = sum(results.values())
+    elapsed = time.monotonic() - started
+    logger.info("Historian pass: %d tags, %d samples in %.1fs (%.0f rows/s)",
+                len(results), total, elapsed, total / elapsed if elapsed else 0)
+    return results
+
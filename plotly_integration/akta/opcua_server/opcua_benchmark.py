@@ -0,0 +1,200 @@
+"""
+Offline benchmark of the OPC UA client paths against SimulatedHistorian.
+
+    python -m plotly_integration.akta.opcua_server.opcua_benchmark --systems 5 --tags 10 --points 50000
+
+Measures:
+- session: cold connect vs. borrowing a pooled session
+- browse: batched fetch_visible_tree (cold and cached) vs. per-node get_children/attribute reads
+- history: paged single-tag read throughput and concurrent multi-tag aligned reads
+- reconnect: fail-fast behaviour while the server is down and time to recover after it returns
+"""
+import argparse
+import logging
+import statistics
+import time
+from datetime import timedelta
+
+from opcua import Client, ua
+
+from plotly_integration.akta.opcua_server.opcua_browse import fetch_visible_tree, clear_browse_cache
+from plotly_integration.akta.opcua_server.opcua_history import iter_history_pages, read_aligned_history
+from plotly_integration.akta.opcua_server.opcua_session import OPCSessionManager
+from plotly_integration.akta.opcua_server.opcua_sim_server import SimulatedHistorian
+
+
+def timed(fn, repeat=1):
+    """ :return: (last result, median seconds) """
+    durations, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - started)
+    return result, statistics.median(durations)
+
+
+def report(section, rows):
+    print(f"\n{section}")
+    for label, value in rows:
+        print(f"  {label:<42} {value}")
+
+
+def bench_sessions(sim, repeat):
+    def cold_connect():
+        client = Client(sim.url)
+        client.connect()
+        client.disconnect()
+
+    manager = OPCSessionManager(client_factory=lambda: Client(sim.url))
+
+    def borrow():
+        with manager.session() as client:
+            client.get_node(ua.FourByteNodeId(ua.ObjectIds.Server_ServerStatus_State)).get_value()
+
+    _, cold = timed(cold_connect, repeat)
+    borrow()  # Opens the pooled session
+    _, pooled = timed(borrow, repeat * 10)
+    manager.close_all()
+    report("Sessions", [
+        ("cold connect + disconnect", f"{cold * 1000:.1f} ms"),
+        ("pooled borrow + one read", f"{pooled * 1000:.2f} ms"),
+    ])
+
+
+def _browse_per_node(client, node_id, expanded):
+    """ The pre-batching browser: get_children plus per-child class/access reads, recursively. """
+    count = 0
+    for child in client.get_node(node_id).get_children():
+        count += 1
+        child.get_browse_name()
+        if child.get_node_class() == ua.NodeClass.Variable:
+            child.get_access_level()
+        elif child.nodeid.to_string() in expanded:
+            count += _browse_per_node(client, child.nodeid.to_string(), expanded)
+    return count
+
+
+def bench_browse(sim, manager, repeat):
+    with manager.session() as client:
+        folders = [child["node_id"] for child in fetch_visible_tree(client, sim.root_node_id, [])[sim.root_node_id]]
+
+        def cold(expanded):
+            clear_browse_cache()
+            return sum(len(children) for children in fetch_visible_tree(client, sim.root_node_id, expanded).values())
+
+        nodes_root, root_cold = timed(lambda: cold([]), repeat)
+        nodes_all, all_cold = timed(lambda: cold(folders), repeat)
+        _, all_cached = timed(lambda: fetch_visible_tree(client, sim.root_node_id, folders), repeat)
+        _, per_node = timed(lambda: _browse_per_node(client, sim.root_node_id, set(folders)), repeat)
+
+    report("Browse", [
+        (f"root level, batched cold ({nodes_root} nodes)", f"{root_cold * 1000:.1f} ms"),
+        (f"all folders, batched cold ({nodes_all} nodes)", f"{all_cold * 1000:.1f} ms"),
+        ("all folders, cached", f"{all_cached * 1000:.2f} ms"),
+        ("all folders, per-node reads", f"{per_node * 1000:.1f} ms"),
+    ])
+
+
+def bench_history(sim, manager, page_size, tags):
+    end = sim.end_time + timedelta(seconds=1)
+
+    def single():
+        return sum(len(page.timestamps) for page in iter_history_pages(
+            sim.tag_node_ids[0], sim.start_time, end, page_size=page_size, sessions=manager))
+
+    rows, single_time = timed(single)
+    tag_map = {node_id: node_id for node_id in sim.tag_node_ids[:tags]}
+    (wide, counts), multi_time = timed(lambda: read_aligned_history(tag_map, sim.start_time, end, sessions=manager))
+    multi_rows = sum(counts.values())
+
+    # A short read would otherwise be reported as a (faster) throughput
+    expected = sim.points_per_tag
+    short = {node_id: count for node_id, count in counts.items() if count != expected}
+    if rows != expected or short:
+        raise RuntimeError(f"History reads returned the wrong number of values (expected {expected} per tag): "
+                           f"single tag {rows}, concurrent {short}")
+
+    report("History", [
+        (f"one tag, page size {page_size}", f"{rows} rows in {single_time:.2f} s ({rows / single_time:,.0f} rows/s)"),
+        (f"{len(tag_map)} tags concurrent + aligned",
+         f"{multi_rows} rows in {multi_time:.2f} s ({multi_rows / multi_time:,.0f} rows/s), "
+         f"{len(wide)} grid rows"),
+    ])
+
+
+def bench_reconnect(sim, downtime):
+    manager = OPCSessionManager(client_factory=lambda: Client(sim.url), keepalive_interval=1,
+                                backoff_base=0.5, backoff_max=5, acquire_timeout=5)
+
+    def borrow():
+        with manager.session() as client:
+            return OPCSessionManager.is_alive(client)
+
+    borrow()
+    sim.stop()
+    down_at = time.perf_counter()
+
+    # While the server is down borrowers should fail quickly rather than hang on the channel timeout
+    failures = []
+    while time.perf_counter() - down_at < downtime:
+        started = time.perf_counter()
+        try:
+            borrow()
+        except Exception:
+            pass
+        failures.append(time.perf_counter() - started)
+        time.sleep(0.1)
+
+    sim.start()
+    up_at = time.perf_counter()
+    recovered = None
+    while time.perf_counter() - up_at < 30:
+        try:
+            if borrow():
+                recovered = time.perf_counter() - up_at
+                break
+        except Exception:
+            time.sleep(0.1)
+    manager.close_all()
+
+    report("Reconnect", [
+        ("first borrow after the server stopped", f"{failures[0] * 1000:.1f} ms"),
+        (f"borrows while down ({len(failures)})",
+         f"median {statistics.median(failures) * 1000:.1f} ms, max {max(failures) * 1000:.1f} ms"),
+        ("time to first good borrow after restart", f"{recovered:.2f} s" if recovered is not None else "not recovered"),
+        ("session status", manager.status()),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OPC UA client paths against a local simulated historian")
+    parser.add_argument("--systems", type=int, default=5)
+    parser.add_argument("--tags", type=int, default=10, help="Variables per system folder")
+    parser.add_argument("--points", type=int, default=20000, help="History values per variable")
+    parser.add_argument("--page-size", type=int, default=10000)
+    parser.add_argument("--history-tags", type=int, default=4, help="Tags read concurrently")
+    parser.add_argument("--downtime", type=float, default=3.0, help="Seconds the server is stopped")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--port", type=int, default=48410)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    started = time.perf_counter()
+    sim = SimulatedHistorian(args.systems, args.tags, args.points, port=args.port).start()
+    print(f"Simulated historian: {len(sim.tag_node_ids)} tags x {args.points} points "
+          f"(started in {time.perf_counter() - started:.1f} s)")
+
+    manager = OPCSessionManager(client_factory=lambda: Client(sim.url))
+    try:
+        bench_sessions(sim, args.repeat)
+        bench_browse(sim, manager, args.repeat)
+        bench_history(sim, manager, args.page_size, args.history_tags)
+        manager.close_all()
+        bench_reconnect(sim, args.downtime)
+    finally:
+        manager.close_all()
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Batched OPC UA browsing with a TTL cache.
+
+One Browse call returns the children (with browse name and node class) of every requested parent, and one
+Read call fetches the AccessLevel of all variable children, so a folder level costs two round-trips no
+matter how many nodes it holds. Results are cached per parent for BROWSE_CACHE_TTL seconds.
+"""
+import threading
+import time
+
+from opcua import ua
+
+BROWSE_CACHE_TTL = 300  # Seconds a parent's children are reused before browsing again
+MAX_NODES_PER_CALL = 500  # Split very wide requests to stay under server operation limits
+
+_cache = {}  # {parent node id: (expires_at, [child dicts])}
+_cache_lock = threading.Lock()
+
+
+def clear_browse_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def _chunks(items, size=MAX_NODES_PER_CALL):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _browse_references(client, parent_ids):
+    """ One Browse (plus BrowseNext for continuation points) for all parents. """
+    references = {}
+    for chunk in _chunks(parent_ids):
+        params = ua.BrowseParameters()
+        params.View.Timestamp = ua.get_win_epoch()
+        params.RequestedMaxReferencesPerNode = 0
+        for parent_id in chunk:
+            desc = ua.BrowseDescription()
+            desc.NodeId = ua.NodeId.from_string(parent_id)
+            desc.BrowseDirection = ua.BrowseDirection.Forward
+            desc.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+            desc.IncludeSubtypes = True
+            desc.NodeClassMask = ua.NodeClass.Unspecified
+            desc.ResultMask = ua.BrowseResultMask.All
+            params.NodesToBrowse.append(desc)
+
+        results = client.uaclient.browse(params)
+        pending = {}
+        for parent_id, result in zip(chunk, results):
+            references[parent_id] = list(result.References)
+            if result.ContinuationPoint:
+                pending[result.ContinuationPoint] = parent_id
+
+        # Large folders come back in pages; fetch the remaining pages for all parents together
+        while pending:
+            next_params = ua.BrowseNextParameters()
+            next_params.ReleaseContinuationPoints = False
+            next_params.ContinuationPoints = list(pending)
+            next_results = client.uaclient.browse_next(next_params)
+            still_pending = {}
+            for point, result in zip(next_params.ContinuationPoints, next_results):
+                parent_id = pending[point]
+                references[parent_id].extend(result.References)
+                if result.ContinuationPoint:
+                    still_pending[result.ContinuationPoint] = parent_id
+            pending = still_pending
+    return references
+
+
+def _read_access_levels(client, node_ids):
+    """ One Read of AccessLevel for all variable nodes. """
+    levels = {}
+    for chunk in _chunks(node_ids):
+        params = ua.ReadParameters()
+        for node_id in chunk:
+            rv = ua.ReadValueId()
+            rv.NodeId = ua.NodeId.from_string(node_id)
+            rv.AttributeId = ua.AttributeIds.AccessLevel
+            params.NodesToRead.append(rv)
+        for node_id, data_value in zip(chunk, client.uaclient.read(params)):
+            levels[node_id] = data_value.Value.Value if data_value.StatusCode.is_good() else 0
+    return levels
+
+
+def fetch_children(client, parent_ids, use_cache=True):
+    """
+    Children of several parents at once.
+    :return: {parent node id: [{"node_id", "name", "node_class", "is_folder", "is_endpoint", "historizing"}]}
+    """
+    now = time.monotonic()
+    children, missing = {}, []
+    with _cache_lock:
+        for parent_id in dict.fromkeys(parent_ids):
+            cached = _cache.get(parent_id) if use_cache else None
+            if cached and cached[0] > now:
+                children[parent_id] = cached[1]
+            else:
+                missing.append(parent_id)
+
+    if not missing:
+        return children
+
+    references = _browse_references(client, missing)
+    variable_ids = [
+        ref.NodeId.to_string()
+        for refs in references.values() for ref in refs
+        if ref.NodeClass == ua.NodeClass.Variable
+    ]
+    access_levels = _read_access_levels(client, variable_ids) if variable_ids else {}
+
+    expires_at = time.monotonic() + BROWSE_CACHE_TTL
+    with _cache_lock:
+        for parent_id, refs in references.items():
+            entries = []
+            for ref in refs:
+                node_id = ref.NodeId.to_string()
+                access_level = access_levels.get(node_id, 0)
+                entries.append({
+                    "node_id": node_id,
+                    "name": ref.BrowseName.Name,
+                    "node_class": ref.NodeClass.name,
+                    "is_folder": ref.NodeClass == ua.NodeClass.Object,
+                    "is_endpoint": bool(access_level & ua.AccessLevel.CurrentRead.mask),
+                    "historizing": bool(access_level & ua.AccessLevel.HistoryRead.mask),
+                })
+            _cache[parent_id] = (expires_at, entries)
+            children[parent_id] = entries
+    return children
+
+
+def fetch_visible_tree(client, root_id, expanded_ids):
+    """
+    Children of the root and of every expanded folder that is actually visible, fetched level by level:
+    each level is one batched Browse + Read, and cached levels cost nothing.
+    :return: {parent node id: [child dicts]}
+    """
+    expanded_ids = set(expanded_ids or [])
+    tree = {}
+    level = [root_id]
+    while level:
+        fetched = fetch_children(client, level)
+        tree.update(fetched)
+        level = [
+            child["node_id"]
+            for parent_id in level for child in fetched.get(parent_id, [])
+            if child["is_folder"] and child["node_id"] in expanded_ids and child["node_id"] not in tree
+        ]
+    return tree
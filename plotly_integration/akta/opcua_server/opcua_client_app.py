@@ -1,20 +1,24 @@
 import dash
-from dash import dcc, html, Input, Output, State, dash_table, ALL
+from dash import dcc, html, Input, Output, State, ALL
 from django_plotly_dash import DjangoDash
-import pandas as pd
+import numpy as np
 import plotly.graph_objs as go
-from opcua import Client, ua
+from plotly.subplots import make_subplots
+from opcua import ua
 from datetime import datetime, timedelta
 import json
-import os
 from dash.exceptions import PreventUpdate
+from plotly_integration.akta.opcua_server.opcua_session import opc_sessions
+from plotly_integration.akta.opcua_server.opcua_browse import fetch_visible_tree, clear_browse_cache
+from plotly_integration.akta.opcua_server.opcua_history import (
+    start_history_export, get_history_export, cancel_history_export,
+    read_aligned_history, save_export_frame, export_path, PREVIEW_MAX_POINTS
+)
+from plotly_integration.akta.akta_app.akta_processing import decimate_min_max
+from plotly_integration.akta.opcua_server.opcua_live import live_monitor
+from plotly_integration.models import HistorianTag
 
-# OPC UA Configuration
-PKI_DIR = r"C:\Users\cdallarosa\DataAlchemy\PythonProject1\pki"
-CLIENT_CERT = os.path.join(PKI_DIR, "own/certs/OWN.cer")
-CLIENT_KEY = os.path.join(PKI_DIR, "own/private/uaexpert_privatekey.pem")
-SERVER_CERT = os.path.join(PKI_DIR, "trusted/certs/HDAServer [84CD0A9C66CC7AA72575C3DBBDCFF83B0F84BCC1].der")
-SERVER_URL = "opc.tcp://opcsrv:60434/OPC/HistoricalAccessServer"
+# OPC UA Configuration (server, certificates and credentials live in opcua_utils)
 CUSTOM_ROOT_PATH = "ns=2;s=2:Archive/OPCuser/Folders"
 
 # Initialize the Dash app
@@ -22,18 +26,6 @@ app = DjangoDash("OPCBrowserApp", suppress_callback_exceptions=True)
 
 
 # ====================== OPC UA Helper Functions ======================
-def get_opc_client():
-    """Create and configure an OPC UA client with security settings"""
-    client = Client(SERVER_URL)
-    client.application_uri = "urn:SI-CF8MJX3:UnifiedAutomation:UaExpert"
-    client.set_security_string(f"Basic256Sha256,SignAndEncrypt,{CLIENT_CERT},{CLIENT_KEY},{SERVER_CERT}")
-    client.set_user("OPCuser")
-    client.set_password("OPCuser_710l")
-    client.session_timeout = 30000
-    client.uaclient.timeout = 30000
-    return client
-
-
 def browse_node(node):
     """Get children of a node with error handling"""
     try:
@@ -43,23 +35,15 @@ def browse_node(node):
         return []
 
 
-def read_historical_data(node, start_time=None, end_time=None, days=1):
-    """Read historical data from a node with time range"""
-    if start_time is None or end_time is None:
-        end_time = datetime.utcnow()
-        start_time = end_time - timedelta(days=days)
-
-    try:
-        history = node.read_raw_history(starttime=start_time, endtime=end_time)
-        return [(entry.SourceTimestamp, entry.Value.Value, entry.StatusCode.name)
-                for entry in history if entry.Value.Value is not None]
-    except Exception as e:
-        print(f"Error reading history: {e}")
-        return []
+_custom_root_id = None
 
 
 def get_custom_root_node(client):
-    """Navigate to the custom starting node path"""
+    """Navigate to the custom starting node path (resolved once per process)"""
+    global _custom_root_id
+    if _custom_root_id:
+        return client.get_node(_custom_root_id)
+
     try:
         path_components = CUSTOM_ROOT_PATH.split('/')
         current_node = client.get_node(path_components[0])
@@ -67,6 +51,7 @@ def get_custom_root_node(client):
         for component in path_components[1:]:
             current_node = current_node.get_child(["2:" + component])
 
+        _custom_root_id = current_node.nodeid.to_string()
         return current_node
     except Exception as e:
         print(f"Error navigating to custom root: {e}")
@@ -81,65 +66,47 @@ def get_default_time_range(days=1):
     return start_time.strftime('%Y-%m-%d %H:%M:%S'), end_time.strftime('%Y-%m-%d %H:%M:%S')
 
 
-def is_endpoint_node(node):
-    """Check if a node is an endpoint (has a value)"""
-    try:
-        node.get_value()
-        return True
-    except:
-        return False
-
-
-def render_tree(node, client, level=0, expanded_nodes=None):
-    """Recursively render the OPC UA node tree"""
+def render_tree(node_id, tree, level=0, expanded_nodes=None):
+    """Render the OPC UA node tree from batched browse results (see opcua_browse.fetch_visible_tree)"""
     if expanded_nodes is None:
         expanded_nodes = set()
 
-    children = browse_node(node)
     items = []
-    for child in children:
-        try:
-            name = child.get_browse_name().Name
-            node_id = child.nodeid.to_string()
-            node_class = child.get_node_class()
-            is_folder = node_class == ua.NodeClass.Object
-            is_endpoint = is_endpoint_node(child) if not is_folder else False
-
-            # Create expand/collapse button for folders
-            if is_folder:
-                expanded = node_id in expanded_nodes
-                button = html.Span(
-                    "▶" if not expanded else "▼",
-                    style={"cursor": "pointer", "marginRight": "5px"}
-                )
-            else:
-                button = html.Span(" ", style={"marginRight": "15px"})
-
-            # Different icons for different node types
-            icon = "📁" if is_folder else ("🔌" if is_endpoint else "📄")
-
-            label = html.Div(
-                [button, html.Span(f"{icon} {name}")],
-                id={'type': 'opc-node', 'node_id': node_id},
-                n_clicks=0,
-                style={
-                    "marginLeft": f"{level * 10}px",
-                    "cursor": "pointer",
-                    "padding": "3px",
-                    "userSelect": "none",
-                    "borderBottom": "1px solid #eee",
-                    "backgroundColor": "#fff" if level % 2 == 0 else "#f9f9f9"
-                }
+    for child in tree.get(node_id, []):
+        child_id = child["node_id"]
+        is_folder = child["is_folder"]
+
+        # Create expand/collapse button for folders
+        if is_folder:
+            expanded = child_id in expanded_nodes
+            button = html.Span(
+                "▶" if not expanded else "▼",
+                style={"cursor": "pointer", "marginRight": "5px"}
             )
-            items.append(label)
-
-            # Recursively add children if expanded
-            if is_folder and node_id in expanded_nodes:
-                items.extend(render_tree(child, client, level + 1, expanded_nodes))
+        else:
+            button = html.Span(" ", style={"marginRight": "15px"})
+
+        # Different icons for different node types
+        icon = "📁" if is_folder else ("🔌" if child["is_endpoint"] else "📄")
+
+        label = html.Div(
+            [button, html.Span(f"{icon} {child['name']}")],
+            id={'type': 'opc-node', 'node_id': child_id},
+            n_clicks=0,
+            style={
+                "marginLeft": f"{level * 10}px",
+                "cursor": "pointer",
+                "padding": "3px",
+                "userSelect": "none",
+                "borderBottom": "1px solid #eee",
+                "backgroundColor": "#fff" if level % 2 == 0 else "#f9f9f9"
+            }
+        )
+        items.append(label)
 
-        except Exception as e:
-            print(f"Error rendering node {child}: {e}")
-            continue
+        # Add children if expanded (already fetched for every visible expanded folder)
+        if is_folder and child_id in expanded_nodes:
+            items.extend(render_tree(child_id, tree, level + 1, expanded_nodes))
 
     if not items:
         items.append(html.Div("(Empty)", style={
@@ -216,6 +183,8 @@ app.layout = html.Div([
                     html.Button("Download CSV", id="btn-csv"),
                 ], style={'marginBottom': '15px'}),
 
+                html.Div(id="history-status", style={'color': '#555', 'marginBottom': '5px'}),
+                html.Div(id="history-progress", style={'color': '#555', 'marginBottom': '10px'}),
                 html.Div(id="data-preview", style={
                     'border': '1px solid #ddd',
                     'borderRadius': '5px',
@@ -224,8 +193,54 @@ app.layout = html.Div([
                     'backgroundColor': '#fff'
                 }),
 
+                html.H4("Tag Comparison", style={'marginTop': '20px'}),
+                html.Div([
+                    html.Button("Add Selected Tag", id="add-tag-btn", style={'marginRight': '10px'}),
+                    dcc.Dropdown(id="compare-tags", options=[], value=[], multi=True,
+                                 placeholder="Add tags from the tree to compare them",
+                                 style={'flex': '1'}),
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
+                html.Div([
+                    html.Label("Time grid:", style={'marginRight': '5px'}),
+                    dcc.Dropdown(
+                        id="compare-grid",
+                        options=[{"label": "Auto", "value": "auto"}] + [
+                            {"label": label, "value": step} for label, step in
+                            [("1 s", "1s"), ("10 s", "10s"), ("1 min", "1min"), ("10 min", "10min"), ("1 h", "1h")]
+                        ],
+                        value="auto", clearable=False, style={'width': '120px', 'marginRight': '10px'}
+                    ),
+                    html.Button("Read Selected Tags", id="read-tags-btn", style={'marginRight': '10px'}),
+                    html.Button("Download Aligned CSV", id="btn-tags-csv", style={'marginRight': '10px'}),
+                    html.Button("Ingest Selected Tag", id="add-historian-btn"),
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '5px'}),
+                html.Div(id="historian-status", style={'color': '#555', 'marginBottom': '10px'}),
+                dcc.Loading(html.Div(id="compare-preview", style={
+                    'border': '1px solid #ddd',
+                    'borderRadius': '5px',
+                    'padding': '15px',
+                    'minHeight': '100px',
+                    'backgroundColor': '#fff'
+                })),
+
+                html.H4("Live Values", style={'marginTop': '20px'}),
+                html.Div([
+                    html.Button("Start Live", id="live-start-btn", style={'marginRight': '10px'}),
+                    html.Button("Stop Live", id="live-stop-btn", style={'marginRight': '10px'}),
+                    html.Span("Monitors the tags selected under Tag Comparison", style={'color': 'gray'}),
+                ], style={'marginBottom': '10px'}),
+                html.Div(id="live-status", style={'color': '#555', 'marginBottom': '10px'}),
+                dcc.Graph(id="live-graph", figure=go.Figure(), style={'height': '400px'}),
+                dcc.Interval(id="live-interval", interval=1000, disabled=True),
+                dcc.Store(id="live-state"),
+                dcc.Store(id="live-cursors"),
+
                 dcc.Download(id="download-data"),
+                dcc.Download(id="download-tags"),
+                dcc.Store(id="compare-export-token"),
                 dcc.Store(id="selected-node-id"),
+                dcc.Store(id="history-job-id"),
+                dcc.Interval(id="history-poll", interval=1000, disabled=True),
                 dcc.Store(id="expanded-nodes", data=[]),
                 dcc.Store(id='tree-data')
             ], style={"width": "100%"})
@@ -242,18 +257,15 @@ app.layout = html.Div([
 )
 def update_connection_status(_):
     try:
-        client = get_opc_client()
-        client.connect()
-
-        try:
-            root = client.get_root_node()
-            server_node = root.get_child(["0:Objects", "0:Server"])
-            server_name = server_node.get_child("0:ServerArray").get_value()[0]
-            status_text = f"✔ Connected to OPC UA Server: {server_name}"
-        except:
-            status_text = "✔ Connected to OPC UA Server"
-
-        client.disconnect()
+        with opc_sessions.session() as client:
+            try:
+                root = client.get_root_node()
+                server_node = root.get_child(["0:Objects", "0:Server"])
+                server_name = server_node.get_child("0:ServerArray").get_value()[0]
+                status_text = f"✔ Connected to OPC UA Server: {server_name}"
+            except ua.UaError:
+                status_text = "✔ Connected to OPC UA Server"
+
         return status_text, {'backgroundColor': '#d4edda', 'color': '#155724'}
     except Exception as e:
         return f"✖ Connection Error: {str(e)}", {'backgroundColor': '#f8d7da', 'color': '#721c24'}
@@ -263,28 +275,28 @@ def update_connection_status(_):
     Output("opc-tree", "children"),
     Output("tree-data", "data"),
     Input("refresh-tree-btn", "n_clicks"),
-    Input("collapse-all-btn", "n_clicks"),
-    State("expanded-nodes", "data")
+    Input("expanded-nodes", "data")  # Also cleared by Collapse All
 )
-def update_tree(refresh_clicks, collapse_clicks, expanded_nodes):
+def update_tree(refresh_clicks, expanded_nodes):
     ctx = dash.callback_context
     trigger_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
 
-    if trigger_id == 'collapse-all-btn':
-        return [], []
+    if trigger_id == 'refresh-tree-btn':
+        clear_browse_cache()
 
     try:
-        client = get_opc_client()
-        client.connect()
-        root = get_custom_root_node(client)
+        with opc_sessions.session() as client:
+            root = get_custom_root_node(client)
 
-        if not root:
-            return [html.Div("Error: Custom root path not found", style={"color": "red"})], None
+            if not root:
+                return [html.Div("Error: Custom root path not found", style={"color": "red"})], None
 
-        tree = render_tree(root, client, 0, set(expanded_nodes or []))
-        client.disconnect()
+            # Only the root and the visible expanded folders are browsed; cached levels are reused
+            root_id = root.nodeid.to_string()
+            expanded = set(expanded_nodes or [])
+            tree = fetch_visible_tree(client, root_id, expanded)
 
-        return tree, {'root_id': root.nodeid.to_string()}
+        return render_tree(root_id, tree, 0, expanded), {'root_id': root_id}
     except Exception as e:
         return [html.Div(f"Error loading tree: {str(e)}", style={"color": "red"})], None
 
@@ -296,7 +308,7 @@ def update_tree(refresh_clicks, collapse_clicks, expanded_nodes):
 )
 def store_selected_node(clicks, ids):
     ctx = dash.callback_context
-    if not ctx.triggered:
+    if not ctx.triggered or not ctx.triggered[0]['value']:
         raise PreventUpdate
 
     clicked_id = json.loads(ctx.triggered[0]['prop_id'].split('.')[0])
@@ -306,14 +318,22 @@ def store_selected_node(clicks, ids):
 @app.callback(
     Output("expanded-nodes", "data"),
     Input({'type': 'opc-node', 'node_id': ALL}, 'n_clicks'),
+    Input("collapse-all-btn", "n_clicks"),
     State({'type': 'opc-node', 'node_id': ALL}, 'id'),
     State("expanded-nodes", "data")
 )
-def toggle_node_expansion(clicks, ids, expanded_nodes):
+def toggle_node_expansion(clicks, collapse_clicks, ids, expanded_nodes):
     ctx = dash.callback_context
     if not ctx.triggered:
         raise PreventUpdate
 
+    if ctx.triggered[0]['prop_id'] == 'collapse-all-btn.n_clicks':
+        return []
+
+    # Re-rendering the tree creates fresh nodes with n_clicks=0; only real clicks toggle
+    if not ctx.triggered[0]['value']:
+        raise PreventUpdate
+
     clicked_id = json.loads(ctx.triggered[0]['prop_id'].split('.')[0])
     node_id = clicked_id['node_id']
 
@@ -332,22 +352,19 @@ def show_node_info(node_id):
         return "Select a node to view its information."
 
     try:
-        client = get_opc_client()
-        client.connect()
-        node = client.get_node(node_id)
-
-        info = {
-            'Name': node.get_browse_name().Name,
-            'Node ID': node_id,
-            'Node Class': str(node.get_node_class()).split('.')[-1],
-            'Data Type': getattr(node.get_data_type(), 'to_string', lambda: "N/A")(),
-            'Value': getattr(node, 'get_value', lambda: "N/A")(),
-            'Access Level': getattr(node, 'get_access_level', lambda: "N/A")(),
-            'Historizing': getattr(node.get_attribute(ua.AttributeIds.Historizing).Value, 'Value', "N/A"),
-            'Description': getattr(node.get_description(), 'Text', "N/A")
-        }
-
-        client.disconnect()
+        with opc_sessions.session() as client:
+            node = client.get_node(node_id)
+
+            info = {
+                'Name': node.get_browse_name().Name,
+                'Node ID': node_id,
+                'Node Class': str(node.get_node_class()).split('.')[-1],
+                'Data Type': getattr(node.get_data_type(), 'to_string', lambda: "N/A")(),
+                'Value': getattr(node, 'get_value', lambda: "N/A")(),
+                'Access Level': getattr(node, 'get_access_level', lambda: "N/A")(),
+                'Historizing': getattr(node.get_attribute(ua.AttributeIds.Historizing).Value, 'Value', "N/A"),
+                'Description': getattr(node.get_description(), 'Text', "N/A")
+            }
 
         return html.Div([
             html.Table([html.Tr([html.Td(k + ":"), html.Td(str(v))]) for k, v in info.items()],
@@ -358,91 +375,290 @@ def show_node_info(node_id):
 
 
 @app.callback(
-    Output("data-preview", "children"),
-    Output("download-data", "data"),
+    Output("history-job-id", "data"),
+    Output("history-status", "children"),
     Input("read-data-btn", "n_clicks"),
     State("selected-node-id", "data"),
     State("start-time", "value"),
     State("end-time", "value"),
+    State("history-job-id", "data"),
     prevent_initial_call=True
 )
-def read_data(n_clicks, node_id, start_time, end_time):
+def read_data(n_clicks, node_id, start_time, end_time, previous_job_id):
     if not node_id:
-        return html.Div("Please select a node first", style={"color": "red"}), None
+        return dash.no_update, html.Div("Please select a node first", style={"color": "red"})
 
+    note = ""
     if not start_time or not end_time:
-        default_start, default_end = get_default_time_range()
-        return html.Div([
-            html.P("Using default time range (last 24 hours)", style={"color": "gray"}),
-            html.P(f"Start: {default_start}"),
-            html.P(f"End: {default_end}"),
-            html.Button("Read Data with Default Range", id="read-default-btn")
-        ]), None
+        start_time, end_time = get_default_time_range()
+        note = " (default range: last 24 hours)"
 
     try:
         start_dt = datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S')
         end_dt = datetime.strptime(end_time, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return dash.no_update, "Invalid date format. Use YYYY-MM-DD HH:MM:SS"
 
-        client = get_opc_client()
-        client.connect()
-        node = client.get_node(node_id)
+    try:
+        with opc_sessions.session() as client:
+            try:
+                if not client.get_node(node_id).get_attribute(ua.AttributeIds.Historizing).Value.Value:
+                    return dash.no_update, "Node is not configured for historizing"
+            except ua.UaError:
+                return dash.no_update, "Historizing not supported for this node"
+    except Exception as e:
+        return dash.no_update, f"Error reading data: {str(e)}"
 
-        try:
-            if not node.get_attribute(ua.AttributeIds.Historizing).Value.Value:
-                return "Node is not configured for historizing", None
-        except:
-            return "Historizing not supported for this node", None
+    # The history is paged into a CSV file in the background; the poll below plots the preview as it grows
+    if previous_job_id:
+        cancel_history_export(previous_job_id)
+    job = start_history_export(node_id, start_dt, end_dt)
+    return job.job_id, f"Reading {start_time} – {end_time}{note}..."
 
-        history = read_historical_data(node, start_dt, end_dt)
-        client.disconnect()
 
-        if not history:
-            return "No historical data available", None
+@app.callback(
+    Output("data-preview", "children"),
+    Output("history-progress", "children"),
+    Output("history-poll", "disabled"),
+    Input("history-poll", "n_intervals"),
+    Input("history-job-id", "data"),  # A new job (re)starts polling
+    prevent_initial_call=True
+)
+def poll_history_export(n_intervals, job_id):
+    job = get_history_export(job_id) if job_id else None
+    if job is None:
+        return dash.no_update, "Export expired, please read the data again", True
+
+    status = f"{job.rows:,} rows read ({job.progress:.0%}, {job.rows_per_second:,.0f} rows/s)"
+    finished = job.state != "running"
+    if job.state == "done":
+        status += " – complete, CSV ready to download"
+    elif job.state == "cancelled":
+        status += " – cancelled"
+    elif job.state == "failed":
+        return dash.no_update, html.Div(f"Error reading data: {job.error}", style={"color": "red"}), True
+
+    x, y = job.preview()
+    if finished and not job.rows:
+        return "No historical data available", status, True
+    if not len(x):
+        preview = "Values are not numeric; download the CSV to view them" if finished else dash.no_update
+        return preview, status, finished
+
+    fig = go.Figure(data=[go.Scattergl(x=x, y=y, mode='lines')])
+    fig.update_layout(
+        title=f"Historical Data for {job.node_id}",
+        xaxis_title="Time", yaxis_title="Value",
+        uirevision=job.job_id
+    )
+    note = f"Preview of {len(x):,} of {job.numeric_rows:,} points (min/max decimated)"
+    return html.Div([
+        dcc.Graph(figure=fig),
+        html.P(note, style={"color": "gray"})
+    ]), status, finished
 
-        df = pd.DataFrame(history, columns=["Timestamp", "Value", "Status"])
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
 
-        fig = go.Figure(data=[go.Scatter(
-            x=df['Timestamp'], y=df['Value'], mode='lines+markers'
-        )])
-        fig.update_layout(
-            title=f"Historical Data for {node.get_browse_name().Name}",
-            xaxis_title="Time", yaxis_title="Value"
-        )
+@app.callback(
+    Output("download-data", "data"),
+    Input("btn-csv", "n_clicks"),
+    State("history-job-id", "data"),
+    prevent_initial_call=True
+)
+def download_history(n_clicks, job_id):
+    job = get_history_export(job_id) if job_id else None
+    if job is None or job.state != "done":
+        raise PreventUpdate
+    return dcc.send_file(job.path, filename=f"opc_data_{job.node_id.replace(':', '_').replace(';', '_')}.csv")
 
-        table = dash_table.DataTable(
-            id='history-table',
-            columns=[{"name": i, "id": i} for i in df.columns],
-            data=df.to_dict('records'),
-            page_size=10,
-            style_table={'overflowX': 'auto'}
-        )
 
-        return html.Div([
-            dcc.Graph(figure=fig),
-            html.H5("Raw Data", style={'marginTop': '20px'}),
-            table
-        ]), dcc.send_data_frame(df.to_csv, filename=f"opc_data_{node_id.replace(':', '_')}.csv")
+@app.callback(
+    Output("compare-tags", "options"),
+    Output("compare-tags", "value"),
+    Input("add-tag-btn", "n_clicks"),
+    State("selected-node-id", "data"),
+    State("compare-tags", "options"),
+    State("compare-tags", "value"),
+    prevent_initial_call=True
+)
+def add_compare_tag(n_clicks, node_id, options, selected):
+    options, selected = options or [], selected or []
+    if not node_id or node_id in selected:
+        raise PreventUpdate
 
+    try:
+        with opc_sessions.session() as client:
+            name = client.get_node(node_id).get_browse_name().Name
+    except Exception:
+        name = node_id
+
+    if any(option["label"] == name for option in options):
+        name = f"{name} ({node_id})"
+    if not any(option["value"] == node_id for option in options):
+        options.append({"label": name, "value": node_id})
+    return options, selected + [node_id]
+
+
+@app.callback(
+    Output("compare-preview", "children"),
+    Output("compare-export-token", "data"),
+    Input("read-tags-btn", "n_clicks"),
+    State("compare-tags", "value"),
+    State("compare-tags", "options"),
+    State("compare-grid", "value"),
+    State("start-time", "value"),
+    State("end-time", "value"),
+    prevent_initial_call=True
+)
+def read_compare_tags(n_clicks, node_ids, options, grid, start_time, end_time):
+    if not node_ids:
+        return html.Div("Add at least one tag first", style={"color": "red"}), None
+    if not start_time or not end_time:
+        start_time, end_time = get_default_time_range()
+
+    try:
+        start_dt = datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S')
+        end_dt = datetime.strptime(end_time, '%Y-%m-%d %H:%M:%S')
     except ValueError:
         return "Invalid date format. Use YYYY-MM-DD HH:MM:SS", None
+
+    labels = {option["value"]: option["label"] for option in options or []}
+    tags = {labels.get(node_id, node_id): node_id for node_id in node_ids}
+
+    try:
+        # Tags are read concurrently over the session pool and as-of joined onto one grid
+        wide, raw_counts = read_aligned_history(tags, start_dt, end_dt, None if grid == "auto" else grid)
     except Exception as e:
-        return f"Error reading data: {str(e)}", None
+        return html.Div(f"Error reading tags: {str(e)}", style={"color": "red"}), None
+
+    if wide.empty or wide.isna().all().all():
+        return "No historical data available", None
+
+    # Plot a min/max decimation of the wide frame; the export keeps every grid row
+    x_ns = wide.index.asi8.astype(np.float64)
+    x_dec, y_dec = decimate_min_max(x_ns, wide.to_numpy(dtype=np.float64), PREVIEW_MAX_POINTS)
+    x_dec = x_dec.astype(np.int64).astype("datetime64[ns]")
+
+    fig = make_subplots(rows=len(tags), cols=1, shared_xaxes=True, vertical_spacing=0.03,
+                        subplot_titles=list(tags))
+    for i, name in enumerate(tags):
+        fig.add_trace(go.Scattergl(x=x_dec, y=y_dec[:, i], mode='lines', name=name), row=i + 1, col=1)
+    fig.update_layout(height=220 * len(tags) + 80, showlegend=False, margin=dict(t=40, b=30))
+
+    step = wide.index[1] - wide.index[0] if len(wide) > 1 else None
+    note = (f"{len(wide):,} rows on a {step} grid from "
+            + ", ".join(f"{name}: {raw_counts[name]:,} samples" for name in tags))
+    return html.Div([
+        dcc.Graph(figure=fig),
+        html.P(note, style={"color": "gray"})
+    ]), save_export_frame(wide)
 
 
-# Initial tree load
 @app.callback(
-    Output("opc-tree", "children", allow_duplicate=True),
-    Input("url", "pathname"),
+    Output("download-tags", "data"),
+    Input("btn-tags-csv", "n_clicks"),
+    State("compare-export-token", "data"),
     prevent_initial_call=True
 )
-def load_tree(_):
+def download_compare_tags(n_clicks, token):
+    if not token:
+        raise PreventUpdate
     try:
-        client = get_opc_client()
-        client.connect()
-        root = get_custom_root_node(client)
-        tree = render_tree(root, client) if root else [html.Div("Custom root path not found", style={"color": "red"})]
-        client.disconnect()
-        return tree
+        return dcc.send_file(export_path(token), filename="opc_aligned_tags.csv")
+    except (ValueError, OSError):
+        raise PreventUpdate
+
+
+@app.callback(
+    Output("historian-status", "children"),
+    Input("add-historian-btn", "n_clicks"),
+    State("selected-node-id", "data"),
+    prevent_initial_call=True
+)
+def add_historian_tag(n_clicks, node_id):
+    if not node_id:
+        return html.Div("Please select a node first", style={"color": "red"})
+
+    try:
+        with opc_sessions.session() as client:
+            name = client.get_node(node_id).get_browse_name().Name
+    except Exception:
+        name = node_id
+
+    # Picked up by the next `manage.py ingest_historian` pass
+    tag, created = HistorianTag.objects.get_or_create(node_id=node_id, defaults={"name": name})
+    if created:
+        return f"{name} added to the historian ingestion list"
+    if tag.watermark:
+        return f"{name} is already ingested (up to {tag.watermark:%Y-%m-%d %H:%M:%S} UTC)"
+    return f"{name} is already on the ingestion list"
+
+
+LIVE_MAX_POINTS = 5000  # Points kept per trace in the browser
+
+
+@app.callback(
+    Output("live-graph", "figure"),
+    Output("live-state", "data"),
+    Output("live-interval", "disabled"),
+    Output("live-status", "children"),
+    Input("live-start-btn", "n_clicks"),
+    Input("live-stop-btn", "n_clicks"),
+    State("compare-tags", "value"),
+    State("compare-tags", "options"),
+    prevent_initial_call=True
+)
+def toggle_live(start_clicks, stop_clicks, node_ids, options):
+    ctx = dash.callback_context
+    if ctx.triggered[0]['prop_id'] == 'live-stop-btn.n_clicks':
+        # Subscriptions nobody polls are dropped by the monitor after its idle timeout
+        return dash.no_update, None, True, "Live mode stopped"
+    if not node_ids:
+        return dash.no_update, None, True, html.Div("Add tags under Tag Comparison first", style={"color": "red"})
+
+    try:
+        cursors = live_monitor.watch(node_ids)
     except Exception as e:
-        return [html.Div(f"Error loading tree: {str(e)}", style={"color": "red"})]
\ No newline at end of file
+        return dash.no_update, None, True, html.Div(f"Error subscribing: {str(e)}", style={"color": "red"})
+
+    # Empty traces in node order; the poll below only appends to them
+    labels = {option["value"]: option["label"] for option in options or []}
+    fig = go.Figure([go.Scattergl(x=[], y=[], mode='lines', name=labels.get(node_id, node_id)) for node_id in node_ids])
+    fig.update_layout(xaxis_title="Time", yaxis_title="Value", uirevision="live",
+                      legend=dict(orientation="h", y=-0.2))
+    status = f"Monitoring {len(cursors)} of {len(node_ids)} tags"
+    return fig, {"node_ids": node_ids, "started": datetime.utcnow().isoformat()}, False, status
+
+
+@app.callback(
+    Output("live-graph", "extendData"),
+    Output("live-cursors", "data"),
+    Input("live-interval", "n_intervals"),
+    State("live-state", "data"),
+    State("live-cursors", "data"),
+    prevent_initial_call=True
+)
+def poll_live_values(n_intervals, state, previous):
+    if not state:
+        raise PreventUpdate
+
+    # Cursors from an earlier Start belong to a figure that has since been replaced
+    node_ids = state["node_ids"]
+    cursors = previous["cursors"] if previous and previous["started"] == state["started"] else {}
+    try:
+        cursors = live_monitor.watch(node_ids, cursors)  # Re-subscribes after a dropped session
+        updates, cursors = live_monitor.read_since(cursors)
+    except Exception:
+        raise PreventUpdate
+    if not updates:
+        raise PreventUpdate
+
+    # Only the new samples travel to the browser
+    xs, ys, trace_indices = [], [], []
+    for i, node_id in enumerate(node_ids):
+        if node_id in updates:
+            timestamps, values = updates[node_id]
+            xs.append(np.datetime_as_string(timestamps, unit="ms").tolist())
+            ys.append(np.where(np.isnan(values), None, values).tolist())
+            trace_indices.append(i)
+
+    return [{"x": xs, "y": ys}, trace_indices, LIVE_MAX_POINTS], {"started": state["started"], "cursors": cursors}
@@ -0,0 +1,336 @@
+"""
+Paged OPC UA history reads with a background CSV export.
+
+Long ranges are split into HISTORY_WINDOW time windows and every window is read in pages of
+HISTORY_PAGE_SIZE values, following the server's continuation points. Pages come back as compact
+numpy columns and are never held all at once:
+
+    for page in iter_history_pages(node_id, start, end):
+        page.timestamps, page.values, page.status  # datetime64[ns], float64 (NaN if not numeric), uint32
+
+start_history_export() runs this in a background thread, appending each page to a CSV file on disk
+while keeping a min/max-decimated preview that the browser can poll and plot as the read progresses.
+read_aligned_history() reads several tags concurrently and as-of joins them onto one time grid.
+"""
+import concurrent.futures
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from opcua import ua
+
+from plotly_integration.akta.akta_app.akta_processing import decimate_min_max
+from plotly_integration.akta.opcua_server.opcua_session import opc_sessions
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PAGE_SIZE = 10000  # Values requested per HistoryRead call
+HISTORY_WINDOW = timedelta(days=1)  # Time span per window; one pooled session is borrowed per window
+PREVIEW_MAX_POINTS = 4000  # Points kept in the plotted preview
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "opcua_exports")
+EXPORT_RETENTION = 6 * 3600  # Seconds finished export files are kept on disk
+MAX_GRID_POINTS = 200000  # Upper bound on rows of an aligned multi-tag frame
+GRID_STEPS = ["1s", "2s", "5s", "10s", "30s", "1min", "5min", "10min", "30min", "1h", "6h", "1D"]
+
+HistoryPage = namedtuple("HistoryPage", ["timestamps", "values", "status"])
+
+
+# ====================== Paged reads ======================
+def _history_read(client, node_id, start, end, page_size, continuation_point=None, release=False):
+    """ One raw HistoryRead call. :return: (DataValues, continuation point or None) """
+    details = ua.ReadRawModifiedDetails()
+    details.IsReadModified = False
+    details.StartTime = start
+    details.EndTime = end
+    details.NumValuesPerNode = page_size
+    details.ReturnBounds = False
+
+    value_id = ua.HistoryReadValueId()
+    value_id.NodeId = ua.NodeId.from_string(node_id)
+    value_id.IndexRange = ''
+    value_id.ContinuationPoint = continuation_point
+
+    params = ua.HistoryReadParameters()
+    params.HistoryReadDetails = details
+    params.TimestampsToReturn = ua.TimestampsToReturn.Both
+    params.ReleaseContinuationPoints = release
+    params.NodesToRead.append(value_id)
+
+    result = client.uaclient.history_read(params)[0]
+    result.StatusCode.check()
+    data_values = result.HistoryData.DataValues if result.HistoryData else []
+    return data_values or [], result.ContinuationPoint or None
+
+
+def _to_page(data_values):
+    """ Converts DataValues to numpy columns; non-numeric values become NaN. """
+    timestamps = np.array(
+        [dv.SourceTimestamp or dv.ServerTimestamp for dv in data_values], dtype="datetime64[ns]"
+    )
+    values = pd.to_numeric(
+        pd.Series([dv.Value.Value if dv.Value is not None else None for dv in data_values], dtype=object),
+        errors="coerce"
+    ).to_numpy(dtype=np.float64)
+    status = np.fromiter((dv.StatusCode.value for dv in data_values), dtype=np.uint32, count=len(data_values))
+    return HistoryPage(timestamps, values, status)
+
+
+def iter_time_windows(start, end, window=HISTORY_WINDOW):
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + window, end)
+        yield window_start, window_end
+        window_start = window_end
+
+
+def iter_history_pages(node_id, start, end, page_size=HISTORY_PAGE_SIZE, window=HISTORY_WINDOW,
+                       cancel_event=None, sessions=opc_sessions):
+    """
+    Yields the raw history of a node as HistoryPage chunks in time order.
+    Windows are half-open [start, end) except the last one, so window edges are not returned twice.
+    """
+    for window_start, window_end in iter_time_windows(start, end, window):
+        last_window = window_end >= end
+        with sessions.session() as client:
+            continuation_point = None
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    if continuation_point:
+                        _history_read(client, node_id, window_start, window_end, page_size,
+                                      continuation_point, release=True)
+                    return
+
+                data_values, continuation_point = _history_read(
+                    client, node_id, window_start, window_end, page_size, continuation_point
+                )
+                page = _to_page(data_values)
+                if not last_window:
+                    keep = page.timestamps < np.datetime64(window_end, "ns")
+                    page = HistoryPage(page.timestamps[keep], page.values[keep], page.status[keep])
+                if len(page.timestamps):
+                    yield page
+                if not continuation_point:
+                    break
+
+
+def status_names(status):
+    """ Status code names for a uint32 array, looked up once per distinct code. """
+    codes, inverse = np.unique(status, return_inverse=True)
+    names = np.array([ua.StatusCode(int(code)).name for code in codes], dtype=object)
+    return names[inverse]
+
+
+def read_history_arrays(node_id, start, end, sessions=opc_sessions, **kwargs):
+    """ Whole raw history of a node as (timestamps, values, status) numpy columns. """
+    pages = list(iter_history_pages(node_id, start, end, sessions=sessions, **kwargs))
+    if not pages:
+        return HistoryPage(np.empty(0, dtype="datetime64[ns]"), np.empty(0), np.empty(0, dtype=np.uint32))
+    return HistoryPage(*(np.concatenate(columns) for columns in zip(*pages)))
+
+
+# ====================== Multi-tag alignment ======================
+def choose_grid_step(start, end, requested=None, max_points=MAX_GRID_POINTS):
+    """
+    Grid spacing for aligning tags: the requested step, coarsened to the first GRID_STEPS entry that
+    keeps the grid under max_points rows.
+    """
+    span = pd.Timedelta(end - start)
+    step = pd.Timedelta(requested) if requested else pd.Timedelta(0)
+    for candidate in GRID_STEPS:
+        candidate = pd.Timedelta(candidate)
+        if candidate >= step and span / candidate <= max_points:
+            return candidate
+    return max(step, pd.Timedelta(GRID_STEPS[-1]))
+
+
+def asof_on_grid(grid, timestamps, values, tolerance=None):
+    """
+    Vectorized as-of join: for each grid time, the last value at or before it.
+    Historians store changes only, so a value holds until the next sample; with tolerance set, values
+    older than that are treated as missing. Grid times before the first sample are NaN.
+    """
+    result = np.full(len(grid), np.nan)
+    if not len(timestamps):
+        return result
+    order = np.argsort(timestamps, kind="stable")
+    timestamps, values = timestamps[order], values[order]
+
+    idx = np.searchsorted(timestamps, grid, side="right") - 1
+    valid = idx >= 0
+    if tolerance is not None:
+        valid &= (grid - timestamps[np.clip(idx, 0, None)]) <= np.timedelta64(pd.Timedelta(tolerance))
+    result[valid] = values[idx[valid]]
+    return result
+
+
+def read_aligned_history(tags, start, end, step=None, tolerance=None, sessions=opc_sessions):
+    """
+    Reads several tags concurrently (one pooled session per worker) and merges them on a common time grid.
+    :param tags: {column name: node id}
+    :return: (wide DataFrame indexed by Timestamp with one column per tag, {column name: raw row count})
+    """
+    grid_step = choose_grid_step(start, end, step)
+    grid = pd.date_range(start, end, freq=grid_step).to_numpy(dtype="datetime64[ns]")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=sessions.max_sessions) as executor:
+        futures = {
+            name: executor.submit(read_history_arrays, node_id, start, end, sessions)
+            for name, node_id in tags.items()
+        }
+        pages = {name: future.result() for name, future in futures.items()}
+
+    wide = pd.DataFrame(
+        {name: asof_on_grid(grid, page.timestamps, page.values, tolerance) for name, page in pages.items()},
+        index=pd.DatetimeIndex(grid, name="Timestamp")
+    )
+    return wide, {name: len(page.timestamps) for name, page in pages.items()}
+
+
+def save_export_frame(df):
+    """ Writes a frame to the export directory. :return: token for export_path(). """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _remove_expired_exports()
+    token = uuid.uuid4().hex
+    df.to_csv(export_path(token))
+    return token
+
+
+def export_path(token):
+    """ Path of an exported file; tokens are plain hex so they cannot point outside EXPORT_DIR. """
+    if not token or not all(c in "0123456789abcdef" for c in token):
+        raise ValueError(f"Invalid export token: {token!r}")
+    return os.path.join(EXPORT_DIR, f"{token}.csv")
+
+
+# ====================== Background export ======================
+class HistoryExport:
+    """ One background read of a node's history into a CSV file plus a decimated preview. """
+
+    def __init__(self, node_id, start, end):
+        self.job_id = uuid.uuid4().hex
+        self.node_id = node_id
+        self.start = start
+        self.end = end
+        self.path = os.path.join(EXPORT_DIR, f"{self.job_id}.csv")
+        self.rows = 0
+        self.numeric_rows = 0
+        self.read_until = start
+        self.state = "running"  # running / done / cancelled / failed
+        self.error = None
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._preview_x = np.empty(0, dtype="datetime64[ns]")
+        self._preview_y = np.empty(0, dtype=np.float64)
+
+    @property
+    def progress(self):
+        """ Fraction of the requested time range read so far. """
+        total = (self.end - self.start).total_seconds()
+        return 1.0 if total <= 0 else min(1.0, (self.read_until - self.start).total_seconds() / total)
+
+    @property
+    def rows_per_second(self):
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def preview(self):
+        """ :return: (timestamps, values) decimated to at most PREVIEW_MAX_POINTS. """
+        with self._lock:
+            return self._preview_x, self._preview_y
+
+    def _add_to_preview(self, page):
+        numeric = ~np.isnan(page.values)
+        if not numeric.any():
+            return
+        self.numeric_rows += int(numeric.sum())
+        with self._lock:
+            x = np.concatenate([self._preview_x, page.timestamps[numeric]])
+            y = np.concatenate([self._preview_y, page.values[numeric]])
+            if len(x) > PREVIEW_MAX_POINTS:
+                # Min/max of min/max keeps every extreme, so re-decimating the merged preview is safe
+                x_ns, y = decimate_min_max(x.astype(np.int64).astype(np.float64), y[:, None], PREVIEW_MAX_POINTS)
+                x, y = x_ns.astype(np.int64).astype("datetime64[ns]"), y[:, 0]
+            self._preview_x, self._preview_y = x, y
+
+    def run(self):
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        try:
+            with open(self.path, "w", newline="") as f:
+                f.write("Timestamp,Value,Status\n")
+                for page in iter_history_pages(self.node_id, self.start, self.end, cancel_event=self.cancel_event):
+                    pd.DataFrame({
+                        "Timestamp": page.timestamps,
+                        "Value": page.values,
+                        "Status": status_names(page.status),
+                    }).to_csv(f, header=False, index=False)
+                    self.rows += len(page.timestamps)
+                    self.read_until = pd.Timestamp(page.timestamps[-1]).to_pydatetime()
+                    self._add_to_preview(page)
+            self.state = "cancelled" if self.cancel_event.is_set() else "done"
+            if self.state == "done":
+                self.read_until = self.end
+        except Exception as e:
+            logger.exception("History export of %s failed", self.node_id)
+            self.state = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = time.monotonic()
+            logger.info("History export of %s %s: %d rows at %.0f rows/s",
+                        self.node_id, self.state, self.rows, self.rows_per_second)
+
+
+_exports = {}  # {job id: HistoryExport}
+_exports_lock = threading.Lock()
+
+
+def _remove_expired_exports():
+    now = time.monotonic()
+    with _exports_lock:
+        expired = [job_id for job_id, job in _exports.items()
+                   if job.finished_at and now - job.finished_at > EXPORT_RETENTION]
+        for job_id in expired:
+            _exports.pop(job_id)
+
+        # Any file not touched within the retention period (finished jobs, aligned exports, older processes)
+        running = {job.path for job in _exports.values() if job.state == "running"}
+        try:
+            names = os.listdir(EXPORT_DIR)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(EXPORT_DIR, name)
+            try:
+                if path not in running and time.time() - os.path.getmtime(path) > EXPORT_RETENTION:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def start_history_export(node_id, start, end):
+    """ Starts reading a node's history in the background. :return: the HistoryExport job. """
+    _remove_expired_exports()
+    job = HistoryExport(node_id, start, end)
+    with _exports_lock:
+        _exports[job.job_id] = job
+    threading.Thread(target=job.run, name=f"opcua-history-{job.job_id[:8]}", daemon=True).start()
+    return job
+
+
+def get_history_export(job_id):
+    with _exports_lock:
+        return _exports.get(job_id)
+
+
+def cancel_history_export(job_id):
+    job = get_history_export(job_id)
+    if job is not None and job.state == "running":
+        job.cancel_event.set()
@@ -0,0 +1,199 @@
+"""
+Live OPC UA values via monitored-item subscriptions.
+
+One dedicated session (subscriptions are bound to the session that created them, so it is not taken from
+the pool) carries a single subscription. Data changes land in a fixed-size ring buffer per tag; browsers
+poll with a per-tag cursor and receive only the samples appended since, which the graph adds with
+extendData instead of redrawing:
+
+    cursors = live_monitor.watch(node_ids, cursors)
+    updates, cursors = live_monitor.read_since(cursors)  # {node id: (timestamps, values)}
+
+Tags nobody has read for LIVE_IDLE_TIMEOUT seconds are unsubscribed, and the session is closed once
+no tags are left.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from plotly_integration.akta.opcua_server.opcua_utils import get_opc_client
+
+logger = logging.getLogger(__name__)
+
+LIVE_BUFFER_SIZE = 20000  # Samples kept per tag
+LIVE_PUBLISH_INTERVAL = 500  # Subscription publishing interval in ms
+LIVE_IDLE_TIMEOUT = 120  # Seconds without readers before a tag is unsubscribed
+
+
+class RingBuffer:
+    """ Fixed-capacity timestamp/value buffer; `total` counts every sample ever appended and serves as cursor. """
+
+    def __init__(self, capacity=LIVE_BUFFER_SIZE):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype="datetime64[ns]")
+        self.values = np.full(capacity, np.nan)
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def append(self, timestamp, value):
+        with self._lock:
+            i = self.total % self.capacity
+            self.timestamps[i] = np.datetime64(timestamp, "ns")
+            self.values[i] = value
+            self.total += 1
+
+    def since(self, cursor):
+        """
+        Samples appended after `cursor` (older ones that were already overwritten are skipped).
+        :return: (timestamps, values, new cursor)
+        """
+        with self._lock:
+            total = self.total
+            start = max(cursor, total - self.capacity)
+            if start >= total:
+                return self.timestamps[:0], self.values[:0], total
+            idx = np.arange(start, total) % self.capacity
+            return self.timestamps[idx], self.values[idx], total
+
+
+class _SubscriptionHandler:
+    def __init__(self, monitor):
+        self.monitor = monitor
+
+    def datachange_notification(self, node, value, data):
+        data_value = data.monitored_item.Value
+        timestamp = data_value.SourceTimestamp or data_value.ServerTimestamp or datetime.utcnow()
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            value = np.nan
+        self.monitor.record(node.nodeid.to_string(), timestamp, value)
+
+    def status_change_notification(self, status):
+        logger.warning("OPC UA subscription status changed: %s", status)
+        # Not from the subscription's own thread; the next watch() subscribes again
+        threading.Thread(target=self.monitor.reset, daemon=True).start()
+
+
+class LiveMonitor:
+    def __init__(self, client_factory=get_opc_client, buffer_size=LIVE_BUFFER_SIZE,
+                 publish_interval=LIVE_PUBLISH_INTERVAL, idle_timeout=LIVE_IDLE_TIMEOUT):
+        self.client_factory = client_factory
+        self.buffer_size = buffer_size
+        self.publish_interval = publish_interval
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.RLock()
+        self._client = None
+        self._subscription = None
+        self._handles = {}  # {node id: monitored item handle}
+        self._buffers = {}  # {node id: RingBuffer}
+        self._last_read = {}  # {node id: monotonic time of the last read}
+
+    def record(self, node_id, timestamp, value):
+        buffer = self._buffers.get(node_id)
+        if buffer is not None:
+            buffer.append(timestamp, value)
+
+    # ---------------------------------------------------------------- subscriptions
+    def _ensure_subscription(self):
+        if self._subscription is None:
+            client = self.client_factory()
+            client.connect()
+            self._client = client
+            self._subscription = client.create_subscription(self.publish_interval, _SubscriptionHandler(self))
+
+    def watch(self, node_ids, cursors=None):
+        """
+        Subscribes to any of node_ids not yet monitored and marks them as read.
+        :return: Cursors for read_since(): the given ones, or 0 for tags whose buffer was (re)created.
+        """
+        cursors = cursors or {}
+        with self._lock:
+            new_ids = [node_id for node_id in node_ids if node_id not in self._handles]
+            if new_ids:
+                self._ensure_subscription()
+                for node_id in new_ids:
+                    self._buffers.setdefault(node_id, RingBuffer(self.buffer_size))
+                # One CreateMonitoredItems call for all new tags; the server sends each current value first
+                handles = self._subscription.subscribe_data_change([self._client.get_node(n) for n in new_ids])
+                for node_id, handle in zip(new_ids, handles if isinstance(handles, list) else [handles]):
+                    if isinstance(handle, int):
+                        self._handles[node_id] = handle
+                    else:
+                        logger.warning("Could not monitor %s: %s", node_id, handle)
+                        self._buffers.pop(node_id, None)
+
+            now = time.monotonic()
+            for node_id in node_ids:
+                self._last_read[node_id] = now
+            return {
+                node_id: 0 if node_id in new_ids else cursors.get(node_id, 0)
+                for node_id in node_ids if node_id in self._buffers
+            }
+
+    def read_since(self, cursors):
+        """
+        :param cursors: {node id: cursor} from watch() or a previous read_since()
+        :return: ({node id: (timestamps, values)} for tags with new samples, updated cursors)
+        """
+        now = time.monotonic()
+        updates, new_cursors = {}, {}
+        for node_id, cursor in cursors.items():
+            buffer = self._buffers.get(node_id)
+            if buffer is None:
+                continue
+            self._last_read[node_id] = now
+            timestamps, values, new_cursors[node_id] = buffer.since(cursor)
+            if len(timestamps):
+                updates[node_id] = (timestamps, values)
+        self._expire_idle(now)
+        return updates, new_cursors
+
+    def _expire_idle(self, now):
+        with self._lock:
+            idle = [node_id for node_id, last in self._last_read.items() if now - last > self.idle_timeout]
+            if not idle:
+                return
+            for node_id in idle:
+                handle = self._handles.pop(node_id, None)
+                self._buffers.pop(node_id, None)
+                self._last_read.pop(node_id, None)
+                if handle is not None and self._subscription is not None:
+                    try:
+                        self._subscription.unsubscribe(handle)
+                    except Exception:
+                        pass
+            if not self._handles:
+                self.reset()
+
+    def reset(self):
+        """ Drops the subscription and session; the next watch() starts a new one. """
+        with self._lock:
+            client, subscription = self._client, self._subscription
+            self._client = self._subscription = None
+            self._handles.clear()
+            self._buffers.clear()
+            self._last_read.clear()
+        for close in (getattr(subscription, "delete", None), getattr(client, "disconnect", None)):
+            if close is None:
+                continue
+            try:
+                close()
+            except Exception:
+                pass
+
+    def status(self):
+        with self._lock:
+            return {
+                "connected": self._client is not None,
+                "tags": len(self._handles),
+                "samples": {node_id: buffer.total for node_id, buffer in self._buffers.items()},
+            }
+
+
+# Shared by every browser tab in this process
+live_monitor = LiveMonitor()
@@ -0,0 +1,215 @@
+"""
+Process-wide pool of secured OPC UA sessions.
+
+Opening a Basic256Sha256/SignAndEncrypt session costs seconds on the historian, so callbacks borrow an
+already-activated session instead of connecting per click:
+
+    with opc_sessions.session() as client:
+        client.get_node(node_id).get_browse_name()
+
+A background thread pings idle sessions, replaces dead ones and keeps one session warm. Failed connects
+back off exponentially; while backing off, borrowers fail fast instead of queueing up more handshakes.
+"""
+import concurrent.futures
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from opcua import ua
+
+from plotly_integration.akta.opcua_server.opcua_utils import get_opc_client
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the session/channel itself is unusable (bad node ids etc. keep the session)
+CONNECTION_ERRORS = (OSError, TimeoutError, concurrent.futures.TimeoutError, ConnectionError, EOFError)
+
+
+class OPCSessionManager:
+    def __init__(self, client_factory=get_opc_client, max_sessions=2, keepalive_interval=30,
+                 idle_timeout=600, backoff_base=1.0, backoff_max=60.0, acquire_timeout=30):
+        """
+        :param client_factory: Returns a configured, unconnected opcua.Client.
+        :param max_sessions: Maximum concurrent sessions (and concurrent borrowers).
+        :param keepalive_interval: Seconds between pings of idle sessions.
+        :param idle_timeout: Idle sessions beyond the first are closed after this many seconds.
+        :param backoff_base: First retry delay after a failed connect, doubled per failure up to backoff_max.
+        :param acquire_timeout: Seconds a borrower waits for a free session before giving up.
+        """
+        self.client_factory = client_factory
+        self.max_sessions = max_sessions
+        self.keepalive_interval = keepalive_interval
+        self.idle_timeout = idle_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+
+        self._slots = threading.BoundedSemaphore(max_sessions)
+        self._lock = threading.Lock()
+        self._idle = []  # [(client, last_used)], most recently used last
+        self._failures = 0
+        self._retry_at = 0.0
+        self._last_error = None
+        self._keepalive_thread = None
+        self._stop = threading.Event()
+
+    # ---------------------------------------------------------------- borrowing
+    @contextmanager
+    def session(self, timeout=None):
+        """
+        Borrows a connected client for the duration of the block.
+        The session goes back to the pool afterwards unless a connection error was raised inside the block.
+        """
+        if not self._slots.acquire(timeout=self.acquire_timeout if timeout is None else timeout):
+            raise TimeoutError(f"No OPC UA session free after {self.acquire_timeout}s "
+                               f"({self.max_sessions} in use)")
+        client = None
+        try:
+            client = self._take_idle() or self._connect()
+            self._ensure_keepalive()
+            yield client
+        except CONNECTION_ERRORS:
+            self._discard(client)
+            client = None
+            raise
+        finally:
+            if client is not None:
+                with self._lock:
+                    self._idle.append((client, time.monotonic()))
+            self._slots.release()
+
+    def _take_idle(self):
+        """ Most recently used idle session whose channel is still open; closed ones are dropped on the way. """
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                client = self._idle.pop()[0]
+            if self.channel_open(client):
+                return client
+            logger.info("OPC UA session closed by the server; dropping it")
+            self._discard(client)
+
+    def _connect(self):
+        """ Opens a new session, honouring the current backoff window. """
+        with self._lock:
+            wait = self._retry_at - time.monotonic()
+        if wait > 0:
+            raise ConnectionError(f"OPC UA server unavailable, retrying in {wait:.0f}s ({self._last_error})")
+
+        client = self.client_factory()
+        try:
+            client.connect()
+        except Exception as e:
+            with self._lock:
+                self._failures += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (self._failures - 1))
+                self._retry_at = time.monotonic() + delay * random.uniform(0.8, 1.2)
+                self._last_error = str(e)
+            logger.warning("OPC UA connect failed (%s); next attempt in %.1fs", e, delay)
+            raise ConnectionError(f"OPC UA connect failed: {e}") from e
+
+        with self._lock:
+            self._failures = 0
+            self._retry_at = 0.0
+            self._last_error = None
+        logger.info("OPC UA session opened to %s", client.server_url.geturl())
+        return client
+
+    @staticmethod
+    def channel_open(client):
+        """
+        False once the client's receive thread has ended, i.e. the server closed the connection.
+        Checked without a request: a Read on a closed channel only fails after the client's request timeout.
+        """
+        thread = getattr(getattr(client.uaclient, "_uasocket", None), "_thread", None)
+        return thread is None or thread.is_alive()
+
+    @staticmethod
+    def _discard(client):
+        if client is None:
+            return
+        try:
+            if OPCSessionManager.channel_open(client):
+                client.disconnect()
+            else:
+                # Nothing left to close on the server; CloseSession would only wait for the request timeout
+                if client.keepalive:
+                    client.keepalive.stop()
+                client.disconnect_socket()
+        except Exception:
+            pass  # The channel is already gone
+
+    # ---------------------------------------------------------------- keepalive
+    def _ensure_keepalive(self):
+        with self._lock:
+            if self._keepalive_thread and self._keepalive_thread.is_alive():
+                return
+            self._stop.clear()
+            self._keepalive_thread = threading.Thread(target=self._keepalive_loop, name="opcua-keepalive",
+                                                      daemon=True)
+            self._keepalive_thread.start()
+
+    @staticmethod
+    def is_alive(client):
+        """ Cheap liveness probe: one Read of Server_ServerStatus_State. """
+        try:
+            client.get_node(ua.FourByteNodeId(ua.ObjectIds.Server_ServerStatus_State)).get_value()
+            return True
+        except Exception:
+            return False
+
+    def _keepalive_loop(self):
+        while not self._stop.wait(self.keepalive_interval):
+            with self._lock:
+                idle, self._idle = self._idle, []
+
+            now = time.monotonic()
+            alive = []
+            for i, (client, last_used) in enumerate(idle):
+                # Keep the most recently used session warm; close the rest once they have idled out
+                if i < len(idle) - 1 and now - last_used > self.idle_timeout:
+                    self._discard(client)
+                elif self.channel_open(client) and self.is_alive(client):
+                    alive.append((client, last_used))
+                else:
+                    logger.info("OPC UA session lost; dropping it")
+                    self._discard(client)
+
+            with self._lock:
+                self._idle = alive + self._idle  # Sessions returned meanwhile stay most recent
+
+            # Re-establish one warm session in the background once the backoff window has passed
+            if not alive and self._slots.acquire(blocking=False):
+                try:
+                    client = self._connect()
+                    with self._lock:
+                        self._idle.insert(0, (client, time.monotonic()))
+                except ConnectionError:
+                    pass
+                finally:
+                    self._slots.release()
+
+    # ---------------------------------------------------------------- status & shutdown
+    def status(self):
+        with self._lock:
+            return {
+                "idle_sessions": len(self._idle),
+                "max_sessions": self.max_sessions,
+                "consecutive_failures": self._failures,
+                "retry_in": max(0.0, self._retry_at - time.monotonic()),
+                "last_error": self._last_error,
+            }
+
+    def close_all(self):
+        self._stop.set()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for client, _ in idle:
+            self._discard(client)
+
+
+# Shared by every OPC UA callback in this process
+opc_sessions = OPCSessionManager()
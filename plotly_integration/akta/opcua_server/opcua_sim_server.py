@@ -0,0 +1,149 @@
+"""
+Local stand-in for the opcsrv historian, for measuring the OPC UA client code offline.
+
+Serves the CUSTOM_ROOT_PATH folder layout (ns=2;s=2:Archive/OPCuser/Folders) with one folder per
+simulated system and historized Double variables whose history is generated up front:
+
+    with SimulatedHistorian(systems=5, tags_per_system=10, points_per_tag=50000) as sim:
+        client = Client(sim.url)
+        ...
+
+Run directly to keep a server up for the browser app (point SERVER_URL at the printed url, no security):
+
+    python -m plotly_integration.akta.opcua_server.opcua_sim_server --points 100000
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from opcua import Server, ua
+from opcua.server.history import HistoryDict
+
+SIM_NAMESPACE = "urn:simulated:historian"
+SIM_ROOT_PATH = ["Archive", "OPCuser", "Folders"]  # Matches CUSTOM_ROOT_PATH in opcua_client_app
+SIM_SIGNALS = ["UV 280", "Conductivity", "pH", "System Pressure", "Flow Rate", "Temperature"]
+
+
+class PagedHistoryDict(HistoryDict):
+    """
+    python-opcua's in-memory history with a correct continuation point: HistoryDict continues from the
+    value after the first one left out of a page, so every continuation skips one value.
+    """
+
+    def read_node_history(self, node_id, start, end, nb_values):
+        results, _ = super().read_node_history(node_id, start, end, 0)
+        if nb_values and len(results) > nb_values:
+            return results[:nb_values], results[nb_values].SourceTimestamp
+        return results, None
+
+
+class SimulatedHistorian:
+    def __init__(self, systems=3, tags_per_system=6, points_per_tag=10000, interval_seconds=1.0,
+                 end_time=None, host="127.0.0.1", port=48410, seed=0):
+        """
+        :param systems: Folders under the root (e.g. one per AKTA).
+        :param tags_per_system: Historized variables per folder.
+        :param points_per_tag: History values generated per variable.
+        :param interval_seconds: Spacing of the generated history; the last value is at end_time.
+        """
+        self.systems = systems
+        self.tags_per_system = tags_per_system
+        self.points_per_tag = points_per_tag
+        self.interval_seconds = interval_seconds
+        self.end_time = end_time or datetime.utcnow().replace(microsecond=0)
+        self.start_time = self.end_time - timedelta(seconds=interval_seconds * (points_per_tag - 1))
+        self.url = f"opc.tcp://{host}:{port}/historian"
+        self.seed = seed
+        self.server = None
+        self.root_node_id = None
+        self.tag_node_ids = []  # Every historized variable, folder by folder
+
+    # ---------------------------------------------------------------- lifecycle
+    def start(self):
+        self.server = Server()
+        self.server.set_endpoint(self.url)
+        self.server.set_server_name("Simulated Historian")
+        self.server.set_security_policy([ua.SecurityPolicyType.NoSecurity])
+        idx = self.server.register_namespace(SIM_NAMESPACE)
+
+        # The production path starts from the string node id "ns=2;s=2:Archive"
+        parent = self.server.get_objects_node().add_folder(
+            ua.NodeId(f"{idx}:{SIM_ROOT_PATH[0]}", idx), f"{idx}:{SIM_ROOT_PATH[0]}"
+        )
+        for name in SIM_ROOT_PATH[1:]:
+            parent = parent.add_folder(idx, name)
+        self.root_node_id = parent.nodeid.to_string()
+
+        self.server.iserver.history_manager.set_storage(PagedHistoryDict())
+        self.server.start()
+        self._add_tags(parent, idx)
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+
+    def restart(self, downtime=0.0):
+        """ Stops the server, waits `downtime` seconds and starts it again with the same tree and history. """
+        self.stop()
+        time.sleep(downtime)
+        self.start()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------------------------------------------------------------- synthetic data
+    def _add_tags(self, root, idx):
+        storage = self.server.iserver.history_manager.storage
+        rng = np.random.default_rng(self.seed)
+        timestamps = [self.start_time + timedelta(seconds=self.interval_seconds * i)
+                      for i in range(self.points_per_tag)]
+
+        self.tag_node_ids = []
+        for system in range(self.systems):
+            folder = root.add_folder(idx, f"AKTA_{system + 1:02d}")
+            for t in range(self.tags_per_system):
+                name = SIM_SIGNALS[t % len(SIM_SIGNALS)] + (f" {t // len(SIM_SIGNALS) + 1}" if t >= len(SIM_SIGNALS) else "")
+                variable = folder.add_variable(idx, name, 0.0, ua.VariantType.Double)
+                variable.set_attribute(ua.AttributeIds.AccessLevel, ua.DataValue(ua.Variant(
+                    ua.AccessLevel.CurrentRead.mask | ua.AccessLevel.HistoryRead.mask, ua.VariantType.Byte)))
+                variable.set_attribute(ua.AttributeIds.Historizing, ua.DataValue(True))
+                self.server.historize_node_data_change(variable, period=None, count=0)
+
+                # Written straight into the history storage; set_value() per point is far too slow
+                values = np.cumsum(rng.normal(0, 1, self.points_per_tag)) + 10 * t
+                for timestamp, value in zip(timestamps, values):
+                    data_value = ua.DataValue(ua.Variant(float(value), ua.VariantType.Double))
+                    data_value.SourceTimestamp = data_value.ServerTimestamp = timestamp
+                    storage.save_node_value(variable.nodeid, data_value)
+                self.tag_node_ids.append(variable.nodeid.to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local simulated OPC UA historian")
+    parser.add_argument("--systems", type=int, default=3)
+    parser.add_argument("--tags", type=int, default=6, help="Variables per system folder")
+    parser.add_argument("--points", type=int, default=10000, help="History values per variable")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between history values")
+    parser.add_argument("--port", type=int, default=48410)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    sim = SimulatedHistorian(args.systems, args.tags, args.points, args.interval, port=args.port)
+    sim.start()
+    print(f"Serving {len(sim.tag_node_ids)} tags x {args.points} points at {sim.url} (root {sim.root_node_id})")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
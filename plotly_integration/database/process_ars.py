@@ -8,6 +8,7 @@ import shutil
 import config
 from tqdm import tqdm
 from django.db import connection, transaction
+from plotly_integration.database.sample_sets import update_sample_set
 from plotly_integration.models import SampleMetadata, PeakResults
 
 # ✅ Database Settings
@@ -221,6 +222,9 @@ def insert_metadata(metadata_dict, use_orm=True):
 
     print(f"✅ Metadata inserted via Raw SQL for result_id {metadata_dict['Result Id']}")
 
+    # ✅ Maintain the sample set dimension used by the report builder dropdowns
+    update_sample_set(metadata_dict)
+
 
 def normalize_sample_names(metadata_dict):
     sample_name = metadata_dict.get("Sample Name", "").strip()
@@ -0,0 +1,74 @@
+"""
+The `sample_set` dimension behind the report builder dropdowns.
+
+Ingest keeps one SampleSet row per Empower sample set and one SampleSetPrefix row per (prefix, sample type)
+found in it, so the dropdowns never scan `sample_metadata`. The sample type comes from each injection's
+instrument method, so one set can hold SEC and ProA injections; both filters are applied to the same
+SampleSetPrefix row.
+"""
+from datetime import datetime
+
+from django.db.models import F
+
+from plotly_integration.models import SampleSet, SampleSetPrefix
+
+
+def parse_sample_set_date(sample_set_name):
+    """
+    Parses the 'YYMMDD' prefix of a sample set name → date.
+    Returns None when the name does not start with a valid date.
+    """
+    if not sample_set_name:
+        return None
+
+    try:
+        return datetime.strptime(sample_set_name[:6], "%y%m%d").date()
+    except ValueError:
+        return None
+
+
+def update_sample_set(metadata_dict):
+    """
+    Keeps the `sample_set` dimension in step with one ingested injection's metadata.
+    """
+    sample_set_id = metadata_dict.get("Sample Set Id")
+    if not sample_set_id:
+        return
+
+    sample_set_name = metadata_dict.get("Sample Set Name")
+    sample_set, _ = SampleSet.objects.update_or_create(
+        sample_set_id=sample_set_id,
+        defaults={
+            "sample_set_name": sample_set_name,
+            "sample_set_date": parse_sample_set_date(sample_set_name),
+        }
+    )
+
+    sample_type = metadata_dict.get("Sample Type")
+    SampleSetPrefix.objects.get_or_create(
+        sample_set=sample_set,
+        sample_prefix=metadata_dict.get("Sample Prefix") or "",
+        sample_type=str(sample_type) if sample_type is not None else None,
+    )
+
+
+def sample_set_options(sample_prefixes=None, sample_type=None):
+    """
+    Dropdown options of the sample sets holding injections with one of `sample_prefixes` and of
+    `sample_type`; most recent first, sets without a YYMMDD prefix last.
+    """
+    query = SampleSet.objects.exclude(sample_set_name__isnull=True).exclude(sample_set_name="")
+    injections = {}
+    if sample_type:
+        injections["prefixes__sample_type"] = sample_type
+    if sample_prefixes:
+        injections["prefixes__sample_prefix__in"] = sample_prefixes
+    if injections:
+        # One filter() call, so both conditions hold for the same prefix row
+        query = query.filter(**injections).distinct()
+
+    sample_set_names = query.order_by(
+        F("sample_set_date").desc(nulls_last=True), "-sample_set_id"
+    ).values_list("sample_set_name", flat=True)
+
+    return [{"label": name, "value": name} for name in dict.fromkeys(sample_set_names)]
@@ -6,6 +6,7 @@ from dash import dcc, html, Input, Output, State, dash_table, Dash, MATCH, callb
 import pandas as pd
 from scipy.stats import linregress
 from plotly_integration.models import Report, SampleMetadata, PeakResults, TimeSeriesData
+from plotly_integration.utils import get_report_result_ids, get_report_sample_names
 import json
 import logging
 from openpyxl.workbook import Workbook
@@ -754,7 +755,7 @@ def update_sample_and_std_details(report_clicks):
         return default_data
 
     # Fetch the first sample name from the report's selected samples
-    selected_result_ids = [sample.strip() for sample in report.selected_result_ids.split(",") if sample.strip()]
+    selected_result_ids = get_report_result_ids(report)
     if not selected_result_ids:
         return default_data
 
@@ -799,8 +800,7 @@ def get_filtered_std_ids(report_id):
             return [("No STD Found", "Unknown Sample", None)]  # Ensure return format is consistent
 
         # Extract selected sample names **with exact match**
-        selected_result_ids = [result_id.strip() for result_id in report.selected_result_ids.split(",") if
-                               result_id.strip()]
+        selected_result_ids = get_report_result_ids(report)
 
         # Fetch all sample set names **linked to the exact selected samples**
         sample_set_entries = SampleMetadata.objects.filter(result_id__in=selected_result_ids) \
@@ -1371,7 +1371,7 @@ def update_hmw_table(selected_columns, report_clicks, main_peak_rt, low_mw_cutof
     # Retrieve the list of selected samples
     # selected_result_ids = [sample.strip() for sample in report.selected_result_ids.split(",") if sample.strip()]
     selected_result_ids = sorted(
-        [sample.strip() for sample in report.selected_result_ids.split(",") if sample.strip()],
+        get_report_result_ids(report),
         key=lambda x: int(x)  # Assuming result_id is numeric
     )
     # selected_result_ids = sorted(selected_result_ids, key=lambda x: int(x))
@@ -1539,8 +1539,8 @@ def update_main_peak_rt(n_clicks, selected_report):
     if not report:
         print("Report not found.")
         return dash.no_update
-    selected_result_ids = [sample.strip() for sample in report.selected_result_ids.split(",") if sample.strip()]
-    sample_list = [sample.strip() for sample in report.selected_samples.split(",") if sample.strip()]
+    selected_result_ids = get_report_result_ids(report)
+    sample_list = get_report_sample_names(report)
     if not selected_result_ids:
         print("No samples found in the report.")
         return dash.no_update
@@ -1604,9 +1604,8 @@ def update_graph(plot_type, report_clicks, shading_options, peak_label_options,
         return go.Figure().update_layout(title="Report Not Found"), {'display': 'block'}, stored_report_id, {}
 
     # ✅ 3. Retrieve Sample List and Result IDs
-    sample_list = [sample.strip() for sample in report.selected_samples.split(",") if sample.strip()]
-    selected_result_ids = [result_id.strip() for result_id in report.selected_result_ids.split(",") if
-                           result_id.strip()]
+    sample_list = get_report_sample_names(report)
+    selected_result_ids = get_report_result_ids(report)
     # Order the result IDs numerically
     selected_result_ids = sorted(selected_result_ids, key=lambda x: int(x))
 
@@ -6,6 +6,7 @@ from dash import dcc, html, Input, Output, State, dash_table, Dash, MATCH, callb
 import pandas as pd
 from scipy.stats import linregress, t
 from plotly_integration.models import Report, SampleMetadata, PeakResults, TimeSeriesData
+from plotly_integration.utils import get_report_result_ids, get_report_sample_names
 import json
 import logging
 from openpyxl.workbook import Workbook
@@ -505,7 +506,7 @@ def update_sample_and_std_details(report_clicks):
         return default_data
 
     # Fetch the first sample name from the report's selected samples
-    selected_result_ids = [sample.strip() for sample in report.selected_result_ids.split(",") if sample.strip()]
+    selected_result_ids = get_report_result_ids(report)
     if not selected_result_ids:
         return default_data
 
@@ -577,7 +578,7 @@ def plot_standard_time_series(report_clicks, selected_report):
         return go.Figure()
 
     # ✅ Extract standard samples from the selected report
-    selected_samples = [s.strip() for s in report.selected_samples.split(",") if s.strip()]
+    selected_samples = get_report_sample_names(report)
 
     if not selected_samples:
         print(f"🚨 No samples found in report: {report_name}")
@@ -587,7 +588,7 @@ def plot_standard_time_series(report_clicks, selected_report):
     print(f"📢 Found Samples: {selected_samples}")
 
     # ✅ Extract standard samples from the selected report
-    result_ids = [r.strip() for r in report.selected_result_ids.split(",") if r.strip()]
+    result_ids = get_report_result_ids(report)
 
     # Step 1: Retrieve sample_set_ids associated with these result_ids
     sample_set_ids = SampleMetadata.objects.filter(result_id__in=result_ids).values_list("sample_set_id",
@@ -679,7 +680,7 @@ def update_standard_table(report_clicks, selected_report):
         return [], []
 
     # ✅ Extract standard samples from the selected report
-    result_ids = [r.strip() for r in report.selected_result_ids.split(",") if r.strip()]
+    result_ids = get_report_result_ids(report)
 
     # Step 1: Retrieve sample_set_ids associated with these result_ids
     sample_set_ids = SampleMetadata.objects.filter(result_id__in=result_ids).values_list("sample_set_id",
@@ -875,7 +876,7 @@ def update_result_table(report_clicks, regression_params, selected_report):
         return [], [], report_name
 
     # ✅ Extract all samples from the report
-    all_samples = [s.strip() for s in report.selected_samples.split(",") if s.strip()]
+    all_samples = get_report_sample_names(report)
     report_samples = SampleMetadata.objects.filter(sample_name__in=all_samples).values(
         "sample_name", "injection_volume", "result_id"
     )
@@ -1048,7 +1049,7 @@ def plot_standard_time_series(report_clicks, selected_report):
         return go.Figure()
 
     # ✅ Extract standard samples from the selected report
-    selected_samples = [s.strip() for s in report.selected_samples.split(",") if s.strip()]
+    selected_samples = get_report_sample_names(report)
 
     if not selected_samples:
         print(f"🚨 No samples found in report: {report_name}")
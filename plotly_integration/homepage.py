@@ -160,6 +160,21 @@ app.layout = html.Div(
                             href="http://localhost:8000/plotly_integration/dash-app/app/AktaChromatogramApp/",
                             target="_blank"
                         ),
+                        dcc.Link(
+                            html.Button("Akta Run Overlay", style={
+                                'width': '250px',
+                                'height': '60px',
+                                'font-size': '18px',
+                                'color': '#ffffff',
+                                'background-color': '#9966CC',
+                                'border': 'none',
+                                'border-radius': '8px',
+                                'cursor': 'pointer',
+                                'box-shadow': '2px 2px 5px rgba(0, 0, 0, 0.2)'
+                            }),
+                            href="http://localhost:8000/plotly_integration/dash-app/app/AktaOverlayApp/",
+                            target="_blank"
+                        ),
                         dcc.Link(
                             html.Button("Akta Data Import", style={
                                 'width': '250px',
@@ -251,6 +266,36 @@ app.layout = html.Div(
                             href="http://localhost:8000/plotly_integration/dash-app/app/UFDFApp/",
                             target="_blank"
                         ),
+                        dcc.Link(
+                            html.Button("Live Run", style={
+                                'width': '250px',
+                                'height': '60px',
+                                'font-size': '18px',
+                                'color': '#ffffff',
+                                'background-color': '#DAA520',  # Goldenrod
+                                'border': 'none',
+                                'border-radius': '8px',
+                                'cursor': 'pointer',
+                                'box-shadow': '2px 2px 5px rgba(0, 0, 0, 0.2)'
+                            }),
+                            href="http://localhost:8000/plotly_integration/dash-app/app/SartoflowLiveApp/",
+                            target="_blank"
+                        ),
+                        dcc.Link(
+                            html.Button("Compare Experiments", style={
+                                'width': '250px',
+                                'height': '60px',
+                                'font-size': '18px',
+                                'color': '#ffffff',
+                                'background-color': '#2E8B57',  # Sea Green
+                                'border': 'none',
+                                'border-radius': '8px',
+                                'cursor': 'pointer',
+                                'box-shadow': '2px 2px 5px rgba(0, 0, 0, 0.2)'
+                            }),
+                            href="http://localhost:8000/plotly_integration/dash-app/app/SartoflowOverlayApp/",
+                            target="_blank"
+                        ),
 
                     ],
                     style={
@@ -311,6 +356,51 @@ app.layout = html.Div(
                             href="http://localhost:8000/plotly_integration/dash-app/app/ViralFiltrationApp/",
                             target="_blank"
                         ),
+                        dcc.Link(
+                            html.Button("Live Run", style={
+                                'width': '250px',
+                                'height': '60px',
+                                'font-size': '18px',
+                                'color': '#ffffff',
+                                'background-color': '#DAA520',  # Goldenrod
+                                'border': 'none',
+                                'border-radius': '8px',
+                                'cursor': 'pointer',
+                                'box-shadow': '2px 2px 5px rgba(0, 0, 0, 0.2)'
+                            }),
+                            href="http://localhost:8000/plotly_integration/dash-app/app/SartoflowLiveApp/",
+                            target="_blank"
+                        ),
+                        dcc.Link(
+                            html.Button("Compare Experiments", style={
+                                'width': '250px',
+                                'height': '60px',
+                                'font-size': '18px',
+                                'color': '#ffffff',
+                                'background-color': '#2E8B57',  # Sea Green
+                                'border': 'none',
+                                'border-radius': '8px',
+                                'cursor': 'pointer',
+                                'box-shadow': '2px 2px 5px rgba(0, 0, 0, 0.2)'
+                            }),
+                            href="http://localhost:8000/plotly_integration/dash-app/app/SartoflowOverlayApp/",
+                            target="_blank"
+                        ),
+                        dcc.Link(
+                            html.Button("Capacity Comparison", style={
+                                'width': '250px',
+                                'height': '60px',
+                                'font-size': '18px',
+                                'color': '#ffffff',
+                                'background-color': '#4B0082',  # Indigo
+                                'border': 'none',
+                                'border-radius': '8px',
+                                'cursor': 'pointer',
+                                'box-shadow': '2px 2px 5px rgba(0, 0, 0, 0.2)'
+                            }),
+                            href="http://localhost:8000/plotly_integration/dash-app/app/VFCapacityApp/",
+                            target="_blank"
+                        ),
                     ],
                     style={
                         'display': 'flex',
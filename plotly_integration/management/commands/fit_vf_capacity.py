@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from plotly_integration.sartoflow_smart.vf_capacity import refit_capacity
+
+
+class Command(BaseCommand):
+    help = "Fits the filter capacity models to the product filtration of VF experiments into vf_capacity_fit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("result_ids", nargs="*", type=int, help="Experiments to refit (all when omitted)")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        fitted = refit_capacity(options["result_ids"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Fitted {fitted} experiments in {time.monotonic() - started:.1f}s"))
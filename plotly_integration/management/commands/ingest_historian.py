@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from plotly_integration.models import HistorianTag
+from plotly_integration.akta.opcua_server.historian_ingest import ingest_all
+
+
+class Command(BaseCommand):
+    help = "Pulls new OPC UA historian data for the enabled HistorianTag rows into historian_sample."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--add", metavar="NODE_ID", help="Register a tag (e.g. 'ns=2;s=...') before ingesting")
+        parser.add_argument("--name", help="Display name for --add (defaults to the node id)")
+        parser.add_argument("--backfill-days", type=int, default=7, help="History pulled on a tag's first run")
+        parser.add_argument("--loop", type=int, metavar="SECONDS", help="Repeat every SECONDS instead of once")
+
+    def handle(self, *args, **options):
+        if options["add"]:
+            tag, created = HistorianTag.objects.get_or_create(
+                node_id=options["add"],
+                defaults={"name": options["name"] or options["add"], "backfill_days": options["backfill_days"]},
+            )
+            self.stdout.write(f"{'Added' if created else 'Already registered'}: {tag}")
+
+        while True:
+            started = time.monotonic()
+            results = ingest_all()
+            for node_id, inserted in sorted(results.items()):
+                self.stdout.write(f"{node_id}: {inserted} samples")
+            self.stdout.write(self.style.SUCCESS(
+                f"{sum(results.values())} samples from {len(results)} tags in {time.monotonic() - started:.1f}s"
+            ))
+            if not options["loop"]:
+                break
+            time.sleep(options["loop"])
@@ -0,0 +1,90 @@
+# Generated by Django 5.1.4 on 2026-10-19 10:12
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def parse_sample_set_date(sample_set_name):
+    # Mirrors sample_sets.parse_sample_set_date; migrations must not import app code
+    if not sample_set_name:
+        return None
+    try:
+        return datetime.strptime(sample_set_name[:6], "%y%m%d").date()
+    except ValueError:
+        return None
+
+
+def backfill_sample_sets(apps, schema_editor):
+    SampleMetadata = apps.get_model('plotly_integration', 'SampleMetadata')
+    SampleSet = apps.get_model('plotly_integration', 'SampleSet')
+    SampleSetPrefix = apps.get_model('plotly_integration', 'SampleSetPrefix')
+
+    rows = (
+        SampleMetadata.objects
+        .exclude(sample_set_id__isnull=True)
+        .values_list('sample_set_id', 'sample_set_name', 'sample_type', 'sample_prefix')
+        .distinct()
+    )
+
+    sample_sets = {}
+    prefixes = set()
+    for sample_set_id, sample_set_name, sample_type, sample_prefix in rows.iterator():
+        sample_sets.setdefault(sample_set_id, SampleSet(
+            sample_set_id=sample_set_id,
+            sample_set_name=sample_set_name,
+            sample_set_date=parse_sample_set_date(sample_set_name),
+            sample_type=sample_type,
+        ))
+        if sample_prefix:
+            prefixes.add((sample_set_id, sample_prefix))
+
+    SampleSet.objects.bulk_create(sample_sets.values(), batch_size=1000, ignore_conflicts=True)
+    SampleSetPrefix.objects.bulk_create(
+        [SampleSetPrefix(sample_set_id=set_id, sample_prefix=prefix) for set_id, prefix in prefixes],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plotly_integration', '0033_vicellreport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SampleSet',
+            fields=[
+                ('sample_set_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('sample_set_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('sample_set_date', models.DateField(blank=True, null=True)),
+                ('sample_type', models.CharField(blank=True, max_length=255, null=True)),
+            ],
+            options={
+                'db_table': 'sample_set',
+                'managed': True,
+                'indexes': [
+                    models.Index(fields=['sample_type', '-sample_set_date'], name='sample_set_type_date_idx'),
+                    models.Index(fields=['-sample_set_date'], name='sample_set_date_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='SampleSetPrefix',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('sample_prefix', models.CharField(max_length=255)),
+                ('sample_set', models.ForeignKey(db_column='sample_set_id', on_delete=django.db.models.deletion.CASCADE, related_name='prefixes', to='plotly_integration.sampleset')),
+            ],
+            options={
+                'db_table': 'sample_set_prefix',
+                'managed': True,
+                'indexes': [models.Index(fields=['sample_prefix', 'sample_set'], name='sample_set_prefix_idx')],
+                'unique_together': {('sample_set', 'sample_prefix')},
+            },
+        ),
+        migrations.RunPython(backfill_sample_sets, migrations.RunPython.noop),
+    ]
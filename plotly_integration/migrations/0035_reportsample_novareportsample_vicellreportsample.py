@@ -0,0 +1,142 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def split_ids(value):
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def backfill_report_samples(apps, schema_editor):
+    Report = apps.get_model('plotly_integration', 'Report')
+    ReportSample = apps.get_model('plotly_integration', 'ReportSample')
+    SampleMetadata = apps.get_model('plotly_integration', 'SampleMetadata')
+
+    reports = list(Report.objects.all())
+    all_result_ids = {int(r) for report in reports for r in split_ids(report.selected_result_ids) if r.isdigit()}
+    all_sample_names = {s for report in reports for s in split_ids(report.selected_samples)}
+
+    metadata_by_result_id = {}
+    metadata_by_name = {}
+    rows = SampleMetadata.objects.filter(
+        models.Q(result_id__in=all_result_ids) | models.Q(sample_name__in=all_sample_names)
+    ).order_by('id').values_list('id', 'result_id', 'sample_name')
+    for metadata_id, result_id, sample_name in rows.iterator():
+        metadata_by_result_id.setdefault(result_id, (metadata_id, sample_name))
+        metadata_by_name.setdefault(sample_name, (metadata_id, result_id))
+
+    members = []
+    for report in reports:
+        result_ids = [int(r) for r in split_ids(report.selected_result_ids) if r.isdigit()]
+        sample_names = split_ids(report.selected_samples)
+
+        if result_ids:
+            # Both text fields were written sorted by sample name, so positions line up
+            if len(sample_names) != len(result_ids):
+                sample_names = [metadata_by_result_id.get(r, (None, None))[1] for r in result_ids]
+            for position, (result_id, sample_name) in enumerate(zip(result_ids, sample_names)):
+                members.append(ReportSample(
+                    report_id=report.report_id,
+                    sample_metadata_id=metadata_by_result_id.get(result_id, (None, None))[0],
+                    result_id=result_id,
+                    sample_name=sample_name,
+                    position=position,
+                ))
+        else:
+            # Older reports only stored sample names
+            position = 0
+            for sample_name in sample_names:
+                if sample_name not in metadata_by_name:
+                    continue
+                metadata_id, result_id = metadata_by_name[sample_name]
+                members.append(ReportSample(
+                    report_id=report.report_id,
+                    sample_metadata_id=metadata_id,
+                    result_id=result_id,
+                    sample_name=sample_name,
+                    position=position,
+                ))
+                position += 1
+
+    ReportSample.objects.bulk_create(members, batch_size=1000)
+
+
+def backfill_cell_culture_report_samples(apps, schema_editor):
+    for report_name, member_name, data_name in (
+            ('NovaReport', 'NovaReportSample', 'NovaFlex2'),
+            ('ViCellReport', 'ViCellReportSample', 'ViCellData'),
+    ):
+        ReportModel = apps.get_model('plotly_integration', report_name)
+        MemberModel = apps.get_model('plotly_integration', member_name)
+        DataModel = apps.get_model('plotly_integration', data_name)
+
+        existing_ids = set(DataModel.objects.values_list('id', flat=True))
+        members = []
+        for report_id, selected_result_ids in ReportModel.objects.values_list('id', 'selected_result_ids'):
+            sample_ids = [int(s) for s in split_ids(selected_result_ids) if s.isdigit() and int(s) in existing_ids]
+            members.extend(
+                MemberModel(report_id=report_id, sample_id=sample_id, position=position)
+                for position, sample_id in enumerate(sample_ids)
+            )
+        MemberModel.objects.bulk_create(members, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plotly_integration', '0034_sampleset_samplesetprefix'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSample',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('result_id', models.IntegerField()),
+                ('sample_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('position', models.IntegerField()),
+                ('report', models.ForeignKey(db_column='report_id', on_delete=django.db.models.deletion.CASCADE, related_name='samples', to='plotly_integration.report')),
+                ('sample_metadata', models.ForeignKey(blank=True, db_column='sample_metadata_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_samples', to='plotly_integration.samplemetadata')),
+            ],
+            options={
+                'db_table': 'report_sample',
+                'ordering': ['report', 'position'],
+                'managed': True,
+                'indexes': [models.Index(fields=['result_id', 'report'], name='report_sample_result_idx')],
+                'unique_together': {('report', 'position')},
+            },
+        ),
+        migrations.CreateModel(
+            name='NovaReportSample',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('position', models.IntegerField()),
+                ('report', models.ForeignKey(db_column='report_id', on_delete=django.db.models.deletion.CASCADE, related_name='samples', to='plotly_integration.novareport')),
+                ('sample', models.ForeignKey(db_column='sample_id', on_delete=django.db.models.deletion.CASCADE, related_name='report_samples', to='plotly_integration.novaflex2')),
+            ],
+            options={
+                'db_table': 'nova_report_sample',
+                'ordering': ['report', 'position'],
+                'indexes': [models.Index(fields=['sample', 'report'], name='nova_report_sample_idx')],
+                'unique_together': {('report', 'position')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ViCellReportSample',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('position', models.IntegerField()),
+                ('report', models.ForeignKey(db_column='report_id', on_delete=django.db.models.deletion.CASCADE, related_name='samples', to='plotly_integration.vicellreport')),
+                ('sample', models.ForeignKey(db_column='sample_id', on_delete=django.db.models.deletion.CASCADE, related_name='report_samples', to='plotly_integration.vicelldata')),
+            ],
+            options={
+                'db_table': 'vicell_report_sample',
+                'ordering': ['report', 'position'],
+                'indexes': [models.Index(fields=['sample', 'report'], name='vicell_report_sample_idx')],
+                'unique_together': {('report', 'position')},
+            },
+        ),
+        migrations.RunPython(backfill_report_samples, migrations.RunPython.noop),
+        migrations.RunPython(backfill_cell_culture_report_samples, migrations.RunPython.noop),
+    ]
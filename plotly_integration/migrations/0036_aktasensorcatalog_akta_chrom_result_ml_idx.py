@@ -0,0 +1,73 @@
+# Generated by Django 5.1.4 on 2026-10-19 12:20
+
+from django.db import migrations, models
+
+SENSOR_FIELDS = [
+    'uv_1_280', 'uv_2_0', 'uv_3_0', 'cond', 'conc_b', 'pH', 'system_flow', 'system_linear_flow',
+    'system_pressure', 'cond_temp', 'sample_flow', 'sample_linear_flow', 'sample_pressure',
+    'preC_pressure', 'deltaC_pressure', 'postC_pressure', 'frac_temp',
+]
+
+
+def backfill_sensor_catalog(apps, schema_editor):
+    AktaChromatogram = apps.get_model('plotly_integration', 'AktaChromatogram')
+    AktaSensorCatalog = apps.get_model('plotly_integration', 'AktaSensorCatalog')
+
+    aggregates = {'row_count': models.Count('id'), 'ml_min': models.Min('ml'), 'ml_max': models.Max('ml')}
+    for field in SENSOR_FIELDS:
+        aggregates[f'{field}__min'] = models.Min(field)
+        aggregates[f'{field}__max'] = models.Max(field)
+
+    # One grouped pass over the chromatogram table
+    rows = (
+        AktaChromatogram.objects
+        .exclude(result_id__isnull=True)
+        .values('result_id')
+        .annotate(**aggregates)
+        .order_by()
+    )
+
+    catalogs = []
+    for row in rows.iterator():
+        sensors = {
+            field: {'min': row[f'{field}__min'], 'max': row[f'{field}__max']}
+            for field in SENSOR_FIELDS
+            if row[f'{field}__min'] is not None
+        }
+        catalogs.append(AktaSensorCatalog(
+            result_id=row['result_id'],
+            ml_min=row['ml_min'],
+            ml_max=row['ml_max'],
+            row_count=row['row_count'],
+            sensors=sensors,
+        ))
+    AktaSensorCatalog.objects.bulk_create(catalogs, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plotly_integration', '0035_reportsample_novareportsample_vicellreportsample'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AktaSensorCatalog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_id', models.CharField(max_length=50, unique=True)),
+                ('ml_min', models.FloatField(blank=True, null=True)),
+                ('ml_max', models.FloatField(blank=True, null=True)),
+                ('row_count', models.IntegerField(default=0)),
+                ('sensors', models.JSONField(default=dict)),
+            ],
+            options={
+                'db_table': 'akta_sensor_catalog',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='aktachromatogram',
+            index=models.Index(fields=['result_id', 'ml'], name='akta_chrom_result_ml_idx'),
+        ),
+        migrations.RunPython(backfill_sensor_catalog, migrations.RunPython.noop),
+    ]
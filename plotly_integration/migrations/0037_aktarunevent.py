@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plotly_integration', '0036_aktasensorcatalog_akta_chrom_result_ml_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AktaRunEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_id', models.CharField(max_length=50)),
+                ('sequence', models.IntegerField()),
+                ('event_type', models.CharField(max_length=20)),
+                ('block_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('phase_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('ml', models.FloatField(blank=True, null=True)),
+                ('end_ml', models.FloatField(blank=True, null=True)),
+                ('value', models.TextField(blank=True, null=True)),
+                ('timestamp', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'akta_run_event',
+                'ordering': ['result_id', 'sequence'],
+                'indexes': [
+                    models.Index(fields=['result_id', 'event_type', 'ml'], name='akta_run_event_type_idx'),
+                    models.Index(fields=['event_type', 'block_name'], name='akta_run_event_block_idx'),
+                ],
+                'unique_together': {('result_id', 'sequence')},
+            },
+        ),
+    ]
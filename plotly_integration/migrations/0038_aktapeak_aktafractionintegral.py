@@ -0,0 +1,50 @@
+# Generated by Django 5.1.4 on 2026-10-19 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plotly_integration', '0037_aktarunevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AktaPeak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_id', models.CharField(max_length=50)),
+                ('peak_number', models.IntegerField()),
+                ('start_ml', models.FloatField()),
+                ('apex_ml', models.FloatField()),
+                ('end_ml', models.FloatField()),
+                ('height', models.FloatField(blank=True, null=True)),
+                ('area', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'akta_peak',
+                'ordering': ['result_id', 'peak_number'],
+                'unique_together': {('result_id', 'peak_number')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AktaFractionIntegral',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_id', models.CharField(max_length=50)),
+                ('fraction', models.CharField(max_length=100)),
+                ('start_ml', models.FloatField()),
+                ('end_ml', models.FloatField()),
+                ('volume', models.FloatField()),
+                ('uv_area', models.FloatField(blank=True, null=True)),
+                ('peak_number', models.IntegerField(blank=True, null=True)),
+                ('peak_share', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'akta_fraction_integral',
+                'ordering': ['result_id', 'start_ml'],
+                'indexes': [models.Index(fields=['result_id', 'start_ml'], name='akta_frac_integral_idx')],
+            },
+        ),
+    ]
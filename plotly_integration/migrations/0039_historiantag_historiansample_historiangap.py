@@ -0,0 +1,63 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plotly_integration', '0038_aktapeak_aktafractionintegral'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorianTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('node_id', models.CharField(max_length=255, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('enabled', models.BooleanField(default=True)),
+                ('backfill_days', models.IntegerField(default=7)),
+                ('max_gap_seconds', models.IntegerField(blank=True, null=True)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_status', models.CharField(blank=True, max_length=20, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('rows_ingested', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'historian_tag',
+            },
+        ),
+        migrations.CreateModel(
+            name='HistorianSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('value', models.FloatField(blank=True, null=True)),
+                ('status', models.BigIntegerField(default=0)),
+                ('tag', models.ForeignKey(db_column='tag_id', on_delete=django.db.models.deletion.CASCADE, related_name='samples', to='plotly_integration.historiantag')),
+            ],
+            options={
+                'db_table': 'historian_sample',
+                'unique_together': {('tag', 'timestamp')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HistorianGap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('reason', models.CharField(max_length=20)),
+                ('status', models.BigIntegerField(blank=True, null=True)),
+                ('status_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('tag', models.ForeignKey(db_column='tag_id', on_delete=django.db.models.deletion.CASCADE, related_name='gaps', to='plotly_integration.historiantag')),
+            ],
+            options={
+                'db_table': 'historian_gap',
+                'indexes': [models.Index(fields=['tag', 'start'], name='historian_gap_tag_idx')],
+            },
+        ),
+    ]
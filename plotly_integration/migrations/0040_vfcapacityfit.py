@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plotly_integration', '0039_historiantag_historiansample_historiangap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VFCapacityFit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fit_model', models.CharField(max_length=20)),
+                ('slope', models.FloatField(blank=True, null=True)),
+                ('intercept', models.FloatField(blank=True, null=True)),
+                ('r_squared', models.FloatField(blank=True, null=True)),
+                ('points', models.IntegerField(default=0)),
+                ('capacity', models.FloatField(blank=True, null=True)),
+                ('initial_flux', models.FloatField(blank=True, null=True)),
+                ('initial_pressure', models.FloatField(blank=True, null=True)),
+                ('throughput', models.FloatField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('filter_area', models.FloatField(blank=True, null=True)),
+                ('fitted_at', models.DateTimeField(auto_now=True)),
+                ('result_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='capacity_fits', to='plotly_integration.vfmetadata')),
+            ],
+            options={
+                'db_table': 'vf_capacity_fit',
+                'unique_together': {('result_id', 'fit_model')},
+            },
+        ),
+    ]
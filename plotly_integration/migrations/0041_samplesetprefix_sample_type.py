@@ -0,0 +1,71 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+def backfill_prefix_types(apps, schema_editor):
+    # One row per (sample set, prefix, sample type) found in sample_metadata
+    SampleMetadata = apps.get_model('plotly_integration', 'SampleMetadata')
+    SampleSet = apps.get_model('plotly_integration', 'SampleSet')
+    SampleSetPrefix = apps.get_model('plotly_integration', 'SampleSetPrefix')
+
+    sample_set_ids = set(SampleSet.objects.values_list('sample_set_id', flat=True))
+    rows = (
+        SampleMetadata.objects
+        .exclude(sample_set_id__isnull=True)
+        .values_list('sample_set_id', 'sample_prefix', 'sample_type')
+        .distinct()
+    )
+    prefixes = {
+        (sample_set_id, sample_prefix or "", sample_type)
+        for sample_set_id, sample_prefix, sample_type in rows.iterator()
+        if sample_set_id in sample_set_ids
+    }
+
+    SampleSetPrefix.objects.all().delete()
+    SampleSetPrefix.objects.bulk_create(
+        [SampleSetPrefix(sample_set_id=set_id, sample_prefix=prefix, sample_type=sample_type)
+         for set_id, prefix, sample_type in prefixes],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plotly_integration', '0040_vfcapacityfit'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sampleset',
+            name='sample_set_type_date_idx',
+        ),
+        migrations.RemoveField(
+            model_name='sampleset',
+            name='sample_type',
+        ),
+        migrations.RemoveIndex(
+            model_name='samplesetprefix',
+            name='sample_set_prefix_idx',
+        ),
+        migrations.AddField(
+            model_name='samplesetprefix',
+            name='sample_type',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='samplesetprefix',
+            unique_together={('sample_set', 'sample_prefix', 'sample_type')},
+        ),
+        migrations.AddIndex(
+            model_name='samplesetprefix',
+            index=models.Index(fields=['sample_prefix', 'sample_type', 'sample_set'], name='sample_set_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='samplesetprefix',
+            index=models.Index(fields=['sample_type', 'sample_set'], name='sample_set_prefix_type_idx'),
+        ),
+        migrations.RunPython(backfill_prefix_types, migrations.RunPython.noop),
+    ]
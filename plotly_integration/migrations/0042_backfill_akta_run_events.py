@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-19 19:05
+
+import pandas as pd
+from django.db import migrations
+
+from plotly_integration.akta.akta_app.akta_processing import parse_run_events
+
+
+def backfill_run_events(apps, schema_editor):
+    # Runs imported before akta_run_event existed; later imports write their events themselves
+    AktaRunEvent = apps.get_model('plotly_integration', 'AktaRunEvent')
+    AktaRunLog = apps.get_model('plotly_integration', 'AktaRunLog')
+
+    parsed_result_ids = set(AktaRunEvent.objects.values_list('result_id', flat=True).distinct())
+    result_ids = (
+        AktaRunLog.objects
+        .exclude(result_id__isnull=True)
+        .values_list('result_id', flat=True)
+        .distinct()
+        .order_by()
+    )
+
+    for result_id in [result_id for result_id in result_ids if result_id not in parsed_result_ids]:
+        df_run_log = pd.DataFrame(
+            AktaRunLog.objects.filter(result_id=result_id).order_by('ml', 'id').values_list('ml', 'log_text'),
+            columns=['ml', 'Run Log'],
+        )
+        df_events = parse_run_events(df_run_log)
+        records = df_events.astype(object).where(df_events.notna(), None).to_dict('records')
+        AktaRunEvent.objects.bulk_create(
+            [AktaRunEvent(result_id=result_id, **record) for record in records],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plotly_integration', '0041_samplesetprefix_sample_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_run_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.4 on 2026-10-19 19:30
+
+import numpy as np
+import pandas as pd
+from django.db import migrations
+
+from plotly_integration.akta.akta_app.akta_processing import integrate_fractions
+
+FRACTION_INTEGRAL_COLUMNS = ['fraction', 'start_ml', 'end_ml', 'volume', 'uv_area', 'peak_number', 'peak_share']
+PEAK_COLUMNS = ['peak_number', 'start_ml', 'apex_ml', 'end_ml', 'height', 'area']
+
+
+def backfill_fraction_integrals(apps, schema_editor):
+    # Runs imported before akta_peak/akta_fraction_integral existed and that have a UV 1_280 curve
+    AktaChromatogram = apps.get_model('plotly_integration', 'AktaChromatogram')
+    AktaFraction = apps.get_model('plotly_integration', 'AktaFraction')
+    AktaFractionIntegral = apps.get_model('plotly_integration', 'AktaFractionIntegral')
+    AktaPeak = apps.get_model('plotly_integration', 'AktaPeak')
+    AktaSensorCatalog = apps.get_model('plotly_integration', 'AktaSensorCatalog')
+
+    processed = set(AktaPeak.objects.values_list('result_id', flat=True).distinct()) | \
+        set(AktaFractionIntegral.objects.values_list('result_id', flat=True).distinct())
+    result_ids = [
+        result_id
+        for result_id, sensors in AktaSensorCatalog.objects.values_list('result_id', 'sensors').iterator()
+        if 'uv_1_280' in (sensors or {}) and result_id not in processed
+    ]
+
+    for result_id in result_ids:
+        chromatogram = np.array(
+            AktaChromatogram.objects.filter(result_id=result_id).order_by('ml').values_list('ml', 'uv_1_280'),
+            dtype=np.float64,
+        )
+        df_fraction = pd.DataFrame(
+            AktaFraction.objects.filter(result_id=result_id).values_list('ml', 'fraction'), columns=['ml', 'Fraction']
+        )
+        fractions, peaks = integrate_fractions(chromatogram[:, 0], chromatogram[:, 1], df_fraction)
+
+        for model, df, columns in (
+                (AktaPeak, peaks, PEAK_COLUMNS),
+                (AktaFractionIntegral, fractions, FRACTION_INTEGRAL_COLUMNS),
+        ):
+            records = df[columns].astype(object).where(df[columns].notna(), None).to_dict('records')
+            model.objects.bulk_create(
+                [model(result_id=result_id, **record) for record in records], batch_size=1000, ignore_conflicts=True
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plotly_integration', '0042_backfill_akta_run_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_fraction_integrals, migrations.RunPython.noop),
+    ]
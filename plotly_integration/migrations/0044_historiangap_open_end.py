@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plotly_integration', '0043_backfill_akta_fraction_integrals'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='historiangap',
+            name='end',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
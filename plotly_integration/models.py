@@ -35,6 +35,36 @@ class SampleMetadata(models.Model):
         unique_together = ('result_id', 'system_name')
 
 
+class SampleSet(models.Model):
+    sample_set_id = models.IntegerField(primary_key=True)
+    sample_set_name = models.CharField(max_length=255, null=True, blank=True)
+    sample_set_date = models.DateField(null=True, blank=True)  # Parsed from the YYMMDD name prefix
+
+    class Meta:
+        db_table = 'sample_set'
+        managed = True
+        indexes = [
+            models.Index(fields=['-sample_set_date'], name='sample_set_date_idx'),
+        ]
+
+
+class SampleSetPrefix(models.Model):
+    id = models.AutoField(primary_key=True)
+    sample_set = models.ForeignKey(SampleSet, on_delete=models.CASCADE, db_column='sample_set_id',
+                                   related_name='prefixes')
+    sample_prefix = models.CharField(max_length=255)  # Empty for injections without a prefix
+    sample_type = models.CharField(max_length=255, null=True, blank=True)  #1:SEC,2:PROA, per injection
+
+    class Meta:
+        db_table = 'sample_set_prefix'
+        managed = True
+        unique_together = ('sample_set', 'sample_prefix', 'sample_type')
+        indexes = [
+            models.Index(fields=['sample_prefix', 'sample_type', 'sample_set'], name='sample_set_prefix_idx'),
+            models.Index(fields=['sample_type', 'sample_set'], name='sample_set_prefix_type_idx'),
+        ]
+
+
 class PeakResults(models.Model):
     id = models.AutoField(primary_key=True)
     result_id = models.IntegerField()
@@ -165,6 +195,25 @@ class Report(models.Model):
         managed = True
 
 
+class ReportSample(models.Model):
+    id = models.AutoField(primary_key=True)
+    report = models.ForeignKey(Report, on_delete=models.CASCADE, db_column='report_id', related_name='samples')
+    sample_metadata = models.ForeignKey(SampleMetadata, on_delete=models.SET_NULL, null=True, blank=True,
+                                        db_column='sample_metadata_id', related_name='report_samples')
+    result_id = models.IntegerField()  # Injection ID, kept so the membership survives metadata re-imports
+    sample_name = models.CharField(max_length=255, null=True, blank=True)
+    position = models.IntegerField()  # Order of the sample within the report
+
+    class Meta:
+        db_table = 'report_sample'
+        managed = True
+        ordering = ['report', 'position']
+        unique_together = ('report', 'position')
+        indexes = [
+            models.Index(fields=['result_id', 'report'], name='report_sample_result_idx'),
+        ]
+
+
 class Users(models.Model):
     user_id = models.IntegerField()
     user_name = models.CharField(max_length=255, primary_key=True)  # ✅ Fixed
@@ -372,6 +421,29 @@ class VFTimeSeriesData(models.Model):
         db_table = "vf_time_series_data"
         managed = True
 
+class VFCapacityFit(models.Model):
+    """ Filter capacity model fitted to an experiment's product filtration, see sartoflow_smart.vf_capacity. """
+    result_id = models.ForeignKey(VFMetadata, on_delete=models.CASCADE, related_name="capacity_fits")
+    fit_model = models.CharField(max_length=20)  # vmax / cake / pmax
+    slope = models.FloatField(null=True, blank=True)
+    intercept = models.FloatField(null=True, blank=True)
+    r_squared = models.FloatField(null=True, blank=True)
+    points = models.IntegerField(default=0)
+    capacity = models.FloatField(null=True, blank=True)  # L/m², None when the model has no plugging limit
+    initial_flux = models.FloatField(null=True, blank=True)  # LMH
+    initial_pressure = models.FloatField(null=True, blank=True)  # bar
+    throughput = models.FloatField(null=True, blank=True)  # L/m² filtered by the end of the step
+    duration = models.FloatField(null=True, blank=True)  # Hours
+    filter_area = models.FloatField(null=True, blank=True)  # m²
+    fitted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.result_id_id} - {self.fit_model}"
+
+    class Meta:
+        db_table = "vf_capacity_fit"
+        unique_together = [("result_id", "fit_model")]
+
 # '''Akta Models for table'''
 
 
@@ -457,11 +529,26 @@ class AktaChromatogram(models.Model):
 
     class Meta:
         db_table = "akta_chromatogram"
+        indexes = [
+            models.Index(fields=['result_id', 'ml'], name='akta_chrom_result_ml_idx'),
+        ]
 
     # def __str__(self):
     #     return f"Result: {self.result.result_id} | ml: {self.ml}"
 
 
+class AktaSensorCatalog(models.Model):
+    """ One row per run: which chromatogram sensors carry data, with their min/max. Written at import. """
+    result_id = models.CharField(max_length=50, unique=True)
+    ml_min = models.FloatField(null=True, blank=True)
+    ml_max = models.FloatField(null=True, blank=True)
+    row_count = models.IntegerField(default=0)
+    sensors = models.JSONField(default=dict)  # {field name: {"min": float, "max": float}}
+
+    class Meta:
+        db_table = "akta_sensor_catalog"
+
+
 class AktaFraction(models.Model):
     result_id = models.CharField(max_length=50, null=True, blank=True)
     ml = models.FloatField(null=True, blank=True)
@@ -473,6 +560,41 @@ class AktaFraction(models.Model):
     #     return f"Result: {self.result.result_id} | Fraction at ml: {self.ml}"
 
 
+class AktaPeak(models.Model):
+    """ UV 280 peaks per run, found at import. ml values are on the chromatogram axis. """
+    result_id = models.CharField(max_length=50)
+    peak_number = models.IntegerField()
+    start_ml = models.FloatField()
+    apex_ml = models.FloatField()
+    end_ml = models.FloatField()
+    height = models.FloatField(null=True, blank=True)  # mAU
+    area = models.FloatField(null=True, blank=True)  # mAU·mL
+
+    class Meta:
+        db_table = "akta_peak"
+        ordering = ["result_id", "peak_number"]
+        unique_together = ("result_id", "peak_number")
+
+
+class AktaFractionIntegral(models.Model):
+    """ UV 280 area and peak assignment per collected fraction. ml values are on the fraction axis. """
+    result_id = models.CharField(max_length=50)
+    fraction = models.CharField(max_length=100)
+    start_ml = models.FloatField()
+    end_ml = models.FloatField()
+    volume = models.FloatField()
+    uv_area = models.FloatField(null=True, blank=True)  # mAU·mL
+    peak_number = models.IntegerField(null=True, blank=True)
+    peak_share = models.FloatField(null=True, blank=True)  # Share of the peak's area collected in this fraction
+
+    class Meta:
+        db_table = "akta_fraction_integral"
+        ordering = ["result_id", "start_ml"]
+        indexes = [
+            models.Index(fields=['result_id', 'start_ml'], name='akta_frac_integral_idx'),
+        ]
+
+
 class AktaRunLog(models.Model):
     result_id = models.CharField(max_length=50, null=True, blank=True)
     ml = models.FloatField(null=True, blank=True)
@@ -485,6 +607,28 @@ class AktaRunLog(models.Model):
     #     return f"Result: {self.result.result_id} | Log at ml: {self.ml}"
 
 
+class AktaRunEvent(models.Model):
+    """ Structural run-log events (method metadata, phase/block boundaries, marks) parsed once at import. """
+    result_id = models.CharField(max_length=50)
+    sequence = models.IntegerField()  # Run-log order
+    event_type = models.CharField(max_length=20)  # method, batch_id, phase_start, block_end, ...
+    block_name = models.CharField(max_length=255, null=True, blank=True)  # Phase/block name, also on end events
+    phase_name = models.CharField(max_length=255, null=True, blank=True)  # Enclosing phase
+    ml = models.FloatField(null=True, blank=True)
+    end_ml = models.FloatField(null=True, blank=True)  # Set on phase_start/block_start once the end is seen
+    value = models.TextField(null=True, blank=True)
+    timestamp = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "akta_run_event"
+        ordering = ["result_id", "sequence"]
+        unique_together = ("result_id", "sequence")
+        indexes = [
+            models.Index(fields=['result_id', 'event_type', 'ml'], name='akta_run_event_type_idx'),
+            models.Index(fields=['event_type', 'block_name'], name='akta_run_event_block_idx'),
+        ]
+
+
 class AktaScoutingList(models.Model):
     scouting_id = models.BigAutoField(primary_key=True)
     total_num_of_scoutings = models.BigIntegerField()
@@ -584,6 +728,21 @@ class NovaReport(models.Model):
         db_table = 'nova_report'
 
 
+class NovaReportSample(models.Model):
+    id = models.AutoField(primary_key=True)
+    report = models.ForeignKey(NovaReport, on_delete=models.CASCADE, db_column='report_id', related_name='samples')
+    sample = models.ForeignKey(NovaFlex2, on_delete=models.CASCADE, db_column='sample_id', related_name='report_samples')
+    position = models.IntegerField()  # Order of the sample within the report
+
+    class Meta:
+        db_table = 'nova_report_sample'
+        ordering = ['report', 'position']
+        unique_together = ('report', 'position')
+        indexes = [
+            models.Index(fields=['sample', 'report'], name='nova_report_sample_idx'),
+        ]
+
+
 #Vicell Models
 class ViCellData(models.Model):
     id = models.AutoField(primary_key=True)  # Ensure primary key is explicitly set
@@ -624,4 +783,67 @@ class ViCellReport(models.Model):
         db_table = 'vicell_report'
 
 
+class ViCellReportSample(models.Model):
+    id = models.AutoField(primary_key=True)
+    report = models.ForeignKey(ViCellReport, on_delete=models.CASCADE, db_column='report_id', related_name='samples')
+    sample = models.ForeignKey(ViCellData, on_delete=models.CASCADE, db_column='sample_id', related_name='report_samples')
+    position = models.IntegerField()  # Order of the sample within the report
+
+    class Meta:
+        db_table = 'vicell_report_sample'
+        ordering = ['report', 'position']
+        unique_together = ('report', 'position')
+        indexes = [
+            models.Index(fields=['sample', 'report'], name='vicell_report_sample_idx'),
+        ]
+
+
+
+#OPC UA Historian Tables
+class HistorianTag(models.Model):
+    """ A historian tag mirrored locally; ingestion resumes from its watermark. """
+    node_id = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=255)
+    enabled = models.BooleanField(default=True)
+    backfill_days = models.IntegerField(default=7)  # History pulled on the first run
+    max_gap_seconds = models.IntegerField(null=True, blank=True)  # Longer silences are recorded as gaps
+    watermark = models.DateTimeField(null=True, blank=True)  # Source timestamp of the last stored sample
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_status = models.CharField(max_length=20, null=True, blank=True)  # ok / no_data / error
+    last_error = models.TextField(null=True, blank=True)
+    rows_ingested = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'historian_tag'
+
+    def __str__(self):
+        return f"{self.name} ({self.node_id})"
+
+
+class HistorianSample(models.Model):
+    tag = models.ForeignKey(HistorianTag, on_delete=models.CASCADE, db_column='tag_id', related_name='samples')
+    timestamp = models.DateTimeField()  # Source timestamp (UTC)
+    value = models.FloatField(null=True, blank=True)  # NULL for non-numeric values
+    status = models.BigIntegerField(default=0)  # OPC UA StatusCode (0 = Good)
+
+    class Meta:
+        db_table = 'historian_sample'
+        unique_together = ('tag', 'timestamp')
+
+
+class HistorianGap(models.Model):
+    """ Periods without usable data: runs of non-good status codes or silences longer than max_gap_seconds. """
+    tag = models.ForeignKey(HistorianTag, on_delete=models.CASCADE, db_column='tag_id', related_name='gaps')
+    start = models.DateTimeField()
+    end = models.DateTimeField(null=True, blank=True)  # NULL while a status run is still open
+    reason = models.CharField(max_length=20)  # status / silence
+    status = models.BigIntegerField(null=True, blank=True)
+    status_name = models.CharField(max_length=100, null=True, blank=True)
+
+    class Meta:
+        db_table = 'historian_gap'
+        indexes = [
+            models.Index(fields=['tag', 'start'], name='historian_gap_tag_idx'),
+        ]
+
 #Cell Culture Aggregated Data
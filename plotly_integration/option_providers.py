@@ -0,0 +1,83 @@
+"""
+Lazily loaded, cached dropdown options.
+
+Dash modules are imported in the delayed-import thread at startup, so querying the database while building
+a layout slows startup, fails when the database is not reachable yet and goes stale until restart. Option
+lists are instead registered here and loaded on the first callback that asks for them, then reused for
+OPTION_TTL seconds or until an import invalidates them:
+
+    @option_provider("vf_experiments")
+    def vf_experiments():
+        return [{"label": ..., "value": ...} for ... in VFMetadata.objects...]
+
+    get_options("vf_experiments")         # in a callback
+    invalidate_options("vf_experiments")  # after an import
+"""
+import threading
+import time
+
+from plotly_integration.models import SartoflowTimeSeriesData, UFDFMetadata, VFMetadata
+
+OPTION_TTL = 300  # Seconds options are reused; also bounds staleness from imports in other processes
+
+
+class OptionProvider:
+    def __init__(self, name, loader, ttl=OPTION_TTL):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self._options = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._options is None or time.monotonic() - self._loaded_at > self.ttl:
+                self._options = self.loader()
+                self._loaded_at = time.monotonic()
+            return self._options
+
+    def invalidate(self):
+        with self._lock:
+            self._options = None
+
+
+_providers = {}  # {name: OptionProvider}
+
+
+def option_provider(name, ttl=OPTION_TTL):
+    """ Registers the decorated function as the loader of option list `name`. """
+    def register(loader):
+        _providers[name] = OptionProvider(name, loader, ttl)
+        return loader
+    return register
+
+
+def get_options(name):
+    return _providers[name].get()
+
+
+def invalidate_options(*names):
+    """ Drops the cached lists `names` (all when none are given); they reload on next use. """
+    for name in names or list(_providers):
+        if name in _providers:
+            _providers[name].invalidate()
+
+
+# ====================== Sartoflow ======================
+@option_provider("sartoflow_batches")
+def sartoflow_batches():
+    batch_ids = SartoflowTimeSeriesData.objects.values_list("batch_id", flat=True).distinct().order_by("batch_id")
+    return [{"label": batch, "value": batch} for batch in batch_ids]
+
+
+@option_provider("ufdf_experiments")
+def ufdf_experiments():
+    experiments = UFDFMetadata.objects.order_by("-result_id").values_list("result_id", "experiment_name")
+    return [{"label": f"{result_id} - {name}", "value": result_id} for result_id, name in experiments]
+
+
+@option_provider("vf_experiments")
+def vf_experiments():
+    experiments = VFMetadata.objects.order_by("-result_id").values_list("result_id", "experiment_name")
+    return [{"label": name, "value": result_id} for result_id, name in experiments]
@@ -3,6 +3,7 @@ import pandas as pd
 from dash import dcc, html, Input, Output, State, dash_table
 from django_plotly_dash import DjangoDash
 from plotly_integration.models import ViCellData, ViCellReport
+from plotly_integration.utils import set_cell_culture_report_samples
 from datetime import datetime
 from django.utils.timezone import is_aware
 
@@ -200,12 +201,13 @@ def create_report(n_clicks, report_name, project_id, user_id, comments, table_da
 
     selected_sample_ids = [table_data[i]["id"] for i in selected_rows]
 
-    ViCellReport.objects.create(
+    report = ViCellReport.objects.create(
         report_name=report_name,
         project_id=project_id,
         user_id=user_id,
         comments=comments,
         selected_result_ids=",".join(map(str, selected_sample_ids))
     )
+    set_cell_culture_report_samples(report, selected_sample_ids)
 
     return "✅ ViCell Report created successfully!"
@@ -1,14 +1,11 @@
-import base64
-import io
 import re
 import numpy as np
 import pandas as pd
 from dash import dcc, html, Input, Output, State, dash_table
 from django.db import IntegrityError
 from django_plotly_dash import DjangoDash
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from plotly_integration.models import ViCellData
+from plotly_integration.streaming_upload import completed_upload_path, streaming_upload
 
 # Initialize the Dash app
 app = DjangoDash('ViCellDataUploadApp')
@@ -38,21 +35,17 @@ app.layout = html.Div(
         html.Div(
             style={"textAlign": "center", "marginBottom": "20px"},
             children=[
-                dcc.Upload(
-                    id='upload-data',
-                    children=html.Button(
-                        '📂 Upload Excel File',
-                        style={
-                            "backgroundColor": "#0047b3",
-                            "color": "white",
-                            "padding": "10px 20px",
-                            "border": "none",
-                            "borderRadius": "5px",
-                            "cursor": "pointer",
-                            "fontSize": "16px"
-                        }
-                    ),
-                    multiple=False
+                streaming_upload(
+                    app, 'upload-data', '📂 Upload Excel File', accept=".xls,.xlsx",
+                    button_style={
+                        "backgroundColor": "#0047b3",
+                        "color": "white",
+                        "padding": "10px 20px",
+                        "border": "none",
+                        "borderRadius": "5px",
+                        "cursor": "pointer",
+                        "fontSize": "16px"
+                    }
                 ),
                 html.Div(id='file-name', style={"marginTop": "10px", "fontWeight": "bold", "color": "green"})
             ]
@@ -116,13 +109,9 @@ app.layout = html.Div(
 
 
 # Function to parse and clean uploaded Excel file
-def parse_contents(contents, filename):
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-    file_path = default_storage.save(f"uploads/{filename}", ContentFile(decoded))
-
-    # Read the first sheet of Excel file
-    xls = pd.ExcelFile(default_storage.path(file_path))
+def parse_contents(upload):
+    # Read the first sheet of the uploaded Excel file straight from the upload's temp file
+    xls = pd.ExcelFile(completed_upload_path(upload))
     df = pd.read_excel(xls, sheet_name=xls.sheet_names[0])
 
     # Remove first row (which contains units)
@@ -182,14 +171,14 @@ def parse_contents(contents, filename):
      Output('data-preview', 'data'),
      Output('file-name', 'children'),
      Output('save-button', 'style')],
-    Input('upload-data', 'contents'),
-    State('upload-data', 'filename'),
+    Input('upload-data', 'data'),
     prevent_initial_call=True
 )
-def update_output(contents, filename):
-    if contents:
+def update_output(upload):
+    if upload:
+        filename = upload["filename"]
         try:
-            df_cleaned = parse_contents(contents, filename)
+            df_cleaned = parse_contents(upload)
 
             # Convert dataframe to DataTable format
             columns = [{"name": i, "id": i} for i in df_cleaned.columns]
@@ -1,10 +1,9 @@
 import pandas as pd
 import dash
-import base64
-import io
 from dash import dcc, html, dash_table, Input, Output, State
 from django_plotly_dash import DjangoDash
 from plotly_integration.models import ProjectID
+from plotly_integration.streaming_upload import completed_upload_path, streaming_upload
 
 # Define the Dash app
 app = DjangoDash('CLDDataApp')
@@ -16,20 +15,16 @@ app.layout = html.Div(
                 style={"textAlign": "center", "color": "#003f7f", "marginBottom": "20px"}),
 
         # Upload Component
-        dcc.Upload(
-            id='upload-data',
-            children=html.Div([
-                'Drag and Drop or ',
-                html.A('Select an Excel File')
-            ]),
-            style={
-                "width": "100%", "height": "60px", "lineHeight": "60px",
+        streaming_upload(
+            app, 'upload-data', 'Select a CSV or Excel File', accept=".csv,.xls,.xlsx",
+            button_style={
+                "width": "100%", "height": "60px",
                 "borderWidth": "2px", "borderStyle": "dashed",
                 "borderColor": "#003f7f", "borderRadius": "8px",
-                "textAlign": "center", "marginBottom": "20px",
+                "textAlign": "center", "cursor": "pointer",
                 "backgroundColor": "#d6e0ff"
             },
-            multiple=False
+            status_style={"marginBottom": "20px"}
         ),
 
         html.Div(id='output-data-upload'),  # Displays file name
@@ -123,15 +118,14 @@ uploaded_df_store = {}
 
 
 # Function to parse uploaded content
-def parse_contents(contents, filename):
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-
+def parse_contents(upload):
+    filename = upload["filename"]
     try:
+        path = completed_upload_path(upload)
         if 'csv' in filename:
-            df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
+            df = pd.read_csv(path, encoding='utf-8')
         elif 'xls' in filename:
-            df = pd.read_excel(io.BytesIO(decoded))
+            df = pd.read_excel(path)
     except Exception as e:
         return None, html.Div(["There was an error processing this file."])
 
@@ -162,16 +156,16 @@ def parse_contents(contents, filename):
     [Output('output-data-upload', 'children'),
      Output('uploaded-data-table', 'columns'),
      Output('uploaded-data-table', 'data')],
-    Input('upload-data', 'contents'),
-    State('upload-data', 'filename')
+    Input('upload-data', 'data')
 )
-def update_output(contents, filename):
+def update_output(upload):
     global uploaded_df_store  # ✅ Store the uploaded dataframe in memory
 
-    if contents is None:
+    if upload is None:
         return html.Div("No file uploaded yet."), [], []
 
-    df, error_message = parse_contents(contents, filename)
+    filename = upload["filename"]
+    df, error_message = parse_contents(upload)
 
     if df is None or df.empty:
         return html.Div("Error: No valid data to process."), [], []
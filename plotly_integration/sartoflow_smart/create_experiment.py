@@ -1,10 +1,11 @@
 from dash import dcc, html, Input, Output, State, dash_table
 from django_plotly_dash import DjangoDash
-import pandas as pd
-import base64
-import io
+from django.db import transaction
 
 from plotly_integration.models import UFDFMetadata, SartoflowTimeSeriesData
+from plotly_integration.option_providers import invalidate_options
+from plotly_integration.sartoflow_smart.sartoflow_loader import iter_sartoflow_chunks, load_sartoflow_file
+from plotly_integration.streaming_upload import completed_upload_path, remove_upload, streaming_upload
 
 # Initialize the Dash app
 app = DjangoDash("UFDFAnalysis")
@@ -140,12 +141,10 @@ ufdf_layout = html.Div(
 
         html.H3("Upload Data File", style={"marginTop": "20px", "color": "#0047b3"}),
 
-        dcc.Upload(
-            id="upload-data",
-            children=html.Button("Upload File", style={"backgroundColor": "#0047b3", "color": "white", "border": "none",
-                                                       "padding": "10px 20px", "cursor": "pointer"}),
-            multiple=False,
-            style={"marginBottom": "20px"},
+        streaming_upload(
+            app, "upload-data", "Upload File", accept=".csv",
+            button_style={"backgroundColor": "#0047b3", "color": "white", "border": "none",
+                          "padding": "10px 20px", "cursor": "pointer", "marginBottom": "20px"},
         ),
         html.Div(id="upload-status", style={"marginTop": "10px", "color": "green"}),
 
@@ -291,86 +290,52 @@ def calculate_flow_rate(final_volume, final_concentration, load_mass):
         return ""
 
 
+PREVIEW_ROWS = 10
+
+
 # Define a function to parse CSV file
-def parse_csv(contents):
+def parse_csv(upload):
     """
-    Parses uploaded CSV file, assigns correct headers, and returns a DataFrame.
+    Parses the first rows of an uploaded Sartoflow CSV for the preview.
+    :param upload: Info dict from the streaming upload store.
+    :return: DataFrame keyed by model field names, or an error message.
     """
-    content_type, content_string = contents.split(",")
-    decoded = base64.b64decode(content_string)
-
     try:
-        # Read CSV, skipping first 4 rows (since data starts on row 5)
-        df = pd.read_csv(io.StringIO(decoded.decode("utf-8-sig")), delimiter=";", skiprows=4, header=None)
-
-        # Define correct headers (36 headers for 36 columns)
-        correct_headers = [
-            "BatchId", "PDatTime", "ProcessTime",
-            "AG2100_Value", "AG2100_Setpoint", "AG2100_Mode", "AG2100_Output",
-            "DPRESS_Value", "DPRESS_Output", "DPRESS_Mode", "DPRESS_Setpoint",
-            "F_PERM_Value",
-            "P2500_Setpoint", "P2500_Value", "P2500_Output", "P2500_Mode",
-            "P3000_Setpoint", "P3000_Mode", "P3000_Output", "P3000_Value", "P3000_T",
-            "PIR2600", "PIR2700",
-            "PIRC2500_Output", "PIRC2500_Value", "PIRC2500_Setpoint", "PIRC2500_Mode",
-            "QIR2000", "QIR2100",
-            "TIR2100", "TMP",
-            "WIR2700",
-            "WIRC2100_Value", "WIRC2100_Output", "WIRC2100_Setpoint", "WIRC2100_Mode"
-        ]
-
-        # Ensure correct number of columns before assigning headers
-        if len(df.columns) != len(correct_headers):
-            raise ValueError(f"Column mismatch! Expected {len(correct_headers)} columns, but found {len(df.columns)}.")
-
-        # Assign correct headers
-        df.columns = correct_headers
-
-        # Convert PDatTime to datetime format
-        df["PDatTime"] = pd.to_datetime(df["PDatTime"], errors="coerce")
-
-        # Drop rows where `BatchId` is NaN
-        df = df.dropna(subset=["BatchId"])
-
-        # Ensure `BatchId` is always a string and non-null
-        df["BatchId"] = df["BatchId"].astype(str).str.strip()
-
-        # Remove completely empty rows
-        df = df.dropna(how="all")
-
-        # Replace NaN values with None for database insertion
-        df = df.where(pd.notnull(df), None)
-
-        return df
+        chunks = iter_sartoflow_chunks(completed_upload_path(upload), chunksize=PREVIEW_ROWS * 10)
+        df = next(chunks, None)
+        if df is None:
+            return "No data rows found."
+        df = df.head(PREVIEW_ROWS)
+        df["pdat_time"] = df["pdat_time"].astype(str)
+        return df.astype(object).where(df.notna(), None)
     except Exception as e:
         return str(e)  # Return error message as string
 
 
 @app.callback(
     [Output("upload-status", "children"), Output("data-preview", "columns"), Output("data-preview", "data")],
-    Input("upload-data", "contents"),
-    State("upload-data", "filename"),
+    Input("upload-data", "data"),
     prevent_initial_call=True
 )
-def upload_file(contents, filename):
-    if contents is None:
+def upload_file(upload):
+    if not upload:
         return "Upload failed.", [], []
 
-    # Parse CSV file once
-    df = parse_csv(contents)
+    filename = upload["filename"]
+    df = parse_csv(upload)
 
     if isinstance(df, str):  # If parsing returned an error message
         return f"Error parsing file: {df}", [], []
 
     # Prepare data for preview
-    data = df.head(10).to_dict("records")
+    data = df.to_dict("records")
     return f"File '{filename}' successfully uploaded!", [{"name": col, "id": col} for col in df.columns], data
 
 
 @app.callback(
     Output("final-status", "children"),
     Input("submit-report", "n_clicks"),
-    State("upload-data", "contents"),
+    State("upload-data", "data"),
     State("molecule-select", "value"),
     State("experiment-name", "value"),
     State("experiment-notes", "value"),
@@ -393,85 +358,54 @@ def upload_file(contents, filename):
 
     prevent_initial_call=True
 )
-def handle_import(n_clicks, contents, molecule_name, experiment_name, experiment_notes,
+def handle_import(n_clicks, upload, molecule_name, experiment_name, experiment_notes,
                   cassette_type, load_concentration, load_volume, load_mass, uf1_target_concentration,
                   uf1_target_mass, diavolumes, target_permeate_mass, target_lmh, target_flowrate, p2500_setpoint,
                   p3000_setpoint, final_volume, final_concentration, product_mass, recovery):
-    if not contents:
+    if not upload:
         return "Upload failed."
 
-    # Parse CSV file once
-    df = parse_csv(contents)
+    try:
+        with transaction.atomic():
+            stats = import_experiment(
+                completed_upload_path(upload),
+                molecule_name=molecule_name,
+                experiment_name=experiment_name,
+                experimental_notes=experiment_notes,
+                cassette_type=cassette_type,
+                load_concentration=load_concentration,
+                load_volume=load_volume,
+                load_mass=load_mass ,
+                target_diafiltration_concentration=uf1_target_concentration,
+                uf1_target_reservoir_mass=uf1_target_mass,
+                diavolumes=diavolumes,
+                permeate_target_mass=target_permeate_mass,
+                diafiltration_volume_required=target_permeate_mass * 1.25,
+                lmh_target=target_lmh,
+                target_flow_rate=target_flowrate,
+                target_p2500_setpoint=p2500_setpoint,
+                target_p3000_setpoint=p3000_setpoint,
+                final_volume=final_volume,
+                final_concentration=final_concentration,
+                product_mass=product_mass,
+                yield_percentage=recovery,
+            )
+    except Exception as e:
+        return f"Error importing file: {e}"
+    remove_upload(upload["token"])
+    invalidate_options("sartoflow_batches", "ufdf_experiments")
+
+    return (f"Successfully imported {stats['rows']} records for Result ID {stats['result_id']} "
+            f"in {stats['seconds']:.1f} s ({stats['rows_per_second']:,.0f} rows/s), "
+            f"file SHA-256 {upload['sha256'][:12]}")
 
-    if isinstance(df, str):  # If parsing returned an error message
-        return f"Error parsing file: {df}"
-
-    # Step 1: Create UFDFMetadata entry
-    ufdf_metadata = UFDFMetadata.objects.create(
-        molecule_name=molecule_name,
-        experiment_name=experiment_name,
-        experimental_notes=experiment_notes,
-        cassette_type=cassette_type,
-        load_concentration=load_concentration,
-        load_volume=load_volume,
-        load_mass=load_mass ,
-        target_diafiltration_concentration=uf1_target_concentration,
-        uf1_target_reservoir_mass=uf1_target_mass,
-        diavolumes=diavolumes,
-        permeate_target_mass=target_permeate_mass,
-        diafiltration_volume_required=target_permeate_mass * 1.25,
-        lmh_target=target_lmh,
-        target_flow_rate=target_flowrate,
-        target_p2500_setpoint=p2500_setpoint,
-        target_p3000_setpoint=p3000_setpoint,
-        final_volume=final_volume,
-        final_concentration=final_concentration,
-        product_mass=product_mass,
-        yield_percentage=recovery
-    )
-
-    # Step 2: Insert Sartoflow data with result_id
-    time_series_records = []
-    for _, row in df.iterrows():
-        time_series_records.append(SartoflowTimeSeriesData(
-            result_id=ufdf_metadata,
-            batch_id=row.get('BatchId'),
-            pdat_time=pd.to_datetime(row.get('PDatTime'), errors='coerce'),  # Convert to datetime
-            process_time=row.get('ProcessTime', 0),
-            ag2100_value=row.get('AG2100_Value'),
-            ag2100_setpoint=row.get('AG2100_Setpoint'),
-            ag2100_mode=row.get('AG2100_Mode'),
-            ag2100_output=row.get('AG2100_Output'),
-            dpress_value=row.get('DPRESS_Value'),
-            dpress_output=row.get('DPRESS_Output'),
-            dpress_mode=row.get('DPRESS_Mode'),
-            dpress_setpoint=row.get('DPRESS_Setpoint'),
-            f_perm_value=row.get('F_PERM_Value'),
-            p2500_setpoint=row.get('P2500_Setpoint'),
-            p2500_value=row.get('P2500_Value'),
-            p2500_output=row.get('P2500_Output'),
-            p2500_mode=row.get('P2500_Mode'),
-            p3000_setpoint=row.get('P3000_Setpoint'),
-            p3000_mode=row.get('P3000_Mode'),
-            p3000_output=row.get('P3000_Output'),
-            p3000_value=row.get('P3000_Value'),
-            p3000_t=row.get('P3000_T'),
-            pir2600=row.get('PIR2600'),
-            pir2700=row.get('PIR2700'),
-            pirc2500_value=row.get('PIRC2500_Value'),
-            pirc2500_output=row.get('PIRC2500_Output'),
-            pirc2500_setpoint=row.get('PIRC2500_Setpoint'),
-            pirc2500_mode=row.get('PIRC2500_Mode'),
-            qir2000=row.get('QIR2000'),
-            qir2100=row.get('QIR2100'),
-            tir2100=row.get('TIR2100'),
-            tmp=row.get('TMP'),
-            wir2700=row.get('WIR2700'),
-            wirc2100_output=row.get('WIRC2100_Output'),
-            wirc2100_setpoint=row.get('WIRC2100_Setpoint'),
-            wirc2100_mode=row.get('WIRC2100_Mode'),
-        ))
-
-    SartoflowTimeSeriesData.objects.bulk_create(time_series_records)
-
-    return f"Successfully imported {len(time_series_records)} records for Result ID {ufdf_metadata.result_id}"
+
+def import_experiment(data, **metadata):
+    """
+    Creates the UFDFMetadata entry and bulk-loads the Sartoflow export against its result_id.
+    Run inside transaction.atomic() so a bad file leaves no empty experiment behind.
+    :return: Loader stats plus "result_id".
+    """
+    ufdf_metadata = UFDFMetadata.objects.create(**metadata)
+    stats = load_sartoflow_file(data, SartoflowTimeSeriesData, {"result_id": ufdf_metadata.result_id})
+    return {**stats, "result_id": ufdf_metadata.result_id}
@@ -1,10 +1,12 @@
 from dash import dcc, html, Input, Output, State, dash_table
+from django.db import transaction
 from django_plotly_dash import DjangoDash
-import pandas as pd
-import base64
-import io
 
 from plotly_integration.models import VFMetadata, VFTimeSeriesData
+from plotly_integration.option_providers import invalidate_options
+from plotly_integration.sartoflow_smart.sartoflow_loader import VF_FIELDS, load_sartoflow_file
+from plotly_integration.sartoflow_smart.vf_capacity import refit_capacity
+from plotly_integration.streaming_upload import completed_upload_path, remove_upload, streaming_upload
 
 # Initialize the Dash app
 app = DjangoDash("ViralFiltrationExperimentImport")
@@ -26,6 +28,15 @@ input_style = {
     "border": "1px solid #ccc"  # Subtle border for all inputs
 }
 
+default_button_style = {
+    "backgroundColor": "#0047b3",  # Default blue
+    "color": "white",
+    "border": "none",
+    "padding": "10px 20px",
+    "cursor": "pointer"
+}
+uploaded_button_style = {**default_button_style, "backgroundColor": "#28a745"}  # Green to indicate success
+
 # Define read-only input style (calculated values)
 readonly_input_style = input_style.copy()
 readonly_input_style["backgroundColor"] = "#e9f1fb"  # Light blue background for calculated fields
@@ -115,31 +126,16 @@ viral_filtration_layout = html.Div(
         html.H3("Upload Data Files", style={"marginTop": "20px", "color": "#0047b3"}),
 
         html.Label("Water Flush File:", style={"fontWeight": "bold"}),
-        dcc.Upload(
-            id="upload-water-flush",
-            children=html.Button("Upload Water Flush", id="button-water",
-                                 style={"backgroundColor": "#0047b3", "color": "white", "border": "none",
-                                        "padding": "10px 20px", "cursor": "pointer"}),
-            multiple=False,
-        ),
+        streaming_upload(app, "upload-water-flush", "Upload Water Flush", accept=".csv",
+                         button_style=default_button_style),
 
         html.Label("Buffer Flush File:", style={"fontWeight": "bold", "marginTop": "15px"}),
-        dcc.Upload(
-            id="upload-buffer-flush",
-            children=html.Button("Upload Buffer Flush", id="button-buffer",
-                                 style={"backgroundColor": "#0047b3", "color": "white", "border": "none",
-                                        "padding": "10px 20px", "cursor": "pointer"}),
-            multiple=False,
-        ),
+        streaming_upload(app, "upload-buffer-flush", "Upload Buffer Flush", accept=".csv",
+                         button_style=default_button_style),
 
         html.Label("Product Filtration File:", style={"fontWeight": "bold", "marginTop": "15px"}),
-        dcc.Upload(
-            id="upload-product-filtration",
-            children=html.Button("Upload Product Filtration", id="button-product",
-                                 style={"backgroundColor": "#0047b3", "color": "white", "border": "none",
-                                        "padding": "10px 20px", "cursor": "pointer"}),
-            multiple=False,
-        ),
+        streaming_upload(app, "upload-product-filtration", "Upload Product Filtration", accept=".csv",
+                         button_style=default_button_style),
 
         html.Div(id="upload-status", style={"marginTop": "10px", "color": "green"}),
         # Data Table Preview
@@ -220,95 +216,24 @@ def calculate_flow_rate(final_volume, final_concentration, load_mass):
         return ""
 
 
-# Define a function to parse CSV file
-def parse_csv(contents):
-    """
-    Parses uploaded CSV file, assigns correct headers, and returns a DataFrame.
-    """
-    content_type, content_string = contents.split(",")
-    decoded = base64.b64decode(content_string)
-
-    try:
-        # Read CSV, skipping first 4 rows (since data starts on row 5)
-        df = pd.read_csv(io.StringIO(decoded.decode("utf-8-sig")), delimiter=";", skiprows=4, header=None)
-
-        # Define correct headers (36 headers for 36 columns)
-        correct_headers = [
-            "BatchId", "PDatTime", "ProcessTime",
-            "AG2100_Value", "AG2100_Setpoint", "AG2100_Mode", "AG2100_Output",
-            "DPRESS_Value", "DPRESS_Output", "DPRESS_Mode", "DPRESS_Setpoint",
-            "F_PERM_Value",
-            "P2500_Setpoint", "P2500_Value", "P2500_Output", "P2500_Mode",
-            "P3000_Setpoint", "P3000_Mode", "P3000_Output", "P3000_Value", "P3000_T",
-            "PIR2600", "PIR2700",
-            "PIRC2500_Output", "PIRC2500_Value", "PIRC2500_Setpoint", "PIRC2500_Mode",
-            "QIR2000", "QIR2100",
-            "TIR2100", "TMP",
-            "WIR2700",
-            "WIRC2100_Value", "WIRC2100_Output", "WIRC2100_Setpoint", "WIRC2100_Mode"
-        ]
-
-        # Ensure correct number of columns before assigning headers
-        if len(df.columns) != len(correct_headers):
-            raise ValueError(f"Column mismatch! Expected {len(correct_headers)} columns, but found {len(df.columns)}.")
-
-        # Assign correct headers
-        df.columns = correct_headers
-
-        # Convert PDatTime to datetime format
-        df["PDatTime"] = pd.to_datetime(df["PDatTime"], errors="coerce")
-
-        # Drop rows where `BatchId` is NaN
-        df = df.dropna(subset=["BatchId"])
-
-        # Ensure `BatchId` is always a string and non-null
-        df["BatchId"] = df["BatchId"].astype(str).str.strip()
-
-        # Remove completely empty rows
-        df = df.dropna(how="all")
-
-        # Replace NaN values with None for database insertion
-        df = df.where(pd.notnull(df), None)
-
-        return df
-    except Exception as e:
-        return str(e)  # Return error message as string
-
-
 @app.callback(
     [
-        Output("button-water", "style"),
-        Output("button-buffer", "style"),
-        Output("button-product", "style"),
+        Output("upload-water-flush-button", "style"),
+        Output("upload-buffer-flush-button", "style"),
+        Output("upload-product-filtration-button", "style"),
     ],
     [
-        Input("upload-water-flush", "contents"),
-        Input("upload-buffer-flush", "contents"),
-        Input("upload-product-filtration", "contents"),
+        Input("upload-water-flush", "data"),
+        Input("upload-buffer-flush", "data"),
+        Input("upload-product-filtration", "data"),
     ],
     prevent_initial_call=True
 )
-def update_button_styles(water_contents, buffer_contents, product_contents):
-    uploaded_style = {
-        "backgroundColor": "#28a745",  # Green to indicate success
-        "color": "white",
-        "border": "none",
-        "padding": "10px 20px",
-        "cursor": "pointer"
-    }
-
-    default_style = {
-        "backgroundColor": "#0047b3",  # Default blue
-        "color": "white",
-        "border": "none",
-        "padding": "10px 20px",
-        "cursor": "pointer"
-    }
-
+def update_button_styles(water_upload, buffer_upload, product_upload):
     return (
-        uploaded_style if water_contents else default_style,
-        uploaded_style if buffer_contents else default_style,
-        uploaded_style if product_contents else default_style
+        uploaded_button_style if water_upload else default_button_style,
+        uploaded_button_style if buffer_upload else default_button_style,
+        uploaded_button_style if product_upload else default_button_style
     )
 
 
@@ -316,12 +241,9 @@ def update_button_styles(water_contents, buffer_contents, product_contents):
     Output("final-status", "children"),
     Input("submit-report", "n_clicks"),  # Now triggered by submit button
     [
-        State("upload-water-flush", "contents"),
-        State("upload-buffer-flush", "contents"),
-        State("upload-product-filtration", "contents"),
-        State("upload-water-flush", "filename"),
-        State("upload-buffer-flush", "filename"),
-        State("upload-product-filtration", "filename"),
+        State("upload-water-flush", "data"),
+        State("upload-buffer-flush", "data"),
+        State("upload-product-filtration", "data"),
         State("experiment-name", "value"),
         State("molecule-select", "value"),
         State("experiment-notes", "value"),
@@ -338,62 +260,64 @@ def update_button_styles(water_contents, buffer_contents, product_contents):
     prevent_initial_call=True  # Prevents running on page load
 )
 def process_uploaded_files(n_clicks,
-                           water_contents, buffer_contents, product_contents,
-                           water_filename, buffer_filename, product_filename,
+                           water_upload, buffer_upload, product_upload,
                            experiment_name, molecule_name, experiment_notes, filter_type,
                            load_concentration, load_volume, load_mass, final_volume, final_concentration,
                            product_mass, recovery, target_pressure):
     # Mapping unit step numbers
     unit_step_mapping = {
-        "water_flush": (water_contents, water_filename, 1),
-        "buffer_flush": (buffer_contents, buffer_filename, 2),
-        "product_filtration": (product_contents, product_filename, 3),
+        "water_flush": (water_upload, 1),
+        "buffer_flush": (buffer_upload, 2),
+        "product_filtration": (product_upload, 3),
     }
 
-    if not any([water_contents, buffer_contents, product_contents]):
+    if not any([water_upload, buffer_upload, product_upload]):
         return "No files uploaded."
 
-    # Step 1: Create a single metadata entry for this experiment
-    vf_metadata = VFMetadata.objects.create(
-        molecule_name=molecule_name,
-        experiment_name=experiment_name,
-        experimental_notes=experiment_notes,
-        filter_type=filter_type,
-        target_pressure=target_pressure,
-        load_concentration=load_concentration,
-        load_volume=load_volume,
-        load_mass=load_mass,
-        final_volume=final_volume,
-        final_concentration=final_concentration,
-        product_mass=product_mass,
-        yield_percentage=recovery
-    )
-
-    records_created = 0
-
-    # Step 2: Process each uploaded file
-    for step_name, (contents, filename, unit_step) in unit_step_mapping.items():
-        if contents:
-            df = parse_csv(contents)  # Parse CSV file
-
-            if isinstance(df, str):  # If parsing failed, return error
-                return f"Error parsing {step_name} file: {df}"
-
-            # Step 3: Insert time-series data
-            time_series_records = [
-                VFTimeSeriesData(
-                    result_id=vf_metadata,
-                    batch_id=row.get('BatchId'),
-                    pdat_time=pd.to_datetime(row.get('PDatTime'), errors='coerce'),
-                    process_time=row.get('ProcessTime', 0),
-                    unit_step=unit_step,  # Assign correct unit step
-                    f_perm_value=row.get('F_PERM_Value'),
-                    pir2700=row.get('PIR2700'),
-                    wir2700=row.get('WIR2700'),
-                ) for _, row in df.iterrows()
-            ]
-
-            VFTimeSeriesData.objects.bulk_create(time_series_records)
-            records_created += len(time_series_records)
-
-    return f"Successfully imported {records_created} records for Experiment: {vf_metadata.experiment_name} (Result ID {vf_metadata.result_id})"
+    records_created, seconds = 0, 0.0
+    step_name = None
+    try:
+        # Metadata and all unit steps are committed together
+        with transaction.atomic():
+            # Step 1: Create a single metadata entry for this experiment
+            vf_metadata = VFMetadata.objects.create(
+                molecule_name=molecule_name,
+                experiment_name=experiment_name,
+                experimental_notes=experiment_notes,
+                filter_type=filter_type,
+                target_pressure=target_pressure,
+                load_concentration=load_concentration,
+                load_volume=load_volume,
+                load_mass=load_mass,
+                final_volume=final_volume,
+                final_concentration=final_concentration,
+                product_mass=product_mass,
+                yield_percentage=recovery
+            )
+
+            # Step 2: Stream each uploaded file into the time-series table
+            for step_name, (upload, unit_step) in unit_step_mapping.items():
+                if upload:
+                    stats = load_sartoflow_file(
+                        completed_upload_path(upload), VFTimeSeriesData,
+                        {"result_id": vf_metadata.result_id, "unit_step": unit_step}, fields=VF_FIELDS,
+                    )
+                    records_created += stats["rows"]
+                    seconds += stats["seconds"]
+    except Exception as e:
+        return f"Error importing {step_name} file: {e}"
+
+    for upload, _ in unit_step_mapping.values():
+        if upload:
+            remove_upload(upload["token"])
+    invalidate_options("vf_experiments")
+
+    message = (f"Successfully imported {records_created} records for Experiment: {vf_metadata.experiment_name} "
+               f"(Result ID {vf_metadata.result_id}) in {seconds:.1f} s")
+    if product_upload:
+        # Capacity fits are stored with the experiment so comparisons do not refit raw data
+        try:
+            refit_capacity([vf_metadata.result_id])
+        except Exception as e:
+            message += f" (capacity fit failed: {e})"
+    return message
@@ -0,0 +1,190 @@
+"""
+Overlay of several UF/DF or VF experiments on a common x axis.
+
+All selected experiments are read in one query (only the plotted columns and what the alignment needs),
+aligned with array operations over the whole frame, and reduced to the graph's point budget per experiment
+before anything is sent to the browser:
+
+    time       hours since the experiment (or VF step) started
+    volume     permeate / filtrate since the start in L/m²
+    mass       volume × load concentration, g/m²
+    diavolume  UF/DF only: permeate since the diafiltration buffer pump started / UF1 reservoir mass
+
+    df, info, notes = load_overlay("vf", [12, 14], ["pir2700", "flux"], "volume", unit_step=3)
+    traces = decimate_overlay(df, ["pir2700", "flux"])
+"""
+import numpy as np
+import pandas as pd
+
+from plotly_integration.models import SartoflowTimeSeriesData, UFDFMetadata, VFMetadata, VFTimeSeriesData
+from plotly_integration.sartoflow_smart.series_query import GRAPH_MAX_POINTS, decimate_series
+from plotly_integration.sartoflow_smart.vf_flux import parse_float
+
+FLUX_WINDOW_SECONDS = 60  # Flux is the permeate weight gained over this much process time
+DF_START_FILL = 1.0  # P3000 totalizer increase that marks the start of diafiltration
+
+ALIGNMENTS = {
+    "time": "Process Time (h)",
+    "volume": "Throughput (L/m²)",
+    "mass": "Throughput (g/m²)",
+    "diavolume": "Diavolumes",
+}
+
+# Target → (time-series model, metadata model, metadata field holding the membrane area)
+OVERLAY_TARGETS = {
+    "ufdf": (SartoflowTimeSeriesData, UFDFMetadata, "cassette_type"),
+    "vf": (VFTimeSeriesData, VFMetadata, "filter_type"),
+}
+
+OVERLAY_SIGNALS = {
+    "ufdf": [
+        {"label": "TMP (bar)", "value": "tmp"},
+        {"label": "Permeate Flux (LMH)", "value": "flux"},
+        {"label": "Permeate Weight (g)", "value": "wir2700"},
+        {"label": "Feed Pressure (bar)", "value": "pirc2500_value"},
+        {"label": "Retentate Pressure (bar)", "value": "pir2600"},
+        {"label": "Filtrate Flow Rate (F_PERM)", "value": "f_perm_value"},
+    ],
+    "vf": [
+        {"label": "Pressure (bar)", "value": "pir2700"},
+        {"label": "Flux (LMH)", "value": "flux"},
+        {"label": "Filtrate Weight (g)", "value": "wir2700"},
+    ],
+}
+
+
+def experiment_info(target, result_ids):
+    """ {result_id: {"name", "area", "load_concentration", "reservoir_mass"}} for the selected experiments. """
+    _, metadata_model, area_field = OVERLAY_TARGETS[target]
+    fields = ["result_id", "experiment_name", area_field, "load_concentration"]
+    if target == "ufdf":
+        fields.append("uf1_target_reservoir_mass")
+    info = {}
+    for row in metadata_model.objects.filter(result_id__in=result_ids).values(*fields):
+        area = parse_float(row[area_field])
+        info[row["result_id"]] = {
+            "name": row["experiment_name"],
+            "area": area if area and area > 0 else np.nan,
+            "load_concentration": row["load_concentration"] if row["load_concentration"] is not None else np.nan,
+            "reservoir_mass": row.get("uf1_target_reservoir_mass") or np.nan,
+        }
+    return info
+
+
+def fetch_overlay(target, result_ids, columns, unit_step=None):
+    """ result_id, process_time and `columns` of all experiments in one query, sorted by experiment and time. """
+    model = OVERLAY_TARGETS[target][0]
+    queryset = model.objects.filter(result_id__in=result_ids)
+    if target == "vf" and unit_step is not None:
+        queryset = queryset.filter(unit_step=unit_step)
+    fields = ["result_id", "process_time", *columns]
+    df = pd.DataFrame.from_records(queryset.values_list(*fields), columns=fields)
+    df[fields] = df[fields].apply(pd.to_numeric, errors="coerce")
+    df = df.dropna(subset=["result_id", "process_time"])
+    return df.sort_values(["result_id", "process_time"], kind="stable").reset_index(drop=True)
+
+
+def group_starts(codes):
+    """ Index of the first row of each group in rows sorted by group code. """
+    return np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1])
+
+
+def windowed_flux(codes, hours, weight, area, window_seconds=FLUX_WINDOW_SECONDS):
+    """
+    Flux in LMH over a trailing process-time window, for all experiments at once.
+    Groups are laid end to end on one increasing key so a single searchsorted finds every window start.
+    """
+    window = window_seconds / 3600
+    key = codes * (np.nanmax(hours) + 2 * window + 1) + hours
+    begin = np.searchsorted(key, key - window, side="left")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dt = hours - hours[begin]
+        flux = (weight - weight[begin]) / 1000 / dt / area
+    flux[(dt < window / 2) | ~np.isfinite(flux) | (flux < 0)] = np.nan
+    return flux
+
+
+def align(df, info, alignment, window_seconds=FLUX_WINDOW_SECONDS):
+    """
+    Adds "x" (the aligned axis) and, when wir2700 is present, "flux" to a fetch_overlay() frame.
+    Exports only log values that changed, so wir2700 and p3000_t are carried forward within each experiment
+    and measured from their first logged value.
+    :return: (frame, notes) with rows that cannot be aligned dropped; notes name the experiments affected.
+    """
+    notes = []
+    if df.empty:
+        return df.assign(x=np.nan), notes
+
+    result_ids, codes = np.unique(df["result_id"].to_numpy(dtype=np.int64), return_inverse=True)
+    starts = group_starts(codes)
+    meta = pd.DataFrame([info.get(result_id, {}) for result_id in result_ids], index=result_ids,
+                        columns=["name", "area", "load_concentration", "reservoir_mass"])
+    area = meta["area"].to_numpy(dtype=np.float64)[codes]
+
+    process_time = df["process_time"].to_numpy(dtype=np.float64)
+    hours = process_time - process_time[starts][codes]  # Every experiment starts at 0
+    totals = [column for column in ("wir2700", "p3000_t") if column in df.columns]
+    df[totals] = df.groupby("result_id")[totals].ffill()
+    first_logged = df.groupby("result_id")[totals].transform("first")
+    if "wir2700" in df.columns:
+        weight = df["wir2700"].to_numpy(dtype=np.float64)
+        df["flux"] = windowed_flux(codes, hours, weight, area, window_seconds)
+        permeate = weight - first_logged["wir2700"].to_numpy(dtype=np.float64)
+
+    if alignment == "time":
+        x = hours
+    elif alignment in ("volume", "mass"):
+        x = permeate / 1000 / area
+        if alignment == "mass":
+            x = x * meta["load_concentration"].to_numpy(dtype=np.float64)[codes]
+    elif alignment == "diavolume":
+        # First row per experiment where the buffer pump totalizer has moved; len(df) when it never does
+        fill = df["p3000_t"].to_numpy(dtype=np.float64)
+        rows = np.arange(len(df))
+        initial_fill = first_logged["p3000_t"].to_numpy(dtype=np.float64)
+        started = np.where(fill > initial_fill + DF_START_FILL, rows, len(df))
+        df_start = np.minimum.reduceat(started, starts)
+        df_start_row = np.minimum(df_start, len(df) - 1)[codes]
+        reservoir = meta["reservoir_mass"].to_numpy(dtype=np.float64)[codes]
+        x = (weight - weight[df_start_row]) / reservoir
+        x[rows < df_start[codes]] = np.nan  # Before diafiltration (UF1) or never started
+    else:
+        raise ValueError(f"Unknown alignment {alignment}")
+
+    df["x"] = x
+    aligned = df.groupby("result_id")["x"].count()
+    for result_id in result_ids:
+        if not aligned.get(result_id):
+            notes.append(f"{info.get(result_id, {}).get('name', result_id)}: cannot be aligned on "
+                         f"{ALIGNMENTS[alignment].lower()} (missing area, load concentration, reservoir mass "
+                         f"or diafiltration)")
+    return df[np.isfinite(df["x"].to_numpy(dtype=np.float64))], notes
+
+
+def load_overlay(target, result_ids, signals, alignment, unit_step=None, window_seconds=FLUX_WINDOW_SECONDS):
+    """
+    Fetches and aligns the selected experiments; see the module docstring.
+    :return: (aligned frame, experiment_info(), notes)
+    """
+    columns = {signal for signal in signals if signal != "flux"}
+    if "flux" in signals or alignment in ("volume", "mass", "diavolume"):
+        columns.add("wir2700")
+    if alignment == "diavolume":
+        if target != "ufdf":
+            raise ValueError("Diavolume alignment applies to UF/DF experiments only")
+        columns.add("p3000_t")
+    info = experiment_info(target, result_ids)
+    df = fetch_overlay(target, result_ids, sorted(columns), unit_step)
+    df, notes = align(df, info, alignment, window_seconds)
+    return df, info, notes
+
+
+def decimate_overlay(df, signals, max_points=GRAPH_MAX_POINTS):
+    """
+    Per-experiment, peak-preserving reduction of the aligned signals (rows stay in process-time order).
+    :return: {result_id: (x array, DataFrame of signals)}
+    """
+    traces = {}
+    for result_id, group in df.groupby("result_id", sort=False):
+        traces[int(result_id)] = decimate_series(group["x"].to_numpy(), group[signals], max_points)
+    return traces
@@ -0,0 +1,139 @@
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+from dash import dcc, html, Input, Output, State
+from django_plotly_dash import DjangoDash
+from plotly.colors import qualitative
+from plotly.subplots import make_subplots
+
+from plotly_integration.option_providers import get_options
+from plotly_integration.sartoflow_smart.overlay import (
+    ALIGNMENTS, FLUX_WINDOW_SECONDS, OVERLAY_SIGNALS, decimate_overlay, load_overlay,
+)
+
+app = DjangoDash("SartoflowOverlayApp")
+
+DEFAULT_SIGNALS = {"ufdf": ["tmp", "flux"], "vf": ["pir2700", "flux"]}
+UNIT_STEPS = [
+    {"label": "Water Flush", "value": 1},
+    {"label": "Buffer Flush", "value": 2},
+    {"label": "Product Filtration", "value": 3},
+]
+
+app.layout = html.Div(
+    style={"display": "flex", "flexDirection": "row", "gap": "20px", "padding": "20px",
+           "fontFamily": "Arial, sans-serif"},
+    children=[
+        html.Div(
+            style={"width": "25%", "border": "1px solid #ccc", "padding": "10px", "borderRadius": "5px"},
+            children=[
+                html.H3("Overlay Experiments"),
+                dcc.RadioItems(
+                    id="target",
+                    options=[{"label": "UF/DF", "value": "ufdf"}, {"label": "Viral Filtration", "value": "vf"}],
+                    value="ufdf",
+                    inline=True,
+                ),
+                html.Label("Experiments:", style={"fontWeight": "bold", "marginTop": "10px"}),
+                dcc.Dropdown(id="experiments", multi=True, placeholder="Select experiments..."),
+                html.Div(id="unit-step-container", children=[
+                    html.Label("Unit Step:", style={"fontWeight": "bold", "marginTop": "10px"}),
+                    dcc.Dropdown(id="unit-step", options=UNIT_STEPS, value=3, clearable=False),
+                ]),
+                html.Label("Align On:", style={"fontWeight": "bold", "marginTop": "10px"}),
+                dcc.RadioItems(id="alignment", value="time", style={"display": "flex", "flexDirection": "column"}),
+                html.H3("Signals"),
+                dcc.Checklist(id="signals", style={"display": "flex", "flexDirection": "column"}),
+                html.Label("Flux Window (seconds):", style={"fontWeight": "bold", "marginTop": "10px"}),
+                dcc.Input(id="flux-window", type="number", min=1, value=FLUX_WINDOW_SECONDS,
+                          style={"width": "100%"}),
+                html.Button("Plot", id="plot-button", n_clicks=0, style={"marginTop": "15px"}),
+                html.Div(id="overlay-status", style={"marginTop": "10px", "color": "#0047b3"}),
+                html.Div(id="overlay-notes", style={"marginTop": "5px", "color": "gray", "fontSize": "13px"}),
+            ],
+        ),
+        html.Div(
+            style={"width": "75%", "border": "1px solid #ccc", "padding": "10px", "borderRadius": "5px"},
+            children=[
+                dcc.Graph(id="overlay-graph", style={"height": "80vh"}),
+            ],
+        ),
+    ],
+)
+
+
+@app.callback(
+    Output("experiments", "options"),
+    Output("experiments", "value"),
+    Output("signals", "options"),
+    Output("signals", "value"),
+    Output("alignment", "options"),
+    Output("alignment", "value"),
+    Output("unit-step-container", "style"),
+    Input("target", "value"),
+)
+def update_target(target):
+    options = get_options("ufdf_experiments" if target == "ufdf" else "vf_experiments")
+    alignments = [{"label": label, "value": value} for value, label in ALIGNMENTS.items()
+                  if target == "ufdf" or value != "diavolume"]
+    unit_step_style = {} if target == "vf" else {"display": "none"}
+    return options, [], OVERLAY_SIGNALS[target], DEFAULT_SIGNALS[target], alignments, "time", unit_step_style
+
+
+@app.callback(
+    Output("overlay-graph", "figure"),
+    Output("overlay-status", "children"),
+    Output("overlay-notes", "children"),
+    Input("plot-button", "n_clicks"),
+    State("target", "value"),
+    State("experiments", "value"),
+    State("unit-step", "value"),
+    State("alignment", "value"),
+    State("signals", "value"),
+    State("flux-window", "value"),
+    prevent_initial_call=True
+)
+def update_overlay(n_clicks, target, result_ids, unit_step, alignment, signals, flux_window):
+    if not result_ids or not signals:
+        return go.Figure(), "Select at least one experiment and one signal.", ""
+    started = time.monotonic()
+
+    # STEP 1: One query for every experiment, aligned as whole-frame array operations
+    try:
+        df, info, notes = load_overlay(target, result_ids, signals, alignment,
+                                       unit_step=unit_step if target == "vf" else None,
+                                       window_seconds=flux_window or FLUX_WINDOW_SECONDS)
+    except ValueError as e:
+        return go.Figure(), f"❌ {e}", ""
+
+    # STEP 2: Point budget per experiment before anything goes to the browser
+    traces = decimate_overlay(df, signals)
+
+    # STEP 3: One row per signal, one color per experiment
+    labels = {option["value"]: option["label"] for option in OVERLAY_SIGNALS[target]}
+    fig = make_subplots(rows=len(signals), cols=1, shared_xaxes=True, vertical_spacing=0.03)
+    colors = qualitative.Plotly
+    for i, result_id in enumerate(result_ids):
+        if result_id not in traces:
+            continue
+        x, values = traces[result_id]
+        name = f"{info[result_id]['name']} ({result_id})"
+        for row, signal in enumerate(signals, start=1):
+            y = values[signal].to_numpy(dtype=np.float64)
+            fig.add_trace(go.Scattergl(
+                x=x, y=y, mode="lines", name=name, legendgroup=str(result_id), showlegend=row == 1,
+                line={"color": colors[i % len(colors)]},
+            ), row=row, col=1)
+    for row, signal in enumerate(signals, start=1):
+        fig.update_yaxes(title_text=labels[signal], row=row, col=1)
+    fig.update_xaxes(title_text=ALIGNMENTS[alignment], row=len(signals), col=1)
+    fig.update_layout(template="plotly_white", margin={"t": 30}, legend={"orientation": "h", "y": 1.05})
+
+    plotted = sum(len(x) for x, _ in traces.values())
+    status = (f"{len(traces)} experiments, {len(df):,} rows aligned, {plotted:,} points plotted "
+              f"in {time.monotonic() - started:.1f} s")
+    missing = [str(result_id) for result_id in result_ids if result_id not in info]
+    if missing:
+        notes.append(f"No metadata for result id {', '.join(missing)}")
+    return fig, status, html.Ul([html.Li(note) for note in notes]) if notes else ""
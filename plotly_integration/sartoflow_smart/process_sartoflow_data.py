@@ -1,16 +1,15 @@
 import os
-import sqlite3
-import pandas as pd
 import shutil
 
-import pytz
 from tqdm import tqdm
 from django.conf import settings
+from django.db import transaction
 from dash import dcc, html, Input, Output, State
 from django_plotly_dash import DjangoDash
 
-# Get database path from Django settings
-DB_PATH = settings.DATABASES['default']['NAME']
+from plotly_integration.models import SartoflowTimeSeriesData, UFDFMetadata
+from plotly_integration.option_providers import invalidate_options
+from plotly_integration.sartoflow_smart.sartoflow_loader import load_sartoflow_file, read_batch_id
 
 # Define file paths
 BASE_DIR = os.path.join(settings.BASE_DIR, "plotly_integration", "data")
@@ -35,90 +34,35 @@ app.layout = html.Div(
 )
 
 
-def load_clean_csv(file_path):
-    """ Reads and cleans Sartoflow CSV data """
-
-    # Read CSV file without assuming headers
-    df = pd.read_csv(file_path, delimiter=";", skiprows=2, header=None)
-
-    # Print original detected columns for debugging
-    print(f"Detected {len(df.columns)} columns in {file_path}")
-    print("Original Data (first 5 rows):")
-    print(df.head())  # Debugging: Check first few rows
-
-    # Manually assign headers to ensure proper alignment
-    correct_headers = [
-        "BatchId", "PDatTime", "ProcessTime",
-        "AG2100_Value", "AG2100_Setpoint", "AG2100_Mode", "AG2100_Output",
-        "DPRESS_Value", "DPRESS_Output", "DPRESS_Mode", "DPRESS_Setpoint",
-        "F_PERM_Value",
-        "P2500_Setpoint", "P2500_Value", "P2500_Output", "P2500_Mode",
-        "P3000_Setpoint", "P3000_Mode", "P3000_Output", "P3000_Value", "P3000_T",
-        "PIR2600", "PIR2700",
-        "PIRC2500_Output", "PIRC2500_Value", "PIRC2500_Setpoint", "PIRC2500_Mode",
-        "QIR2000", "QIR2100",
-        "TIR2100", "TMP",
-        "WIR2700",
-        "WIRC2100_Output", "WIRC2100_Setpoint", "WIRC2100_Mode"
-    ]
-
-    # Ensure we have the right number of columns
-    df = df.iloc[:, :len(correct_headers)]
-
-    # Assign headers
-    df.columns = correct_headers
-
-    # Drop rows where `BatchId` is NaN (i.e., any unwanted header rows)
-    df = df.dropna(subset=["BatchId"])
-
-    # # Convert datetime column & replace NaT with None
-    # df["PDatTime"] = pd.to_datetime(df["PDatTime"], errors="coerce")
-    #
-    # # Define the target timezone
-    # target_timezone = pytz.timezone("America/Los_Angeles")  # Change as needed
-    #
-    # # Convert to formatted datetime with timezone offset
-    # df["PDatTime"] = df["PDatTime"].apply(lambda x: x.astimezone(target_timezone).strftime("%Y-%m-%d %H:%M:%S%z") if pd.notna(x) else None)
-
-    # Replace NaN values with None for database insertion
-    df = df.where(pd.notnull(df), None)
-
-    # Ensure all columns are displayed
-    pd.set_option("display.max_columns", None)  # Show all columns
-    pd.set_option("display.width", 200)  # Prevent line breaks
-
-    # Print first 30 rows
-    print(df.head(30))
-    return df
-
-
-def process_sartoflow_file(file_path, conn):
-    """ Processes a single Sartoflow CSV file and inserts data into the database """
+def batch_experiment(batch_id, file_name):
+    """
+    UFDFMetadata the rows of a batch belong to: the experiment already holding rows of the batch, else one
+    named after the batch, else a new experiment named after the batch (metadata can be completed later).
+    """
+    result_id = (
+        SartoflowTimeSeriesData.objects.filter(batch_id=batch_id, result_id__isnull=False)
+        .values_list("result_id", flat=True).first()
+    )
+    if result_id is None:
+        result_id = UFDFMetadata.objects.filter(experiment_name=batch_id).values_list("result_id", flat=True).first()
+    if result_id is None:
+        result_id = UFDFMetadata.objects.create(
+            molecule_name="", experiment_name=batch_id, experimental_notes=f"Imported from {file_name}"
+        ).result_id
+    return result_id
+
+
+def process_sartoflow_file(file_path):
+    """ Loads a single Sartoflow CSV file into the database, linked to the UFDFMetadata of its batch """
+    file_name = os.path.basename(file_path)
     try:
-        df = load_clean_csv(file_path)  # Load and clean the CSV file
-
-        cursor = conn.cursor()
-        insert_query = """
-            INSERT INTO sartoflow_time_series_data (
-                batch_id, pdat_time, process_time, ag2100_value, ag2100_setpoint,
-                ag2100_mode, ag2100_output, dpress_value, dpress_output, dpress_mode,
-                dpress_setpoint, f_perm_value, p2500_setpoint, p2500_value,
-                p2500_output, p2500_mode, p3000_setpoint, p3000_mode, p3000_output,
-                p3000_value, p3000_t, pir2600, pir2700, pirc2500_value,
-                pirc2500_output, pirc2500_setpoint, pirc2500_mode, qir2000,
-                qir2100, tir2100, tmp, wir2700, wirc2100_output, wirc2100_setpoint, wirc2100_mode
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-        """
-
-        batch_size = 1000
-        records = [tuple(row) for row in df.itertuples(index=False, name=None)]
-
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i + batch_size]
-            cursor.executemany(insert_query, batch)
-            conn.commit()
-
-        return f"Inserted {len(records)} records from {file_path}"
+        batch_id = read_batch_id(file_path)
+        # A failed load leaves no new experiment behind
+        with transaction.atomic():
+            result_id = batch_experiment(batch_id, file_name)
+            stats = load_sartoflow_file(file_path, SartoflowTimeSeriesData, {"result_id": result_id})
+        return (f"Inserted {stats['rows']} records from {file_name} into Result ID {result_id} "
+                f"in {stats['seconds']:.1f} s ({stats['rows_per_second']:,.0f} rows/s)")
     except Exception as e:
         return f"Error processing {file_path}: {str(e)}"
 
@@ -130,11 +74,6 @@ def process_all_files():
     if not files:
         return "No Sartoflow files found."
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA journal_mode=WAL;")
-    cursor.execute("PRAGMA synchronous=OFF;")
-
     results = []
     for file_name in tqdm(files, desc="Processing Files", unit="file"):
         file_path = os.path.join(INPUT_DIR, file_name)
@@ -144,8 +83,10 @@ def process_all_files():
             results.append(f"Skipping {file_name}: File not found.")
             continue
 
-        result = process_sartoflow_file(file_path, conn)
+        result = process_sartoflow_file(file_path)
         results.append(result)
+        if result.startswith("Error"):
+            continue  # Leave failed files in the import folder
 
         processed_path = os.path.join(PROCESSED_DIR, file_name)
 
@@ -155,7 +96,7 @@ def process_all_files():
         else:
             results.append(f"Warning: {file_name} was deleted before move.")
 
-    conn.close()
+    invalidate_options("sartoflow_batches", "ufdf_experiments")
     return "\n".join(results)
 
 @app.callback(
@@ -0,0 +1,241 @@
+from datetime import datetime
+
+import dash
+import numpy as np
+import plotly.graph_objects as go
+from dash import dcc, html, Input, Output, State
+from dash.exceptions import PreventUpdate
+from django_plotly_dash import DjangoDash
+from plotly.subplots import make_subplots
+
+from plotly_integration.models import UFDFMetadata, VFMetadata
+from plotly_integration.option_providers import get_options
+from plotly_integration.sartoflow_smart.sartoflow_tail import get_tail, read_new_rows, start_tail, stop_tail
+from plotly_integration.sartoflow_smart.vf_flux import parse_float
+
+app = DjangoDash("SartoflowLiveApp")
+
+LIVE_POLL_MS = 3000
+LIVE_MAX_POINTS = 20000  # Points kept per trace in the browser
+
+# Signals per target; "flux" is derived from the permeate/filtrate weight
+LIVE_SIGNALS = {
+    "ufdf": [
+        {"label": "TMP (bar)", "value": "tmp"},
+        {"label": "Permeate Weight (g)", "value": "wir2700"},
+        {"label": "Permeate Flux (LMH)", "value": "flux"},
+        {"label": "Feed Pressure (bar)", "value": "pirc2500_value"},
+        {"label": "Retentate Pressure (bar)", "value": "pir2600"},
+    ],
+    "vf": [
+        {"label": "Pressure (bar)", "value": "pir2700"},
+        {"label": "Filtrate Weight (g)", "value": "wir2700"},
+        {"label": "Flux (LMH)", "value": "flux"},
+    ],
+}
+DEFAULT_SIGNALS = {"ufdf": ["tmp", "wir2700", "flux"], "vf": ["pir2700", "wir2700", "flux"]}
+UNIT_STEPS = [
+    {"label": "Water Flush", "value": 1},
+    {"label": "Buffer Flush", "value": 2},
+    {"label": "Product Filtration", "value": 3},
+]
+
+app.layout = html.Div(
+    style={"display": "flex", "flexDirection": "row", "gap": "20px", "padding": "20px",
+           "fontFamily": "Arial, sans-serif"},
+    children=[
+        html.Div(
+            style={"width": "25%", "border": "1px solid #ccc", "padding": "10px", "borderRadius": "5px"},
+            children=[
+                html.H3("Live Run"),
+                dcc.RadioItems(
+                    id="target",
+                    options=[{"label": "UF/DF", "value": "ufdf"}, {"label": "Viral Filtration", "value": "vf"}],
+                    value="ufdf",
+                    inline=True,
+                ),
+                html.Label("Experiment:", style={"fontWeight": "bold", "marginTop": "10px"}),
+                dcc.Dropdown(id="experiment", placeholder="Select an experiment..."),
+                html.Div(id="unit-step-container", children=[
+                    html.Label("Unit Step:", style={"fontWeight": "bold", "marginTop": "10px"}),
+                    dcc.Dropdown(id="unit-step", options=UNIT_STEPS, value=3, clearable=False),
+                ]),
+                html.Label("Export file on the server (leave empty to only watch):",
+                           style={"fontWeight": "bold", "marginTop": "10px"}),
+                dcc.Input(id="export-path", type="text", placeholder=r"\\share\sartoflow\run.csv",
+                          style={"width": "100%"}),
+                html.H3("Signals"),
+                dcc.Checklist(id="signals", style={"display": "flex", "flexDirection": "column"}),
+                html.Div(style={"marginTop": "15px", "display": "flex", "gap": "10px"}, children=[
+                    html.Button("Start", id="start-live", n_clicks=0),
+                    html.Button("Stop", id="stop-live", n_clicks=0),
+                ]),
+                html.Div(id="live-status", style={"marginTop": "10px", "color": "#0047b3"}),
+                html.Div(id="tail-status", style={"marginTop": "5px", "color": "gray", "fontSize": "13px"}),
+            ],
+        ),
+        html.Div(
+            style={"width": "75%", "border": "1px solid #ccc", "padding": "10px", "borderRadius": "5px"},
+            children=[
+                dcc.Graph(id="live-graph", style={"height": "80vh"}),
+            ],
+        ),
+        dcc.Interval(id="live-interval", interval=LIVE_POLL_MS, disabled=True),
+        dcc.Store(id="live-state"),
+        dcc.Store(id="live-cursor"),
+    ],
+)
+
+
+@app.callback(
+    Output("experiment", "options"),
+    Output("experiment", "value"),
+    Output("signals", "options"),
+    Output("signals", "value"),
+    Output("unit-step-container", "style"),
+    Input("target", "value"),
+)
+def update_target(target):
+    options = get_options("ufdf_experiments" if target == "ufdf" else "vf_experiments")
+    unit_step_style = {} if target == "vf" else {"display": "none"}
+    return options, None, LIVE_SIGNALS[target], DEFAULT_SIGNALS[target], unit_step_style
+
+
+def filter_area(target, result_id):
+    """ Membrane area in m² from the experiment's cassette / filter selection. """
+    if target == "ufdf":
+        value = UFDFMetadata.objects.filter(result_id=result_id).values_list("cassette_type", flat=True).first()
+    else:
+        value = VFMetadata.objects.filter(result_id=result_id).values_list("filter_type", flat=True).first()
+    return parse_float(value)
+
+
+@app.callback(
+    Output("live-state", "data"),
+    Output("live-interval", "disabled"),
+    Output("live-graph", "figure"),
+    Output("live-status", "children"),
+    Input("start-live", "n_clicks"),
+    Input("stop-live", "n_clicks"),
+    State("target", "value"),
+    State("experiment", "value"),
+    State("unit-step", "value"),
+    State("export-path", "value"),
+    State("signals", "value"),
+    State("live-state", "data"),
+    prevent_initial_call=True
+)
+def toggle_live(start_clicks, stop_clicks, target, result_id, unit_step, path, signals, state):
+    # STEP 1: Stop keeps the figure and ends polling and the tail this page started
+    if "stop-live" in dash.callback_context.triggered[0]["prop_id"]:
+        if state and state.get("tail_id"):
+            stop_tail(state["tail_id"])
+        return None, True, dash.no_update, "Stopped."
+
+    if not result_id or not signals:
+        return None, True, dash.no_update, "Select an experiment and at least one signal."
+    unit_step = unit_step if target == "vf" else None
+
+    # STEP 2: Start (or join) the tail on the export file
+    tail_id = None
+    if path:
+        try:
+            tail_id = start_tail(path.strip(), target, result_id, unit_step).tail_id
+        except Exception as e:
+            return None, True, dash.no_update, f"Could not follow file: {e}"
+
+    # STEP 3: Empty figure with one row per signal; poll_live fills it with extendData
+    labels = {option["value"]: option["label"] for option in LIVE_SIGNALS[target]}
+    fig = make_subplots(rows=len(signals), cols=1, shared_xaxes=True, vertical_spacing=0.03)
+    for i, signal in enumerate(signals, start=1):
+        fig.add_trace(go.Scattergl(x=[], y=[], mode="lines", name=labels[signal]), row=i, col=1)
+        fig.update_yaxes(title_text=labels[signal], row=i, col=1)
+    fig.update_layout(template="plotly_white", showlegend=False, margin={"t": 30},
+                      uirevision=f"{target}-{result_id}-{unit_step}")
+
+    state = {
+        "target": target,
+        "result_id": result_id,
+        "unit_step": unit_step,
+        "signals": signals,
+        "area": filter_area(target, result_id),
+        "tail_id": tail_id,
+        "started": datetime.utcnow().isoformat(),
+    }
+    status = "Following file and database." if tail_id else "Watching database."
+    return state, False, fig, status
+
+
+def weight_flux(times, weights, area, previous):
+    """
+    Flux in LMH between consecutive logged weights (g → L), continuing from the previous poll's last weight.
+    Exports only log values that changed, so rows without a weight are left out rather than differenced.
+    :return: (times of the rows with a weight, flux at those times, last weighed sample for the next poll)
+    """
+    logged = ~np.isnan(weights)
+    times = times[logged]
+    t = times.astype("datetime64[ms]").astype(np.float64) / 3.6e6  # Hours
+    w = weights[logged].astype(np.float64) / 1000
+    if not t.size:
+        return times, np.empty(0), previous
+    if previous:
+        t = np.concatenate([[previous[0]], t])
+        w = np.concatenate([[previous[1]], w])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        flux = np.diff(w) / np.diff(t) / (area or np.nan)
+    flux[~np.isfinite(flux) | (flux < 0)] = np.nan
+    if not previous:
+        flux = np.concatenate([[np.nan], flux])
+    return times, flux, [float(t[-1]), float(w[-1])]
+
+
+@app.callback(
+    Output("live-graph", "extendData"),
+    Output("live-cursor", "data"),
+    Output("tail-status", "children"),
+    Input("live-interval", "n_intervals"),
+    State("live-state", "data"),
+    State("live-cursor", "data"),
+    prevent_initial_call=True
+)
+def poll_live(n_intervals, state, previous):
+    if not state:
+        raise PreventUpdate
+
+    # STEP 1: Cursor from an earlier Start belongs to a figure that has since been replaced
+    cursor = previous if previous and previous["started"] == state["started"] else {"started": state["started"]}
+
+    tail = get_tail(state["tail_id"]) if state.get("tail_id") else None
+    tail_status = ""
+    if tail is not None:
+        tail_status = f"File: {tail.state}, {tail.rows:,} rows appended"
+        if tail.error:
+            tail_status += f" ({tail.error})"
+
+    # STEP 2: Only rows inserted since the last poll, only the plotted columns
+    signals = state["signals"]
+    fields = sorted({"wir2700" if signal == "flux" else signal for signal in signals})
+    df, row_cursor = read_new_rows(state["target"], state["result_id"], fields, cursor.get("row_id"),
+                                   unit_step=state["unit_step"])
+    if df.empty:
+        return dash.no_update, cursor, tail_status
+
+    times = df["pdat_time"].to_numpy(dtype="datetime64[ms]")
+    if "flux" in signals:
+        flux_times, flux, cursor["last_weight"] = weight_flux(
+            times, df["wir2700"].to_numpy(dtype=np.float64), state["area"], cursor.get("last_weight")
+        )
+
+    # Each trace gets only its logged rows; empty cells of the sparse export would break the lines
+    xs, ys = [], []
+    for signal in signals:
+        if signal == "flux":
+            x, values = flux_times, flux
+        else:
+            values = df[signal].to_numpy(dtype=np.float64)
+            x, values = times[~np.isnan(values)], values[~np.isnan(values)]
+        xs.append(np.datetime_as_string(x, unit="ms").tolist())
+        ys.append(np.where(np.isnan(values), None, values).tolist())
+
+    cursor["row_id"] = row_cursor
+    return [{"x": xs, "y": ys}, list(range(len(signals))), LIVE_MAX_POINTS], cursor, tail_status
@@ -0,0 +1,178 @@
+"""
+Chunked bulk loader for Sartoflow SMART exports (semicolon CSV).
+
+Exports come with a 2- or 4-line preamble and 35 or 36 columns (newer firmware adds WIRC2100_Value);
+the layout is sniffed from the first lines. The file is read in chunks with explicit dtypes and each
+chunk is inserted with executemany through the Django connection (MySQLdb rewrites it into multi-row
+INSERTs) inside one transaction:
+
+    stats = load_sartoflow_file(path, SartoflowTimeSeriesData, {"result_id": ufdf_metadata.result_id})
+    stats["rows"], stats["rows_per_second"]
+"""
+import io
+import time
+
+import pandas as pd
+from django.db import connection, transaction
+
+from plotly_integration.utils import bulk_insert_frame
+
+SARTOFLOW_CHUNK_ROWS = 20000  # Rows parsed per chunk
+SARTOFLOW_INSERT_BATCH = 5000  # Rows per executemany call
+SNIFF_LINES = 20
+SARTOFLOW_TIME_FORMAT = "%m/%d/%Y %I:%M:%S %p"  # PDatTime as exported, e.g. "2/19/2025 11:47:40 AM"
+
+# Export column → model field (None: not stored)
+SARTOFLOW_COLUMNS = [
+    ("BatchId", "batch_id"), ("PDatTime", "pdat_time"), ("ProcessTime", "process_time"),
+    ("AG2100_Value", "ag2100_value"), ("AG2100_Setpoint", "ag2100_setpoint"),
+    ("AG2100_Mode", "ag2100_mode"), ("AG2100_Output", "ag2100_output"),
+    ("DPRESS_Value", "dpress_value"), ("DPRESS_Output", "dpress_output"),
+    ("DPRESS_Mode", "dpress_mode"), ("DPRESS_Setpoint", "dpress_setpoint"),
+    ("F_PERM_Value", "f_perm_value"),
+    ("P2500_Setpoint", "p2500_setpoint"), ("P2500_Value", "p2500_value"),
+    ("P2500_Output", "p2500_output"), ("P2500_Mode", "p2500_mode"),
+    ("P3000_Setpoint", "p3000_setpoint"), ("P3000_Mode", "p3000_mode"), ("P3000_Output", "p3000_output"),
+    ("P3000_Value", "p3000_value"), ("P3000_T", "p3000_t"),
+    ("PIR2600", "pir2600"), ("PIR2700", "pir2700"),
+    ("PIRC2500_Output", "pirc2500_output"), ("PIRC2500_Value", "pirc2500_value"),
+    ("PIRC2500_Setpoint", "pirc2500_setpoint"), ("PIRC2500_Mode", "pirc2500_mode"),
+    ("QIR2000", "qir2000"), ("QIR2100", "qir2100"),
+    ("TIR2100", "tir2100"), ("TMP", "tmp"),
+    ("WIR2700", "wir2700"),
+    ("WIRC2100_Value", None), ("WIRC2100_Output", "wirc2100_output"),
+    ("WIRC2100_Setpoint", "wirc2100_setpoint"), ("WIRC2100_Mode", "wirc2100_mode"),
+]
+SARTOFLOW_FIELDS = dict(SARTOFLOW_COLUMNS)
+VF_FIELDS = {"batch_id", "pdat_time", "process_time", "f_perm_value", "pir2700", "wir2700"}  # VFTimeSeriesData
+MODE_COLUMNS = [column for column, _ in SARTOFLOW_COLUMNS if column.endswith("_Mode")]
+
+
+def _open_text(source):
+    """ Paths and binary buffers are read as UTF-8 with an optional BOM; text buffers are used as is. """
+    if isinstance(source, (bytes, bytearray)):
+        return io.StringIO(bytes(source).decode("utf-8-sig"))
+    if isinstance(source, str):
+        return open(source, encoding="utf-8-sig", newline="")
+    return source
+
+
+def parse_pdat_time(values):
+    """
+    Parses PDatTime strings with SARTOFLOW_TIME_FORMAT; values in another layout fall back to per-value
+    parsing. Unparseable values become NaT.
+    """
+    parsed = pd.to_datetime(values, format=SARTOFLOW_TIME_FORMAT, errors="coerce")
+    missed = parsed.isna() & values.notna()
+    if missed.any():
+        parsed[missed] = pd.to_datetime(values[missed], format="mixed", errors="coerce")
+    return parsed
+
+
+def sniff_layout(lines):
+    """
+    Finds the first data line (second field parses as a timestamp) and the column layout.
+    The layout is read from the BatchId header line: data rows only carry values that changed, so their
+    trailing sensors are often empty and cannot tell a 35- from a 36-column export.
+    :return: (preamble line count, export column names)
+    """
+    header = None
+    for i, line in enumerate(lines):
+        fields = line.rstrip("\r\n").split(";")
+        if fields[0].strip().lstrip("\ufeff") == "BatchId":
+            header = fields
+        elif len(fields) > 2 and fields[0].strip() and parse_pdat_time(pd.Series([fields[1]])).notna().iloc[0]:
+            fields = header if header is not None else fields  # Headerless exports: best effort from the row
+            while fields and not fields[-1].strip():
+                fields.pop()  # Trailing separators
+            columns = [column for column, _ in SARTOFLOW_COLUMNS]
+            if len(fields) < len(columns):
+                columns.remove("WIRC2100_Value")  # Older 35-column exports
+            return i, columns[:len(fields)]
+    raise ValueError(f"No Sartoflow data rows found in the first {len(lines)} lines")
+
+
+def read_batch_id(source):
+    """ BatchId of the first data row of an export, without parsing the rest of the file. """
+    handle = _open_text(source)
+    try:
+        lines = [handle.readline() for _ in range(SNIFF_LINES)]
+    finally:
+        if handle is not source:
+            handle.close()
+    skip, _ = sniff_layout(lines)
+    return lines[skip].split(";")[0].strip()
+
+
+def read_options(columns, fields=None):
+    """
+    read_csv arguments for a sniffed layout, keeping the stored columns (or only those mapped to `fields`).
+    :return: (kept export columns, read_csv keyword arguments)
+    """
+    keep = [column for column in columns
+            if SARTOFLOW_FIELDS[column] and (fields is None or SARTOFLOW_FIELDS[column] in fields)]
+    positions = [columns.index(column) for column in keep]  # Trailing separators add unnamed fields
+    dtypes = {i: "string" if columns[i] in ("BatchId", "PDatTime") else "float64" for i in positions}
+    return keep, {"sep": ";", "header": None, "index_col": False, "usecols": positions, "dtype": dtypes}
+
+
+def clean_chunk(chunk, columns, keep):
+    """ Names, cleans and renames a parsed chunk to model field names; rows without BatchId/PDatTime are dropped. """
+    chunk.columns = [columns[i] for i in chunk.columns]
+    chunk = chunk.dropna(subset=["BatchId"])
+    chunk["BatchId"] = chunk["BatchId"].str.strip()
+    chunk["PDatTime"] = parse_pdat_time(chunk["PDatTime"])
+    chunk = chunk.dropna(subset=["PDatTime"])  # pdat_time is NOT NULL
+    for column in MODE_COLUMNS:
+        if column in chunk.columns:
+            chunk[column] = chunk[column].round().astype("Int64")
+    return chunk[keep].rename(columns=SARTOFLOW_FIELDS)
+
+
+def iter_sartoflow_chunks(source, chunksize=SARTOFLOW_CHUNK_ROWS, fields=None):
+    """
+    Yields cleaned chunks keyed by model field names.
+    :param source: File path, bytes or an open text buffer.
+    :param fields: Model fields to keep (default: all stored fields).
+    """
+    handle = _open_text(source)
+    try:
+        preamble = [handle.readline() for _ in range(SNIFF_LINES)]
+        skip, columns = sniff_layout(preamble)
+        handle.seek(0)
+
+        keep, options = read_options(columns, fields)
+        for chunk in pd.read_csv(handle, skiprows=skip, chunksize=chunksize, **options):
+            chunk = clean_chunk(chunk, columns, keep)
+            if not chunk.empty:
+                yield chunk
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+def load_sartoflow_file(source, model, extra=None, fields=None, chunksize=SARTOFLOW_CHUNK_ROWS,
+                        batch_size=SARTOFLOW_INSERT_BATCH):
+    """
+    Bulk-inserts a Sartoflow export into `model` in one transaction.
+    :param extra: Constant field values for every row, e.g. {"result_id": 12, "unit_step": 3}.
+                  Foreign keys are given by their field name and take the primary key value.
+    :return: {"rows", "seconds", "rows_per_second", "batch_ids"}
+    """
+    extra = extra or {}
+    started = time.perf_counter()
+    rows, batch_ids = 0, set()
+    with transaction.atomic(), connection.cursor() as cursor:
+        for chunk in iter_sartoflow_chunks(source, chunksize, fields):
+            batch_ids.update(chunk["batch_id"].unique())
+            for field, value in extra.items():
+                chunk[field] = value
+            rows += bulk_insert_frame(cursor, model, chunk, list(chunk.columns), batch_size)
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else 0.0,
+        "batch_ids": sorted(batch_ids),
+    }
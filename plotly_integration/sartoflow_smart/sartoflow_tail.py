@@ -0,0 +1,220 @@
+"""
+Live tail of a Sartoflow export that is still being written.
+
+A SartoflowTail remembers the byte offset it has parsed up to. Each poll reads only the bytes appended since,
+parses the complete lines (a partially written last line is left for the next poll) and bulk-inserts them
+against an existing UF/DF or VF experiment. Rows up to the latest pdat_time already stored for the
+experiment are skipped, so a tail restarted on the same file (after Stop, a server restart or in another
+worker process) resumes instead of inserting the file twice. Graphs follow the run by reading rows with an id above their
+last cursor, see read_new_rows().
+
+    tail = start_tail(path, "vf", result_id=12, unit_step=3)
+    rows, cursor = read_new_rows("vf", 12, ["wir2700", "pir2700"], cursor, unit_step=3)
+"""
+import io
+import logging
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Max
+
+from plotly_integration.models import SartoflowTimeSeriesData, VFTimeSeriesData
+from plotly_integration.option_providers import invalidate_options
+from plotly_integration.sartoflow_smart.sartoflow_loader import (
+    SNIFF_LINES, VF_FIELDS, clean_chunk, read_options, sniff_layout,
+)
+from plotly_integration.utils import bulk_insert_frame
+
+logger = logging.getLogger(__name__)
+
+TAIL_INTERVAL = 5  # Seconds between polls of the file
+TAIL_READ_LIMIT = 16 * 1024 * 1024  # Bytes parsed per poll; a large backlog is caught up over several polls
+TAIL_IDLE_STOP = 2 * 3600  # Seconds without growth after which a tail finishes on its own
+TAIL_ROW_LIMIT = 5000  # Rows returned per read_new_rows() call
+
+# Target → (model, stored fields)
+TAIL_TARGETS = {
+    "ufdf": (SartoflowTimeSeriesData, None),
+    "vf": (VFTimeSeriesData, VF_FIELDS),
+}
+
+
+class SartoflowTail:
+    def __init__(self, path, target, result_id, unit_step=None, interval=TAIL_INTERVAL):
+        self.tail_id = uuid.uuid4().hex
+        self.path = path
+        self.target = target
+        self.model, self.fields = TAIL_TARGETS[target]
+        self.extra = {"result_id": result_id}
+        if target == "vf":
+            self.extra["unit_step"] = unit_step
+        self.interval = interval
+
+        self.offset = 0
+        self.stored_until = None  # Latest pdat_time stored for the experiment (naive UTC)
+        self.seen_id = None  # Highest row id already taken into stored_until
+        self.layout = None  # (export columns, kept columns, read_csv options) once the first data line is seen
+        self.rows = 0
+        self.state = "running"  # running / stopped / finished / failed
+        self.error = None
+        self.last_growth = time.monotonic()
+        self.stop_event = threading.Event()
+
+    def poll(self):
+        """
+        Parses and inserts the complete lines appended since the last poll.
+        :return: Number of rows inserted.
+        """
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            raise ValueError(f"{os.path.basename(self.path)} was truncated or replaced")
+        if size == self.offset:
+            return 0
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(min(size - self.offset, TAIL_READ_LIMIT))
+        end = data.rfind(b"\n")
+        if end < 0:
+            return 0  # No complete line yet
+        data = data[:end + 1]
+        text = data.decode("utf-8-sig" if self.offset == 0 else "utf-8")
+
+        skip = 0
+        if self.layout is None:
+            lines = text.splitlines(keepends=True)[:SNIFF_LINES]
+            try:
+                skip, columns = sniff_layout(lines)
+            except ValueError:
+                if len(lines) < SNIFF_LINES:
+                    return 0  # Only the preamble so far; read it again with the first data line
+                raise
+            self.layout = (columns, *read_options(columns, self.fields))
+
+        columns, keep, options = self.layout
+        try:
+            chunk = clean_chunk(pd.read_csv(io.StringIO(text), skiprows=skip, **options), columns, keep)
+        except pd.errors.EmptyDataError:
+            chunk = None
+
+        inserted = 0
+        if chunk is not None and not chunk.empty:
+            for field, value in self.extra.items():
+                chunk[field] = value
+            with transaction.atomic(), connection.cursor() as cursor:
+                stored_until = self.update_stored_until()
+                if stored_until is not None:
+                    chunk = chunk[chunk["pdat_time"] > stored_until]
+                inserted = bulk_insert_frame(cursor, self.model, chunk, list(chunk.columns))
+        self.offset += len(data)  # Only after the rows are committed
+        if inserted and not self.rows and self.target == "ufdf":
+            invalidate_options("sartoflow_batches")  # The run's batch id may be new
+        self.rows += inserted
+        return inserted
+
+    def update_stored_until(self):
+        """
+        Latest pdat_time stored for the experiment (and unit step), including rows written by other tails.
+        After the first call only rows above the last seen id are aggregated, which the primary key bounds.
+        """
+        queryset = self.model.objects.filter(**self.extra)
+        if self.seen_id is not None:
+            queryset = queryset.filter(id__gt=self.seen_id)
+        latest = queryset.aggregate(pdat_time=Max("pdat_time"), id=Max("id"))
+        if latest["id"] is not None:
+            self.seen_id = latest["id"]
+            stored = pd.Timestamp(latest["pdat_time"])
+            stored = stored.tz_convert(None) if stored.tzinfo else stored
+            if self.stored_until is None or stored > self.stored_until:
+                self.stored_until = stored
+        return self.stored_until
+
+    def run(self):
+        try:
+            while True:
+                if self.poll():
+                    self.last_growth = time.monotonic()
+                elif time.monotonic() - self.last_growth > TAIL_IDLE_STOP:
+                    self.state = "finished"
+                    break
+                close_old_connections()
+                if self.stop_event.wait(self.interval):
+                    self.state = "stopped"
+                    break
+        except Exception as e:
+            logger.exception("Tail of %s failed", self.path)
+            self.state = "failed"
+            self.error = str(e)
+        finally:
+            close_old_connections()
+
+    def status(self):
+        return {
+            "tail_id": self.tail_id,
+            "path": self.path,
+            "state": self.state,
+            "rows": self.rows,
+            "offset": self.offset,
+            "error": self.error,
+        }
+
+
+# ====================== Registry ======================
+_tails = {}  # {tail id: SartoflowTail}
+_tails_lock = threading.Lock()
+
+
+def start_tail(path, target, result_id, unit_step=None):
+    """ Starts following `path`, or returns the tail already running on it. """
+    if not os.path.isfile(path):
+        raise ValueError(f"File not found: {path}")
+    with _tails_lock:
+        for tail in _tails.values():
+            if tail.state == "running" and os.path.samefile(tail.path, path):
+                return tail
+        tail = SartoflowTail(path, target, result_id, unit_step)
+        _tails[tail.tail_id] = tail
+    threading.Thread(target=tail.run, name=f"sartoflow-tail-{tail.tail_id[:8]}", daemon=True).start()
+    return tail
+
+
+def get_tail(tail_id):
+    with _tails_lock:
+        return _tails.get(tail_id)
+
+
+def stop_tail(tail_id):
+    tail = get_tail(tail_id)
+    if tail is not None:
+        tail.stop_event.set()
+
+
+def list_tails():
+    with _tails_lock:
+        return [tail.status() for tail in _tails.values()]
+
+
+def read_new_rows(target, result_id, fields, cursor=None, unit_step=None, limit=TAIL_ROW_LIMIT):
+    """
+    Rows of an experiment inserted after `cursor` (a row id), only the requested fields plus pdat_time.
+    Without a cursor, or when more than `limit` rows are new, only the latest `limit` rows are returned.
+    :return: (DataFrame ordered by id, new cursor)
+    """
+    model, _ = TAIL_TARGETS[target]
+    queryset = model.objects.filter(result_id=result_id)
+    if target == "vf" and unit_step is not None:
+        queryset = queryset.filter(unit_step=unit_step)
+    if cursor:
+        queryset = queryset.filter(id__gt=cursor)
+
+    rows = list(queryset.order_by("-id").values_list("id", "pdat_time", *fields)[:limit])
+    if not rows:
+        return pd.DataFrame(columns=["id", "pdat_time", *fields]), cursor
+    df = pd.DataFrame.from_records(rows[::-1], columns=["id", "pdat_time", *fields])
+    df["pdat_time"] = pd.to_datetime(df["pdat_time"], utc=True).dt.tz_localize(None)
+    df[fields] = df[fields].apply(pd.to_numeric, errors="coerce")
+    return df, int(df["id"].iloc[-1])
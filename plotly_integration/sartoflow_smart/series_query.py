@@ -0,0 +1,75 @@
+"""
+Graph reads of Sartoflow / VF time series: only the plotted columns, downsampled to the graph's point budget.
+
+    df = fetch_columns(SartoflowTimeSeriesData.objects.filter(batch_id=batch), "process_time", ["tmp"])
+    x, y = decimate_series(df["process_time"], df[["tmp"]])
+    row_count(SartoflowTimeSeriesData, batch_id=batch)  # cached, for warnings before large pulls
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from plotly_integration.akta.akta_app.akta_processing import decimate_min_max
+
+GRAPH_MAX_POINTS = 2000  # Per trace, about two points per horizontal pixel of a full-width graph
+LARGE_PULL_ROWS = 500000  # Row count above which the UI warns before plotting
+ROW_COUNT_TTL = 300  # Seconds a cached row count is trusted
+
+_row_counts = {}  # {(model label, filters): (monotonic time, count)}
+_row_counts_lock = threading.Lock()
+
+
+def fetch_columns(queryset, x_field, columns):
+    """ x_field plus `columns` only, sorted by x; values are coerced to float (NULL → NaN). """
+    fields = [x_field, *[column for column in columns if column != x_field]]
+    df = pd.DataFrame.from_records(queryset.order_by(x_field).values_list(*fields), columns=fields)
+    df[fields] = df[fields].apply(pd.to_numeric, errors="coerce")
+    return df
+
+
+def decimate_series(x, ys, max_points=GRAPH_MAX_POINTS):
+    """
+    Peak-preserving (per-bucket min/max) downsampling of traces sharing x.
+    Every trace keeps its own min/max rows in each bucket, so all traces get the union of 1 + 2k rows per
+    bucket for k traces; the bucket count is scaled down by k to keep that union within max_points.
+    :param x: Sorted x values (Series or array).
+    :param ys: DataFrame of traces.
+    :return: (x array, DataFrame) with at most ~max_points rows.
+    """
+    traces = max(ys.shape[1], 1)
+    bucket_budget = max(3 * max_points // (1 + 2 * traces), 3)  # decimate_min_max keeps up to 3 rows per bucket
+    x_values, y_values = decimate_min_max(np.asarray(x), ys.to_numpy(dtype=np.float64), bucket_budget)
+    return x_values, pd.DataFrame(y_values, columns=ys.columns)
+
+
+def row_count(model, **filters):
+    """ Cached COUNT(*) of `model` rows matching filters. """
+    key = (model._meta.label, tuple(sorted(filters.items())))
+    now = time.monotonic()
+    with _row_counts_lock:
+        cached = _row_counts.get(key)
+        if cached and now - cached[0] < ROW_COUNT_TTL:
+            return cached[1]
+    count = model.objects.filter(**filters).count()
+    with _row_counts_lock:
+        _row_counts[key] = (now, count)
+    return count
+
+
+def clear_row_counts():
+    with _row_counts_lock:
+        _row_counts.clear()
+
+
+def row_count_message(count, max_points=GRAPH_MAX_POINTS):
+    """ Status line for a selection, with a warning when the pull is large. """
+    if not count:
+        return "No data for this selection."
+    message = f"{count:,} rows"
+    if count > max_points:
+        message += f", plotted at up to {max_points:,} points per trace"
+    if count > LARGE_PULL_ROWS:
+        message = f"⚠️ Large dataset: {message}. Loading may take a while."
+    return message
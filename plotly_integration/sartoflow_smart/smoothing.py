@@ -0,0 +1,86 @@
+"""
+Time-based smoothing for Sartoflow series (VF flux, UF/DF sensors).
+
+Windows are given in seconds of real process time, not in samples, so irregular logging intervals do not
+change how much a curve is smoothed. All selected columns are smoothed in one vectorized pass:
+
+    df[["L/hr"]] = smooth_frame(df, ["L/hr"], "process_time", "rolling", 60)
+"""
+import numpy as np
+import pandas as pd
+from scipy.signal import savgol_filter
+
+SMOOTHING_METHODS = [
+    {"label": "Rolling mean", "value": "rolling"},
+    {"label": "EWMA", "value": "ewma"},
+    {"label": "Savitzky–Golay", "value": "savgol"},
+    {"label": "None", "value": "none"},
+]
+MIN_SMOOTHING_SECONDS = 10
+SAVGOL_POLYORDER = 2
+
+
+def time_index(times):
+    """
+    Time axis as a DatetimeIndex: pdat_time is used as is, process_time (hours) is offset from the epoch.
+    """
+    times = pd.Series(times)
+    if pd.api.types.is_datetime64_any_dtype(times):
+        return pd.DatetimeIndex(times)
+    return pd.Timestamp(0) + pd.to_timedelta(times.to_numpy(dtype=np.float64), unit="h")
+
+
+def _savgol(index, values, window_seconds):
+    """
+    Savitzky–Golay on a uniform grid at the median sampling interval, interpolated back to the samples.
+    """
+    t = (index - index[0]).total_seconds().to_numpy()
+    dt = np.median(np.diff(t)) if len(t) > 1 else 0
+    if not dt > 0:
+        return values
+    grid = np.arange(t[0], t[-1] + dt / 2, dt)
+    window = int(window_seconds / dt) | 1  # Odd sample count covering the window
+    if window <= SAVGOL_POLYORDER or window > len(grid):
+        return values
+
+    smoothed = np.empty_like(values)
+    for j in range(values.shape[1]):
+        column = values[:, j]
+        valid = ~np.isnan(column)
+        if valid.sum() < 2:
+            smoothed[:, j] = column
+            continue
+        uniform = np.interp(grid, t[valid], column[valid])
+        smoothed[:, j] = np.interp(t, grid, savgol_filter(uniform, window, SAVGOL_POLYORDER))
+        smoothed[~valid, j] = np.nan
+    return smoothed
+
+
+def smooth_frame(df, columns, time_column, method="rolling", window_seconds=60):
+    """
+    Smooths `columns` of a frame sorted by `time_column` with a window of `window_seconds` process time.
+    :param method: "rolling" (trailing time-window mean), "ewma" (half-life = window) or "savgol".
+    :return: DataFrame of the smoothed columns with df's index; unchanged copies if smoothing is off.
+    """
+    values = df[columns].astype(np.float64)
+    if method in (None, "none") or not window_seconds or window_seconds < MIN_SMOOTHING_SECONDS or values.empty:
+        return values
+
+    index = time_index(df[time_column])
+    has_time = ~index.isna()
+    if not has_time.all():
+        # Rows without a timestamp keep their raw values
+        result = values.copy()
+        result.loc[has_time] = smooth_frame(df.loc[has_time], columns, time_column, method, window_seconds)
+        return result
+    timed = values.set_axis(index)
+
+    if method == "rolling":
+        smoothed = timed.rolling(pd.Timedelta(seconds=window_seconds), min_periods=1).mean()
+    elif method == "ewma":
+        smoothed = timed.ewm(halflife=pd.Timedelta(seconds=window_seconds), times=index).mean()
+    elif method == "savgol":
+        smoothed = pd.DataFrame(_savgol(index, timed.to_numpy(), window_seconds), columns=columns)
+    else:
+        raise ValueError(f"Unknown smoothing method: {method}")
+    return smoothed.set_axis(df.index)
@@ -1,15 +1,16 @@
-import pandas as pd
 import plotly.graph_objects as go
 from django_plotly_dash import DjangoDash
 from dash import dcc, html, Input, Output
 from plotly_integration.models import SartoflowTimeSeriesData
+from plotly_integration.option_providers import get_options
+from plotly_integration.sartoflow_smart.series_query import (
+    decimate_series, fetch_columns, row_count, row_count_message,
+)
+from plotly_integration.sartoflow_smart.smoothing import SMOOTHING_METHODS, smooth_frame
 
 # Create Dash App
 app = DjangoDash("UFDFApp")
 
-# Query the database for unique batch IDs
-batch_ids = SartoflowTimeSeriesData.objects.values_list("batch_id", flat=True).distinct()
-
 # Define selectable columns (except BatchId and ProcessTime)
 selectable_columns = [
     {"label": "Agitator Speed (AG_2100)", "value": "AG2100_Value"},
@@ -26,11 +27,13 @@ selectable_columns = [
     {"label": "Permeate Weight (WIR2700)", "value": "WIR2700"},
     {"label": "Retain Vessel Weight (WIRC2100)", "value": "WIRC2100_SETPOINT"},
 ]
+SERIES_FIELDS = {option["value"].lower() for option in selectable_columns}
 
 # Dash Layout
 app.layout = html.Div(
     style={"display": "flex", "flexDirection": "row", "gap": "20px", "padding": "20px"},
     children=[
+        dcc.Location(id="url", refresh=False),
         # Left Sidebar - Batch Selection & Checkboxes
         html.Div(
             style={"width": "25%", "border": "1px solid #ccc", "padding": "10px", "borderRadius": "5px"},
@@ -38,10 +41,11 @@ app.layout = html.Div(
                 html.H3("Select Batch ID"),
                 dcc.Dropdown(
                     id="batch-dropdown",
-                    options=[{"label": batch, "value": batch} for batch in batch_ids],
+                    options=[],  # Loaded on page load, see load_batch_options
                     placeholder="Select a batch...",
                     style={"marginBottom": "10px"}
                 ),
+                html.Div(id="row-count-info", style={"marginBottom": "10px", "fontSize": "13px", "color": "gray"}),
                 html.H3("Select Data to Plot"),
                 dcc.Checklist(
                     id="data-selection",
@@ -49,6 +53,16 @@ app.layout = html.Div(
                     value=["TMP"],  # Default selection
                     style={"display": "flex", "flexDirection": "column"}
                 ),
+                html.H3("Smoothing"),
+                dcc.Dropdown(
+                    id="smoothing-method",
+                    options=SMOOTHING_METHODS,
+                    value="none",
+                    clearable=False,
+                    style={"marginBottom": "10px"}
+                ),
+                html.Label("Window (seconds):"),
+                dcc.Input(id="smoothing-input", type="number", min=10, step=1, value=60, style={"width": "100%"}),
             ],
         ),
         # Graph Area
@@ -63,29 +77,49 @@ app.layout = html.Div(
 )
 
 
+@app.callback(
+    Output("batch-dropdown", "options"),
+    Input("url", "pathname"),
+)
+def load_batch_options(pathname):
+    return get_options("sartoflow_batches")
+
+
+@app.callback(
+    Output("row-count-info", "children"),
+    Input("batch-dropdown", "value"),
+)
+def show_row_count(selected_batch):
+    if not selected_batch:
+        return ""
+    return row_count_message(row_count(SartoflowTimeSeriesData, batch_id=selected_batch))
+
+
 @app.callback(
     Output("time-series-graph", "figure"),
     Input("batch-dropdown", "value"),
-    Input("data-selection", "value")
+    Input("data-selection", "value"),
+    Input("smoothing-method", "value"),
+    Input("smoothing-input", "value")
 )
-def update_graph(selected_batch, selected_columns):
+def update_graph(selected_batch, selected_columns, smoothing_method, smoothing_seconds):
     if not selected_batch:
         return go.Figure()
 
-    # Query database for selected batch
-    query_set = SartoflowTimeSeriesData.objects.filter(batch_id=selected_batch).values()
-    df = pd.DataFrame.from_records(query_set)
+    # Convert selected columns to lowercase to match database column names
+    selected_columns = [col.lower() for col in selected_columns or []]
+    present = [col for col in selected_columns if col in SERIES_FIELDS]
+
+    # Query only the plotted columns for the selected batch
+    df = fetch_columns(SartoflowTimeSeriesData.objects.filter(batch_id=selected_batch), "process_time", present)
 
     if df.empty:
         return go.Figure()
 
-    df = df.sort_values(by="process_time")
-
-    # Debugging: Print available columns
-    print("Available columns in DataFrame:", df.columns.tolist())
-
-    # Convert selected columns to lowercase to match database column names
-    selected_columns = [col.lower() for col in selected_columns]
+    # Smooth every selected series in one pass over real process time, then reduce to the graph's point budget
+    if present:
+        df[present] = smooth_frame(df, present, "process_time", smoothing_method, smoothing_seconds)
+    x, df = decimate_series(df["process_time"], df[present])
 
     fig = go.Figure()
 
@@ -99,7 +133,7 @@ def update_graph(selected_batch, selected_columns):
             axis_map[column] = y_axis_name
 
             fig.add_trace(go.Scatter(
-                x=df["process_time"],
+                x=x,
                 y=df[column],
                 mode="lines",
                 name=column,
@@ -107,8 +141,6 @@ def update_graph(selected_batch, selected_columns):
             ))
 
             y_axis_count += 1
-        else:
-            print(f"Warning: Column {column} not found in DataFrame")
 
     # Layout with multiple y-axes
     layout = {
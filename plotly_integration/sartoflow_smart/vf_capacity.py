@@ -0,0 +1,193 @@
+"""
+Filter capacity models for viral filtration, fitted to the product filtration step of many experiments in
+one pass and stored in VFCapacityFit so comparison pages read the results instead of the raw time series.
+
+V is the filtrate collected since the start of the step in L/m², t the process time since then in hours.
+Every model is a straight line y = slope * x + intercept, solved for all experiments at once from
+per-experiment sums:
+
+    vmax  t/V against t          standard blocking:  capacity = 1/slope, initial flux = 1/intercept
+    cake  t/V against V          cake filtration:    initial flux = 1/intercept, no plugging limit
+    pmax  √(P0/P) against V      pressure rise:      capacity = -intercept/slope
+
+    refit_capacity()      # every experiment
+    refit_capacity([12])  # one experiment, e.g. after its import
+"""
+import numpy as np
+import pandas as pd
+from django.db import transaction
+
+from plotly_integration.models import VFCapacityFit, VFMetadata, VFTimeSeriesData
+from plotly_integration.sartoflow_smart.vf_flux import parse_float
+
+PRODUCT_FILTRATION = 3  # unit_step of the product filtration
+FIT_START_HOURS = 5 / 60  # Wetting and pressure ramp at the start of the step are left out of the fits
+FIT_MIN_POINTS = 10  # Fewer points in the fit window leave the fit empty
+PMAX_P0_POINTS = 10  # P0 is the median pressure of this many points at the start of the fit window
+
+CAPACITY_MODELS = {
+    "vmax": "Vmax (t/V vs t)",
+    "cake": "Cake Filtration (t/V vs V)",
+    "pmax": "Pmax (√(P0/P) vs V)",
+}
+
+
+def filter_areas(result_ids=None):
+    """ {result_id: filter area in m²} from VFMetadata.filter_type, for experiments with a usable area. """
+    queryset = VFMetadata.objects.all()
+    if result_ids is not None:
+        queryset = queryset.filter(result_id__in=result_ids)
+    areas = {result_id: parse_float(value) for result_id, value in queryset.values_list("result_id", "filter_type")}
+    return {result_id: area for result_id, area in areas.items() if area and area > 0}
+
+
+def load_product_filtration(result_ids=None):
+    """ result_id / process_time / wir2700 / pir2700 of the product filtration steps, in one query. """
+    queryset = VFTimeSeriesData.objects.filter(unit_step=PRODUCT_FILTRATION)
+    if result_ids is not None:
+        queryset = queryset.filter(result_id__in=result_ids)
+    fields = ["result_id", "process_time", "wir2700", "pir2700"]
+    df = pd.DataFrame.from_records(queryset.values_list(*fields), columns=fields)
+    df[fields] = df[fields].apply(pd.to_numeric, errors="coerce")
+    return df
+
+
+def throughput_frame(df, areas):
+    """
+    Adds t (hours since the step started) and V (L/m² filtered since then) to raw product filtration rows.
+    Exports only log values that changed, so weight and pressure are carried forward within each experiment
+    before rows are filtered; rows are then deduplicated on weight the same way as vf_flux.derive_flux.
+    """
+    df = df.dropna(subset=["result_id", "process_time"])
+    df = df.sort_values(["result_id", "process_time"], kind="stable")
+    df[["wir2700", "pir2700"]] = df.groupby("result_id")[["wir2700", "pir2700"]].ffill()
+    df = df.dropna(subset=["wir2700"])
+    df = df.round({"wir2700": 1, "process_time": 6})
+    df = df.drop_duplicates(subset=["result_id", "wir2700"], keep="first")
+
+    df = df.assign(area=df["result_id"].map(areas))
+    df = df[df["area"] > 0].reset_index(drop=True)
+    start = df.groupby("result_id")[["process_time", "wir2700"]].transform("first")
+    df["t"] = df["process_time"] - start["process_time"]
+    df["V"] = (df["wir2700"] - start["wir2700"]) / 1000 / df["area"]
+    return df
+
+
+def grouped_linear_fit(codes, x, y, groups):
+    """
+    Least-squares line through (x, y) for each group at once.
+    :param codes: Group index (0 .. groups-1) of every point.
+    :return: (points, slope, intercept, r²) arrays of length groups; NaN where a group cannot be fitted.
+    """
+    points = np.bincount(codes, minlength=groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_x = np.bincount(codes, x, groups) / points
+        mean_y = np.bincount(codes, y, groups) / points
+        dx = x - mean_x[codes]
+        dy = y - mean_y[codes]
+        sxx = np.bincount(codes, dx * dx, groups)
+        sxy = np.bincount(codes, dx * dy, groups)
+        syy = np.bincount(codes, dy * dy, groups)
+        slope = sxy / sxx
+        intercept = mean_y - slope * mean_x
+        r_squared = sxy ** 2 / (sxx * syy)
+
+    empty = points < FIT_MIN_POINTS
+    for values in (slope, intercept, r_squared):
+        values[empty | ~np.isfinite(values)] = np.nan
+    return points, slope, intercept, r_squared
+
+
+def positive_reciprocal(values):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(values > 0, 1 / values, np.nan)
+
+
+def fit_capacity(df):
+    """
+    Fits every capacity model to every experiment in a throughput_frame().
+    :return: DataFrame with one row per (result_id, fit_model), columns as in VFCapacityFit.
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    result_ids, codes = np.unique(df["result_id"].to_numpy(), return_inverse=True)
+    groups = len(result_ids)
+    t = df["t"].to_numpy(dtype=np.float64)
+    V = df["V"].to_numpy(dtype=np.float64)
+    P = df["pir2700"].to_numpy(dtype=np.float64)
+
+    summary = df.groupby("result_id").agg(
+        throughput=("V", "max"), duration=("t", "max"), filter_area=("area", "first"),
+    ).reset_index()
+
+    window = (t >= FIT_START_HOURS) & (V > 0)
+    fits = []
+
+    # Standard blocking and cake filtration share y = t/V
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_over_v = t / V
+    for fit_model, x in (("vmax", t), ("cake", V)):
+        points, slope, intercept, r_squared = grouped_linear_fit(codes[window], x[window], t_over_v[window], groups)
+        fits.append(summary.assign(
+            fit_model=fit_model, points=points, slope=slope, intercept=intercept, r_squared=r_squared,
+            capacity=positive_reciprocal(slope) if fit_model == "vmax" else np.nan,
+            initial_flux=positive_reciprocal(intercept), initial_pressure=np.nan,
+        ))
+
+    # Pmax: pressure rise relative to the pressure at the start of the fit window
+    window &= P > 0
+    position = pd.Series(codes[window]).groupby(codes[window]).cumcount().to_numpy()
+    first = position < PMAX_P0_POINTS
+    p0 = pd.Series(P[window][first]).groupby(codes[window][first]).median().reindex(range(groups)).to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pressure_ratio = np.sqrt(p0[codes[window]] / P[window])
+    points, slope, intercept, r_squared = grouped_linear_fit(codes[window], V[window], pressure_ratio, groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        capacity = np.where(slope < 0, -intercept / slope, np.nan)
+    fits.append(summary.assign(
+        fit_model="pmax", points=points, slope=slope, intercept=intercept, r_squared=r_squared,
+        capacity=capacity, initial_flux=np.nan, initial_pressure=p0,
+    ))
+    return pd.concat(fits, ignore_index=True)
+
+
+def store_fits(fits, result_ids=None):
+    """ Replaces the stored fits of `result_ids` (all experiments when None) with `fits`. """
+    fits = fits.astype(object).where(fits.notna(), None) if not fits.empty else fits
+    objects = [
+        VFCapacityFit(
+            result_id_id=int(row["result_id"]),
+            fit_model=row["fit_model"],
+            slope=row["slope"],
+            intercept=row["intercept"],
+            r_squared=row["r_squared"],
+            points=int(row["points"]),
+            capacity=row["capacity"],
+            initial_flux=row["initial_flux"],
+            initial_pressure=row["initial_pressure"],
+            throughput=row["throughput"],
+            duration=row["duration"],
+            filter_area=row["filter_area"],
+        )
+        for row in fits.to_dict("records")
+    ]
+    with transaction.atomic():
+        stale = VFCapacityFit.objects.all()
+        if result_ids is not None:
+            stale = stale.filter(result_id__in=result_ids)
+        stale.delete()
+        VFCapacityFit.objects.bulk_create(objects)
+    return len(objects)
+
+
+def refit_capacity(result_ids=None):
+    """
+    Fits and stores the capacity models of `result_ids` (all experiments when None).
+    :return: Number of experiments with stored fits.
+    """
+    areas = filter_areas(result_ids)
+    df = throughput_frame(load_product_filtration(result_ids), areas)
+    fits = fit_capacity(df)
+    store_fits(fits, result_ids)
+    return 0 if fits.empty else fits["result_id"].nunique()
@@ -0,0 +1,169 @@
+import time
+
+import dash
+import pandas as pd
+import plotly.graph_objects as go
+from dash import dcc, html, Input, Output, State, dash_table
+from django_plotly_dash import DjangoDash
+
+from plotly_integration.models import VFCapacityFit
+from plotly_integration.option_providers import get_options
+from plotly_integration.sartoflow_smart.vf_capacity import CAPACITY_MODELS, refit_capacity
+
+app = DjangoDash("VFCapacityApp")
+
+FIT_FIELDS = {
+    "result_id": "result_id",
+    "result_id__experiment_name": "experiment",
+    "result_id__molecule_name": "molecule",
+    "result_id__filter_type": "filter_type",
+    "result_id__load_concentration": "load_concentration",
+    "capacity": "capacity",
+    "throughput": "throughput",
+    "initial_flux": "initial_flux",
+    "initial_pressure": "initial_pressure",
+    "r_squared": "r_squared",
+    "points": "points",
+    "fitted_at": "fitted_at",
+}
+
+panel_style = {"border": "1px solid #ccc", "padding": "10px", "borderRadius": "5px"}
+
+app.layout = html.Div(
+    style={"display": "flex", "flexDirection": "row", "gap": "20px", "padding": "20px",
+           "fontFamily": "Arial, sans-serif"},
+    children=[
+        dcc.Location(id="url"),
+        dcc.Store(id="fits-version"),
+        html.Div(
+            style={"width": "25%", **panel_style},
+            children=[
+                html.H3("Filter Capacity"),
+                html.Label("Model:", style={"fontWeight": "bold"}),
+                dcc.Dropdown(
+                    id="fit-model",
+                    options=[{"label": label, "value": value} for value, label in CAPACITY_MODELS.items()],
+                    value="vmax",
+                    clearable=False,
+                ),
+                html.Label("Units:", style={"fontWeight": "bold", "marginTop": "10px"}),
+                dcc.RadioItems(
+                    id="capacity-units",
+                    options=[{"label": "L/m²", "value": "volume"}, {"label": "g/m²", "value": "mass"}],
+                    value="volume",
+                    inline=True,
+                ),
+                html.Label("Experiments (all when empty):", style={"fontWeight": "bold", "marginTop": "10px"}),
+                dcc.Dropdown(id="capacity-experiments", multi=True, placeholder="All experiments"),
+                html.Button("Refit", id="refit-button", n_clicks=0, style={"marginTop": "15px"}),
+                html.Div(id="refit-status", style={"marginTop": "10px", "color": "#0047b3"}),
+                html.Div(
+                    "Fits cover the product filtration step and are refreshed after each import; "
+                    "use Refit after runs were followed live.",
+                    style={"marginTop": "10px", "color": "gray", "fontSize": "13px"},
+                ),
+            ],
+        ),
+        html.Div(
+            style={"width": "75%", **panel_style},
+            children=[
+                dcc.Graph(id="capacity-graph", style={"height": "50vh"}),
+                dash_table.DataTable(
+                    id="capacity-table",
+                    sort_action="native",
+                    page_size=15,
+                    style_table={"overflowX": "auto"},
+                    style_header={"backgroundColor": "#0047b3", "color": "white", "fontWeight": "bold"},
+                    style_cell={"padding": "6px", "textAlign": "center"},
+                ),
+            ],
+        ),
+    ],
+)
+
+
+@app.callback(
+    Output("capacity-experiments", "options"),
+    Input("url", "pathname"),
+)
+def load_experiment_options(pathname):
+    return get_options("vf_experiments")
+
+
+@app.callback(
+    Output("fits-version", "data"),
+    Output("refit-status", "children"),
+    Input("refit-button", "n_clicks"),
+    State("capacity-experiments", "value"),
+    prevent_initial_call=True
+)
+def refit(n_clicks, experiments):
+    started = time.monotonic()
+    try:
+        fitted = refit_capacity(experiments or None)
+    except Exception as e:
+        return dash.no_update, f"❌ Refit failed: {e}"
+    return time.time(), f"Refit {fitted} experiments in {time.monotonic() - started:.1f} s"
+
+
+def stored_fits(fit_model, experiments):
+    """ Stored fits of one model joined with the experiment metadata; no time-series data is read. """
+    queryset = VFCapacityFit.objects.filter(fit_model=fit_model)
+    if experiments:
+        queryset = queryset.filter(result_id__in=experiments)
+    df = pd.DataFrame.from_records(queryset.values_list(*FIT_FIELDS), columns=list(FIT_FIELDS.values()))
+    if df.empty:
+        return df
+    df["load_concentration"] = pd.to_numeric(df["load_concentration"], errors="coerce")
+    df["fitted_at"] = pd.to_datetime(df["fitted_at"], utc=True).dt.strftime("%Y-%m-%d %H:%M")
+    return df.sort_values("capacity", ascending=False, na_position="last")
+
+
+@app.callback(
+    Output("capacity-graph", "figure"),
+    Output("capacity-table", "columns"),
+    Output("capacity-table", "data"),
+    Input("fit-model", "value"),
+    Input("capacity-units", "value"),
+    Input("capacity-experiments", "value"),
+    Input("fits-version", "data"),
+)
+def update_comparison(fit_model, units, experiments, version):
+    # STEP 1: Read the stored fits
+    df = stored_fits(fit_model, experiments)
+    fig = go.Figure()
+    fig.update_layout(template="plotly_white", title=CAPACITY_MODELS[fit_model], barmode="group")
+    if df.empty:
+        fig.add_annotation(text="No fits stored yet, press Refit.", showarrow=False, x=0.5, y=0.5,
+                           xref="paper", yref="paper")
+        return fig, [], []
+
+    # STEP 2: Capacity and throughput reached, per filter area or per filter area and load concentration
+    unit = "L/m²"
+    if units == "mass":
+        unit = "g/m²"
+        df["capacity"] = df["capacity"] * df["load_concentration"]
+        df["throughput"] = df["throughput"] * df["load_concentration"]
+
+    labels = df["experiment"].astype(str) + " (" + df["result_id"].astype(str) + ")"
+    if df["capacity"].notna().any():
+        fig.add_trace(go.Bar(x=labels, y=df["capacity"], name=f"Capacity ({unit})"))
+    fig.add_trace(go.Bar(x=labels, y=df["throughput"], name=f"Throughput Reached ({unit})"))
+    fig.update_yaxes(title_text=unit)
+
+    # STEP 3: Table
+    columns = [
+        {"name": "Experiment", "id": "experiment"},
+        {"name": "Molecule", "id": "molecule"},
+        {"name": "Filter Area (m²)", "id": "filter_type"},
+        {"name": f"Capacity ({unit})", "id": "capacity"},
+        {"name": f"Throughput ({unit})", "id": "throughput"},
+        {"name": "Initial Flux (LMH)", "id": "initial_flux"},
+        {"name": "P0 (bar)", "id": "initial_pressure"},
+        {"name": "R²", "id": "r_squared"},
+        {"name": "Points", "id": "points"},
+        {"name": "Fitted", "id": "fitted_at"},
+    ]
+    table = df.round({"capacity": 1, "throughput": 1, "initial_flux": 1, "initial_pressure": 3, "r_squared": 4})
+    table = table.astype(object).where(table.notna(), None)
+    return fig, columns, table.to_dict("records")
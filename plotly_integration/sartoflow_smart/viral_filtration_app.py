@@ -2,9 +2,14 @@ import pandas as pd
 import plotly.graph_objects as go
 from django_plotly_dash import DjangoDash
 from dash import dcc, html, Input, Output
-from paramiko.agent import value
 
 from plotly_integration.models import VFMetadata, VFTimeSeriesData
+from plotly_integration.option_providers import get_options, invalidate_options
+from plotly_integration.sartoflow_smart.vf_flux import derive_flux, flux_frame, parse_float, clear_flux_cache
+from plotly_integration.sartoflow_smart.series_query import (
+    clear_row_counts, decimate_series, row_count, row_count_message,
+)
+from plotly_integration.sartoflow_smart.smoothing import SMOOTHING_METHODS
 import numpy as np
 from dash.dependencies import ALL, State
 
@@ -17,8 +22,6 @@ unit_step_options = [
     {"label": "Buffer Flush", "value": 2},
     {"label": "Product Filtration", "value": 3},
 ]
-# Query the database for unique experiment names and result IDs
-experiments = VFMetadata.objects.values("result_id", "experiment_name").distinct().order_by("-result_id")
 
 # Define selectable columns (including derived metrics)
 selectable_columns = [
@@ -65,7 +68,7 @@ app.layout = html.Div(
                 html.Label("Select Experiment:", style={"fontWeight": "bold"}),
                 dcc.Dropdown(
                     id="experiment-dropdown",
-                    options=[{"label": exp["experiment_name"], "value": exp["result_id"]} for exp in experiments],
+                    options=[],  # Loaded on page load, see update_experiment_list
                     placeholder="Select an experiment...",
                     style={"marginBottom": "10px"},
                 ),
@@ -77,6 +80,7 @@ app.layout = html.Div(
                     placeholder="Select unit step...",
                     style={"marginBottom": "10px"},
                 ),
+                html.Div(id="row-count-info", style={"marginBottom": "10px", "fontSize": "13px", "color": "gray"}),
                 # Water Flush Flux Input
                 html.Label("Water Flush Flux (L/m²/hr):", style={"fontWeight": "bold"}),
                 dcc.Input(
@@ -112,6 +116,9 @@ app.layout = html.Div(
                                         ],
                                         style={"marginTop": "15px", "textAlign": "left"}
                                     ),
+                                    html.Button("Export CSV", id="export-button", n_clicks=0,
+                                                style={"marginTop": "10px"}),
+                                    dcc.Download(id="export-download"),
                                 ],
                             ),
 
@@ -159,6 +166,14 @@ app.layout = html.Div(
                                         value=60,
                                         style={**input_style, "width": "100%", "marginBottom": "10px"},
                                     ),
+                                    html.Label("Smoothing Method:", style={"fontWeight": "bold"}),
+                                    dcc.Dropdown(
+                                        id="smoothing-method",
+                                        options=SMOOTHING_METHODS,
+                                        value="rolling",
+                                        clearable=False,
+                                        style={"marginBottom": "10px", "width": "100%"},
+                                    ),
 
                                     html.Label("Y-Min:", style={"fontWeight": "bold"}),
                                     dcc.Input(
@@ -208,8 +223,25 @@ app.layout = html.Div(
     Input("refresh-button", "n_clicks")
 )
 def update_experiment_list(n_clicks):
-    experiments = VFMetadata.objects.values("result_id", "experiment_name").distinct().order_by("-result_id")
-    return [{"label": exp["experiment_name"], "value": exp["result_id"]} for exp in experiments]
+    if n_clicks:
+        # Picks up runs imported in other processes before the caches expire
+        clear_flux_cache()
+        clear_row_counts()
+        invalidate_options("vf_experiments")
+    return get_options("vf_experiments")
+
+
+@app.callback(
+    Output("row-count-info", "children"),
+    Input("experiment-dropdown", "value"),
+    Input("unit-step-dropdown", "value"),
+)
+def show_row_count(selected_experiment, selected_unit_step):
+    if not selected_experiment or not selected_unit_step:
+        return ""
+    return row_count_message(
+        row_count(VFTimeSeriesData, result_id=selected_experiment, unit_step=selected_unit_step)
+    )
 
 
 @app.callback(
@@ -222,90 +254,31 @@ def update_experiment_list(n_clicks):
     Input("y-min-input", "value"),
     Input("y-max-input", "value"),
     Input("smoothing-input", "value"),
+    Input("smoothing-method", "value"),
     Input("water-flush-flux", "value"),
     Input({"type": "metadata-field", "field": "load_concentration"}, "value"),
 )
 def update_graph(selected_experiment, selected_unit_step, selected_columns, x_axis, y_min, y_max, smoothing_seconds,
-                 water_flux, load_concentration):
+                 smoothing_method, water_flux, load_concentration):
     if not selected_experiment or not selected_unit_step:
-        return go.Figure()
+        return go.Figure(), ""
 
     # Query metadata for selected filter area (m²)
     try:
         metadata = VFMetadata.objects.get(result_id=selected_experiment)
         filter_area = float(metadata.filter_type)  # Assuming filter_type stores the m² value
-    except VFMetadata.DoesNotExist:
-        return go.Figure()
-
-    # Query database for selected experiment and unit step
-    query_set = VFTimeSeriesData.objects.filter(
-        result_id=selected_experiment,
-        unit_step=selected_unit_step
-    ).values()
-
-    df = pd.DataFrame.from_records(query_set)
-
-    if df.empty:
-        return go.Figure()
-
-    df = df.sort_values(by="process_time")
-
-    # Data Preprocessing
-    df = df.round({"wir2700": 1, "process_time": 6})
-    df = df.drop_duplicates(subset=['wir2700'], keep='first').reset_index(drop=True)
-
-    df['g/m²'] = ((df['wir2700'] * load_concentration) / 1000) / filter_area
-
-    # Create a new DataFrame for flow rate calculation
-    df_flux = df[["process_time", "wir2700"]].copy()
-
-    df_flux['process_time_seconds'] = df_flux['process_time'] * 3600
-
-    # Round numerical columns to a fixed number of decimal places
-    df_flux = df_flux.round({"wir2700": 1, "process_time": 6})
+    except (VFMetadata.DoesNotExist, TypeError, ValueError):
+        return go.Figure(), ""
 
-    df_flux = df_flux.drop_duplicates(subset=['wir2700'], keep='first')
+    # Query, dedupe, flow and smoothing are cached; only concentration/water-flux scaling runs per render
+    derived = derive_flux(selected_experiment, selected_unit_step, smoothing_seconds, filter_area, smoothing_method)
+    if derived is None:
+        return go.Figure(), ""
 
-    df_flux['diff_wir2700'] = df_flux['wir2700'].diff() / 1000
-
-    # Calculate x axis g/m^2
-    df_flux['g/m²'] = ((df_flux['wir2700'] * load_concentration) / 1000) / filter_area
-
-    df_flux['diff_time'] = df_flux['process_time'].diff()
-
-    df_flux['L/hr'] = df_flux['diff_wir2700'] / df_flux['diff_time']
-
-    df_flux['mL/min'] = df_flux['L/hr'] * 16.666
-
-    df_flux = df_flux[df_flux['L/hr'] > 0]
-    # df_flux["L/hr_moving_average"] = df_flux['L/hr'].rolling(window=15).mean()
-
-    # Dynamic Smoothing
-    if smoothing_seconds and smoothing_seconds >= 10:
-        rolling_window = max(1, int(smoothing_seconds / df_flux["diff_time"].median()))
-        df_flux["L/hr_moving_average"] = df_flux['L/hr'].rolling(window=smoothing_seconds).mean()
-    else:
-        df_flux["L/hr_moving_average"] = df_flux['L/hr']
-
-    # Compute L/m²/hr
-    if filter_area > 0:
-        df_flux["L/m²/hr"] = df_flux["L/hr_moving_average"] / filter_area
-        df_flux["g/m²/hr"] = df_flux["L/m²/hr"] * load_concentration
-        df_flux = df_flux[df_flux['L/m²/hr'] > 0]
-
-    # Compute Flux Decay based on Water Flush Flux
-    if water_flux:
-        df_flux["flux_decay"] = ((water_flux - df_flux["L/m²/hr"]) / (water_flux)) * 100
-
-    # Overall LMH Calculation
-    final_time = df["process_time"].iloc[-1]  # Last process time
-    final_weight = (df["wir2700"].iloc[-1]) / 1000
-    overall_lmh = (final_weight / final_time) / filter_area
-
-    df_flux.to_csv("viral_filtration_data.csv", index=False)
-    print("CSV saved: viral_filtration_data.csv")
-
-    print(df_flux)
+    load_concentration = parse_float(load_concentration)
+    df = flux_frame(derived.raw, filter_area, load_concentration)
+    df_flux = flux_frame(derived.flux, filter_area, load_concentration, water_flux)
+    overall_lmh = derived.overall_lmh
 
     # Define a dictionary for more descriptive axis labels
     axis_labels = {
@@ -332,12 +305,13 @@ def update_graph(selected_experiment, selected_unit_step, selected_columns, x_ax
         # Determine which DataFrame to use
         data_source = df_flux if column in df_flux.columns else df  # Choose the appropriate DataFrame
 
-        if column in data_source.columns:
+        if column in data_source.columns and x_axis in data_source.columns:
             yaxis_name = f"y{i + 1}" if i > 0 else "y"  # First axis is 'y', others are 'y2', 'y3', etc.
+            x, y = decimate_series(data_source[x_axis], data_source[[column]])
 
             fig.add_trace(go.Scatter(
-                x=data_source[x_axis],  # Shared x-axis
-                y=data_source[column],
+                x=x,  # Shared x-axis
+                y=y[column],
                 mode="lines",
                 name=axis_labels.get(column, column),  # Use the descriptive label if available
                 yaxis=yaxis_name,  # Assign a unique y-axis
@@ -364,11 +338,43 @@ def update_graph(selected_experiment, selected_unit_step, selected_columns, x_ax
         xaxis=dict(title=axis_labels.get(x_axis, x_axis)),  # Set descriptive x-axis title
         hovermode="x unified",
         height=800,
+        uirevision=f"{selected_experiment}|{selected_unit_step}|{x_axis}",
         **y_axes  # Add all y-axes configurations dynamically
     )
     # ✅ Ensure `fig` is returned at the end
 
-    return fig, f"{overall_lmh:.2f} L/m²/hr"
+    return fig, f"{overall_lmh:.2f} L/m²/hr" if overall_lmh is not None else ""
+
+
+@app.callback(
+    Output("export-download", "data"),
+    Input("export-button", "n_clicks"),
+    State("experiment-dropdown", "value"),
+    State("unit-step-dropdown", "value"),
+    State("smoothing-input", "value"),
+    State("smoothing-method", "value"),
+    State("water-flush-flux", "value"),
+    State({"type": "metadata-field", "field": "load_concentration"}, "value"),
+    prevent_initial_call=True
+)
+def export_flux_data(n_clicks, selected_experiment, selected_unit_step, smoothing_seconds, smoothing_method,
+                     water_flux, load_concentration):
+    if not selected_experiment or not selected_unit_step:
+        return None
+
+    try:
+        filter_area = float(VFMetadata.objects.get(result_id=selected_experiment).filter_type)
+    except (VFMetadata.DoesNotExist, TypeError, ValueError):
+        return None
+
+    derived = derive_flux(selected_experiment, selected_unit_step, smoothing_seconds, filter_area, smoothing_method)
+    if derived is None:
+        return None
+
+    df_flux = flux_frame(derived.flux, filter_area, parse_float(load_concentration), water_flux)
+    return dcc.send_data_frame(
+        df_flux.to_csv, f"viral_filtration_{selected_experiment}_step{selected_unit_step}.csv", index=False
+    )
 
 
 @app.callback(
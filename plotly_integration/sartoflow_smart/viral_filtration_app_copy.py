@@ -5,6 +5,8 @@ from dash import dcc, html, Input, Output
 from paramiko.agent import value
 
 from plotly_integration.models import VFMetadata, VFTimeSeriesData
+from plotly_integration.option_providers import get_options
+from plotly_integration.sartoflow_smart.smoothing import smooth_frame
 import numpy as np
 from dash.dependencies import ALL, State
 
@@ -17,8 +19,6 @@ unit_step_options = [
     {"label": "Buffer Flush", "value": 2},
     {"label": "Product Filtration", "value": 3},
 ]
-# Query the database for unique experiment names and result IDs
-experiments = VFMetadata.objects.values("result_id", "experiment_name").distinct()
 
 # Define selectable columns (including derived metrics)
 selectable_columns = [
@@ -53,6 +53,7 @@ readonly_style["backgroundColor"] = "#e9f1fb"
 app.layout = html.Div(
     style=app_style,
     children=[
+        dcc.Location(id="url", refresh=False),
         html.H2("Viral Filtration Experiment Data", style={"textAlign": "center", "color": "#0047b3"}),
 
         # Experiment selection
@@ -62,7 +63,7 @@ app.layout = html.Div(
                 html.Label("Select Experiment:", style={"fontWeight": "bold"}),
                 dcc.Dropdown(
                     id="experiment-dropdown",
-                    options=[{"label": exp["experiment_name"], "value": exp["result_id"]} for exp in experiments],
+                    options=[],  # Loaded on page load, see load_experiment_options
                     placeholder="Select an experiment...",
                     style={"marginBottom": "10px"},
                 ),
@@ -134,6 +135,14 @@ app.layout = html.Div(
 )
 
 
+@app.callback(
+    Output("experiment-dropdown", "options"),
+    Input("url", "pathname"),
+)
+def load_experiment_options(pathname):
+    return get_options("vf_experiments")
+
+
 @app.callback(
     Output("time-series-graph", "figure"),
     Input("experiment-dropdown", "value"),
@@ -159,7 +168,7 @@ def update_graph(selected_experiment, selected_unit_step, selected_columns, y_mi
     query_set = VFTimeSeriesData.objects.filter(
         result_id=selected_experiment,
         unit_step=selected_unit_step
-    ).values()
+    ).values("process_time", "wir2700", "pir2700")
 
     df = pd.DataFrame.from_records(query_set)
 
@@ -191,14 +200,8 @@ def update_graph(selected_experiment, selected_unit_step, selected_columns, y_mi
     df_flux['mL/min'] = df_flux['L/hr'] * 16.666
 
     df_flux = df_flux[df_flux['L/hr'] > 0]
-    df_flux["L/hr_moving_average"] = df_flux['L/hr'].rolling(window=15).mean()
-
-    # # Dynamic Smoothing
-    # if smoothing_seconds and smoothing_seconds >= 10:
-    #     rolling_window = max(1, int(smoothing_seconds / df_flux["diff_time"].median()))
-    #     df_flux["L/hr_moving_average"] = df_flux['L/hr'].rolling(window=rolling_window).mean()
-    # else:
-    #     df_flux["L/hr_moving_average"] = df_flux['L/hr']
+    # Smoothing over a window of process time (not samples)
+    df_flux["L/hr_moving_average"] = smooth_frame(df_flux, ["L/hr"], "process_time", "rolling", smoothing_seconds)["L/hr"]
 
     # Compute L/m²/hr
     if filter_area > 0:
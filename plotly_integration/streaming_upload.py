@@ -0,0 +1,283 @@
+"""
+Chunked uploads for large instrument files.
+
+A server callback on dcc.Upload contents receives the whole file base64-encoded, so a multi-hour Sartoflow
+export is held in memory several times and can exceed DATA_UPLOAD_MAX_MEMORY_SIZE. Instead dcc.Upload only
+picks the file and the browser posts it in UPLOAD_CHUNK_SIZE slices to views.upload_chunk, which appends them
+to a temp file; the last slice returns the file token and a SHA-256 of the content. Callbacks receive that
+info dict and parse from disk:
+
+    streaming_upload(app, "upload-data", "Upload File")          # in the layout
+    Input("upload-data", "data")                                  # {"token", "filename", "size", "sha256"}
+    path = completed_upload_path(info)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+
+from dash import dcc, html, Input, Output, State
+
+UPLOAD_DIR = os.path.join(tempfile.gettempdir(), "plotly_uploads")
+UPLOAD_URL = "/plotly_integration/uploads/"  # views.upload_chunk, see urls.py
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # Bytes per request, well below DATA_UPLOAD_MAX_MEMORY_SIZE
+UPLOAD_MAX_SIZE = 4 * 1024 ** 3
+UPLOAD_DIR_MAX_SIZE = 16 * 1024 ** 3  # Bytes all stored uploads may take together
+UPLOAD_MAX_ACTIVE = 8  # Unfinished uploads at a time
+UPLOAD_RETENTION = 24 * 3600  # Seconds a finished upload is kept after its last write
+UPLOAD_STALE = 3600  # Seconds an unfinished upload is kept without a new chunk
+COPY_BUFFER = 256 * 1024
+
+
+# ====================== Storage ======================
+def _check_token(token):
+    """ Tokens are plain hex so they cannot point outside UPLOAD_DIR. """
+    if not token or not all(c in "0123456789abcdef" for c in token):
+        raise ValueError(f"Invalid upload token: {token!r}")
+    return token
+
+
+def upload_path(token):
+    return os.path.join(UPLOAD_DIR, f"{_check_token(token)}.data")
+
+
+def _info_path(token):
+    return os.path.join(UPLOAD_DIR, f"{_check_token(token)}.json")
+
+
+def _write_info(info):
+    with open(_info_path(info["token"]), "w") as f:
+        json.dump(info, f)
+
+
+def upload_info(token):
+    """ :return: {"token", "filename", "size", "sha256", "complete"}; raises ValueError for unknown tokens. """
+    try:
+        with open(_info_path(token)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise ValueError("Upload not found or expired, please upload the file again.")
+
+
+def start_upload(filename):
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    uploads = _remove_expired_uploads()
+    if sum(not info["complete"] for info in uploads) >= UPLOAD_MAX_ACTIVE:
+        raise ValueError("Too many uploads in progress, please try again later.")
+    _check_capacity(uploads)
+    token = uuid.uuid4().hex
+    open(upload_path(token), "wb").close()
+    info = {"token": token, "filename": os.path.basename(filename or "upload"), "size": 0,
+            "sha256": None, "complete": False}
+    _write_info(info)
+    return info
+
+
+def append_chunk(token, offset, stream, final=False):
+    """
+    Appends a request body to an upload. Chunks must arrive in order: `offset` has to equal the bytes
+    received so far, so a client can retry a failed chunk or resume from info["size"].
+    :param stream: File-like object (the request) read in COPY_BUFFER pieces.
+    :return: Updated upload info.
+    """
+    info = upload_info(token)
+    if info["complete"]:
+        # Retry of the final slice after its response was lost: the same bytes end where the upload ends
+        received = sum(len(block) for block in iter(lambda: stream.read(COPY_BUFFER), b""))
+        if final and offset + received == info["size"]:
+            return info
+        raise ValueError("Upload is already complete.")
+    if offset != info["size"]:
+        raise ValueError(f"Expected offset {info['size']}, got {offset}.")
+    _check_capacity(_stored_uploads())
+
+    with open(upload_path(token), "r+b") as f:
+        f.seek(offset)
+        f.truncate()
+        while True:
+            block = stream.read(COPY_BUFFER)
+            if not block:
+                break
+            f.write(block)
+            if f.tell() > UPLOAD_MAX_SIZE:
+                raise ValueError(f"Upload exceeds {UPLOAD_MAX_SIZE // 1024 ** 2} MB.")
+        info["size"] = f.tell()
+
+    if final:
+        info["sha256"] = file_sha256(upload_path(token))
+        info["complete"] = True
+    _write_info(info)
+    if final:
+        _remove_expired_uploads()
+    return info
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(COPY_BUFFER), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def completed_upload_path(info):
+    """ Path of a finished upload from the info dict a callback received. """
+    if not info or not info.get("token"):
+        raise ValueError("No file uploaded.")
+    if not upload_info(info["token"])["complete"]:
+        raise ValueError("Upload is not complete yet.")
+    return upload_path(info["token"])
+
+
+def remove_upload(token):
+    for path in (upload_path(token), _info_path(token)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _stored_uploads():
+    """ Info dicts of the uploads in UPLOAD_DIR, with "age" (seconds since the last write) added. """
+    try:
+        names = os.listdir(UPLOAD_DIR)
+    except OSError:
+        return []
+    uploads = []
+    for name in names:
+        token, extension = os.path.splitext(name)
+        if extension != ".json":
+            continue
+        try:
+            info = upload_info(token)
+            info["age"] = time.time() - os.path.getmtime(upload_path(token))
+        except (OSError, ValueError):
+            continue
+        uploads.append(info)
+    return uploads
+
+
+def _check_capacity(uploads):
+    if sum(info["size"] for info in uploads) >= UPLOAD_DIR_MAX_SIZE:
+        raise ValueError("Upload storage is full, please try again later.")
+
+
+def _remove_expired_uploads():
+    """
+    Removes finished uploads older than UPLOAD_RETENTION, abandoned ones older than UPLOAD_STALE and
+    files without a valid info record.
+    :return: Info dicts of the remaining uploads.
+    """
+    uploads = []
+    for info in _stored_uploads():
+        if info["age"] > (UPLOAD_RETENTION if info["complete"] else UPLOAD_STALE):
+            remove_upload(info["token"])
+        else:
+            uploads.append(info)
+
+    kept = {info["token"] for info in uploads}
+    try:
+        names = os.listdir(UPLOAD_DIR)
+    except OSError:
+        return uploads
+    for name in names:
+        path = os.path.join(UPLOAD_DIR, name)
+        try:
+            if os.path.splitext(name)[0] not in kept and time.time() - os.path.getmtime(path) > UPLOAD_STALE:
+                os.remove(path)
+        except OSError:
+            pass
+    return uploads
+
+
+# ====================== Dash component ======================
+# dcc.Upload only picks the file: its contents stay in the browser and are released right away. The File is
+# taken from the picker's input (or rebuilt from the data URL after a drag and drop) and posted in slices with
+# the CSRF cookie, retrying a failed slice from the offset the server reports. Progress and the final info
+# dict are pushed with set_props.
+_UPLOAD_JS = """
+function(contents, filename) {
+    const setProps = window.dash_clientside.set_props;
+    if (!contents) { return window.dash_clientside.no_update; }
+    const picker = document.getElementById("%(picker_id)s");
+    const input = picker ? picker.querySelector("input[type=file]") : null;
+    const picked = input && input.files.length ? input.files[0] : null;
+    if (input) { input.value = ""; }
+    setProps("%(picker_id)s", {contents: null});
+    const report = (text) => setProps("%(status_id)s", {children: text});
+    (async function() {
+        let file = picked;
+        try {
+            if (!file || file.name !== filename) {
+                file = new File([await (await fetch(contents)).blob()], filename);
+            }
+            const config = await (await fetch("%(url)s", {credentials: "same-origin"})).json();
+            const match = document.cookie.match(/(?:^|;\\s*)csrftoken=([^;]+)/);
+            const csrf = match ? decodeURIComponent(match[1]) : "";
+            let token = "", offset = 0, info = null, failures = 0;
+            do {
+                const end = Math.min(offset + config.chunk_size, file.size);
+                const response = await fetch("%(url)s", {
+                    method: "POST", credentials: "same-origin", body: file.slice(offset, end),
+                    headers: {
+                        "X-CSRFToken": csrf, "X-Upload-Token": token, "X-Upload-Offset": String(offset),
+                        "X-File-Name": encodeURIComponent(file.name), "X-Upload-Final": end >= file.size ? "1" : "0",
+                    },
+                }).catch(() => null);
+                const body = response ? await response.json().catch(() => ({})) : {};
+                if (!response || !response.ok) {
+                    // Network errors retry the slice; offset errors resume from what the server has
+                    if (++failures > 3 || (response && body.size == null)) {
+                        throw new Error(body.error || "network error");
+                    }
+                    if (response) { offset = body.size; }
+                    continue;
+                }
+                failures = 0;
+                token = body.token;
+                offset = body.size;
+                info = body.complete ? body : null;
+                report(`Uploading ${file.name}: ${Math.round(100 * offset / Math.max(file.size, 1))}%%`);
+            } while (!info);
+            report(`Uploaded ${file.name} (${(file.size / 1048576).toFixed(1)} MB)`);
+            setProps("%(store_id)s", {data: info});
+        } catch (error) {
+            report(`Upload of ${filename} failed: ${error.message}`);
+        }
+    })();
+    return window.dash_clientside.no_update;
+}
+"""
+
+
+def streaming_upload(app, component_id, label, accept=None, button_style=None, status_style=None):
+    """
+    Upload button backed by the chunked upload endpoint; registers its clientside callback on `app`.
+    The finished upload's info dict is written to dcc.Store `component_id` ("data").
+    Picker, button and status ids are f"{component_id}-picker", f"{component_id}-button" and
+    f"{component_id}-status".
+    """
+    ids = {
+        "picker_id": f"{component_id}-picker",
+        "status_id": f"{component_id}-status",
+        "store_id": component_id,
+        "url": UPLOAD_URL,
+    }
+    app.clientside_callback(
+        _UPLOAD_JS % ids,
+        Output(f"{component_id}-button", "title"),
+        Input(ids["picker_id"], "contents"),
+        State(ids["picker_id"], "filename"),
+        prevent_initial_call=True,
+    )
+    return html.Div([
+        dcc.Upload(
+            html.Button(label, id=f"{component_id}-button", n_clicks=0, style=button_style),
+            id=ids["picker_id"], accept=accept, multiple=False, max_size=UPLOAD_MAX_SIZE,
+            style={"display": "inline-block"},
+        ),
+        html.Div(id=ids["status_id"], style=status_style or {"marginTop": "5px", "fontSize": "14px"}),
+        dcc.Store(id=component_id),
+    ])
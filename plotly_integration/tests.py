@@ -0,0 +1,1071 @@
+import hashlib
+import importlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import warnings
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from opcua import ua
+
+from plotly_integration.akta.akta_app.akta_data_import import import_parsed_run
+from plotly_integration.akta.akta_app.akta_processing import (
+    decimate_min_max, detect_peaks, integrate_fractions, parse_akta_file, parse_run_events, read_akta_asc,
+    resample_curves, RUN_EVENT_COLUMNS
+)
+from plotly_integration.akta.akta_app.akta_fractions import get_fraction_integrals, get_peaks
+from plotly_integration.akta.akta_app.akta_run_events import get_load_volume, get_phase_bands
+from plotly_integration.akta.opcua_server.historian_ingest import GapTracker, ingest_tag
+from plotly_integration.akta.opcua_server.opcua_history import asof_on_grid, choose_grid_step, iter_history_pages
+from plotly_integration.apps import DASH_APP_MODULES
+from plotly_integration import option_providers, streaming_upload
+from plotly_integration.database.sample_sets import parse_sample_set_date, sample_set_options, update_sample_set
+from plotly_integration.models import (
+    AktaChromatogram, AktaFractionIntegral, AktaPeak, AktaResult, AktaRunEvent, AktaSensorCatalog, HistorianGap,
+    HistorianSample, HistorianTag, Report, SampleMetadata, SampleSet, SampleSetPrefix, VFMetadata, VFTimeSeriesData
+)
+from plotly_integration.sartoflow_smart import sartoflow_tail
+from plotly_integration.sartoflow_smart.overlay import align
+from plotly_integration.sartoflow_smart.sartoflow_loader import iter_sartoflow_chunks, parse_pdat_time, sniff_layout
+from plotly_integration.sartoflow_smart.sartoflow_tail import SartoflowTail
+from plotly_integration.sartoflow_smart.series_query import decimate_series
+from plotly_integration.sartoflow_smart.smoothing import smooth_frame
+from plotly_integration.sartoflow_smart.vf_capacity import (
+    FIT_MIN_POINTS, fit_capacity, grouped_linear_fit, throughput_frame,
+)
+from plotly_integration.sartoflow_smart.vf_flux import clear_flux_cache, derive_flux
+from plotly_integration.utils import get_report_result_ids, get_report_sample_names, set_report_samples
+
+
+class SmoothFrameTests(SimpleTestCase):
+    def setUp(self):
+        # Irregular logging: 1 s steps, then 10 s steps
+        seconds = np.concatenate([np.arange(0, 60, 1.0), np.arange(60, 600, 10.0)])
+        self.df = pd.DataFrame({
+            "process_time": seconds / 3600,
+            "ramp": seconds * 0.5,
+            "constant": np.full(seconds.size, 3.0),
+        })
+
+    def test_none_returns_raw_values(self):
+        smoothed = smooth_frame(self.df, ["ramp"], "process_time", "none", 60)
+        pd.testing.assert_frame_equal(smoothed, self.df[["ramp"]].astype(np.float64))
+
+    def test_short_window_returns_raw_values(self):
+        smoothed = smooth_frame(self.df, ["ramp"], "process_time", "rolling", 5)
+        pd.testing.assert_frame_equal(smoothed, self.df[["ramp"]].astype(np.float64))
+
+    def test_rolling_window_is_process_time(self):
+        smoothed = smooth_frame(self.df, ["ramp"], "process_time", "rolling", 60)
+        self.assertEqual(list(smoothed.index), list(self.df.index))
+        # At 590 s the trailing 60 s hold the samples at 540 .. 590 s
+        self.assertAlmostEqual(smoothed["ramp"].iloc[-1], np.mean(np.arange(540, 600, 10.0)) * 0.5)
+
+    def test_methods_keep_a_constant(self):
+        for method in ("rolling", "ewma", "savgol"):
+            smoothed = smooth_frame(self.df, ["constant"], "process_time", method, 60)
+            np.testing.assert_allclose(smoothed["constant"], 3.0, err_msg=method)
+
+    def test_savgol_keeps_a_line(self):
+        smoothed = smooth_frame(self.df, ["ramp"], "process_time", "savgol", 60)
+        np.testing.assert_allclose(smoothed["ramp"], self.df["ramp"], atol=1e-6)
+
+    def test_rows_without_time_keep_raw_values(self):
+        df = self.df.copy()
+        df.loc[5, "process_time"] = np.nan
+        smoothed = smooth_frame(df, ["ramp"], "process_time", "rolling", 60)
+        self.assertEqual(smoothed.loc[5, "ramp"], df.loc[5, "ramp"])
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            smooth_frame(self.df, ["ramp"], "process_time", "median", 60)
+
+
+AKTA_FILE = os.path.join(settings.BASE_DIR, "plotly_integration", "akta", "test_files", "chromatogram.asc")
+SARTOFLOW_FILE = os.path.join(settings.BASE_DIR, "plotly_integration", "data", "Processed",
+                              "UFDF.20250219SI50E15CHTLoad.csv")
+
+
+def gaussian(ml, apex, width, height):
+    return height * np.exp(-0.5 * ((ml - apex) / width) ** 2)
+
+
+class MigrationTestCase(TransactionTestCase):
+    """ Runs migrate_to on rows created at migrate_from; the schema is brought back to the latest state after. """
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate([("plotly_integration", self.migrate_from)])
+        self.executor.loader.build_graph()
+        self.old_apps = self.executor.loader.project_state([("plotly_integration", self.migrate_from)]).apps
+
+    def migrate(self):
+        self.executor.loader.build_graph()
+        self.executor.migrate([("plotly_integration", self.migrate_to)])
+        self.executor.loader.build_graph()
+        return self.executor.loader.project_state([("plotly_integration", self.migrate_to)]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+class DashAppImportTests(TestCase):
+    def test_every_app_module_imports(self):
+        # ready() imports these in a background thread and only prints failures
+        for module in DASH_APP_MODULES:
+            with self.subTest(module=module):
+                importlib.import_module(module)
+
+
+class SampleSetTests(TestCase):
+    def ingest(self, sample_set_id, name, prefix, sample_type):
+        update_sample_set({"Sample Set Id": sample_set_id, "Sample Set Name": name,
+                           "Sample Prefix": prefix, "Sample Type": sample_type})
+
+    def option_names(self, sample_prefixes=None, sample_type=None):
+        return [option["value"] for option in sample_set_options(sample_prefixes, sample_type)]
+
+    def test_parse_sample_set_date(self):
+        self.assertEqual(parse_sample_set_date("250219_SEC_FB"), date(2025, 2, 19))
+        self.assertIsNone(parse_sample_set_date("SEC_250219"))
+        self.assertIsNone(parse_sample_set_date(None))
+
+    def test_update_sample_set_keeps_type_per_prefix(self):
+        self.ingest(10, "250219_mixed", "FB", 1)
+        self.ingest(10, "250219_mixed", "UP", 2)
+        self.ingest(10, "250219_mixed", "UP", 2)  # Re-ingested injection
+        self.ingest(10, "250219_mixed", "", 1)
+        self.ingest(None, "no set", "FB", 1)
+
+        self.assertEqual(SampleSet.objects.count(), 1)
+        sample_set = SampleSet.objects.get()
+        self.assertEqual(sample_set.sample_set_date, date(2025, 2, 19))
+        self.assertEqual(
+            set(SampleSetPrefix.objects.values_list("sample_prefix", "sample_type")),
+            {("FB", "1"), ("UP", "2"), ("", "1")},
+        )
+
+    def test_options_filter_on_the_same_injection(self):
+        self.ingest(1, "250101_sec", "FB", 1)
+        self.ingest(2, "250102_mixed", "FB", 1)
+        self.ingest(2, "250102_mixed", "UP", 2)
+        self.ingest(3, "250103_proa", "UP", 2)
+
+        self.assertEqual(self.option_names(sample_type="1"), ["250102_mixed", "250101_sec"])
+        self.assertEqual(self.option_names(sample_type="2"), ["250103_proa", "250102_mixed"])
+        self.assertEqual(self.option_names(["FB"], "2"), [])
+        self.assertEqual(self.option_names(["FB", "UP"], "2"), ["250103_proa", "250102_mixed"])
+
+    def test_options_order(self):
+        self.ingest(1, "240601_old", "FB", 1)
+        self.ingest(2, "no_date", "FB", 1)
+        self.ingest(3, "250101_new", "FB", 1)
+        self.ingest(4, "250101_new_rerun", "FB", 1)
+        self.ingest(5, "", "FB", 1)
+
+        self.assertEqual(self.option_names(), ["250101_new_rerun", "250101_new", "240601_old", "no_date"])
+
+
+class ReportSampleTests(TestCase):
+    def setUp(self):
+        for result_id, sample_name in ((101, "FB1"), (102, "FB2"), (103, "UP1")):
+            SampleMetadata.objects.create(result_id=result_id, system_name="Empower", sample_name=sample_name)
+        self.report = Report.objects.create(report_name="report")
+
+    def test_set_report_samples(self):
+        set_report_samples(self.report, ["103", "101", "999"])
+        rows = list(self.report.samples.values_list("position", "result_id", "sample_name",
+                                                    "sample_metadata__result_id"))
+        self.assertEqual(rows, [(0, 103, "UP1", 103), (1, 101, "FB1", 101), (2, 999, None, None)])
+        self.assertEqual(get_report_result_ids(self.report), ["103", "101", "999"])
+        self.assertEqual(get_report_sample_names(self.report), ["UP1", "FB1"])
+
+    def test_set_report_samples_replaces_membership(self):
+        set_report_samples(self.report, [101, 102, 103], ["a", "b", "c"])
+        set_report_samples(self.report, [102], ["b"])
+        self.assertEqual(get_report_result_ids(self.report), ["102"])
+        self.assertEqual(get_report_sample_names(self.report), ["b"])
+
+    def test_reports_without_membership_rows(self):
+        report = Report.objects.create(selected_result_ids="101, 102,", selected_samples="FB1,FB2")
+        self.assertEqual(get_report_result_ids(report), ["101", "102"])
+        self.assertEqual(get_report_sample_names(report), ["FB1", "FB2"])
+
+
+class ReportSampleBackfillTests(MigrationTestCase):
+    migrate_from = "0034_sampleset_samplesetprefix"
+    migrate_to = "0035_reportsample_novareportsample_vicellreportsample"
+
+    def test_backfill(self):
+        SampleMetadataBefore = self.old_apps.get_model("plotly_integration", "SampleMetadata")
+        ReportBefore = self.old_apps.get_model("plotly_integration", "Report")
+        for result_id, sample_name in ((101, "FB1"), (102, "FB2"), (103, "UP1")):
+            SampleMetadataBefore.objects.create(result_id=result_id, system_name="Empower", sample_name=sample_name)
+        by_result_id = ReportBefore.objects.create(selected_result_ids="102,101", selected_samples="FB2,FB1").pk
+        mismatched = ReportBefore.objects.create(selected_result_ids="103,101", selected_samples="UP1").pk
+        by_name = ReportBefore.objects.create(selected_samples="UP1,missing,FB1").pk
+
+        apps = self.migrate()
+        ReportSampleAfter = apps.get_model("plotly_integration", "ReportSample")
+
+        def members(report_id):
+            return list(ReportSampleAfter.objects.filter(report_id=report_id).order_by("position")
+                        .values_list("position", "result_id", "sample_name"))
+
+        self.assertEqual(members(by_result_id), [(0, 102, "FB2"), (1, 101, "FB1")])
+        self.assertEqual(members(mismatched), [(0, 103, "UP1"), (1, 101, "FB1")])
+        self.assertEqual(members(by_name), [(0, 103, "UP1"), (1, 101, "FB1")])
+        self.assertFalse(ReportSampleAfter.objects.filter(sample_metadata__isnull=True).exists())
+
+
+class AktaParsingTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.raw = read_akta_asc(AKTA_FILE)
+        cls.parsed = parse_akta_file(AKTA_FILE)
+
+    def test_run_details(self):
+        self.assertEqual(self.parsed["result_id"], "304b25bb-ba2d-4e7c-a703-e5e6d8a60f79")
+        self.assertEqual(self.parsed["method"], "20250220_CHT_flowthrough_5ml")
+        self.assertEqual(self.parsed["timestamp"], "2025-02-20 19:42:18")
+
+    def test_fraction_integrals(self):
+        fractions = self.parsed["fraction_integrals"]
+        self.assertEqual(list(fractions["fraction"]), ["2.A.3", "2.B.1", "4.A.5"])
+        self.assertFalse(fractions["fraction"].str.contains("Waste").any())
+        self.assertTrue((fractions["uv_area"] > 0).all())
+        self.assertTrue((fractions["end_ml"] > fractions["start_ml"]).all())
+
+    def test_chromatogram_grid(self):
+        chromatogram = self.parsed["chromatogram"]
+        self.assertEqual(chromatogram.columns[0], "ml")
+        self.assertIn("UV 1_280", chromatogram.columns)
+        self.assertNotIn("Fraction", chromatogram.columns)
+        self.assertNotIn("Run Log", chromatogram.columns)
+        np.testing.assert_allclose(np.diff(chromatogram["ml"]), 0.1, atol=1e-9)
+        self.assertAlmostEqual(chromatogram["ml"].iloc[0], self.raw["ml_1"].min(), places=4)
+
+    def test_resample_follows_each_curve_axis(self):
+        resampled = resample_curves(self.raw, interval=0.5, curves=["UV 1_280", "Cond"])
+        self.assertEqual(list(resampled.columns), ["ml", "UV 1_280", "Cond"])
+        self.assertLessEqual(resampled["UV 1_280"].max(), self.raw["UV 1_280"].max() + 1e-3)
+        self.assertGreaterEqual(resampled["Cond"].min(), self.raw["Cond"].min() - 1e-3)
+
+    def test_preserve_peaks_keeps_narrow_spikes(self):
+        ml = np.arange(0, 10, 0.01)
+        uv = np.zeros(ml.size)
+        uv[503] = 100.0  # Between two 0.5 ml grid points
+        df = pd.DataFrame({"ml_1": ml, "UV 1_280": uv})
+        self.assertLess(resample_curves(df, interval=0.5)["UV 1_280"].max(), 1.0)
+        self.assertEqual(resample_curves(df, interval=0.5, preserve_peaks=True)["UV 1_280"].max(), 100.0)
+
+
+class PeakTests(SimpleTestCase):
+    def setUp(self):
+        self.ml = np.arange(0, 100, 0.1)
+        self.uv = gaussian(self.ml, 30, 2, 1000) + gaussian(self.ml, 70, 3, 400)
+
+    def test_detect_peaks(self):
+        peaks = detect_peaks(self.ml, self.uv)
+        self.assertEqual(list(peaks["peak_number"]), [1, 2])
+        np.testing.assert_allclose(peaks["apex_ml"], [30, 70], atol=0.1)
+        np.testing.assert_allclose(peaks["height"], [1000, 400], rtol=1e-3)
+        # Gaussian areas: height · width · √(2π), edges at 1% of the apex cut off a little
+        np.testing.assert_allclose(peaks["area"], [1000 * 2 * np.sqrt(2 * np.pi), 400 * 3 * np.sqrt(2 * np.pi)],
+                                   rtol=0.01)
+
+    def test_shoulder_is_merged(self):
+        uv = gaussian(self.ml, 30, 3, 1000) + gaussian(self.ml, 34, 3, 600)
+        self.assertEqual(len(detect_peaks(self.ml, uv)), 1)
+
+    def test_flat_signal_has_no_peaks(self):
+        self.assertTrue(detect_peaks(self.ml, np.zeros(self.ml.size)).empty)
+
+    def test_integrate_fractions(self):
+        df_fraction = pd.DataFrame({"ml": [20.0, 40.0, 50.0, 60.0], "Fraction": ["1.A.1", "Waste", "1.A.2", "1.A.3"]})
+        fractions, peaks = integrate_fractions(self.ml, self.uv, df_fraction)
+        self.assertEqual(list(fractions["fraction"]), ["1.A.1", "1.A.2", "1.A.3"])
+        self.assertEqual(list(fractions["peak_number"]), [1, None, 2])
+        np.testing.assert_allclose(fractions["volume"], [20, 10, 39.9], atol=1e-9)
+        self.assertGreater(fractions["peak_share"].iloc[0], 0.99)
+        self.assertAlmostEqual(fractions["uv_area"].iloc[2], peaks["area"].iloc[1], delta=peaks["area"].iloc[1] * 0.01)
+
+    def test_fractions_on_the_absolute_axis(self):
+        # Sensor curves start at -injection ml, fractions keep absolute volumes
+        ml = self.ml - 10
+        df_fraction = pd.DataFrame({"ml": [30.0, 50.0], "Fraction": ["1.A.1", "1.A.2"]})
+        fractions, _ = integrate_fractions(ml, self.uv, df_fraction)
+        self.assertEqual(list(fractions["peak_number"]), [1, 2])
+
+
+class FractionIntegralBackfillTests(MigrationTestCase):
+    migrate_from = "0042_backfill_akta_run_events"
+    migrate_to = "0043_backfill_akta_fraction_integrals"
+
+    def test_backfill(self):
+        AktaChromatogramBefore = self.old_apps.get_model("plotly_integration", "AktaChromatogram")
+        AktaFractionBefore = self.old_apps.get_model("plotly_integration", "AktaFraction")
+        AktaPeakBefore = self.old_apps.get_model("plotly_integration", "AktaPeak")
+        AktaSensorCatalogBefore = self.old_apps.get_model("plotly_integration", "AktaSensorCatalog")
+        ml = np.arange(0, 100, 0.1)
+        uv = gaussian(ml, 30, 2, 1000) + gaussian(ml, 70, 3, 400)
+        runs = {"old-run": {"uv_1_280": {}}, "no-uv": {"cond": {}}, "parsed-run": {"uv_1_280": {}}}
+        for result_id, sensors in runs.items():
+            AktaSensorCatalogBefore.objects.create(result_id=result_id, sensors=sensors)
+            AktaChromatogramBefore.objects.bulk_create(
+                AktaChromatogramBefore(result_id=result_id, ml=x, uv_1_280=y) for x, y in zip(ml, uv)
+            )
+            AktaFractionBefore.objects.bulk_create(
+                AktaFractionBefore(result_id=result_id, ml=x, fraction=label)
+                for x, label in ((20.0, "1.A.1"), (50.0, "1.A.2"))
+            )
+        AktaPeakBefore.objects.create(result_id="parsed-run", peak_number=1, start_ml=0, apex_ml=1, end_ml=2)
+
+        apps = self.migrate()
+        AktaPeakAfter = apps.get_model("plotly_integration", "AktaPeak")
+        AktaFractionIntegralAfter = apps.get_model("plotly_integration", "AktaFractionIntegral")
+        self.assertEqual(list(AktaPeakAfter.objects.filter(result_id="old-run").values_list("peak_number", flat=True)),
+                         [1, 2])
+        self.assertEqual(list(AktaFractionIntegralAfter.objects.filter(result_id="old-run")
+                              .values_list("fraction", "peak_number")), [("1.A.1", 1), ("1.A.2", 2)])
+        self.assertEqual(AktaPeakAfter.objects.filter(result_id="parsed-run").get().apex_ml, 1)
+        self.assertFalse(AktaFractionIntegralAfter.objects.exclude(result_id="old-run").exists())
+
+
+class FractionLookupTests(TestCase):
+    def test_lookups_do_not_write(self):
+        AktaChromatogram.objects.create(result_id="run-1", ml=0.0, uv_1_280=1.0)
+        self.assertTrue(get_fraction_integrals("run-1").empty)
+        self.assertTrue(get_peaks("run-1").empty)
+        self.assertFalse(AktaPeak.objects.exists())
+        self.assertFalse(AktaFractionIntegral.objects.exists())
+
+
+class DecimateMinMaxTests(SimpleTestCase):
+    def test_small_input_is_unchanged(self):
+        x = np.arange(100.0)
+        ys = np.column_stack([x, -x])
+        result_x, result_ys = decimate_min_max(x, ys, max_points=2000)
+        self.assertIs(result_x, x)
+        self.assertIs(result_ys, ys)
+
+    def test_extremes_survive(self):
+        x = np.arange(100000.0)
+        ys = np.column_stack([np.sin(x / 1000), np.zeros(x.size)])
+        ys[12345, 1] = 50.0
+        ys[67890, 1] = -50.0
+        result_x, result_ys = decimate_min_max(x, ys, max_points=600)
+        self.assertLess(result_x.size, 2000)
+        self.assertTrue(np.all(np.diff(result_x) > 0))
+        self.assertIn(12345.0, result_x)
+        self.assertIn(67890.0, result_x)
+        self.assertEqual(result_ys[:, 1].max(), 50.0)
+        self.assertEqual(result_ys[:, 1].min(), -50.0)
+
+    def test_nan_buckets(self):
+        x = np.arange(10000.0)
+        ys = np.full((x.size, 1), np.nan)
+        ys[:100, 0] = 1.0
+        result_x, result_ys = decimate_min_max(x, ys, max_points=300)
+        self.assertEqual(result_x[0], 0.0)
+        self.assertEqual(np.nanmax(result_ys), 1.0)
+
+
+RUN_LOG = pd.DataFrame([
+    (0.0, "Method Run 2/20/2025 7:42:18 PM -08:00 Method: CHT_5ml Result: /Results/DN 500 User wboyle"),
+    (0.0, "Batch ID: run-1"),
+    (0.5, "Phase Equilibration (Issued) (Processing) (Completed)"),
+    (1.0, "Block Equilibrate (Issued) (Processing) (Completed)"),
+    (2.0, "Block Inner (Issued) (Processing) (Completed)"),
+    (3.0, "End_Block (Issued) (Processing) (Completed)"),
+    (4.0, "End_Block (Issued) (Processing) (Completed)"),
+    (4.5, "End Phase (Issued) (Processing) (Completed)"),
+    (5.0, "Phase Sample Application (Issued) (Processing) (Completed)"),
+    (6.0, "Block Start frac (Sample Appl) (Issued) (Processing) (Completed)"),
+    (9.0, "End_Block (Issued) (Processing) (Completed)"),
+    (9.5, "Set mark Load done\" (Issued) (Processing) (Completed)\""),
+    (10.0, "End_Block (Issued) (Processing) (Completed)"),
+], columns=["ml", "Run Log"])
+
+
+class RunEventTests(SimpleTestCase):
+    def setUp(self):
+        self.events = parse_run_events(RUN_LOG)
+
+    def test_method_line_details(self):
+        values = self.events.dropna(subset="value").set_index("event_type")["value"]
+        self.assertEqual(values["method"], "CHT_5ml")
+        self.assertEqual(values["result_path"], "/Results/DN 500")
+        self.assertEqual(values["user"], "wboyle")
+        self.assertEqual(values["batch_id"], "run-1")
+        self.assertEqual(values["mark"], "Load done")
+        self.assertTrue((self.events["timestamp"] == "2025-02-20 19:42:18").all())
+        self.assertEqual(list(self.events["sequence"]), list(range(len(self.events))))
+
+    def test_nested_blocks_pair_innermost_first(self):
+        blocks = self.events[self.events["event_type"] == "block_start"].set_index("block_name")
+        self.assertEqual(blocks.at["Inner", "end_ml"], 3.0)
+        self.assertEqual(blocks.at["Equilibrate", "end_ml"], 4.0)
+        self.assertEqual(blocks.at["Start frac (Sample Appl)", "end_ml"], 9.0)
+        ends = self.events[self.events["event_type"] == "block_end"]
+        self.assertEqual(list(ends["block_name"].fillna("")), ["Inner", "Equilibrate", "Start frac (Sample Appl)", ""])
+
+    def test_phases(self):
+        phases = self.events[self.events["event_type"] == "phase_start"]
+        self.assertEqual(list(phases["block_name"]), ["Equilibration", "Sample Application"])
+        self.assertEqual(list(phases["end_ml"].fillna(-1)), [4.5, -1])
+        inner = self.events[self.events["block_name"] == "Inner"]
+        self.assertTrue((inner["phase_name"] == "Equilibration").all())
+        self.assertEqual(self.events.iloc[-1]["phase_name"], "Sample Application")
+
+    def test_empty_log(self):
+        events = parse_run_events(pd.DataFrame(columns=["ml", "Run Log"]))
+        self.assertTrue(events.empty)
+        self.assertEqual(list(events.columns), RUN_EVENT_COLUMNS)
+
+
+class RunEventLookupTests(TestCase):
+    def test_lookups_do_not_write(self):
+        self.assertEqual(get_load_volume("run-1"), (None, None, 0.0))
+        self.assertEqual(get_phase_bands("run-1"), [])
+        self.assertFalse(AktaRunEvent.objects.exists())
+
+    def test_load_volume(self):
+        df_events = parse_run_events(RUN_LOG)
+        AktaRunEvent.objects.bulk_create(
+            AktaRunEvent(result_id="run-1", **record)
+            for record in df_events.astype(object).where(df_events.notna(), None).to_dict("records")
+        )
+        self.assertEqual(get_load_volume("run-1"), (6.0, 9.0, 3.0))
+        self.assertEqual([band["phase"] for band in get_phase_bands("run-1")], ["Equilibration", "Sample Application"])
+
+
+class RunEventBackfillTests(MigrationTestCase):
+    migrate_from = "0041_samplesetprefix_sample_type"
+    migrate_to = "0042_backfill_akta_run_events"
+
+    def test_backfill(self):
+        AktaRunLogBefore = self.old_apps.get_model("plotly_integration", "AktaRunLog")
+        AktaRunEventBefore = self.old_apps.get_model("plotly_integration", "AktaRunEvent")
+        AktaRunLogBefore.objects.bulk_create(
+            AktaRunLogBefore(result_id=result_id, ml=ml, log_text=text)
+            for result_id in ("old-run", "parsed-run") for ml, text in RUN_LOG.itertuples(index=False)
+        )
+        AktaRunEventBefore.objects.create(result_id="parsed-run", sequence=0, event_type="batch_id", value="kept")
+
+        apps = self.migrate()
+        AktaRunEventAfter = apps.get_model("plotly_integration", "AktaRunEvent")
+        self.assertEqual(AktaRunEventAfter.objects.filter(result_id="old-run").count(), len(parse_run_events(RUN_LOG)))
+        self.assertEqual(list(AktaRunEventAfter.objects.filter(result_id="parsed-run").values_list("value", flat=True)),
+                         ["kept"])
+
+
+class AktaImportPolicyTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.parsed = parse_akta_file(AKTA_FILE)
+
+    def test_new_run_is_imported(self):
+        existing = set()
+        message, done = import_parsed_run(self.parsed, existing)
+        result_id = self.parsed["result_id"]
+        self.assertTrue(done, message)
+        self.assertIn(result_id, existing)
+        self.assertTrue(AktaResult.objects.filter(result_id=result_id).exists())
+        self.assertEqual(AktaChromatogram.objects.filter(result_id=result_id).count(), len(self.parsed["chromatogram"]))
+        self.assertEqual(AktaSensorCatalog.objects.filter(result_id=result_id).count(), 1)
+
+    def test_existing_run_is_skipped(self):
+        existing = set()
+        import_parsed_run(self.parsed, existing)
+        AktaChromatogram.objects.filter(result_id=self.parsed["result_id"]).delete()
+
+        message, done = import_parsed_run(self.parsed, existing)
+        self.assertTrue(done)
+        self.assertTrue(message.startswith("⏭️"), message)
+        self.assertFalse(AktaChromatogram.objects.filter(result_id=self.parsed["result_id"]).exists())
+
+    def test_existing_run_is_replaced(self):
+        existing = set()
+        import_parsed_run(self.parsed, existing)
+        result_id = self.parsed["result_id"]
+        rows = AktaChromatogram.objects.filter(result_id=result_id).count()
+
+        message, done = import_parsed_run(self.parsed, existing, on_existing="replace")
+        self.assertTrue(done, message)
+        self.assertEqual(AktaChromatogram.objects.filter(result_id=result_id).count(), rows)
+        self.assertEqual(AktaResult.objects.filter(result_id=result_id).count(), 1)
+        self.assertEqual(AktaSensorCatalog.objects.filter(result_id=result_id).count(), 1)
+
+    def test_run_without_batch_id_is_kept(self):
+        message, done = import_parsed_run({**self.parsed, "result_id": None}, set())
+        self.assertFalse(done)
+        self.assertTrue(message.startswith("❌"), message)
+        self.assertFalse(AktaResult.objects.exists())
+
+
+class FakeHistorian:
+    """ Session pool stand-in serving HistoryRead from a list of (timestamp, value, status) samples. """
+    max_sessions = 1
+
+    def __init__(self, samples, fail_after=None):
+        self.samples = samples
+        self.fail_after = fail_after  # Reads that succeed before the connection drops
+        self.uaclient = self
+        self.reads = []  # [(start, end, offset, release)]
+        self.sessions_borrowed = 0
+
+    @contextmanager
+    def session(self, timeout=None):
+        self.sessions_borrowed += 1
+        yield self
+
+    def history_read(self, params):
+        details, node = params.HistoryReadDetails, params.NodesToRead[0]
+        offset = int(node.ContinuationPoint) if node.ContinuationPoint else 0
+        if self.fail_after is not None and len(self.reads) >= self.fail_after:
+            raise OSError("Connection lost")
+        self.reads.append((details.StartTime, details.EndTime, offset, params.ReleaseContinuationPoints))
+        result = ua.HistoryReadResult()
+        if params.ReleaseContinuationPoints:
+            return [result]
+
+        # Raw reads include both ends of the range
+        window = [sample for sample in self.samples if details.StartTime <= sample[0] <= details.EndTime]
+        data_values = []
+        for timestamp, value, status in window[offset:offset + details.NumValuesPerNode]:
+            data_value = ua.DataValue(ua.Variant(value))
+            data_value.SourceTimestamp = timestamp
+            data_value.StatusCode = ua.StatusCode(status)
+            data_values.append(data_value)
+        result.HistoryData = ua.HistoryData()
+        result.HistoryData.DataValues = data_values
+        if offset + details.NumValuesPerNode < len(window):
+            result.ContinuationPoint = str(offset + details.NumValuesPerNode).encode()
+        return [result]
+
+
+def hourly_samples(start, hours, status=ua.StatusCodes.Good):
+    return [(start + timedelta(hours=hour), float(hour), status) for hour in range(hours + 1)]
+
+
+class HistoryPagingTests(SimpleTestCase):
+    def setUp(self):
+        self.start = datetime(2025, 1, 1)
+        self.end = self.start + timedelta(days=3)
+        self.historian = FakeHistorian(hourly_samples(self.start, 72))
+
+    def test_windows_return_each_sample_once(self):
+        pages = list(iter_history_pages("ns=2;s=Tag", self.start, self.end, page_size=10,
+                                        window=timedelta(days=1), sessions=self.historian))
+        values = np.concatenate([page.values for page in pages])
+        np.testing.assert_array_equal(values, np.arange(73.0))  # Window edges once, the end included
+        self.assertTrue(all(len(page.timestamps) <= 10 for page in pages))
+        self.assertEqual(self.historian.sessions_borrowed, 3)
+
+    def test_continuation_points_are_followed(self):
+        list(iter_history_pages("ns=2;s=Tag", self.start, self.end, page_size=10,
+                                window=timedelta(days=1), sessions=self.historian))
+        first_window = [offset for start, _, offset, _ in self.historian.reads if start == self.start]
+        self.assertEqual(first_window, [0, 10, 20])  # 25 samples incl. the next window's first one
+
+    def test_cancel_releases_the_continuation_point(self):
+        cancel_event = threading.Event()
+        pages = iter_history_pages("ns=2;s=Tag", self.start, self.end, page_size=10,
+                                   window=timedelta(days=1), cancel_event=cancel_event, sessions=self.historian)
+        next(pages)
+        cancel_event.set()
+        self.assertEqual(list(pages), [])
+        self.assertEqual(self.historian.reads[-1][2:], (10, True))
+
+    def test_status_and_non_numeric_values(self):
+        self.historian.samples = [
+            (self.start, "text", ua.StatusCodes.Good),
+            (self.start + timedelta(hours=1), 2.0, ua.StatusCodes.BadSensorFailure),
+        ]
+        page, = iter_history_pages("ns=2;s=Tag", self.start, self.end, sessions=self.historian)
+        self.assertTrue(np.isnan(page.values[0]))
+        self.assertEqual(page.values[1], 2.0)
+        self.assertEqual(list(page.status), [ua.StatusCodes.Good, ua.StatusCodes.BadSensorFailure])
+        self.assertEqual(page.timestamps[1], np.datetime64(self.start + timedelta(hours=1), "ns"))
+
+
+class AsofOnGridTests(SimpleTestCase):
+    def setUp(self):
+        self.grid = np.arange(np.datetime64("2025-01-01T00:00"), np.datetime64("2025-01-01T00:10"),
+                              np.timedelta64(1, "m")).astype("datetime64[ns]")
+
+    def minutes(self, *offsets):
+        return (self.grid[0] + np.array(offsets, dtype="timedelta64[s]")).astype("datetime64[ns]")
+
+    def test_last_value_holds(self):
+        result = asof_on_grid(self.grid, self.minutes(90, 60, 300), np.array([2.0, 1.0, 3.0]))
+        np.testing.assert_array_equal(result, [np.nan, 1, 2, 2, 2, 3, 3, 3, 3, 3])
+
+    def test_sample_on_a_grid_time_counts(self):
+        result = asof_on_grid(self.grid, self.minutes(120), np.array([5.0]))
+        self.assertTrue(np.isnan(result[1]))
+        self.assertEqual(result[2], 5.0)
+
+    def test_tolerance_expires_old_values(self):
+        result = asof_on_grid(self.grid, self.minutes(0, 300), np.array([1.0, 2.0]), tolerance="2min")
+        np.testing.assert_array_equal(result, [1, 1, 1, np.nan, np.nan, 2, 2, 2, np.nan, np.nan])
+
+    def test_no_samples(self):
+        result = asof_on_grid(self.grid, np.empty(0, dtype="datetime64[ns]"), np.empty(0))
+        self.assertTrue(np.isnan(result).all())
+
+    def test_grid_step_is_coarsened(self):
+        start = datetime(2025, 1, 1)
+        self.assertEqual(choose_grid_step(start, start + timedelta(hours=1), "1s"), pd.Timedelta("1s"))
+        self.assertEqual(choose_grid_step(start, start + timedelta(days=30), "1s"), pd.Timedelta("30s"))
+        self.assertEqual(choose_grid_step(start, start + timedelta(hours=1), "3min"), pd.Timedelta("5min"))
+
+
+BAD = ua.StatusCodes.BadSensorFailure
+
+
+class GapTrackerTests(SimpleTestCase):
+    def setUp(self):
+        self.tag = HistorianTag(node_id="ns=2;s=Tag", name="Tag", max_gap_seconds=90)
+        self.start = np.datetime64("2025-01-01T00:00", "ns")
+
+    def seconds(self, *offsets):
+        return self.start + np.array(offsets, dtype="timedelta64[s]")
+
+    def test_status_run_across_pages(self):
+        tracker = GapTracker(self.tag)
+        tracker.add_page(self.seconds(0, 60, 120), np.array([0, BAD, BAD], dtype=np.uint32))
+        open_gap, = tracker.take(self.tag)
+        self.assertIsNone(open_gap.end)
+        self.assertEqual(open_gap.status_name, "BadSensorFailure")
+
+        tracker.add_page(self.seconds(180, 240), np.array([BAD, 0], dtype=np.uint32))
+        gap, = tracker.take(self.tag)
+        self.assertEqual((gap.start, gap.end), (datetime(2025, 1, 1, 0, 1, tzinfo=timezone.utc),
+                                                datetime(2025, 1, 1, 0, 4, tzinfo=timezone.utc)))
+        self.assertEqual(gap.reason, "status")
+
+    def test_silence_across_pages(self):
+        tracker = GapTracker(self.tag)
+        tracker.add_page(self.seconds(0, 60), np.zeros(2, dtype=np.uint32))
+        tracker.add_page(self.seconds(200, 260, 400), np.zeros(3, dtype=np.uint32))
+        gaps = [(gap.start.minute, gap.start.second, gap.end.minute, gap.end.second) for gap in tracker.take(self.tag)]
+        self.assertEqual(gaps, [(1, 0, 3, 20), (4, 20, 6, 40)])
+
+    def test_restored_open_run_continues(self):
+        tracker = GapTracker(self.tag, self.seconds(60)[0], (self.seconds(0)[0], BAD))
+        tracker.add_page(self.seconds(120, 180), np.array([BAD, 0], dtype=np.uint32))
+        gap, = tracker.take(self.tag)
+        self.assertEqual((gap.start.minute, gap.end.minute), (0, 3))
+
+
+class HistorianIngestTests(TestCase):
+    def setUp(self):
+        self.base = datetime(2025, 1, 1)
+        self.now = datetime(2025, 1, 4, tzinfo=timezone.utc)
+        self.tag = HistorianTag.objects.create(node_id="ns=2;s=Tag", name="Tag", backfill_days=3)
+        # Hours 40-55 are bad; the second daily window ends inside that run
+        self.samples = [(timestamp, value, BAD if 40 <= value <= 55 else 0)
+                        for timestamp, value, _ in hourly_samples(self.base, 71)]
+
+    def stored_hours(self):
+        return [timestamp.hour + 24 * (timestamp.day - 1)
+                for timestamp in HistorianSample.objects.filter(tag=self.tag).order_by("timestamp")
+                .values_list("timestamp", flat=True)]
+
+    def test_watermark_resume(self):
+        self.assertEqual(ingest_tag(self.tag, self.now, FakeHistorian(self.samples[:30])), 30)
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.watermark, datetime(2025, 1, 2, 5, tzinfo=timezone.utc))
+
+        self.assertEqual(ingest_tag(self.tag, self.now, FakeHistorian(self.samples)), 42)
+        self.assertEqual(self.stored_hours(), list(range(72)))
+        self.tag.refresh_from_db()
+        self.assertEqual((self.tag.rows_ingested, self.tag.last_status), (72, "ok"))
+
+    def test_open_gap_survives_a_failed_page(self):
+        with self.assertLogs("plotly_integration.akta.opcua_server.historian_ingest", "ERROR"):
+            self.assertEqual(ingest_tag(self.tag, self.now, FakeHistorian(self.samples, fail_after=2)), 48)
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.last_status, "error")
+        open_gap = HistorianGap.objects.get(tag=self.tag)
+        self.assertEqual((open_gap.start, open_gap.end), (datetime(2025, 1, 2, 16, tzinfo=timezone.utc), None))
+
+        self.assertEqual(ingest_tag(self.tag, self.now, FakeHistorian(self.samples)), 24)
+        self.assertEqual(self.stored_hours(), list(range(72)))
+        gap = HistorianGap.objects.get(tag=self.tag)
+        self.assertEqual((gap.start, gap.end, gap.status), (datetime(2025, 1, 2, 16, tzinfo=timezone.utc),
+                                                            datetime(2025, 1, 3, 8, tzinfo=timezone.utc), BAD))
+
+
+class SartoflowLoaderTests(SimpleTestCase):
+    def test_sniff_layout(self):
+        with open(SARTOFLOW_FILE, encoding="utf-8-sig") as f:
+            lines = [f.readline() for _ in range(20)]
+        skip, columns = sniff_layout(lines)
+        self.assertEqual(skip, 4)
+        self.assertEqual(len(columns), 36)
+        self.assertEqual(columns[:3], ["BatchId", "PDatTime", "ProcessTime"])
+
+    def test_sniff_layout_without_data_rows(self):
+        with self.assertRaises(ValueError):
+            sniff_layout(["Sartoflow export\n", "\n"])
+
+    def test_iter_sartoflow_chunks(self):
+        chunks = list(iter_sartoflow_chunks(SARTOFLOW_FILE, chunksize=1000))
+        self.assertEqual([len(chunk) for chunk in chunks], [1000, 1000, 762])
+        df = pd.concat(chunks)
+        self.assertNotIn("wirc2100_value", df.columns)
+        self.assertEqual(df["batch_id"].unique().tolist(), ["UFDF.20250219 SI50E15 CHT Load"])
+        self.assertEqual(df["pdat_time"].iloc[0], pd.Timestamp("2025-02-19 11:47:40"))
+        self.assertTrue(df["pdat_time"].is_monotonic_increasing)
+
+    def test_iter_sartoflow_chunks_fields(self):
+        df = pd.concat(iter_sartoflow_chunks(SARTOFLOW_FILE, fields={"batch_id", "pdat_time", "wir2700"}))
+        self.assertEqual(list(df.columns), ["batch_id", "pdat_time", "wir2700"])
+        self.assertEqual(len(df), 2762)
+
+    def test_pdat_time_uses_the_export_format(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # No "Could not infer format" fallback to dateutil
+            df = pd.concat(iter_sartoflow_chunks(SARTOFLOW_FILE, fields={"batch_id", "pdat_time"}))
+        self.assertEqual(df["pdat_time"].iloc[-1].strftime("%p"), "PM")
+        self.assertEqual(df["pdat_time"].isna().sum(), 0)
+
+    def test_parse_pdat_time_other_layouts(self):
+        parsed = parse_pdat_time(pd.Series(["2/19/2025 1:05:00 PM", "2025-02-19 13:06:00", "n/a"], dtype="string"))
+        self.assertEqual(parsed.iloc[0], pd.Timestamp("2025-02-19 13:05:00"))
+        self.assertEqual(parsed.iloc[1], pd.Timestamp("2025-02-19 13:06:00"))
+        self.assertTrue(pd.isna(parsed.iloc[2]))
+
+
+class SartoflowTailTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "live.csv")
+        with open(SARTOFLOW_FILE, encoding="utf-8-sig") as f:
+            self.lines = f.readlines()
+        open(self.path, "w", encoding="utf-8").close()
+
+        self.inserted = []
+        for patcher in (
+            mock.patch.object(sartoflow_tail, "transaction"),
+            mock.patch.object(sartoflow_tail, "connection"),
+            mock.patch.object(sartoflow_tail, "invalidate_options"),
+            mock.patch.object(sartoflow_tail, "bulk_insert_frame", side_effect=self.insert),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def insert(self, cursor, model, frame, columns, batch_size=None):
+        self.inserted.append(frame.copy())
+        return len(frame)
+
+    def append(self, text):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_poll_growing_file(self):
+        tail = SartoflowTail(self.path, "vf", result_id=12, unit_step=3)
+        with mock.patch.object(SartoflowTail, "update_stored_until", return_value=None):
+            self.assertEqual(tail.poll(), 0)  # Empty file
+
+            self.append("".join(self.lines[:3]))
+            self.assertEqual(tail.poll(), 0)  # Preamble only
+            self.assertIsNone(tail.layout)
+
+            self.append("".join(self.lines[3:104]) + self.lines[104][:20])
+            self.assertEqual(tail.poll(), 100)  # The partial last line waits for the next poll
+
+            self.append(self.lines[104][20:] + "".join(self.lines[105:]))
+            self.assertEqual(tail.poll(), 2662)
+            self.assertEqual(tail.poll(), 0)
+
+        df = pd.concat(self.inserted, ignore_index=True)
+        self.assertEqual(tail.rows, 2762)
+        self.assertEqual(tail.offset, os.path.getsize(self.path))
+        self.assertEqual(set(df.columns), {"batch_id", "pdat_time", "process_time", "f_perm_value", "pir2700",
+                                           "wir2700", "result_id", "unit_step"})
+        self.assertEqual(df["result_id"].unique().tolist(), [12])
+        self.assertEqual(df["unit_step"].unique().tolist(), [3])
+        expected = pd.concat(iter_sartoflow_chunks(SARTOFLOW_FILE))
+        np.testing.assert_array_equal(df["pdat_time"].to_numpy(), expected["pdat_time"].to_numpy())
+
+    def test_restart_skips_stored_rows(self):
+        self.append("".join(self.lines))
+        stored_until = pd.Timestamp("2025-02-19 12:00:00")
+        tail = SartoflowTail(self.path, "ufdf", result_id=12)
+        with mock.patch.object(SartoflowTail, "update_stored_until", return_value=stored_until):
+            inserted = tail.poll()
+        df = pd.concat(self.inserted, ignore_index=True)
+        self.assertEqual(inserted, len(df))
+        self.assertGreater(df["pdat_time"].min(), stored_until)
+        expected = pd.concat(iter_sartoflow_chunks(SARTOFLOW_FILE))
+        self.assertEqual(inserted, (expected["pdat_time"] > stored_until).sum())
+
+    def test_truncated_file(self):
+        self.append("".join(self.lines))
+        tail = SartoflowTail(self.path, "ufdf", result_id=12)
+        with mock.patch.object(SartoflowTail, "update_stored_until", return_value=None):
+            tail.poll()
+        open(self.path, "w", encoding="utf-8").close()
+        with self.assertRaises(ValueError):
+            tail.poll()
+
+
+class VFFluxTests(TestCase):
+    def setUp(self):
+        clear_flux_cache()
+        self.addCleanup(clear_flux_cache)
+        self.experiment = VFMetadata.objects.create(molecule_name="mAb", experiment_name="VF 1", filter_type="0.01")
+        self.add_rows(range(1, 11))
+
+    def add_rows(self, minutes):
+        # 10 g per minute
+        VFTimeSeriesData.objects.bulk_create(
+            VFTimeSeriesData(result_id=self.experiment, unit_step=3, batch_id="VF 1", pdat_time=datetime(2025, 1, 1),
+                             process_time=minute / 60, wir2700=10.0 * minute, pir2700=1.0)
+            for minute in minutes
+        )
+
+    def test_overall_lmh(self):
+        derived = derive_flux(self.experiment.result_id, 3, 0, 0.01)
+        self.assertAlmostEqual(derived.overall_lmh, 60.0, places=3)  # 0.6 L/hr over 0.01 m²
+        np.testing.assert_allclose(derived.flux["L/m²/hr"], 60.0, rtol=1e-4)
+
+    def test_filter_area_without_size(self):
+        for filter_area in (0.0, -1.0):
+            derived = derive_flux(self.experiment.result_id, 3, 0, filter_area)
+            self.assertIsNone(derived.overall_lmh)
+            self.assertNotIn("L/m²/hr", derived.flux.columns)
+
+    def test_appended_rows_are_not_served_from_the_cache(self):
+        self.assertEqual(len(derive_flux(self.experiment.result_id, 3, 0, 0.01).raw), 10)
+        self.add_rows(range(11, 16))
+        self.assertEqual(len(derive_flux(self.experiment.result_id, 3, 0, 0.01).raw), 15)
+
+    def test_unknown_step(self):
+        self.assertIsNone(derive_flux(self.experiment.result_id, 1, 0, 0.01))
+
+
+class DecimateSeriesTests(SimpleTestCase):
+    def test_point_budget_covers_all_traces(self):
+        x = np.arange(200000.0)
+        for traces in (1, 3, 8):
+            ys = pd.DataFrame({f"trace {i}": np.sin(x / (1000 + i)) for i in range(traces)})
+            result_x, result_ys = decimate_series(x, ys, max_points=2000)
+            self.assertLessEqual(len(result_x), 2000, traces)
+            self.assertEqual(list(result_ys.columns), list(ys.columns))
+            self.assertTrue(np.all(np.diff(result_x) > 0))
+
+    def test_spikes_survive_in_every_trace(self):
+        x = np.arange(100000.0)
+        ys = pd.DataFrame({"tmp": np.zeros(x.size), "pir2700": np.ones(x.size)})
+        ys.loc[31415, "tmp"] = 9.0
+        ys.loc[27182, "pir2700"] = -9.0
+        _, result_ys = decimate_series(x, ys, max_points=500)
+        self.assertEqual(result_ys["tmp"].max(), 9.0)
+        self.assertEqual(result_ys["pir2700"].min(), -9.0)
+
+
+class StreamingUploadTests(SimpleTestCase):
+    def setUp(self):
+        upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(upload_dir.cleanup)
+        patcher = mock.patch.object(streaming_upload, "UPLOAD_DIR", upload_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.token = streaming_upload.start_upload("run.csv")["token"]
+
+    def append(self, offset, data, final=False):
+        return streaming_upload.append_chunk(self.token, offset, io.BytesIO(data), final)
+
+    def test_chunks_in_order(self):
+        self.assertEqual(self.append(0, b"abc")["size"], 3)
+        info = self.append(3, b"def", final=True)
+        self.assertTrue(info["complete"])
+        self.assertEqual(info["sha256"], hashlib.sha256(b"abcdef").hexdigest())
+        with open(streaming_upload.completed_upload_path(info), "rb") as f:
+            self.assertEqual(f.read(), b"abcdef")
+
+    def test_offset_mismatch(self):
+        self.append(0, b"abc")
+        with self.assertRaisesRegex(ValueError, "Expected offset 3, got 1"):
+            self.append(1, b"def")
+        with self.assertRaises(ValueError):
+            streaming_upload.completed_upload_path({"token": self.token})
+
+    def test_retried_chunk_replaces_a_partial_write(self):
+        self.append(0, b"abc")
+        with open(streaming_upload.upload_path(self.token), "ab") as f:
+            f.write(b"partial")  # Bytes of a request that failed before its info was written
+        self.append(3, b"def", final=True)
+        with open(streaming_upload.upload_path(self.token), "rb") as f:
+            self.assertEqual(f.read(), b"abcdef")
+
+    def test_retried_final_slice(self):
+        self.append(0, b"abc")
+        info = self.append(3, b"def", final=True)
+        self.assertEqual(self.append(3, b"def", final=True), info)  # The response to the first try was lost
+
+    def test_already_complete(self):
+        self.append(0, b"abc", final=True)
+        with self.assertRaisesRegex(ValueError, "already complete"):
+            self.append(3, b"def")
+        with self.assertRaisesRegex(ValueError, "already complete"):
+            self.append(0, b"abcdef", final=True)
+
+    def test_invalid_token(self):
+        with self.assertRaises(ValueError):
+            streaming_upload.append_chunk("../settings", 0, io.BytesIO(b""))
+
+
+class OptionProviderTests(SimpleTestCase):
+    def setUp(self):
+        self.loads = 0
+        self.now = 1000.0
+        patcher = mock.patch.object(option_providers.time, "monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def loader(self):
+        self.loads += 1
+        return [{"label": f"load {self.loads}", "value": self.loads}]
+
+    def test_options_are_reused_within_the_ttl(self):
+        provider = option_providers.OptionProvider("test", self.loader, ttl=60)
+        self.assertEqual(provider.get(), [{"label": "load 1", "value": 1}])
+        self.now += 60
+        self.assertEqual(provider.get()[0]["value"], 1)
+        self.now += 1
+        self.assertEqual(provider.get()[0]["value"], 2)
+        self.assertEqual(self.loads, 2)
+
+    def test_invalidate_reloads_on_next_use(self):
+        provider = option_providers.OptionProvider("test", self.loader, ttl=60)
+        provider.get()
+        provider.invalidate()
+        self.assertEqual(self.loads, 1)  # Nothing is loaded until the options are asked for again
+        self.assertEqual(provider.get()[0]["value"], 2)
+
+    def test_registry(self):
+        self.addCleanup(option_providers._providers.pop, "test_options", None)
+        option_providers.option_provider("test_options")(self.loader)
+        self.assertEqual(option_providers.get_options("test_options")[0]["value"], 1)
+        option_providers.invalidate_options("test_options", "unknown_options")
+        self.assertEqual(option_providers.get_options("test_options")[0]["value"], 2)
+        option_providers.invalidate_options()
+        self.assertEqual(option_providers.get_options("test_options")[0]["value"], 3)
+
+
+class CapacityFitTests(SimpleTestCase):
+    def test_grouped_linear_fit(self):
+        x = np.tile(np.arange(20.0), 3)
+        codes = np.repeat([0, 1, 2], 20)
+        y = np.concatenate([2 * x[:20] + 1, -0.5 * x[:20] + 4, np.zeros(20)])
+        keep = (codes != 2) | (x < FIT_MIN_POINTS - 1)  # Too few points in group 2
+        points, slope, intercept, r_squared = grouped_linear_fit(codes[keep], x[keep], y[keep], 3)
+        self.assertEqual(list(points), [20, 20, FIT_MIN_POINTS - 1])
+        np.testing.assert_allclose(slope[:2], [2, -0.5])
+        np.testing.assert_allclose(intercept[:2], [1, 4])
+        np.testing.assert_allclose(r_squared[:2], [1, 1])
+        self.assertTrue(np.isnan([slope[2], intercept[2], r_squared[2]]).all())
+
+    def test_fit_capacity(self):
+        # Standard blocking: V = q0·t / (1 + q0·t / vmax); pressure logged on other rows than weight
+        area, vmax, q0 = 0.001, 500.0, 200.0
+        t = np.arange(0, 4, 10 / 3600)
+        volume = q0 * t / (1 + q0 * t / vmax)
+        df = pd.DataFrame({
+            "result_id": 1,
+            "process_time": t,
+            "wir2700": 3 + volume * area * 1000,
+            "pir2700": 2.0 / (1 - volume / (1.6 * vmax)) ** 2,
+        })
+        df.loc[df.index % 2 == 0, "pir2700"] = np.nan
+        df.loc[df.index % 2 == 1, "wir2700"] = np.nan
+
+        fits = fit_capacity(throughput_frame(df, {1: area})).set_index("fit_model")
+        self.assertAlmostEqual(fits.at["vmax", "capacity"], vmax, delta=1)
+        self.assertAlmostEqual(fits.at["vmax", "initial_flux"], q0, delta=1)
+        self.assertGreater(fits.at["vmax", "r_squared"], 0.999)
+        self.assertTrue(np.isnan(fits.at["cake", "capacity"]))
+        self.assertAlmostEqual(fits.at["pmax", "capacity"], 1.6 * vmax, delta=5)
+
+    def test_experiments_without_area_are_left_out(self):
+        df = pd.DataFrame({"result_id": [1, 1], "process_time": [0.0, 1.0], "wir2700": [0.0, 10.0],
+                           "pir2700": [1.0, 1.0]})
+        self.assertTrue(throughput_frame(df, {}).empty)
+        self.assertTrue(fit_capacity(throughput_frame(df, {})).empty)
+
+
+class OverlayAlignTests(SimpleTestCase):
+    def setUp(self):
+        # Two experiments logged every 10 s for an hour at 1 and 2 g/s; weight logged on every other row only
+        hours = np.arange(0, 1, 10 / 3600)
+        frames = []
+        for result_id, rate in ((1, 1.0), (2, 2.0)):
+            weight = 5 + rate * hours * 3600
+            weight[1::2] = np.nan
+            frames.append(pd.DataFrame({"result_id": result_id, "process_time": 10 + hours, "wir2700": weight}))
+        self.df = pd.concat(frames, ignore_index=True)
+        self.info = {
+            1: {"name": "A", "area": 0.1, "load_concentration": 10.0, "reservoir_mass": np.nan},
+            2: {"name": "B", "area": 0.2, "load_concentration": np.nan, "reservoir_mass": np.nan},
+        }
+
+    def test_time(self):
+        df, notes = align(self.df.copy(), self.info, "time")
+        self.assertEqual(notes, [])
+        self.assertEqual(len(df), len(self.df))
+        self.assertEqual(df.groupby("result_id")["x"].min().tolist(), [0, 0])
+
+    def test_flux_on_sparse_weight(self):
+        df, _ = align(self.df.copy(), self.info, "time", window_seconds=60)
+        flux = df[df["x"] > 0.05].groupby("result_id")["flux"]
+        # 3.6 kg/h over 0.1 m² and 7.2 kg/h over 0.2 m²: 36 LMH, within one logging step of the window
+        np.testing.assert_allclose(flux.median(), [36, 36], rtol=0.2)
+        self.assertEqual(flux.count().tolist(), flux.size().tolist())
+
+    def test_volume_and_mass(self):
+        df, _ = align(self.df.copy(), self.info, "volume")
+        np.testing.assert_allclose(df.groupby("result_id")["x"].max(), [35.7, 35.7], rtol=0.01)
+
+        df, notes = align(self.df.copy(), self.info, "mass")
+        self.assertEqual(df["result_id"].unique().tolist(), [1])
+        self.assertEqual(len(notes), 1)
+        self.assertTrue(notes[0].startswith("B:"))
+
+    def test_diavolume(self):
+        hours = np.arange(0, 2, 10 / 3600)
+        fill = np.where(hours < 1, 0.0, (hours - 1) * 3600)  # Buffer pump starts after an hour
+        df = pd.DataFrame({"result_id": 1, "process_time": hours, "wir2700": hours * 3600, "p3000_t": fill})
+        df.loc[df.index % 3 != 0, "p3000_t"] = np.nan
+        info = {1: {"name": "A", "area": 0.1, "load_concentration": 10.0, "reservoir_mass": 360.0}}
+        aligned, notes = align(df, info, "diavolume")
+        self.assertEqual(notes, [])
+        # The totalizer is logged every 30 s: the first logged value above DF_START_FILL is at 1 h 30 s
+        self.assertAlmostEqual(aligned["process_time"].min(), 1 + 30 / 3600)
+        self.assertAlmostEqual(aligned["x"].iloc[0], 0)
+        self.assertAlmostEqual(aligned["x"].max(), (hours[-1] * 3600 - 3630) / 360)
+
+    def test_unknown_alignment(self):
+        with self.assertRaises(ValueError):
+            align(self.df.copy(), self.info, "weight")
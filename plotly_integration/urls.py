@@ -9,5 +9,6 @@ urlpatterns = [
     # path('plotly_dash/', views.plotly_dash_view, name='plotly_dash_view'),
     path('time-series/', views.plot_time_series, name='plot_time_series'),
     path('dash/', views.dashboard, name='dashboard'),
+    path('uploads/', views.upload_chunk, name='upload_chunk'),
     path('dash-app/', include('django_plotly_dash.urls')),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -1,9 +1,93 @@
-import pandas as pd
-from django.db import transaction
-from plotly_integration.models import Report, SampleMetadata  # Adjust based on your app
+from itertools import islice
+
+from django.db import connection, transaction
+from plotly_integration.models import Report, ReportSample, SampleMetadata  # Adjust based on your app
+
+INSERT_CHUNK_SIZE = 5000  # Rows per executemany call
+
+
+def split_ids(value):
+    """ Splits a legacy comma-separated id/name field into a clean list. """
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def set_report_samples(report, result_ids, sample_names=None):
+    """
+    Replaces the ordered membership rows of an Empower `Report`.
+    `result_ids` and `sample_names` are parallel lists in report order.
+    """
+    result_ids = [int(result_id) for result_id in result_ids]
+
+    # ✅ Resolve all metadata rows in one query
+    metadata = {
+        result_id: (metadata_id, sample_name)
+        for metadata_id, result_id, sample_name in SampleMetadata.objects.filter(result_id__in=result_ids)
+        .order_by("-id").values_list("id", "result_id", "sample_name")
+    }
+    if sample_names is None:
+        sample_names = [metadata.get(result_id, (None, None))[1] for result_id in result_ids]
+
+    with transaction.atomic():
+        ReportSample.objects.filter(report=report).delete()
+        ReportSample.objects.bulk_create([
+            ReportSample(
+                report=report,
+                sample_metadata_id=metadata.get(result_id, (None, None))[0],
+                result_id=result_id,
+                sample_name=sample_name,
+                position=position,
+            )
+            for position, (result_id, sample_name) in enumerate(zip(result_ids, sample_names))
+        ])
+
+
+def get_report_result_ids(report):
+    """ Returns the report's result IDs (as strings) in report order. """
+    result_ids = list(report.samples.values_list("result_id", flat=True))
+    if result_ids:
+        return [str(result_id) for result_id in result_ids]
+    return split_ids(report.selected_result_ids)  # Reports saved before the membership table
+
+
+def get_report_sample_names(report):
+    """ Returns the report's sample names in report order. """
+    sample_names = [name for name in report.samples.values_list("sample_name", flat=True) if name]
+    if sample_names:
+        return sample_names
+    return split_ids(report.selected_samples)
+
+
+def set_cell_culture_report_samples(report, sample_ids):
+    """
+    Replaces the ordered membership rows of a `NovaReport` or `ViCellReport`.
+    `sample_ids` are primary keys of the report's data model.
+    """
+    membership_model = report.samples.model
+    with transaction.atomic():
+        membership_model.objects.filter(report=report).delete()
+        membership_model.objects.bulk_create([
+            membership_model(report=report, sample_id=int(sample_id), position=position)
+            for position, sample_id in enumerate(sample_ids)
+        ])
+
+
+def get_cell_culture_report_sample_ids(report):
+    """ Returns the data-row IDs of a `NovaReport` or `ViCellReport` in report order. """
+    sample_ids = list(report.samples.values_list("sample_id", flat=True))
+    if sample_ids:
+        return sample_ids
+    return split_ids(report.selected_result_ids)
+
 
 def convert_selected_samples_to_result_ids():
-    reports = Report.objects.all()
+    reports = list(Report.objects.all())
+
+    # ✅ Resolve every sample name in a single query instead of one lookup per name
+    all_sample_names = {name for report in reports for name in split_ids(report.selected_samples)}
+    result_ids_by_name = {}
+    for sample_name, result_id in SampleMetadata.objects.filter(sample_name__in=all_sample_names) \
+            .order_by("id").values_list("sample_name", "result_id"):
+        result_ids_by_name.setdefault(sample_name, result_id)
 
     with transaction.atomic():  # Ensures all updates are committed together
         for report in reports:
@@ -11,32 +95,54 @@ def convert_selected_samples_to_result_ids():
                 print(f"Skipping report '{report.report_name}' (No selected samples)")
                 continue
 
-            # Extract sample names from the report (assuming comma-separated format)
-            sample_names = report.selected_samples.split(",")
-
-            # Fetch corresponding result IDs
-            data = []
-            for sample_name in sample_names:
-                sample_metadata = SampleMetadata.objects.filter(sample_name=sample_name).first()
-                if sample_metadata:
-                    data.append((sample_name, str(sample_metadata.result_id)))
+            # ✅ Sort by sample name
+            data = sorted(
+                (sample_name, result_ids_by_name[sample_name])
+                for sample_name in split_ids(report.selected_samples)
+                if sample_name in result_ids_by_name
+            )
 
             if not data:
                 print(f"Skipping report '{report.report_name}' (No matching result IDs)")
                 continue
 
-            # ✅ Convert to DataFrame and sort by sample name
-            df = pd.DataFrame(data, columns=["sample_name", "result_id"])
-            df = df.sort_values(by="sample_name", ascending=True)
-
-            # ✅ Extract sorted lists
-            sorted_result_ids = df["result_id"].tolist()
+            sorted_samples = [sample_name for sample_name, _ in data]
+            sorted_result_ids = [str(result_id) for _, result_id in data]
             result_ids_str = ",".join(sorted_result_ids)
 
             # ✅ Use `update()` for bulk efficiency
             Report.objects.filter(report_id=report.report_id).update(selected_result_ids=result_ids_str)
+            set_report_samples(report, sorted_result_ids, sorted_samples)
 
             print(f"✅ Updated report '{report.report_name}' → Selected Result IDs: {result_ids_str}")
 
-# Run the function
-convert_selected_samples_to_result_ids()
+
+def bulk_insert_frame(cursor, model, df, fields, chunk_size=INSERT_CHUNK_SIZE):
+    """
+    Inserts a DataFrame with executemany in fixed-size chunks, streaming rows from itertuples().
+    :param model: Django model whose table receives the rows.
+    :param df: DataFrame whose columns are already in `fields` order.
+    :param fields: Model field names matching the DataFrame columns.
+    :return: Number of rows inserted.
+    """
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(model._meta.get_field(field).column) for field in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    sql = f"INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})"
+
+    # NaN → NULL; astype(object) also turns float32 values into plain Python floats for the driver
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+    inserted = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        cursor.executemany(sql, chunk)
+        inserted += len(chunk)
+    return inserted
+
+
+if __name__ == "__main__":
+    # Run the function
+    convert_selected_samples_to_result_ids()
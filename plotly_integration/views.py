@@ -1,6 +1,14 @@
+from urllib.parse import unquote
+
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_http_methods
+
 from .forms import ReportSelectionForm
 from .models import Report, SampleMetadata, TimeSeriesData
+from .utils import get_report_sample_names
+from .streaming_upload import UPLOAD_CHUNK_SIZE, append_chunk, start_upload, upload_info
 import plotly.graph_objects as go
 import pandas as pd
 
@@ -17,8 +25,7 @@ def plot_time_series(request):
             report = Report.objects.filter(report_name=report_name).first()
             if report:
                 project_id = report.project_id
-                selected_samples = report.selected_samples
-                sample_list = selected_samples.split(",")
+                sample_list = get_report_sample_names(report)
     else:
         form = ReportSelectionForm()
 
@@ -71,4 +78,31 @@ def home(request):
     return render(request, 'dashboard.html')
 
 def dashboard(request):
-    return render(request, 'dashboard.html')
\ No newline at end of file
+    return render(request, 'dashboard.html')
+
+
+@ensure_csrf_cookie
+@require_http_methods(["GET", "POST"])
+def upload_chunk(request):
+    """
+    Chunked upload endpoint used by streaming_upload.
+    GET: upload settings (and the CSRF cookie). POST: raw body appended at X-Upload-Offset to the upload
+    X-Upload-Token (a new one when empty); X-Upload-Final: 1 completes it and adds the SHA-256.
+    """
+    if request.method == "GET":
+        return JsonResponse({"chunk_size": UPLOAD_CHUNK_SIZE})
+
+    token = request.headers.get("X-Upload-Token")
+    try:
+        info = upload_info(token) if token else start_upload(unquote(request.headers.get("X-File-Name", "")))
+        # Read from the request stream, not request.body, so the chunk is never held in memory whole
+        info = append_chunk(info["token"], int(request.headers.get("X-Upload-Offset", 0)), request,
+                            final=request.headers.get("X-Upload-Final") == "1")
+    except ValueError as e:
+        # Bytes already stored, so the client can resume from there
+        try:
+            received = upload_info(token)["size"] if token else None
+        except ValueError:
+            received = None
+        return JsonResponse({"error": str(e), "size": received}, status=400)
+    return JsonResponse(info)
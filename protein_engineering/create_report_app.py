@@ -1,7 +1,9 @@
 import pytz
 from dash import dcc, html, Input, Output, State, dash_table
 from django_plotly_dash import DjangoDash
+from plotly_integration.database.sample_sets import sample_set_options
 from plotly_integration.models import SampleMetadata, Report
+from plotly_integration.utils import set_report_samples
 from datetime import datetime
 import re
 import pandas as pd
@@ -399,29 +401,8 @@ def update_table(sample_types, sample_set_names, selected_columns, analysis_type
     Input("analysis_type_filter", "value")
 )
 def update_sample_set_options(sample_types, analysis_type):
-    query = SampleMetadata.objects.all()
-    if analysis_type:  # ✅ Filter based on selected analysis type
-        query = query.filter(sample_type=analysis_type)
-    if sample_types:
-        query = query.filter(sample_prefix__in=sample_types)
-
-    sample_set_names = list(query.values_list("sample_set_name", flat=True).distinct())
-
-    # Extract the date prefix (YYMMDD) and convert to datetime for sorting
-    def extract_date(sample_set):
-        if not sample_set:  # ✅ Handle None values
-            return datetime.min  # Assign the earliest possible date
-
-        try:
-            date_part = sample_set[:6]  # ✅ Safe slicing
-            return datetime.strptime(date_part, "%y%m%d")  # Convert to YYYY-MM-DD format
-        except ValueError:
-            return datetime.min  # Assign the earliest date if invalid format
-
-    # Sort sample sets by extracted date in descending order (most recent first)
-    sample_set_names_sorted = sorted(sample_set_names, key=extract_date, reverse=True)
-
-    return [{"label": name, "value": name} for name in sample_set_names_sorted if name]
+    # ✅ Read from the indexed sample_set dimension (maintained at ingest), already in date order
+    return sample_set_options(sample_types, analysis_type)
 
 
 # Select All Button
@@ -540,7 +521,7 @@ def submit_report(n_clicks, analysis_type, report_name, project_id, new_project_
 
         # Store report with timestamp
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        Report.objects.create(
+        report = Report.objects.create(
             report_name=report_name,
             project_id=final_project_id,
             user_id=final_user_id,
@@ -551,6 +532,7 @@ def submit_report(n_clicks, analysis_type, report_name, project_id, new_project_
             analysis_type=analysis_type,
             department=2
         )
+        set_report_samples(report, sorted_result_ids, sorted_samples)
 
         return f"Report '{report_name}' created successfully with {len(sorted_samples)} samples."
 